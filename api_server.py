@@ -0,0 +1,224 @@
+"""
+HTTP API for the analysis pipeline.
+
+Lets other tools request hotspot matrices without going through the
+Streamlit UI. Analyses run as "analysis" jobs on the shared job queue (the
+same SQLite table the UI uses), which gives the API two properties:
+
+- Identical requests (same domain, years, paper/keyword limits and
+  pipeline settings) are coalesced: while one is queued or running, later
+  submissions join that job instead of starting another computation.
+- A successful job is the cached result of every identical request for
+  RESULT_TTL_SECONDS, whether it was started from the API or from the UI.
+
+Endpoints:
+    POST /analyses                          submit (or join) an analysis
+    GET  /analyses/{job_id}                 status, progress and log
+    GET  /analyses/{job_id}/matrix          co-occurrence matrix (JSON, sparse entries)
+    GET  /analyses/{job_id}/exports/{name}  NPZ / Parquet / CSV / metadata files
+
+Run (from the repository root):
+    LLM_API_KEY=sk-... uvicorn api_server:api --port 8000
+
+The LLM API key is read from the X-LLM-API-Key header, falling back to the
+LLM_API_KEY environment variable; requests with an offline
+extraction_backend need none. The server's LLM_API_KEY is only ever sent to
+DEFAULT_ENDPOINT: requests naming another endpoint must bring their own key.
+The "local_llm" backend always uses the server's $LOCAL_LLM_MODEL. With
+llm_pool (the default), requests are also spread over the backends
+configured in llm_backends.json (see llm_pool.py). Requires fastapi and
+uvicorn.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Literal
+
+from fastapi import FastAPI, Header, HTTPException
+from fastapi.responses import FileResponse
+from pydantic import BaseModel, Field, model_validator
+
+import app as pipeline
+from job_queue import ACTIVE_STATES, JOB_QUEUED, JOB_SUCCEEDED, get_job_queue
+from llm_scheduler import TokenBudget
+from result_exports import EXPORT_FORMATS, export_path, matrix_entries
+
+
+DEFAULT_ENDPOINT = pipeline.DEFAULT_ENDPOINT
+
+# A successful job answers identical requests for this long
+RESULT_TTL_SECONDS = 24 * 3600
+
+# How many recent analysis jobs are searched for a matching request
+MATCH_SCAN_LIMIT = 200
+
+# Parameters that do not change the result and are ignored when matching requests
+_NON_IDENTIFYING_PARAMS = {"max_concurrency", "hedge_requests", "llm_pool", "journals_by_domain"}
+
+
+class AnalysisRequest(BaseModel):
+    """
+    Parameters of one analysis (same fields and defaults as the UI sidebar).
+    """
+    domain: str = Field(min_length=1)
+    start_year: int = Field(ge=1900, le=2100)
+    end_year: int = Field(ge=1900, le=2100)
+    max_papers: int = Field(100, ge=1, le=5000)
+    sampling: Literal["none", "year_journal", "year_journal_citations"] = "none"
+    sampling_pool_factor: int = Field(5, ge=2, le=10)
+    query_partition: Literal["none", "year", "quarter"] = "none"
+    max_keywords: int = Field(20, ge=2, le=200)
+    early_stop: bool = False
+    early_stop_tolerance: float = Field(0.1, ge=0.0, le=0.5)
+    use_journal_filter: bool = True
+    paper_source: Literal["openalex", "local"] = "openalex"
+    deduplicate: bool = True
+    merge_similar_keywords: bool = False
+    extraction_backend: Literal["remote", "local_llm", "statistical"] = "remote"
+    embedding_backend: Literal["hashed", "minilm"] = "hashed"
+    max_concurrency: int = Field(8, ge=1, le=16)
+    hedge_requests: bool = True
+    llm_pool: bool = True
+    extraction_priority: Literal["citations", "recency", "original"] = "citations"
+    token_budget: TokenBudget = Field(default_factory=TokenBudget)
+    endpoint: str = DEFAULT_ENDPOINT
+
+    @model_validator(mode="after")
+    def _check_limits(self):
+        if self.start_year > self.end_year:
+            raise ValueError("start_year must not be after end_year")
+        if self.max_papers > 1000 and self.extraction_backend != "statistical":
+            raise ValueError("max_papers above 1000 requires extraction_backend 'statistical'")
+        return self
+
+
+def request_key(params: dict) -> str:
+    """
+    Identify an analysis request by the parameters that determine its result.
+
+    Args:
+        params: Job parameters (from the API or the UI)
+
+    Returns:
+        Hex digest; equal for requests that produce the same result
+    """
+    identifying = {key: value for key, value in params.items() if key not in _NON_IDENTIFYING_PARAMS}
+    identifying["domain"] = identifying["domain"].strip().lower()
+    payload = json.dumps(identifying, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+# Makes "find a matching job, else submit" atomic within this process
+_submit_lock = threading.Lock()
+
+
+def _find_matching_job(key: str) -> dict:
+    """Most recent active job, or fresh successful job, with the same request key."""
+    now = time.time()
+    for job in get_job_queue().list_jobs(kind="analysis", limit=MATCH_SCAN_LIMIT):
+        fresh = job["status"] == JOB_SUCCEEDED and now - job["updated_at"] <= RESULT_TTL_SECONDS
+        if (job["status"] in ACTIVE_STATES or fresh) and request_key(job["params"]) == key:
+            return job
+    return None
+
+
+def submit_analysis(params: dict, api_key: str) -> tuple[str, str, str]:
+    """
+    Submit an analysis, or join an identical one that is running or finished.
+
+    Args:
+        params: Job parameters
+        api_key: LLM API key (used only if a new job is started)
+
+    Returns:
+        Tuple of (job ID, job status, how the job was obtained: "submitted",
+        "coalesced" or "cached")
+    """
+    key = request_key(params)
+    with _submit_lock:
+        job = _find_matching_job(key)
+        if job is not None:
+            return job["id"], job["status"], "cached" if job["status"] == JOB_SUCCEEDED else "coalesced"
+        job_id = get_job_queue().submit("analysis", params, pipeline.run_analysis, api_key)
+        return job_id, JOB_QUEUED, "submitted"
+
+
+def _get_analysis_job(job_id: str) -> dict:
+    job = get_job_queue().get(job_id)
+    if job is None or job["kind"] != "analysis":
+        raise HTTPException(status_code=404, detail=f"Unknown analysis {job_id}")
+    return job
+
+
+def _finished_result(job: dict) -> dict:
+    if job["status"] != JOB_SUCCEEDED:
+        raise HTTPException(status_code=409, detail=f"Analysis is {job['status']}, no result available")
+    return job["result"]
+
+
+api = FastAPI(title="Research Hotspot Analysis API")
+
+
+@api.post("/analyses", status_code=202)
+def create_analysis(request: AnalysisRequest, x_llm_api_key: str = Header(None)) -> dict:
+    """Submit an analysis; identical requests share one job."""
+    if not x_llm_api_key and request.endpoint.rstrip("/") != DEFAULT_ENDPOINT:
+        # Never forward the server's key to an endpoint chosen by the caller
+        raise HTTPException(status_code=403, detail="A custom endpoint requires your own key (X-LLM-API-Key header)")
+    api_key = x_llm_api_key or os.getenv("LLM_API_KEY", "")
+    has_api_key = pipeline.validate_api_key(api_key)
+    if not has_api_key and request.extraction_backend == "remote":
+        raise HTTPException(status_code=401, detail="LLM API key required (X-LLM-API-Key header or LLM_API_KEY)")
+    params = request.model_dump()
+    params["domain"] = params["domain"].strip()
+    if not has_api_key:
+        # Offline extraction without a key: no LLM journal identification, as in the UI
+        params["use_journal_filter"] = False
+    job_id, status, source = submit_analysis(params, api_key)
+    return {"job_id": job_id, "status": status, "source": source, "status_url": f"/analyses/{job_id}"}
+
+
+@api.get("/analyses/{job_id}")
+def get_analysis(job_id: str) -> dict:
+    """Status, progress, log and (for failures) the error of an analysis."""
+    job = _get_analysis_job(job_id)
+    job.pop("result", None)
+    job.pop("owner_pid", None)
+    return job
+
+
+@api.get("/analyses/{job_id}/matrix")
+def get_matrix(job_id: str) -> dict:
+    """
+    Co-occurrence matrix and keyword statistics of a finished analysis.
+
+    The symmetric matrix is returned as its non-zero upper-triangle entries:
+    keywords[rows[i]] and keywords[cols[i]] co-occur in weights[i] papers.
+    """
+    result = _finished_result(_get_analysis_job(job_id))
+    rows, cols, weights = matrix_entries(result["matrix"])
+    return {
+        "keywords": result["matrix"]["keywords"],
+        "rows": rows.tolist(),
+        "cols": cols.tolist(),
+        "weights": weights.tolist(),
+        "paper_count": result["paper_count"],
+        "total_keywords": result["total_keywords"],
+        "keyword_mapping": result["keyword_mapping"],
+        "journals": result["journals"],
+    }
+
+
+@api.get("/analyses/{job_id}/exports/{export_format}")
+def get_export(job_id: str, export_format: str) -> FileResponse:
+    """One export file of a finished analysis (see result_exports.EXPORT_FORMATS)."""
+    if export_format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=404, detail=f"Unknown export format {export_format}; "
+                                                    f"available: {', '.join(EXPORT_FORMATS)}")
+    job = _get_analysis_job(job_id)
+    spec = EXPORT_FORMATS[export_format]
+    path = export_path(_finished_result(job), export_format, job["params"])
+    return FileResponse(path, media_type=spec.mime, filename=spec.file_name)
@@ -1,67 +1,103 @@
 # 数据源：OpenAlex（免费开放获取）
 
+# Heavy libraries (pandas, numpy, matplotlib, seaborn, the OpenAI SDK, pyarrow)
+# are imported inside the functions that use them, so the first page renders
+# without paying their import cost. Keep it that way: benchmarks/bench_import_time.py
+# fails if importing this module pulls them in.
+from __future__ import annotations
+
 import streamlit as st
-from datetime import date
+from datetime import date, datetime
 import requests
 import os
-from openai import OpenAI
-import pandas as pd
-import seaborn as sns
-import matplotlib.pyplot as plt
-import matplotlib.figure
-from dotenv import load_dotenv
+import io
 import json
+import math
+import threading
+import time
+from collections import Counter
+from dataclasses import asdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import ExitStack
+from typing import TYPE_CHECKING
+
+from domain_snapshots import (
+    list_snapshots,
+    load_snapshot,
+    load_snapshot_config,
+    save_snapshot,
+    save_snapshot_config,
+    start_snapshot_scheduler,
+)
+from extraction_backends import LOCAL_MODEL_ENV, ExtractionBackend, get_extraction_backend
+from extraction_checkpoint import ExtractionCheckpoint, clear_checkpoints, run_fingerprint
+from font_resolution import chinese_font_properties, configure_matplotlib, font_diagnostic, resolve_chinese_font
+from http_cache import cached_get, get_http_cache
+from job_queue import (
+    ACTIVE_STATES,
+    JOB_CANCELLED,
+    JOB_FAILED,
+    JOB_INTERRUPTED,
+    JOB_QUEUED,
+    JOB_RUNNING,
+    JOB_SUCCEEDED,
+    JobCancelled,
+    JobContext,
+    get_job_queue,
+)
+from keyword_parsing import build_keyword_prompt, parse_keyword_response
+from llm_concurrency import (
+    ERROR_MESSAGES,
+    HEDGE_MAX_EXTRA_LOAD,
+    AdaptiveConcurrencyLimiter,
+    HedgedCaller,
+    call_with_retry,
+    classify_llm_error,
+)
+from llm_pool import BACKENDS_FILE, LLMPool, get_llm_pool, load_backends
+from llm_scheduler import (
+    LLMScheduler,
+    TokenBudget,
+    estimate_request_tokens,
+    plan_extraction,
+)
+from openalex_local import index_stats, journal_matches, search_local_papers, work_to_paper
+from openalex_stream import read_page
+from result_exports import EXPORT_FORMATS, clear_exports, dense_values, export_bytes, sparse_entries
+from topk_convergence import TopKConvergenceMonitor
+
+if TYPE_CHECKING:
+    import matplotlib.figure
+    import pandas as pd
+    from paper_store import Corpus
 
 # Note: No longer using .env file, API key configured in UI
 
 # Application version
 APP_VERSION = "3.0"
+
+# LLM endpoint the server's LLM_API_KEY belongs to; it is never sent anywhere else
+DEFAULT_ENDPOINT = "https://dashscope.aliyuncs.com/compatible-mode/v1"
 VERSION_FILE = ".app_version.json"
 
+# Corpora this large select their top keywords with bounded-memory sketches
+STREAMING_MIN_PAPERS = 100_000
+
+# With early stopping, papers are extracted in this seeded random order so that
+# the ranking converges on a uniform sample rather than on the top-priority papers
+EARLY_STOP_SHUFFLE_SEED = 0
+
 # Configure matplotlib to support Chinese characters
-import matplotlib.font_manager as fm
 import sys
 
-def setup_chinese_font():
-    """
-    Setup Chinese font for matplotlib with multiple fallback options.
-    """
-    # Try to find available Chinese fonts
-    available_fonts = [f.name for f in fm.fontManager.ttflist]
-    
-    # List of Chinese fonts to try (in order of preference)
-    chinese_fonts = [
-        'SimHei',           # 黑体 (Windows)
-        'Microsoft YaHei',  # 微软雅黑 (Windows)
-        'STHeiti',          # 华文黑体 (Mac)
-        'Arial Unicode MS', # (Mac)
-        'PingFang SC',      # 苹方 (Mac)
-        'Heiti SC',         # 黑体-简 (Mac)
-        'WenQuanYi Micro Hei',  # 文泉驿微米黑 (Linux)
-        'WenQuanYi Zen Hei',    # 文泉驿正黑 (Linux)
-        'Noto Sans CJK SC',     # 思源黑体 (Linux)
-        'Droid Sans Fallback',  # Android fallback
-    ]
-    
-    # Find first available Chinese font
-    found_font = None
-    for font in chinese_fonts:
-        if font in available_fonts:
-            found_font = font
-            break
-    
-    if found_font:
-        plt.rcParams['font.sans-serif'] = [found_font] + chinese_fonts
-        plt.rcParams['axes.unicode_minus'] = False
-        return found_font
-    else:
-        # If no Chinese font found, use default and warn user
-        plt.rcParams['font.sans-serif'] = chinese_fonts + ['DejaVu Sans']
-        plt.rcParams['axes.unicode_minus'] = False
-        return None
 
-# Setup Chinese font
-detected_font = setup_chinese_font()
+def _discard_log(message: str, level: str = "info"):
+    """
+    Default log callback of the pipeline helpers below.
+    
+    The helpers run inside background jobs, where Streamlit output is lost;
+    jobs pass JobContext.log instead, other callers (benchmarks) get this.
+    """
 
 
 def check_version_upgrade() -> tuple[bool, str]:
@@ -119,8 +155,11 @@ def clear_cache_on_upgrade():
     is_upgrade, previous_version = check_version_upgrade()
     
     if is_upgrade:
+        from paper_store import clear_corpus_store
+        
         # Clear all cached data
         st.cache_data.clear()
+        clear_corpus_store()
         
         # Display migration notice
         st.info(f"""
@@ -209,7 +248,8 @@ def validate_date_range(start_date: date, end_date: date) -> bool:
     return start_date <= end_date
 
 
-def identify_top_journals(domain: str, api_key: str, endpoint: str) -> list[str]:
+def identify_top_journals(domain: str, api_key: str, endpoint: str, pool: LLMPool = None,
+                          log=_discard_log) -> list[str]:
     """
     Invokes LLM to generate top-tier journal names (Q1 journals).
     
@@ -217,18 +257,20 @@ def identify_top_journals(domain: str, api_key: str, endpoint: str) -> list[str]
         domain: Research field keyword
         api_key: LLM API key
         endpoint: LLM API endpoint
+        pool: Optional LLM backend pool (default: api_key and endpoint only);
+              api_key and endpoint are then unused
+        log: Callable(message, level) receiving warnings (e.g. JobContext.log)
         
     Returns:
         List of journal names (e.g., ["Nature", "Science"])
     """
     try:
         # If no API key is provided, return empty list
-        if not api_key:
-            st.warning("⚠️ 未配置 LLM API 密钥，跳过期刊筛选")
-            return []
-        
-        # Initialize OpenAI client (compatible with Qwen API)
-        client = OpenAI(api_key=api_key, base_url=endpoint)
+        if pool is None:
+            if not api_key:
+                log("⚠️ 未配置 LLM API 密钥，跳过期刊筛选", "warning")
+                return []
+            pool = get_llm_pool(api_key, endpoint, configured=False)
         
         # Create LLM prompt for Q1 journals
         prompt = f"""请列出"{domain}"领域的中科院1区或SCI Q1期刊。
@@ -241,13 +283,16 @@ def identify_top_journals(domain: str, api_key: str, endpoint: str) -> list[str]
 
 示例输出格式：Nature, Science, Cell, Nature Communications, Advanced Materials"""
         
-        # Call LLM
-        response = client.chat.completions.create(
-            model="qwen-plus",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.3,
-            max_tokens=300,
-            timeout=15
+        # Call LLM through the backend pool (compatible with Qwen API); failed backends are skipped
+        response = call_with_retry(
+            lambda: pool.call(lambda client, model: client.chat.completions.create(
+                model=model,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=0.3,
+                max_tokens=300,
+                timeout=15
+            )),
+            max_retries=2
         )
         
         # Extract response text
@@ -260,170 +305,279 @@ def identify_top_journals(domain: str, api_key: str, endpoint: str) -> list[str]
         
     except Exception as e:
         # Log error and continue without journal filtering
-        st.warning(f"⚠️ 期刊识别失败: {str(e)}")
+        log(f"⚠️ 期刊识别失败: {str(e)}", "warning")
         return []
 
 
-def reconstruct_abstract_from_inverted_index(inverted_index: dict) -> str:
+def estimate_extraction_tokens(papers: list[dict]) -> list[int]:
     """
-    Convert OpenAlex inverted index format to full text.
-    
-    OpenAlex stores abstracts as inverted indices where each word maps to 
-    a list of positions where it appears. This function reconstructs the 
-    original text by placing words at their correct positions.
+    Estimate the tokens each paper's extraction request will consume.
     
     Args:
-        inverted_index: Dictionary mapping words to position lists
-                       e.g., {"hello": [0], "world": [1]}
+        papers: List of paper dictionaries
         
     Returns:
-        Reconstructed full text string, or empty string if index is empty
+        Estimated total tokens per paper (same order as papers)
+    """
+    return [
+        estimate_request_tokens(build_keyword_prompt(paper.get("title", ""), paper.get("abstract", "")))
+        for paper in papers
+    ]
+
+
+def _extract_keywords_for_paper(pool: LLMPool, paper: dict, scheduler: LLMScheduler,
+                                limiter: AdaptiveConcurrencyLimiter,
+                                stop_event: threading.Event,
+                                hedger: HedgedCaller = None) -> tuple[str, object]:
+    """
+    Extract keywords for one paper. Runs in a worker thread, so no Streamlit calls here.
+    
+    Each request goes to the pool's least loaded backend and fails over to
+    the others. With a hedger, a request slower than the tracked p90 latency
+    is sent a second time and the first answer wins.
+    
+    Returns:
+        ("ok", keywords), ("failed", reason), ("budget", None) if the
+        token budget is exhausted, or ("stopped", None) if extraction was
+        stopped before this paper started
     """
-    if not inverted_index:
-        return ""
+    if stop_event.is_set():
+        return "stopped", None
     
-    # Create a list to hold words at their positions
-    # First, find the maximum position to determine list size
-    max_position = 0
-    for positions in inverted_index.values():
-        if positions:
-            max_position = max(max_position, max(positions))
+    title = paper.get("title", "")
+    abstract = paper.get("abstract", "")
     
-    # Initialize list with empty strings
-    words = [""] * (max_position + 1)
+    # Skip if no content
+    if not title:
+        return "failed", "无标题"
     
-    # Place each word at its positions
-    for word, positions in inverted_index.items():
-        for pos in positions:
-            words[pos] = word
+    # Create LLM prompt
+    prompt = build_keyword_prompt(title, abstract)
     
-    # Join words with spaces
-    return " ".join(words)
+    # Reserve token budget (waits for the per-minute window if needed)
+    estimated_tokens = 0
+    if scheduler is not None:
+        estimated_tokens = estimate_request_tokens(prompt)
+        if not scheduler.acquire(estimated_tokens):
+            # Run budget exhausted: stop instead of failing paper after paper
+            stop_event.set()
+            return "budget", None
+    
+    def request():
+        return pool.call(lambda client, model: client.chat.completions.create(
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0.3,
+            max_tokens=200,
+            timeout=10  # 10 second timeout per attempt
+        ))
+    
+    def reserve_duplicate():
+        # A duplicate is only sent if budget and per-minute window admit it right away
+        return scheduler is None or scheduler.try_acquire(estimated_tokens)
+    
+    def record_duplicate(duplicate):
+        # Every copy of a hedged request holds a reservation; the losing one settles its own
+        if scheduler is not None:
+            scheduler.record(estimated_tokens, duplicate.usage if duplicate is not None else None)
+    
+    def hedged_request():
+        return hedger.call(request, on_discard=record_duplicate, on_hedge=reserve_duplicate)
+    
+    response = None
+    try:
+        # Call LLM with timeout; throttling and timeouts are retried with backoff
+        response = call_with_retry(hedged_request if hedger is not None else request, limiter=limiter)
+    except Exception as e:
+        return "failed", ERROR_MESSAGES[classify_llm_error(e)]
+    finally:
+        # Replace the reservation with real usage (or release it on failure)
+        if scheduler is not None:
+            scheduler.record(estimated_tokens, response.usage if response is not None else None)
+    
+    keywords = parse_keyword_response(response.choices[0].message.content.strip())
+    if not keywords:
+        # No valid keywords extracted
+        return "failed", "未提取到有效关键词"
+    return "ok", keywords
 
 
-def extract_keywords_with_llm_single(papers: list[dict], api_key: str, endpoint: str) -> list[list[str]]:
+def extract_keywords_by_paper(papers: list[dict], api_key: str, endpoint: str,
+                              scheduler: LLMScheduler = None,
+                              limiter: AdaptiveConcurrencyLimiter = None,
+                              progress_callback=None,
+                              checkpoint: ExtractionCheckpoint = None,
+                              convergence: TopKConvergenceMonitor = None,
+                              hedger: HedgedCaller = None,
+                              backend: ExtractionBackend = None,
+                              pool: LLMPool = None,
+                              log=_discard_log) -> list[list[str]]:
     """
     Extract keywords using LLM exclusively (no fallback).
-    Processes papers one by one for better reliability.
+    Sends one request per paper for better reliability; requests run
+    concurrently under an adaptive concurrency limiter. With an offline
+    backend, papers are extracted by it instead and nothing is sent to the
+    remote LLM.
     
     Args:
         papers: List of paper dictionaries
         api_key: LLM API key (required)
         endpoint: LLM API endpoint
+        scheduler: Optional token budget scheduler; papers beyond the run
+                   budget are skipped and per-minute limits are respected
+        limiter: Optional adaptive concurrency limiter (default: sequential)
+        progress_callback: Optional callable(done, total), called after each
+                           paper; an exception raised by it stops extraction
+        checkpoint: Optional per-paper checkpoint; papers it already holds
+                    are reused, every finished paper is written to it
+        convergence: Optional top-K convergence monitor; extraction stops
+                     once it reports convergence and the number of papers
+                     not sent to the LLM is stored in its saved_calls
+        hedger: Optional hedged caller; slow requests get a duplicate and
+                achieved latencies are tracked in its summary()
+        backend: Optional offline extraction backend (see extraction_backends.py);
+                 api_key, endpoint, scheduler, limiter and hedger are then unused
+        pool: Optional LLM backend pool (default: api_key and endpoint only)
+        log: Callable(message, level) receiving warnings and summaries (e.g. JobContext.log)
         
     Returns:
-        List of keyword lists, one per paper
+        Keyword list for each paper, aligned with papers (None where the
+        paper failed or was skipped)
         
     Raises:
         Exception if LLM extraction fails for all papers
     """
-    # Initialize OpenAI client
-    client = OpenAI(api_key=api_key, base_url=endpoint)
+    if limiter is None:
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=1, max_limit=1)
     
-    all_keywords = []
+    results = [None] * len(papers)
     failed_count = 0
     success_count = 0
     failed_papers = []  # Track failed papers for reporting
+    budget_exhausted_count = 0
+    stopped_count = 0
+    stop_event = threading.Event()
+    
+    # Reuse papers already extracted by an earlier, interrupted run;
+    # papers that failed last time are retried
+    restored = checkpoint.completed() if checkpoint is not None else {}
+    pending = []
+    for i, paper in enumerate(papers):
+        keywords = restored.get(paper.get("id"))
+        if keywords:
+            results[i] = keywords
+            success_count += 1
+            if convergence is not None:
+                convergence.add(keywords)
+        else:
+            pending.append(i)
+    if success_count:
+        log(f"♻️ 已从检查点恢复 {success_count} 篇论文的关键词，仅处理剩余 {len(pending)} 篇")
+    if convergence is not None and convergence.converged:
+        stop_event.set()
     
-    # Process papers one by one for better reliability
-    for i, paper in enumerate(papers, 1):
+    # Worker threads (or processes) only extract; Streamlit output stays on this thread
+    with ExitStack() as stack:
+        if backend is None:
+            if pool is None:
+                pool = get_llm_pool(api_key, endpoint, configured=False)
+            executor = stack.enter_context(ThreadPoolExecutor(max_workers=limiter.max_limit))
+            futures = {
+                executor.submit(_extract_keywords_for_paper, pool, papers[i], scheduler, limiter, stop_event, hedger): i
+                for i in pending
+            }
+            outcomes = ((futures[future], *future.result()) for future in as_completed(futures))
+        else:
+            outcomes = ((pending[j], status, payload) for j, status, payload
+                        in backend.iter_extract([papers[i] for i in pending], stop_event))
         try:
-            title = paper.get("title", "")
-            abstract = paper.get("abstract", "")[:800]  # Limit abstract length
-            
-            # Skip if no content
-            if not title:
-                failed_count += 1
-                failed_papers.append((i, "无标题"))
-                continue
-            
-            # Create LLM prompt
-            prompt = f"""从以下论文的标题和摘要中提取3-5个核心关键词。
-
-要求：
-1. 提取具体的技术、方法、模型名称（如"Transformer Architecture"、"Quantum Error Correction"）
-2. 避免宽泛概念（如"Machine Learning"、"Computer Science"）
-3. 优先提取多词专业术语（2-4个词）
-4. 不要输出完整的论文标题
-5. 只输出关键词，用逗号分隔
-
-标题: {title}
-摘要: {abstract if abstract else "无摘要"}
-
-输出格式：关键词1, 关键词2, 关键词3
-"""
-            
-            # Call LLM with timeout
-            response = client.chat.completions.create(
-                model="qwen-plus",
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.3,
-                max_tokens=200,
-                timeout=10  # 10 second timeout per paper
-            )
-            
-            # Parse response
-            llm_output = response.choices[0].message.content.strip()
-            
-            # Split keywords by comma
-            keywords = [kw.strip() for kw in llm_output.split(',') if kw.strip()]
-            
-            # Filter out overly long "keywords" (likely full titles)
-            # Keep only phrases with 1-5 words
-            keywords = [kw for kw in keywords if 1 <= len(kw.split()) <= 5]
-            
-            # Filter out generic terms
-            generic_terms = {'machine learning', 'deep learning', 'artificial intelligence', 
-                            'computer science', 'data science', 'neural network'}
-            keywords = [kw for kw in keywords if kw.lower() not in generic_terms]
-            
-            if keywords:
-                all_keywords.append(keywords[:6])  # Limit to 6 per paper
-                success_count += 1
-            else:
-                # No valid keywords extracted
-                failed_count += 1
-                failed_papers.append((i, "未提取到有效关键词"))
+            for done, (i, status, payload) in enumerate(outcomes, len(papers) - len(pending) + 1):
+                paper_id = papers[i].get("id")
                 
-        except Exception as e:
-            # Skip this paper if LLM fails, continue with others
-            failed_count += 1
-            error_reason = str(e)
-            # Simplify error message for display
-            if "timeout" in error_reason.lower():
-                error_reason = "处理超时"
-            elif "api" in error_reason.lower() or "auth" in error_reason.lower():
-                error_reason = "API调用失败"
-            else:
-                error_reason = "提取失败"
-            
-            failed_papers.append((i, error_reason))
-            
-            # Display warning for failed paper (only show first few to avoid spam)
-            if failed_count <= 3:
-                st.warning(f"⚠️ 论文 {i} {error_reason}，已跳过")
-            elif failed_count == 4:
-                st.warning(f"⚠️ 更多论文处理失败，将继续处理剩余论文...")
-            
-            continue
+                if status == "ok":
+                    results[i] = payload
+                    success_count += 1
+                    if checkpoint is not None and paper_id:
+                        checkpoint.record_success(paper_id, payload)
+                    if convergence is not None and convergence.add(payload):
+                        # Top-K ranking is stable: papers not started yet are skipped
+                        stop_event.set()
+                elif status == "budget":
+                    budget_exhausted_count += 1
+                elif status == "stopped":
+                    stopped_count += 1
+                else:
+                    failed_count += 1
+                    failed_papers.append((i + 1, payload))
+                    if checkpoint is not None and paper_id:
+                        checkpoint.record_failure(paper_id, payload)
+                    
+                    # Display warning for failed paper (only show first few to avoid spam)
+                    if failed_count <= 3:
+                        log(f"⚠️ 论文 {i + 1} {payload}，已跳过", "warning")
+                    elif failed_count == 4:
+                        log(f"⚠️ 更多论文处理失败，将继续处理剩余论文...", "warning")
+                
+                if progress_callback is not None:
+                    progress_callback(done, len(papers))
+        except BaseException:
+            # Let queued papers return immediately so the pool can shut down
+            stop_event.set()
+            raise
+    
+    # Report papers left unprocessed because the ranking converged or the token budget ran out
+    if convergence is not None and convergence.converged:
+        convergence.saved_calls = stopped_count
+        log(f"⏹️ 关键词排名已收敛，跳过剩余 {stopped_count} 篇论文")
+    else:
+        budget_exhausted_count += stopped_count
+    if budget_exhausted_count > 0:
+        log(f"⚠️ Token 预算已用尽，剩余 {budget_exhausted_count} 篇论文未处理", "warning")
     
     # If all papers failed, raise exception with clear error message in Chinese
-    if not all_keywords:
+    if not any(results):
         error_msg = f"❌ 所有论文的关键词提取均失败\n\n成功: {success_count}/{len(papers)}\n失败: {failed_count}/{len(papers)}"
         raise Exception(error_msg)
     
     # If some papers failed but we have results, display summary and continue
     if failed_count > 0:
-        st.info(f"ℹ️ 关键词提取完成：成功 {success_count}/{len(papers)} 篇，跳过 {failed_count} 篇失败的论文")
+        log(f"ℹ️ 关键词提取完成：成功 {success_count}/{len(papers)} 篇，跳过 {failed_count} 篇失败的论文")
+    
+    return [keywords or None for keywords in results]
+
+
+def extract_keywords_with_llm_single(papers: list[dict], api_key: str, endpoint: str,
+                                     **kwargs) -> list[list[str]]:
+    """
+    Extract keywords for each paper, keeping only the successful ones.
     
-    return all_keywords
+    Args:
+        papers: List of paper dictionaries
+        api_key: LLM API key (required)
+        endpoint: LLM API endpoint
+        **kwargs: Passed on to extract_keywords_by_paper
+        
+    Returns:
+        List of keyword lists in paper order, failed papers left out
+    """
+    results = extract_keywords_by_paper(papers, api_key, endpoint, **kwargs)
+    return [keywords for keywords in results if keywords]
 
 
 # Rule-based extraction removed in v3.0 - LLM-only mode
 
 
-@st.cache_data
-def fetch_openalex_by_journals(domain: str, start_year: int, end_year: int, journals: list[str], max_total_papers: int = 100) -> list[dict]:
+def _report_cached_response(response, log=_discard_log):
+    """Tell the user when search results come from an outdated cached response (see http_cache.py)."""
+    age_hours = response.age_seconds / 3600
+    if response.cache_status == "offline":
+        log(f"⚠️ OpenAlex 暂时无法访问，使用 {age_hours:.1f} 小时前缓存的检索结果", "warning")
+    elif response.cache_status == "stale":
+        log(f"ℹ️ 使用 {age_hours:.1f} 小时前缓存的检索结果，正在后台向 OpenAlex 更新")
+
+
+def fetch_openalex_by_journals(domain: str, start_year: int, end_year: int, journals: list[str], max_total_papers: int = 100,
+                               log=_discard_log, progress_callback=None) -> list[dict]:
     """
     Queries OpenAlex API directly for each Q1 journal to get substantial paper volume.
     v3.1 Update: Direct journal search with total paper limit for performance.
@@ -434,6 +588,8 @@ def fetch_openalex_by_journals(domain: str, start_year: int, end_year: int, jour
         end_year: End of time range (YYYY)
         journals: List of Q1 journal names to query
         max_total_papers: Maximum total papers to fetch (default: 100 for performance)
+        log: Callable(message, level) receiving per-journal results (e.g. JobContext.log)
+        progress_callback: Optional callable(done, total) called before each journal query
         
     Returns:
         List of paper dictionaries aggregated from all journals (up to max_total_papers)
@@ -444,23 +600,18 @@ def fetch_openalex_by_journals(domain: str, start_year: int, end_year: int, jour
     total_journals = len(journals)
     failed_journals = []
     
-    # Create a progress bar
-    progress_bar = st.progress(0)
-    status_text = st.empty()
-    
-    st.info(f"📊 将从 {total_journals} 个期刊中获取论文，每个期刊约 {papers_per_journal} 篇，总计不超过 {max_total_papers} 篇")
+    log(f"📊 将从 {total_journals} 个期刊中获取论文，每个期刊约 {papers_per_journal} 篇，总计不超过 {max_total_papers} 篇")
     
     for i, journal in enumerate(journals):
         # Check if we've reached the limit
         if len(all_papers) >= max_total_papers:
-            st.info(f"✅ 已达到论文数量上限 ({max_total_papers} 篇)，停止查询")
+            log(f"✅ 已达到论文数量上限 ({max_total_papers} 篇)，停止查询")
             break
+        
+        # Update progress (outside the try below, so a cancelled job is not taken for a failed journal)
+        if progress_callback is not None:
+            progress_callback(i, total_journals)
         try:
-            # Update progress
-            progress = (i + 1) / total_journals
-            progress_bar.progress(progress)
-            status_text.text(f"🔍 正在查询期刊 [{i+1}/{total_journals}]: {journal}")
-            
             # Construct API endpoint
             url = "https://api.openalex.org/works"
             
@@ -471,7 +622,7 @@ def fetch_openalex_by_journals(domain: str, start_year: int, end_year: int, jour
                 "filter": f"publication_year:{start_year}-{end_year}",
                 "search": domain,
                 "per_page": papers_per_journal * 3,  # Fetch more to account for filtering
-                "select": "id,title,publication_year,keywords,concepts,abstract_inverted_index,primary_location"
+                "select": "id,doi,title,publication_year,cited_by_count,abstract_inverted_index,primary_location"
             }
             
             # Make API request with retry mechanism
@@ -480,7 +631,8 @@ def fetch_openalex_by_journals(domain: str, start_year: int, end_year: int, jour
             
             for attempt in range(max_retries):
                 try:
-                    response = requests.get(url, params=params, timeout=60)
+                    # Through the shared disk cache (see http_cache.py)
+                    response = cached_get(url, params=params, timeout=60)
                     response.raise_for_status()
                     break  # Success
                 except (requests.exceptions.Timeout, requests.exceptions.ConnectionError, requests.exceptions.RequestException) as e:
@@ -490,69 +642,22 @@ def fetch_openalex_by_journals(domain: str, start_year: int, end_year: int, jour
                     else:
                         raise
             
-            # Parse JSON response
-            data = response.json()
-            results = data.get("results", [])
+            _report_cached_response(response, log)
+            
+            # Parse JSON response into paper records (streamed, see openalex_stream.py)
+            with response:
+                results = read_page(response, work_to_paper).get("results", [])
             
             # Process results and filter by journal name
             journal_papers = []
-            for result in results:
-                title = result.get("title", "")
-                if not title:
+            for paper in results:
+                if not paper["title"]:
                     continue
                 
-                # Get journal name
-                journal_name = ""
-                primary_location = result.get("primary_location", {})
-                if primary_location and isinstance(primary_location, dict):
-                    source = primary_location.get("source", {})
-                    if source and isinstance(source, dict):
-                        journal_name = source.get("display_name", "")
-                
                 # Filter by journal name (flexible matching)
-                if journal_name:
-                    journal_lower = journal.lower().strip()
-                    journal_name_lower = journal_name.lower().strip()
-                    
-                    # Check if this paper is from the target journal
-                    is_match = False
-                    
-                    # Strategy 1: Exact match
-                    if journal_lower == journal_name_lower:
-                        is_match = True
-                    # Strategy 2: Substring match
-                    elif journal_lower in journal_name_lower or journal_name_lower in journal_lower:
-                        is_match = True
-                    # Strategy 3: Word-level matching
-                    else:
-                        journal_words = [w for w in journal_lower.split() if len(w) > 3]
-                        if journal_words:
-                            matches = sum(1 for word in journal_words if word in journal_name_lower)
-                            if matches >= len(journal_words) * 0.5:
-                                is_match = True
-                    
-                    if not is_match:
-                        continue  # Skip papers not from this journal
-                
-                # Get abstract
-                abstract_inverted_index = result.get("abstract_inverted_index", {})
-                abstract = ""
-                if abstract_inverted_index:
-                    abstract = reconstruct_abstract_from_inverted_index(abstract_inverted_index)
+                if paper["journal"] and not journal_matches(journal, paper["journal"]):
+                    continue  # Skip papers not from this journal
                 
-                # Get keywords and concepts
-                keywords = result.get("keywords", [])
-                concepts = result.get("concepts", [])
-                
-                paper = {
-                    "id": result.get("id", ""),
-                    "title": title,
-                    "abstract": abstract,
-                    "keywords": keywords,
-                    "concepts": concepts,
-                    "publication_year": result.get("publication_year", 0),
-                    "journal": journal_name
-                }
                 journal_papers.append(paper)
                 
                 # Stop if we have enough papers for this journal
@@ -564,33 +669,33 @@ def fetch_openalex_by_journals(domain: str, start_year: int, end_year: int, jour
             
             # Display result for this journal
             if journal_papers:
-                st.success(f"  ✅ {journal}: 获取 {len(journal_papers)} 篇论文")
+                log(f"✅ {journal}: 获取 {len(journal_papers)} 篇论文", "success")
             else:
-                st.warning(f"  ⚠️ {journal}: 未找到论文")
+                log(f"⚠️ {journal}: 未找到论文", "warning")
                 failed_journals.append(journal)
         
         except Exception as e:
-            st.error(f"  ❌ {journal}: 查询失败 ({str(e)})")
+            log(f"❌ {journal}: 查询失败 ({str(e)})", "error")
             failed_journals.append(journal)
             continue
     
-    # Clear progress indicators
-    progress_bar.empty()
-    status_text.empty()
+    if progress_callback is not None:
+        progress_callback(total_journals, total_journals)
     
     # Display summary statistics
     successful_journals = total_journals - len(failed_journals)
-    st.info(f"📊 查询完成：成功 {successful_journals}/{total_journals} 个期刊，共获取 {len(all_papers)} 篇论文")
+    log(f"📊 查询完成：成功 {successful_journals}/{total_journals} 个期刊，共获取 {len(all_papers)} 篇论文")
     
     if failed_journals:
-        st.warning(f"⚠️ 以下期刊未能获取论文：{', '.join(failed_journals[:5])}" + 
-                  (f" 等 {len(failed_journals)} 个期刊" if len(failed_journals) > 5 else ""))
+        log(f"⚠️ 以下期刊未能获取论文：{', '.join(failed_journals[:5])}" +
+            (f" 等 {len(failed_journals)} 个期刊" if len(failed_journals) > 5 else ""), "warning")
     
     return all_papers
 
 
-@st.cache_data
-def fetch_openalex_data(domain: str, start_year: int, end_year: int, journals: list[str] = None, max_papers: int = 100) -> list[dict]:
+def fetch_openalex_data(domain: str, start_year: int, end_year: int, journals: list[str] = None, max_papers: int = 100,
+                        source: str = "openalex", partition: str = "none", log=_discard_log,
+                        progress_callback=None) -> list[dict]:
     """
     Queries OpenAlex API for publications.
     v3.1 Update: If journals provided, use direct journal search; otherwise use traditional search.
@@ -601,17 +706,27 @@ def fetch_openalex_data(domain: str, start_year: int, end_year: int, journals: l
         end_year: End of time range (YYYY)
         journals: Optional list of journal names (if provided, use direct journal search)
         max_papers: Maximum total papers to fetch (default: 100)
+        source: "openalex" (live API) or "local" (ingested snapshot index, see openalex_local.py)
+        partition: "none", or "year" / "quarter" to split the keyword search into parallel
+                   sub-queries per period (see openalex_planner.py)
+        log: Callable(message, level) receiving status and errors (e.g. JobContext.log)
+        progress_callback: Optional callable(done, total) for the journal queries
         
     Returns:
-        List of paper dictionaries with metadata
+        List of paper dictionaries with metadata (empty on failure; the reason is logged)
     """
+    # Answer from the local snapshot index without network access
+    if source == "local":
+        return search_local_papers(domain, start_year, end_year, journals, max_papers=max_papers)
+    
     # v3.1: If journals provided, use direct journal search
     if journals:
-        return fetch_openalex_by_journals(domain, start_year, end_year, journals, max_total_papers=max_papers)
+        return fetch_openalex_by_journals(domain, start_year, end_year, journals, max_total_papers=max_papers,
+                                          log=log, progress_callback=progress_callback)
     
     # Otherwise, use traditional domain keyword search (fallback mode when Q1 filtering disabled)
     try:
-        st.info(f"ℹ️ 使用传统搜索模式（未启用1区期刊筛选），将获取最多 {max_papers} 篇论文")
+        log(f"ℹ️ 使用传统搜索模式（未启用1区期刊筛选），将获取最多 {max_papers} 篇论文")
         # Construct API endpoint
         url = "https://api.openalex.org/works"
         
@@ -620,47 +735,61 @@ def fetch_openalex_data(domain: str, start_year: int, end_year: int, journals: l
             "search": domain,
             "filter": f"publication_year:{start_year}-{end_year}",
             "per_page": min(max_papers, 100),  # OpenAlex max is 100 per page
-            "select": "id,title,publication_year,keywords,concepts,abstract_inverted_index,primary_location"
+            "select": "id,doi,title,publication_year,cited_by_count,abstract_inverted_index,primary_location"
         }
         
-        # Make API request with retry mechanism
-        max_retries = 3
-        retry_delay = 2  # seconds
-        
-        for attempt in range(max_retries):
-            try:
-                # Display retry progress to user
-                if attempt > 0:
-                    st.info(f"🔄 正在进行第 {attempt + 1} 次尝试...")
-                
-                response = requests.get(url, params=params, timeout=60)  # 60-second timeout per request
-                response.raise_for_status()
-                break  # Success, exit retry loop
-            except requests.exceptions.Timeout:
-                if attempt < max_retries - 1:
-                    st.warning(f"⚠️ 连接超时，正在重试 ({attempt + 1}/{max_retries})...")
-                    import time
-                    time.sleep(retry_delay)
-                else:
-                    raise
-            except requests.exceptions.ConnectionError:
-                if attempt < max_retries - 1:
-                    st.warning(f"⚠️ 连接失败，正在重试 ({attempt + 1}/{max_retries})...")
-                    import time
-                    time.sleep(retry_delay)
-                else:
-                    raise
-            except requests.exceptions.RequestException:
-                if attempt < max_retries - 1:
-                    st.warning(f"⚠️ 请求失败，正在重试 ({attempt + 1}/{max_retries})...")
-                    import time
-                    time.sleep(retry_delay)
-                else:
-                    raise
-        
-        # Parse JSON response
-        data = response.json()
-        results = data.get("results", [])
+        if partition != "none":
+            # Per-year (or per-quarter) sub-queries with an evenly split budget
+            from openalex_planner import fetch_partitioned
+            
+            results, partitions = fetch_partitioned(params, start_year, end_year, max_papers, mode=partition,
+                                                    convert=work_to_paper)
+            covered = sum(1 for part in partitions if part.allocation)
+            log(f"📅 分区并行查询：{len(partitions)} 个{'年份' if partition == 'year' else '季度'}分区"
+                f"（{covered} 个有结果），合并去重后 {len(results)} 篇论文")
+        else:
+            # Make API request with retry mechanism
+            max_retries = 3
+            retry_delay = 2  # seconds
+            
+            for attempt in range(max_retries):
+                try:
+                    # Display retry progress to user
+                    if attempt > 0:
+                        log(f"🔄 正在进行第 {attempt + 1} 次尝试...")
+                    
+                    # Through the shared disk cache (see http_cache.py); results are converted
+                    # while the page is read (see openalex_stream.py)
+                    response = cached_get(url, params=params, timeout=60)  # 60-second timeout per request
+                    response.raise_for_status()
+                    break  # Success, exit retry loop
+                except requests.exceptions.Timeout:
+                    if attempt < max_retries - 1:
+                        log(f"⚠️ 连接超时，正在重试 ({attempt + 1}/{max_retries})...", "warning")
+                        import time
+                        time.sleep(retry_delay)
+                    else:
+                        raise
+                except requests.exceptions.ConnectionError:
+                    if attempt < max_retries - 1:
+                        log(f"⚠️ 连接失败，正在重试 ({attempt + 1}/{max_retries})...", "warning")
+                        import time
+                        time.sleep(retry_delay)
+                    else:
+                        raise
+                except requests.exceptions.RequestException:
+                    if attempt < max_retries - 1:
+                        log(f"⚠️ 请求失败，正在重试 ({attempt + 1}/{max_retries})...", "warning")
+                        import time
+                        time.sleep(retry_delay)
+                    else:
+                        raise
+            
+            _report_cached_response(response, log)
+            
+            # Parse JSON response into paper records
+            with response:
+                results = read_page(response, work_to_paper).get("results", [])
         
         # Handle empty results
         if not results:
@@ -672,79 +801,17 @@ def fetch_openalex_data(domain: str, start_year: int, end_year: int, journals: l
         filtered_count = 0
         total_results = len(results)
         
-        for result in results:
-            # Extract title (required)
-            title = result.get("title", "")
-            if not title:
+        for paper in results:
+            # Title is required
+            if not paper["title"]:
                 continue
             
-            # Get journal name for filtering
-            journal_name = ""
-            primary_location = result.get("primary_location", {})
-            if primary_location and isinstance(primary_location, dict):
-                source = primary_location.get("source", {})
-                if source and isinstance(source, dict):
-                    journal_name = source.get("display_name", "")
-            
             # Filter by journals if provided (flexible matching)
-            if journals and journal_name:
-                # Check if paper is from one of the target journals
-                # Use flexible matching for journal names
-                is_from_target_journal = False
-                matched_journal = None
-                
-                for journal in journals:
-                    journal_lower = journal.lower().strip()
-                    journal_name_lower = journal_name.lower().strip()
-                    
-                    # Strategy 1: Exact match
-                    if journal_lower == journal_name_lower:
-                        is_from_target_journal = True
-                        matched_journal = journal
-                        break
-                    
-                    # Strategy 2: Substring match (either direction)
-                    if journal_lower in journal_name_lower or journal_name_lower in journal_lower:
-                        is_from_target_journal = True
-                        matched_journal = journal
-                        break
-                    
-                    # Strategy 3: Word-level matching (for multi-word journal names)
-                    # Match if significant words (>3 chars) from target journal appear in actual journal name
-                    journal_words = [w for w in journal_lower.split() if len(w) > 3]
-                    if journal_words:
-                        # Check if at least 50% of significant words match
-                        matches = sum(1 for word in journal_words if word in journal_name_lower)
-                        if matches >= len(journal_words) * 0.5:
-                            is_from_target_journal = True
-                            matched_journal = journal
-                            break
-                
-                if not is_from_target_journal:
+            if journals and paper["journal"]:
+                if not any(journal_matches(journal, paper["journal"]) for journal in journals):
                     filtered_count += 1
                     continue  # Skip papers not from target journals
             
-            # Get abstract (optional, but preferred)
-            abstract_inverted_index = result.get("abstract_inverted_index", {})
-            abstract = ""
-            if abstract_inverted_index:
-                abstract = reconstruct_abstract_from_inverted_index(abstract_inverted_index)
-            
-            # Get keywords (OpenAlex keywords)
-            keywords = result.get("keywords", [])
-            
-            # Get concepts (OpenAlex topic classification)
-            concepts = result.get("concepts", [])
-            
-            paper = {
-                "id": result.get("id", ""),
-                "title": title,
-                "abstract": abstract,
-                "keywords": keywords,
-                "concepts": concepts,
-                "publication_year": result.get("publication_year", 0),
-                "journal": journal_name
-            }
             papers.append(paper)
         
         # Display filtering statistics if journals were provided
@@ -752,17 +819,17 @@ def fetch_openalex_data(domain: str, start_year: int, end_year: int, journals: l
             if len(papers) > 0:
                 # Successfully filtered papers
                 filter_rate = (len(papers) / total_results * 100) if total_results > 0 else 0
-                st.info(f"📊 期刊筛选统计：从 {total_results} 篇论文中筛选出 {len(papers)} 篇来自1区期刊的论文（保留率: {filter_rate:.1f}%，过滤了 {filtered_count} 篇）")
+                log(f"📊 期刊筛选统计：从 {total_results} 篇论文中筛选出 {len(papers)} 篇来自1区期刊的论文（保留率: {filter_rate:.1f}%，过滤了 {filtered_count} 篇）")
             else:
                 # No papers matched - will fall back to all papers
-                st.warning(f"⚠️ 在指定的 {len(journals)} 个1区期刊中未找到论文（共检索到 {total_results} 篇论文）")
-                st.info("💡 将返回空结果，主程序会自动重试搜索所有论文")
+                log(f"⚠️ 在指定的 {len(journals)} 个1区期刊中未找到论文（共检索到 {total_results} 篇论文）", "warning")
+                log("💡 将返回空结果，主程序会自动重试搜索所有论文")
         
         return papers
         
     except requests.exceptions.Timeout:
-        st.error("❌ 连接 OpenAlex API 超时")
-        st.info("""
+        log("❌ 连接 OpenAlex API 超时", "error")
+        log("""
         **可能的原因：**
         - 网络连接较慢
         - OpenAlex 服务器响应慢
@@ -774,8 +841,8 @@ def fetch_openalex_data(domain: str, start_year: int, end_year: int, journals: l
         """)
         return []
     except requests.exceptions.ConnectionError:
-        st.error("❌ 无法连接到 OpenAlex API")
-        st.info("""
+        log("❌ 无法连接到 OpenAlex API", "error")
+        log("""
         **可能的原因：**
         - 网络连接问题
         - 防火墙阻止
@@ -789,33 +856,154 @@ def fetch_openalex_data(domain: str, start_year: int, end_year: int, journals: l
         """)
         return []
     except requests.exceptions.RequestException as e:
-        st.error(f"❌ OpenAlex API 请求失败: {str(e)}")
+        log(f"❌ OpenAlex API 请求失败: {str(e)}", "error")
         return []
     except Exception as e:
-        st.error(f"❌ 处理 OpenAlex 数据时出错: {str(e)}")
+        log(f"❌ 处理 OpenAlex 数据时出错: {str(e)}", "error")
         return []
 
 
-def build_cooccurrence_matrix(keyword_lists: list[list[str]], max_keywords: int = 50) -> pd.DataFrame:
+def _fetch_papers(domain: str, start_year: int, end_year: int, journals: list[str], max_papers: int,
+                 source: str, sampling: str, pool_factor: int, partition: str, log=_discard_log,
+                 progress_callback=None) -> tuple[list[dict], dict]:
+    """
+    Fetch papers in relevance order, or as a stratified sample (see paper_sampling.py).
+    
+    Failures are reported through log (see fetch_openalex_data).
+    
+    Returns:
+        Tuple of (papers, sampling report or None)
+    """
+    if sampling == "none":
+        papers = fetch_openalex_data(domain, start_year, end_year, journals, max_papers=max_papers, source=source,
+                                     partition=partition, log=log, progress_callback=progress_callback)
+        return papers, None
+    
+    from paper_sampling import fetch_stratified_sample
+    
+    try:
+        return fetch_stratified_sample(domain, start_year, end_year, journals, max_papers=max_papers,
+                                       mode=sampling, pool_factor=pool_factor, source=source)
+    except requests.exceptions.RequestException as e:
+        log(f"❌ OpenAlex API 请求失败: {str(e)}", "error")
+        return [], None
+
+
+def load_or_fetch_corpus(domain: str, start_year: int, end_year: int, journals: list[str] = None,
+                         max_papers: int = 100, refresh: bool = False, source: str = "openalex",
+                         sampling: str = "none", pool_factor: int = 5, partition: str = "none",
+                         log=_discard_log, progress_callback=None) -> Corpus:
+    """
+    Load a fetched corpus from the local columnar store, fetching it from OpenAlex on a miss.
+    
+    Stored corpora are memory-mapped, shared by all sessions and survive
+    server restarts; they are fetched again once older than a week
+    (paper_store.CORPUS_TTL_SECONDS). Empty results are not stored. Results of the local
+    snapshot index are not stored either: querying it is as fast as loading.
+    
+    Args:
+        domain: Search keyword
+        start_year: Beginning of time range (YYYY)
+        end_year: End of time range (YYYY)
+        journals: Optional list of journal names
+        max_papers: Maximum total papers to fetch
+        refresh: Fetch from OpenAlex even if the corpus is stored (and replace it)
+        source: "openalex" (live API) or "local" (ingested snapshot index)
+        sampling: "none" (top relevance hits), "year_journal" or
+                  "year_journal_citations" (stratified sample, see paper_sampling.py)
+        pool_factor: Candidate pool size of stratified sampling, as a multiple of max_papers
+        partition: "none", "year" or "quarter" (parallel per-period sub-queries of the
+                   keyword search, see openalex_planner.py)
+        log: Callable(message, level) receiving status and fetch errors (e.g. JobContext.log)
+        progress_callback: Optional callable(done, total) for the journal queries
+        
+    Returns:
+        Corpus (possibly empty); metadata["sampling"] holds the sampling report
+    """
+    from paper_store import Corpus, corpus_key, load_corpus, save_corpus
+    
+    if source == "local":
+        papers, sampling_report = _fetch_papers(domain, start_year, end_year, journals, max_papers,
+                                                source, sampling, pool_factor, partition, log, progress_callback)
+        return Corpus.from_papers(papers, {"domain": domain, "source": source, "fetched_at": time.time(),
+                                           "sampling": sampling_report})
+    
+    options = {}
+    if sampling != "none":
+        options.update(sampling=sampling, pool_factor=pool_factor)
+    if partition != "none":
+        options["partition"] = partition
+    key = corpus_key(domain, start_year, end_year, journals, max_papers, options=options)
+    corpus = None if refresh else load_corpus(key)
+    if corpus is not None:
+        fetched_at = corpus.metadata.get("fetched_at")
+        if fetched_at:
+            log(f"📦 使用本地存储的论文数据（获取于 {datetime.fromtimestamp(fetched_at):%Y-%m-%d %H:%M}）")
+        return corpus
+    
+    papers, sampling_report = _fetch_papers(domain, start_year, end_year, journals, max_papers,
+                                            source, sampling, pool_factor, partition, log, progress_callback)
+    if not papers:
+        return Corpus.from_papers([])
+    
+    metadata = {
+        "domain": domain,
+        "start_year": start_year,
+        "end_year": end_year,
+        "journals": journals or [],
+        "max_papers": max_papers,
+        "sampling": sampling_report,
+    }
+    try:
+        return save_corpus(key, papers, metadata)
+    except OSError:
+        # Store is an optimization only: fall back to the in-memory corpus
+        return Corpus.from_papers(papers, metadata)
+
+
+def build_cooccurrence_matrix(keyword_lists: list[list[str]], max_keywords: int = 50,
+                              vocabulary: list[str] = None, streaming: bool = None) -> pd.DataFrame:
     """
     Constructs keyword co-occurrence matrix.
     
     Args:
         keyword_lists: Keywords extracted from each paper
         max_keywords: Maximum number of keywords to include (default: 50)
+        vocabulary: Optional fixed keyword set; matrices built over the same
+                    vocabulary are aligned (max_keywords is then ignored)
+        streaming: Select the top keywords with bounded-memory sketches
+                   instead of counting every keyword (see keyword_sketches.py);
+                   default: for STREAMING_MIN_PAPERS papers or more
         
     Returns:
-        DataFrame with keywords as both index and columns
+        DataFrame with keywords as both index and columns;
+        attrs["keyword_selection"] tells whether sketches selected the keywords
+        ("streaming") and whether the selection is guaranteed to equal exact
+        counting ("exact")
     """
-    # Count keyword frequencies
-    keyword_freq = {}
-    for keywords in keyword_lists:
-        for keyword in keywords:
-            keyword_freq[keyword] = keyword_freq.get(keyword, 0) + 1
+    import pandas as pd
     
-    # Sort keywords by frequency and take top N
-    sorted_keywords = sorted(keyword_freq.items(), key=lambda x: x[1], reverse=True)
-    top_keywords = [kw for kw, _ in sorted_keywords[:max_keywords]]
+    if streaming is None:
+        streaming = len(keyword_lists) >= STREAMING_MIN_PAPERS
+    streaming = streaming and vocabulary is None
+    exact = True
+    
+    if vocabulary is not None:
+        top_keywords = list(vocabulary)
+    elif streaming:
+        from keyword_sketches import select_top_keywords
+        
+        top_keywords, exact = select_top_keywords(keyword_lists, max_keywords)
+    else:
+        # Count keyword frequencies
+        keyword_freq = {}
+        for keywords in keyword_lists:
+            for keyword in keywords:
+                keyword_freq[keyword] = keyword_freq.get(keyword, 0) + 1
+        
+        # Sort keywords by frequency and take top N
+        sorted_keywords = sorted(keyword_freq.items(), key=lambda x: x[1], reverse=True)
+        top_keywords = [kw for kw, _ in sorted_keywords[:max_keywords]]
     
     # Convert to sorted list for consistent ordering
     unique_keywords = sorted(top_keywords)
@@ -844,19 +1032,33 @@ def build_cooccurrence_matrix(keyword_lists: list[list[str]], max_keywords: int
                 matrix[idx2][idx1] += 1
     
     # Return symmetric matrix as DataFrame
-    return pd.DataFrame(matrix, index=unique_keywords, columns=unique_keywords)
+    matrix = pd.DataFrame(matrix, index=unique_keywords, columns=unique_keywords)
+    matrix.attrs["keyword_selection"] = {"streaming": streaming, "exact": exact}
+    return matrix
 
 
-def render_heatmap(matrix: pd.DataFrame) -> matplotlib.figure.Figure:
+def render_heatmap(matrix: pd.DataFrame, title: str = '关键词共现热力图', cmap: str = "YlGnBu",
+                   center: float = None, cbar_label: str = '共现次数', fmt: str = 'g') -> matplotlib.figure.Figure:
     """
     Generates heatmap visualization.
     
     Args:
         matrix: Co-occurrence matrix
+        title: Figure title
+        cmap: Color map (use a diverging map with center for differences)
+        center: Optional value at the center of a diverging color map
+        cbar_label: Color bar label
+        fmt: Annotation format
         
     Returns:
-        Matplotlib figure object
+        Matplotlib figure object (not registered with pyplot, so it is safe to
+        build on job threads and needs no plt.close)
     """
+    import matplotlib.figure
+    import seaborn as sns
+    
+    configure_matplotlib()
+    
     # Set dynamic figure size based on matrix dimensions
     # Limit maximum size to prevent memory issues
     n = len(matrix)
@@ -882,61 +1084,1197 @@ def render_heatmap(matrix: pd.DataFrame) -> matplotlib.figure.Figure:
         annot_fontsize = 8
         show_annot = True
     
-    # Create figure and axis with constrained layout
-    fig, ax = plt.subplots(figsize=(figsize, figsize), dpi=100)
+    # Create figure and axis without pyplot's global figure state
+    fig = matplotlib.figure.Figure(figsize=(figsize, figsize), dpi=100)
+    ax = fig.subplots()
     
     # Generate heatmap using seaborn
     sns.heatmap(
         matrix,
-        cmap="YlGnBu",      # Yellow-Green-Blue color scheme
+        cmap=cmap,           # Yellow-Green-Blue color scheme by default
+        center=center,       # Diverging maps center on this value
         annot=show_annot,    # Enable annotations only for smaller matrices
-        fmt='g',             # Format for annotations (general format)
+        fmt=fmt,             # Format for annotations (general format by default)
         ax=ax,               # Use the created axis
-        cbar_kws={'label': '共现次数'},
+        cbar_kws={'label': cbar_label},
         annot_kws={'fontsize': annot_fontsize} if show_annot else {}
     )
     
-    # Set title and labels with dynamic font sizes
-    ax.set_title('关键词共现热力图', fontsize=title_fontsize, pad=20)
-    ax.set_xlabel('关键词', fontsize=label_fontsize)
-    ax.set_ylabel('关键词', fontsize=label_fontsize)
+    # Set title and labels with dynamic font sizes, pinned to the resolved
+    # Chinese font file so matplotlib does not search fonts per text element
+    title_font = chinese_font_properties(title_fontsize)
+    label_font = chinese_font_properties(label_fontsize)
+    ax.set_title(title, fontsize=title_fontsize, pad=20, fontproperties=title_font)
+    ax.set_xlabel('关键词', fontsize=label_fontsize, fontproperties=label_font)
+    ax.set_ylabel('关键词', fontsize=label_fontsize, fontproperties=label_font)
     
     # Rotate labels for better readability
-    plt.xticks(rotation=45, ha='right')
-    plt.yticks(rotation=0)
+    ax.tick_params(axis='x', labelrotation=45)
+    ax.tick_params(axis='y', labelrotation=0)
+    for label in ax.get_xticklabels():
+        label.set_horizontalalignment('right')
+    
+    # Keyword tick labels and the color bar label are Chinese text too
+    tick_font = chinese_font_properties()
+    if tick_font is not None:
+        for label in ax.get_xticklabels() + ax.get_yticklabels():
+            label.set_fontproperties(tick_font)
+        ax.collections[0].colorbar.set_label(cbar_label, fontproperties=tick_font)
     
     # Adjust layout to prevent label cutoff
-    plt.tight_layout()
+    fig.tight_layout()
     
     return fig
 
 
-def main():
-    st.title("🔬 研究热点分析工具")
-    st.write("分析学术领域的研究趋势和热点话题")
+NO_PAPERS_HELP = """
+    **可能的原因：**
+    - 🔍 关键词过于具体或拼写错误
+    - 📅 时间范围内没有相关论文
+    - 📚 1区期刊筛选过于严格
+    - 🌐 OpenAlex 数据库中没有相关数据
+
+    **建议的解决方案：**
+
+    1. **调整搜索关键词**
+       - 尝试使用更通用的关键词
+       - 使用英文关键词（OpenAlex 主要收录英文文献）
+       - 检查关键词拼写是否正确
+       - 示例：将 "quantum error correction" 改为 "quantum computing"
+
+    2. **扩大时间范围**
+       - 尝试更长的时间跨度（如最近5年）
+       - 确认起始日期早于结束日期
+
+    3. **禁用1区期刊筛选**
+       - 在左侧边栏取消勾选"识别1区期刊"
+       - 这将搜索所有期刊的论文，而不仅限于顶级期刊
+
+    4. **尝试其他领域**
+       - 某些新兴领域可能数据较少
+       - 尝试相关但更成熟的研究领域
+
+    **提示：** 如果问题持续，可以先禁用1区筛选，查看是否能找到论文。
+"""
+
+LLM_FAILURE_HELP = """
+    **可能的原因：**
+    - ❌ API Key 无效、过期或配额不足
+    - 🌐 网络连接问题或防火墙阻止
+    - 🔗 API 端点配置错误
+    - ⏱️ LLM 服务暂时不可用或响应超时
+    - 📄 论文内容格式问题
+
+    **解决方案（请按顺序尝试）：**
+
+    1. **检查 API Key**
+       - 在左侧边栏确认 API Key 已正确输入
+       - 访问 [阿里云控制台](https://dashscope.console.aliyun.com/) 验证 API Key 状态
+       - 确认 API Key 有足够的配额
+
+    2. **检查网络连接**
+       - 点击左侧边栏的"测试网络"按钮
+       - 确认可以访问 OpenAlex API
+       - 如在国内，可能需要使用 VPN
+
+    3. **检查 API 端点**
+       - 确认端点地址为: `https://dashscope.aliyuncs.com/compatible-mode/v1`
+       - 如使用其他 LLM 服务，请确认端点正确
+
+    4. **调整搜索参数**
+       - 尝试缩短时间范围以减少论文数量
+       - 尝试更具体的关键词
+
+    5. **稍后重试**
+       - LLM 服务可能暂时繁忙
+       - 等待几分钟后重新尝试
+
+    **重要提示：** v3.0 版本仅支持 LLM 提取，无规则提取备选方案。必须解决 LLM 连接问题才能继续。
+"""
+
+
+class AnalysisError(Exception):
+    """
+    Analysis stopped for a user-facing reason.
     
-    # Check for version upgrade and clear cache if needed
-    clear_cache_on_upgrade()
+    kind selects the troubleshooting tips shown in the UI ("no_papers",
+    "llm_failed", "no_keywords", "empty_matrix").
+    """
+    def __init__(self, kind: str, message: str):
+        super().__init__(message)
+        self.kind = kind
+
+
+def _llm_pool(ctx: JobContext, params: dict, api_key: str) -> LLMPool:
+    """
+    LLM backend pool of a job: the job's API key plus the configured backends (if enabled).
     
-    # Show font detection result
-    if detected_font:
-        st.success(f"✅ 已检测到中文字体: {detected_font}")
+    A malformed backend configuration is reported and the job's API key used alone.
+    
+    Raises:
+        AnalysisError if no backend is available
+    """
+    try:
+        return get_llm_pool(api_key, params["endpoint"], configured=params.get("llm_pool", True))
+    except ValueError as e:
+        if not api_key:
+            raise AnalysisError("llm_failed", f"❌ {str(e)}")
+        ctx.log(f"⚠️ {str(e)}，仅使用当前 API Key", "warning")
+        return get_llm_pool(api_key, params["endpoint"], configured=False)
+
+
+def _resolve_journals(ctx: JobContext, params: dict, domain: str, api_key: str) -> list[str]:
+    """
+    Top journals of a domain (if enabled).
+    
+    Resumed runs reuse the list persisted by the earlier run, so they resolve
+    to the same corpus and extraction checkpoint.
+    
+    Returns:
+        Journal names (empty if filtering is disabled or none were found)
+    """
+    journals_by_domain = params.setdefault("journals_by_domain", {})
+    journals = journals_by_domain.get(domain)
+    if journals is not None:
+        if journals:
+            ctx.log(f"♻️ 沿用已识别的 {len(journals)} 个1区期刊（{domain}）")
+        return journals
+    if not params["use_journal_filter"]:
+        return []
+    
+    journals = identify_top_journals(domain, api_key, params["endpoint"], pool=_llm_pool(ctx, params, api_key),
+                                     log=ctx.log)
+    if journals:
+        ctx.log(f"✅ 已识别 {len(journals)} 个1区期刊（{domain}），将只保留来自这些期刊的论文", "success")
     else:
-        st.warning("⚠️ 未检测到中文字体，热力图可能显示方框。请参考侧边栏的字体安装说明。")
+        ctx.log(f"ℹ️ 未识别到期刊（{domain}），将搜索所有论文")
+    journals_by_domain[domain] = journals
+    ctx.update_params(journals_by_domain=journals_by_domain)
+    return journals
+
+
+def _fetch_domain_papers(ctx: JobContext, params: dict, domain: str, journals: list[str]) -> Corpus:
+    """
+    Fetch the corpus of one domain, retrying without the journal filter if it finds nothing.
     
-    # Add cache clearing mechanism in sidebar
-    with st.sidebar:
-        st.header("⚙️ 设置")
+    Raises:
+        AnalysisError if no papers are found
+    """
+    start_year = params["start_year"]
+    end_year = params["end_year"]
+    max_papers = params["max_papers"]
+    
+    def on_journal_progress(done: int, total: int):
+        # Domains of a comparison are fetched in parallel, so only the status message moves
+        ctx.progress(0.1, f"📚 正在查询「{domain}」的1区期刊 [{done}/{total}]")
+    
+    fetch_options = {
+        "refresh": params.get("refresh_corpus", False),
+        "source": params.get("paper_source", "openalex"),
+        "sampling": params.get("sampling", "none"),
+        "pool_factor": params.get("sampling_pool_factor", 5),
+        "partition": params.get("query_partition", "none"),
+        "log": ctx.log,
+        "progress_callback": on_journal_progress,
+    }
+    papers = load_or_fetch_corpus(domain, start_year, end_year, journals if journals else None,
+                                  max_papers=max_papers, **fetch_options)
+    
+    # If journal filtering resulted in no papers, try without filtering
+    if not papers and journals:
+        ctx.log(f"⚠️ 在指定期刊中未找到「{domain}」的论文，尝试搜索所有论文...", "warning")
+        papers = load_or_fetch_corpus(domain, start_year, end_year, None, max_papers=max_papers, **fetch_options)
+    
+    if not papers:
+        raise AnalysisError("no_papers", f"❌ 未找到「{domain}」的任何论文")
+    
+    source_label = "本地 OpenAlex 索引" if fetch_options["source"] == "local" else "OpenAlex"
+    ctx.log(f"✅ 已从 {source_label} 获取 {len(papers)} 篇「{domain}」论文", "success")
+    sampling_report = papers.metadata.get("sampling")
+    if sampling_report:
+        ctx.log(f"🎯 分层抽样：从 {sampling_report['pool_size']} 篇候选论文（{sampling_report['strata']} 个层）"
+                f"中按比例抽取 {sampling_report['sample_size']} 篇")
+        if "pool_limit" in sampling_report:
+            ctx.log(f"⚠️ 候选池上限为 {sampling_report['pool_limit']} 篇，小于最大论文数量 × 候选池倍数", "warning")
+    return papers
+
+
+def _extract_keywords_job(ctx: JobContext, params: dict, papers: list[dict], domain: str,
+                          journals: list[str], api_key: str,
+                          known_keywords: dict[str, list[str]] = None,
+                          top_k: int = None) -> tuple[list[dict], list[list[str]], dict]:
+    """
+    Budget-planned, checkpointed LLM keyword extraction shared by all job kinds.
+    
+    With params["extraction_backend"] other than "remote", papers are
+    extracted offline by that backend (no token budget applies); otherwise
+    requests are spread over the LLM backend pool (see _llm_pool).
+    
+    Args:
+        ctx: Job context
+        params: Job parameters
+        papers: Papers to extract (each work once)
+        domain: Domain label for the checkpoint fingerprint
+        journals: Journals used for the fetch (part of the fingerprint)
+        api_key: LLM API key
+        known_keywords: Optional keywords by paper ID from an earlier run;
+                        these papers are not sent to the LLM again
+        top_k: Number of keywords displayed; with params["early_stop"],
+               papers are extracted in a seeded random order and extraction
+               stops once their ranking has converged
         
-        # LLM API Configuration
-        st.subheader("🔑 LLM API 配置")
-        st.markdown("**⚠️ 必须配置 API Key 才能使用本工具**")
+    Returns:
+        Tuple of (papers with keywords, their keyword lists, run report with
+        paper_count, failed_papers, plan, usage, concurrency, latency, backends
+        and early_stop)
         
-        # API Key input - prominent and required
-        api_key_input = st.text_input(
-            "API Key (必填)",
-            value="",
-            type="password",
+    Raises:
+        AnalysisError if no keywords could be extracted
+    """
+    # Planning and extraction index papers at random: build the dictionaries once
+    papers = list(papers)
+    backend = None
+    pool = None
+    if params.get("extraction_backend", "remote") != "remote":
+        try:
+            backend = get_extraction_backend(params["extraction_backend"], params.get("local_model_path"))
+        except RuntimeError as e:
+            raise AnalysisError("llm_failed", f"❌ {str(e)}")
+    else:
+        pool = _llm_pool(ctx, params, api_key)
+        if len(pool.backends) > 1:
+            ctx.log(f"🔀 请求将分配到 {len(pool.backends)} 个 LLM 后端")
+    
+    # Per-paper checkpoint of this exact run (domain, years, journals, papers, extractor)
+    checkpoint = ExtractionCheckpoint(run_fingerprint(
+        domain, params["start_year"], params["end_year"], journals, [paper.get("id", "") for paper in papers],
+        extractor=backend.fingerprint if backend is not None else None
+    ))
+    if known_keywords:
+        known = {paper["id"]: known_keywords[paper["id"]] for paper in papers if paper.get("id") in known_keywords}
+        if known:
+            checkpoint.seed(known)
+            ctx.log(f"♻️ 沿用上次结果中 {len(known)} 篇论文的关键词，仅提取新增论文")
+    checkpointed = checkpoint.completed()
+    
+    # Plan the extraction run against the token budget and report projections;
+    # checkpointed papers (and offline extraction) cost nothing
+    token_budget = TokenBudget(**params["token_budget"])
+    max_concurrency = params["max_concurrency"]
+    estimates = [
+        0 if backend is not None or paper.get("id") in checkpointed else estimate
+        for paper, estimate in zip(papers, estimate_extraction_tokens(papers))
+    ]
+    plan = plan_extraction(
+        papers,
+        estimates,
+        token_budget,
+        priority=params["extraction_priority"],
+        concurrency=max(1, max_concurrency // 2),
+        shuffle_seed=EARLY_STOP_SHUFFLE_SEED if top_k and params.get("early_stop") else None
+    )
+    if backend is None:
+        ctx.log(f"💰 预计消耗约 {plan.estimated_tokens:,} Token，"
+                f"费用约 ¥{plan.projected_cost:.4f}，"
+                f"耗时约 {plan.projected_seconds / 60:.1f} 分钟")
+    else:
+        ctx.log(f"🖥️ 使用离线提取后端 {backend.fingerprint}，不消耗 Token")
+    if plan.skipped:
+        ctx.log(f"⚠️ Token 预算不足，将按优先级处理 {len(plan.selected)} 篇论文，"
+                f"跳过 {len(plan.skipped)} 篇", "warning")
+    if top_k and params.get("early_stop"):
+        ctx.log("🔀 已启用提前停止，论文将按随机顺序提取，使收敛判断基于无偏样本")
+    papers = [papers[i] for i in plan.selected]
+    scheduler = LLMScheduler(token_budget)
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=min(2, max_concurrency), max_limit=max_concurrency)
+    # Always tracks achieved latency; sends duplicates only with hedge_requests
+    hedger = HedgedCaller(max_extra_load=HEDGE_MAX_EXTRA_LOAD if params.get("hedge_requests", True) else 0.0,
+                          max_workers=2 * max_concurrency)
+    convergence = None
+    if top_k and params.get("early_stop"):
+        convergence = TopKConvergenceMonitor(top_k, tolerance=params.get("early_stop_tolerance", 0.1))
+    
+    stage = "🤖 LLM 智能提取关键词" if backend is None else "🖥️ 离线提取关键词"
+    ctx.progress(0.2, f"{stage}...")
+    
+    def on_extraction_progress(done: int, total: int):
+        # At most ~100 updates, so offline backends with thousands of papers are not slowed down
+        if done == total or done % max(1, total // 100) == 0:
+            ctx.progress(0.2 + 0.7 * done / total, f"{stage} [{done}/{total}]")
+    
+    try:
+        results = extract_keywords_by_paper(
+            papers,
+            api_key=api_key,
+            endpoint=params["endpoint"],
+            scheduler=scheduler,
+            limiter=limiter,
+            progress_callback=on_extraction_progress,
+            checkpoint=checkpoint,
+            convergence=convergence,
+            hedger=hedger,
+            backend=backend,
+            pool=pool,
+            log=ctx.log
+        )
+    except JobCancelled:
+        raise
+    except Exception as e:
+        raise AnalysisError("llm_failed", str(e))
+    finally:
+        hedger.shutdown()
+    
+    extracted = [(paper, keywords) for paper, keywords in zip(papers, results) if keywords]
+    if not extracted:
+        raise AnalysisError("no_keywords", "⚠️ 无法从论文中提取关键词")
+    
+    if checkpointed:
+        ctx.log(f"♻️ 其中 {len(checkpointed)} 篇论文的关键词来自检查点，未重复调用 LLM")
+    early_stop = None
+    if convergence is not None and convergence.converged:
+        early_stop = {
+            "converged_at": convergence.converged_at,
+            "saved_calls": convergence.saved_calls,
+            "stability": convergence.stability,
+            "tolerance": convergence.tolerance,
+        }
+        ctx.log(f"⏹️ 前 {top_k} 个关键词的排名在 {convergence.converged_at} 篇论文后已收敛，"
+                f"提前停止提取，节省 {convergence.saved_calls} 次 LLM 调用")
+    ctx.log(f"✅ 已从 {len(extracted)} 篇论文中提取关键词", "success")
+    
+    report = {
+        "paper_count": len(papers) - (early_stop["saved_calls"] if early_stop else 0),
+        "failed_papers": len(checkpoint.failed()),
+        "plan": {
+            "estimated_tokens": plan.estimated_tokens,
+            "projected_cost": plan.projected_cost,
+            "projected_seconds": plan.projected_seconds,
+        },
+        "usage": scheduler.summary(),
+        "concurrency": limiter.summary(),
+        "latency": hedger.summary(),
+        "backends": pool.summary() if pool is not None else [],
+        "early_stop": early_stop,
+    }
+    return [paper for paper, _ in extracted], [keywords for _, keywords in extracted], report
+
+
+def _merge_keyword_variants(ctx: JobContext, params: dict,
+                            keyword_lists: list[list[str]]) -> tuple[list[list[str]], dict[str, str]]:
+    """
+    Map keyword variants to their cluster representative (if enabled).
+    
+    Returns:
+        Tuple of (clustered keyword lists, mapping from variant to representative)
+    """
+    from keyword_clustering import cluster_keywords
+    
+    keyword_mapping = {}
+    if params["merge_similar_keywords"]:
+        ctx.progress(0.92, "🧩 正在合并语义相近的关键词...")
+        try:
+            keyword_lists, keyword_mapping = cluster_keywords(keyword_lists, backend=params["embedding_backend"])
+        except RuntimeError as e:
+            ctx.log(f"⚠️ {str(e)}，已跳过关键词合并", "warning")
+        if keyword_mapping:
+            ctx.log(f"🧩 已将 {len(keyword_mapping)} 个关键词变体合并到其代表关键词")
+    return keyword_lists, keyword_mapping
+
+
+def run_analysis(ctx: JobContext, params: dict, api_key: str,
+                 known_keywords: dict[str, list[str]] = None) -> dict:
+    """
+    Run the full analysis pipeline as a background job.
+    
+    Runs outside the Streamlit script thread, so progress and messages are
+    reported through the job context instead of st.* calls.
+    
+    Args:
+        ctx: Job context for progress, log messages and cancellation
+        params: Analysis parameters (persisted with the job)
+        api_key: LLM API key (kept in memory only)
+        known_keywords: Optional keywords by paper ID from an earlier run
+                        (incremental refresh); only other papers hit the LLM
+        
+    Returns:
+        JSON-serializable analysis result; "matrix" holds the keywords and
+        the matrix's non-zero upper-triangle entries (see sparse_entries)
+        
+    Raises:
+        AnalysisError if the pipeline cannot produce a matrix
+    """
+    from paper_dedup import deduplicate_papers
+    
+    domain = params["domain"]
+    max_keywords = params["max_keywords"]
+    
+    # Step 1: Identify top journals (if enabled)
+    ctx.progress(0.02, "🔍 正在识别1区期刊...")
+    journals = _resolve_journals(ctx, params, domain, api_key)
+    
+    # Step 2: Fetch papers from OpenAlex
+    ctx.progress(0.1, "📚 正在从 OpenAlex 获取论文数据...")
+    papers = _fetch_domain_papers(ctx, params, domain, journals)
+    
+    # Collapse preprint/published versions and errata of the same work
+    if params["deduplicate"]:
+        papers, collapsed_count = deduplicate_papers(papers)
+        if collapsed_count:
+            ctx.log(f"🧹 已合并 {collapsed_count} 篇重复论文，剩余 {len(papers)} 篇")
+    
+    # Step 3: Extract keywords from papers using LLM (mandatory in v3.0)
+    extracted_papers, keyword_lists, report = _extract_keywords_job(
+        ctx, params, papers, domain, journals, api_key, known_keywords=known_keywords, top_k=max_keywords
+    )
+    paper_keywords = {paper["id"]: keywords for paper, keywords in zip(extracted_papers, keyword_lists)}
+    keyword_lists, keyword_mapping = _merge_keyword_variants(ctx, params, keyword_lists)
+    
+    # Count total unique keywords
+    all_keywords = set()
+    for keywords in keyword_lists:
+        all_keywords.update(keywords)
+    total_keywords = len(all_keywords)
+    
+    # Show info if keywords will be limited
+    if total_keywords > max_keywords:
+        ctx.log(f"ℹ️ 共提取 {total_keywords} 个关键词，将显示出现频率最高的前 {max_keywords} 个关键词")
+    
+    # Step 4: Build co-occurrence matrix
+    ctx.progress(0.95, "📊 正在构建共现矩阵...")
+    matrix = build_cooccurrence_matrix(keyword_lists, max_keywords=max_keywords)
+    
+    # Check if matrix has data
+    if matrix.empty or len(matrix) == 0:
+        raise AnalysisError("empty_matrix", "⚠️ 没有可用的共现数据进行可视化")
+    
+    ctx.log(f"✅ 已构建 {len(matrix)}×{len(matrix)} 共现矩阵", "success")
+    keyword_selection = matrix.attrs["keyword_selection"]
+    if not keyword_selection["exact"]:
+        ctx.log(f"⚠️ 关键词频率由概率草图估计，前 {max_keywords} 个关键词可能与精确统计略有出入", "warning")
+    
+    return {
+        "journals": journals,
+        "total_keywords": total_keywords,
+        "keyword_mapping": keyword_mapping,
+        "keyword_selection": keyword_selection,
+        "matrix": {"keywords": list(matrix.index), **sparse_entries(matrix.values)},
+        "paper_keywords": paper_keywords,
+        **report,
+    }
+
+
+def run_comparison(ctx: JobContext, params: dict, api_key: str) -> dict:
+    """
+    Compare several domains as a background job.
+    
+    Domains are fetched concurrently and their corpora unioned by work ID, so a
+    paper found by several domains is extracted only once. Keywords are merged
+    across the union and every domain gets a co-occurrence matrix over the same
+    vocabulary (the union of each domain's top keywords), which makes the
+    matrices directly comparable.
+    
+    Args:
+        ctx: Job context for progress, log messages and cancellation
+        params: Comparison parameters (persisted with the job), with "domains"
+        api_key: LLM API key (kept in memory only)
+        
+    Returns:
+        JSON-serializable comparison result; "matrices" holds each domain's
+        sparse entries over "vocabulary" (see sparse_entries)
+        
+    Raises:
+        AnalysisError if the pipeline cannot produce matrices
+    """
+    from paper_dedup import find_duplicate_groups
+    
+    domains = params["domains"]
+    max_keywords = params["max_keywords"]
+    
+    # Step 1: Identify top journals per domain (if enabled)
+    ctx.progress(0.02, "🔍 正在识别各领域的1区期刊...")
+    journals_by_domain = {domain: _resolve_journals(ctx, params, domain, api_key) for domain in domains}
+    
+    # Step 2: Fetch all domains concurrently
+    ctx.progress(0.1, f"📚 正在并行获取 {len(domains)} 个领域的论文数据...")
+    with ThreadPoolExecutor(max_workers=len(domains)) as executor:
+        corpora = list(executor.map(
+            lambda domain: _fetch_domain_papers(ctx, params, domain, journals_by_domain[domain]),
+            domains
+        ))
+    
+    # Union by work ID; members holds each domain's papers as indices into the union
+    papers = []
+    index_by_id = {}
+    members = {domain: set() for domain in domains}
+    for domain, corpus in zip(domains, corpora):
+        for paper in corpus:
+            if paper["id"] not in index_by_id:
+                index_by_id[paper["id"]] = len(papers)
+                papers.append(paper)
+            members[domain].add(index_by_id[paper["id"]])
+    
+    # Collapse preprint/published versions; domains keep the representative
+    if params["deduplicate"]:
+        groups = find_duplicate_groups(papers)
+        new_index = {member: position for position, representative in enumerate(sorted(groups))
+                     for member in groups[representative]}
+        collapsed_count = len(papers) - len(groups)
+        papers = [papers[i] for i in sorted(groups)]
+        members = {domain: {new_index[i] for i in indices} for domain, indices in members.items()}
+        if collapsed_count:
+            ctx.log(f"🧹 已合并 {collapsed_count} 篇重复论文，剩余 {len(papers)} 篇")
+    
+    domain_count = [0] * len(papers)
+    for indices in members.values():
+        for i in indices:
+            domain_count[i] += 1
+    shared_papers = sum(1 for count in domain_count if count > 1)
+    saved_extractions = sum(len(indices) for indices in members.values()) - len(papers)
+    ctx.log(f"🔗 共 {len(papers)} 篇不同论文，其中 {shared_papers} 篇被多个领域共享，"
+            f"节省 {saved_extractions} 次重复提取")
+    
+    # Step 3: Extract each unique paper once and merge keyword variants across all domains
+    all_journals = sorted({journal for journals in journals_by_domain.values() for journal in journals})
+    extracted_papers, keyword_lists, report = _extract_keywords_job(
+        ctx, params, papers, " | ".join(sorted(domains)), all_journals, api_key
+    )
+    keyword_lists, keyword_mapping = _merge_keyword_variants(ctx, params, keyword_lists)
+    keywords_by_id = {paper["id"]: keywords for paper, keywords in zip(extracted_papers, keyword_lists)}
+    
+    lists_by_domain = {
+        domain: [keywords_by_id[papers[i]["id"]] for i in sorted(members[domain]) if papers[i]["id"] in keywords_by_id]
+        for domain in domains
+    }
+    
+    # Step 4: Union vocabulary of each domain's top keywords, aligned matrices over it
+    ctx.progress(0.95, "📊 正在构建对齐的共现矩阵...")
+    per_domain_top = max(5, math.ceil(max_keywords / len(domains)))
+    keyword_freq = {domain: Counter(kw for keywords in lists for kw in keywords)
+                    for domain, lists in lists_by_domain.items()}
+    top_keywords = {domain: {kw for kw, _ in freq.most_common(per_domain_top)}
+                    for domain, freq in keyword_freq.items()}
+    vocabulary = sorted(set().union(*top_keywords.values()))
+    matrices = {domain: build_cooccurrence_matrix(lists, vocabulary=vocabulary)
+                for domain, lists in lists_by_domain.items()}
+    
+    if not vocabulary or all(matrix.values.sum() == 0 for matrix in matrices.values()):
+        raise AnalysisError("empty_matrix", "⚠️ 没有可用的共现数据进行可视化")
+    
+    # Jaccard overlap of the domains' top keyword sets
+    top_overlap = []
+    for i, first in enumerate(domains):
+        for second in domains[i + 1:]:
+            union = top_keywords[first] | top_keywords[second]
+            overlap = len(top_keywords[first] & top_keywords[second]) / len(union) if union else 0.0
+            top_overlap.append([first, second, round(overlap, 3)])
+    
+    ctx.log(f"✅ 已为 {len(domains)} 个领域构建 {len(vocabulary)}×{len(vocabulary)} 对齐共现矩阵", "success")
+    
+    return {
+        "domains": domains,
+        "journals_by_domain": journals_by_domain,
+        "domain_paper_counts": {domain: len(lists) for domain, lists in lists_by_domain.items()},
+        "unique_papers": len(papers),
+        "shared_papers": shared_papers,
+        "saved_extractions": saved_extractions,
+        "keyword_mapping": keyword_mapping,
+        "vocabulary": vocabulary,
+        "matrices": {domain: sparse_entries(matrix.values) for domain, matrix in matrices.items()},
+        "keyword_counts": {domain: [freq[kw] for kw in vocabulary] for domain, freq in keyword_freq.items()},
+        "top_overlap": top_overlap,
+        **report,
+    }
+
+
+def run_snapshot_refresh(ctx: JobContext, params: dict, api_key: str) -> dict:
+    """
+    Precompute domain snapshots as a background job.
+    
+    Runs the single-domain pipeline for each domain with a freshly fetched
+    corpus and stores result and rendered heatmap as the domain's snapshot.
+    With params["incremental"], journals and per-paper keywords of the
+    previous snapshot are reused, so only newly published papers are sent
+    to the LLM.
+    
+    Args:
+        ctx: Job context for progress, log messages and cancellation
+        params: Analysis parameters plus "domains" and "incremental"
+        api_key: LLM API key (kept in memory only)
+        
+    Returns:
+        Dictionary with refreshed domains and failure messages by domain
+        
+    Raises:
+        AnalysisError if no snapshot could be refreshed
+    """
+    import pandas as pd
+    
+    domains = params["domains"]
+    journals_by_domain = params.setdefault("journals_by_domain", {})
+    refreshed = []
+    failed = {}
+    
+    for i, domain in enumerate(domains):
+        domain_ctx = ctx.scoped(i / len(domains), (i + 1) / len(domains), f"[{i + 1}/{len(domains)}] {domain}")
+        domain_ctx.progress(0.0, "⏳ 开始刷新快照...")
+        
+        known_keywords = None
+        previous = load_snapshot(domain) if params["incremental"] else None
+        if previous is not None:
+            known_keywords = previous["result"].get("paper_keywords")
+            journals_by_domain.setdefault(domain, previous["result"]["journals"])
+        
+        # journals_by_domain is shared, so identified journals are persisted for every domain
+        domain_params = {**params, "domain": domain, "refresh_corpus": True}
+        try:
+            result = run_analysis(domain_ctx, domain_params, api_key, known_keywords=known_keywords)
+        except AnalysisError as e:
+            failed[domain] = str(e)
+            domain_ctx.log(f"⚠️ 快照刷新失败：{str(e)}", "warning")
+            continue
+        
+        keywords = result["matrix"]["keywords"]
+        fig = render_heatmap(pd.DataFrame(dense_values(result["matrix"], len(keywords)), index=keywords,
+                                          columns=keywords))
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format="png")
+        
+        snapshot_params = {key: value for key, value in domain_params.items()
+                           if key not in ("domains", "incremental", "refresh_corpus", "journals_by_domain")}
+        save_snapshot(domain, snapshot_params, result, buffer.getvalue())
+        refreshed.append(domain)
+        domain_ctx.log("✅ 快照已更新", "success")
+    
+    if not refreshed:
+        raise AnalysisError("snapshot_failed", "❌ 所有领域的快照均刷新失败")
+    return {"refreshed": refreshed, "failed": failed}
+
+
+def submit_snapshot_refresh(domains: list[str], params: dict, api_key: str, lookback_years: int,
+                            incremental: bool = True) -> str:
+    """
+    Queue a snapshot refresh job.
+    
+    Args:
+        domains: Domains to refresh
+        params: Analysis parameters (without domain and years)
+        api_key: LLM API key
+        lookback_years: Snapshots cover the current year and the years before it
+        incremental: Reuse keywords of the previous snapshots
+        
+    Returns:
+        Job ID
+    """
+    end_year = date.today().year
+    job_params = {
+        **params,
+        "domain": f"⚡ 领域快照（{'、'.join(domains)}）",
+        "domains": domains,
+        "start_year": end_year - lookback_years + 1,
+        "end_year": end_year,
+        "incremental": incremental,
+    }
+    return get_job_queue().submit("snapshot", job_params, run_snapshot_refresh, api_key)
+
+
+def _scheduled_snapshot_refresh(domains: list[str], config: dict):
+    """
+    Scheduler callback: refresh stale snapshots with the server's API key
+    (LLM_API_KEY environment variable), one refresh job at a time.
+    
+    The server's key is only used with DEFAULT_ENDPOINT. For another saved
+    endpoint the refresh runs on the configured pool backends alone (their
+    own keys), or is skipped if there are none.
+    """
+    params = config["params"]
+    api_key = os.getenv("LLM_API_KEY", "")
+    if params.get("extraction_backend", "remote") == "remote":
+        if params["endpoint"].rstrip("/") != DEFAULT_ENDPOINT:
+            api_key = ""
+        if not validate_api_key(api_key):
+            try:
+                configured = params.get("llm_pool", True) and load_backends()
+            except ValueError:
+                configured = []
+            if not configured:
+                reason = ("LLM_API_KEY is only sent to " + DEFAULT_ENDPOINT
+                          if params["endpoint"].rstrip("/") != DEFAULT_ENDPOINT else "LLM_API_KEY is not set")
+                print(f"Skipping scheduled snapshot refresh of {', '.join(domains)}: {reason} "
+                      f"and no LLM backends are configured", file=sys.stderr)
+                return
+    if any(job["status"] in ACTIVE_STATES for job in get_job_queue().list_jobs(kind="snapshot", limit=5)):
+        return
+    submit_snapshot_refresh(domains, params, api_key, config["lookback_years"])
+
+
+def render_keyword_mapping(keyword_mapping: dict[str, str]):
+    """
+    Display which keyword variants were merged into which representative.
+    """
+    import pandas as pd
+    
+    if keyword_mapping:
+        with st.expander("📋 查看关键词合并详情"):
+            st.dataframe(pd.DataFrame(
+                sorted(keyword_mapping.items(), key=lambda item: item[1]),
+                columns=["原关键词", "合并为"]
+            ))
+
+
+def render_run_report(result: dict):
+    """
+    Display token usage, cost and concurrency of a finished job.
+    """
+    import pandas as pd
+    
+    usage = result["usage"]
+    concurrency = result["concurrency"]
+    plan = result["plan"]
+    with st.expander("📒 运行报告"):
+        st.markdown(f"""
+        - LLM 请求数: {usage['requests']}
+        - Token 用量: {usage['total_tokens']:,}（输入 {usage['prompt_tokens']:,} / 输出 {usage['completion_tokens']:,}）
+        - 实际费用: ¥{usage['cost']:.4f}（预计 ¥{plan['projected_cost']:.4f}）
+        - 限流等待: {usage['throttle_wait_seconds']} 秒
+        - 并发数: 当前 {concurrency['current_limit']} / 峰值 {concurrency['peak_limit']}
+        - 基线延迟: {concurrency['baseline_latency']} 秒
+        - 限流/超时事件: {len(concurrency['throttle_events'])} 次
+        """)
+        latency = result.get("latency")
+        if latency and latency["calls"]:
+            st.markdown(f"- ⚡ 单篇延迟: p50 {latency['p50']} 秒 / p99 {latency['p99']} 秒，"
+                        f"对冲请求 {latency['hedges']} 次（{latency['hedge_rate']:.1%}，"
+                        f"其中 {latency['hedge_wins']} 次先于原请求返回）")
+        backends = result.get("backends") or []
+        if len(backends) > 1:
+            st.markdown("- 🔀 LLM 后端: " + "；".join(
+                f"{backend['backend']} {backend['requests']} 次请求 / {backend['failures']} 次失败"
+                + ("" if backend["healthy"] else "（已摘除）")
+                for backend in backends
+            ))
+        keyword_selection = result.get("keyword_selection")
+        if keyword_selection and keyword_selection["streaming"]:
+            st.markdown("- 🧮 关键词筛选: 概率草图（Space-Saving + Count-Min）估计频率，" + (
+                "已确认与精确统计一致" if keyword_selection["exact"]
+                else "前 N 个关键词可能与精确统计略有出入"))
+        early_stop = result.get("early_stop")
+        if early_stop:
+            st.markdown(f"- ⏹️ 提前停止: 关键词排名在 {early_stop['converged_at']} 篇论文后收敛"
+                        f"（置信度 {early_stop['stability']:.0%}，容差 {early_stop['tolerance']:.0%}），"
+                        f"节省 {early_stop['saved_calls']} 次 LLM 调用")
+        if concurrency['throttle_events']:
+            st.dataframe(pd.DataFrame(
+                concurrency['throttle_events'],
+                columns=["时间 (秒)", "类型", "调整后并发数"]
+            ))
+
+
+def render_export_buttons(result: dict, params: dict = None):
+    """
+    Download buttons for the exports of an analysis result.
+    
+    Files are only generated when a button is clicked (and then cached on
+    disk by result hash), so rendering the page does not serialize anything.
+    
+    Args:
+        result: Result dictionary returned by run_analysis
+        params: Analysis parameters (written to the run metadata)
+    """
+    st.subheader("📥 导出数据")
+    columns = st.columns(len(EXPORT_FORMATS))
+    for column, (export_format, spec) in zip(columns, EXPORT_FORMATS.items()):
+        with column:
+            st.download_button(
+                spec.label,
+                data=lambda export_format=export_format: export_bytes(result, export_format, params),
+                file_name=spec.file_name,
+                mime=spec.mime,
+                key=f"export_{export_format}",
+                on_click="ignore",
+            )
+
+
+def render_analysis_result(result: dict, figure_path: str = None, params: dict = None):
+    """
+    Display a finished analysis: journal list, heatmap, summary, run report
+    and data exports.
+    
+    Args:
+        result: Result dictionary returned by run_analysis
+        figure_path: Optional pre-rendered heatmap image (snapshots)
+        params: Analysis parameters (for the exported run metadata)
+    """
+    import pandas as pd
+    
+    journals = result["journals"]
+    if journals:
+        with st.expander("📋 查看期刊列表（只会保留这些期刊的论文）"):
+            st.markdown("**识别到的1区期刊：**")
+            for i, journal in enumerate(journals, 1):
+                st.write(f"{i}. {journal}")
+    
+    render_keyword_mapping(result["keyword_mapping"])
+    
+    keywords = result["matrix"]["keywords"]
+    matrix = pd.DataFrame(dense_values(result["matrix"], len(keywords)), index=keywords, columns=keywords)
+    
+    # Display final heatmap (rendered now unless a snapshot already holds it)
+    st.subheader("📈 关键词共现热力图")
+    if figure_path:
+        st.image(figure_path)
+    else:
+        with st.spinner("🎨 正在生成热力图..."):
+            fig = render_heatmap(matrix)
+        st.pyplot(fig)
+    
+    # Display summary statistics
+    st.subheader("📊 分析摘要")
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("分析论文数", result["paper_count"])
+    with col2:
+        st.metric("唯一关键词数", len(matrix))
+    with col3:
+        total_cooccurrences = int(matrix.sum().sum() / 2)  # Divide by 2 because matrix is symmetric
+        st.metric("总共现次数", total_cooccurrences)
+    
+    render_run_report(result)
+    render_export_buttons(result, params)
+
+
+def render_comparison_result(result: dict):
+    """
+    Display a finished comparison: per-domain heatmaps, overlap and difference
+    heatmaps, keyword frequencies and run report.
+    
+    Matrices are normalized to co-occurrences per 100 papers before they are
+    compared, so domains with different corpus sizes stay comparable.
+    
+    Args:
+        result: Result dictionary returned by run_comparison
+    """
+    import numpy as np
+    import pandas as pd
+    
+    domains = result["domains"]
+    vocabulary = result["vocabulary"]
+    
+    journals_by_domain = result["journals_by_domain"]
+    if any(journals_by_domain.values()):
+        with st.expander("📋 查看各领域期刊列表"):
+            for domain, journals in journals_by_domain.items():
+                st.markdown(f"**{domain}：** {'、'.join(journals) if journals else '所有期刊'}")
+    
+    render_keyword_mapping(result["keyword_mapping"])
+    
+    # Display summary statistics
+    st.subheader("📊 对比摘要")
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("对比领域数", len(domains))
+    with col2:
+        st.metric("不同论文数", result["unique_papers"])
+    with col3:
+        st.metric("跨领域共享论文", result["shared_papers"])
+    with col4:
+        st.metric("节省的重复提取", result["saved_extractions"])
+    
+    matrices = {
+        domain: pd.DataFrame(dense_values(entries, len(vocabulary)), index=vocabulary, columns=vocabulary)
+        for domain, entries in result["matrices"].items()
+    }
+    rates = {
+        domain: matrix / max(1, result["domain_paper_counts"][domain]) * 100
+        for domain, matrix in matrices.items()
+    }
+    
+    # Per-domain heatmaps over the shared vocabulary
+    st.subheader("📈 各领域关键词共现热力图")
+    for tab, domain in zip(st.tabs(domains), domains):
+        with tab:
+            st.caption(f"{result['domain_paper_counts'][domain]} 篇论文")
+            with st.spinner("🎨 正在生成热力图..."):
+                st.pyplot(render_heatmap(matrices[domain], title=f"{domain} 关键词共现热力图"))
+    
+    # Overlap: co-occurrence rate every domain reaches
+    st.subheader("🤝 共同热点")
+    overlap = pd.DataFrame(np.minimum.reduce([rate.values for rate in rates.values()]),
+                           index=vocabulary, columns=vocabulary)
+    with st.spinner("🎨 正在生成热力图..."):
+        st.pyplot(render_heatmap(overlap, title="各领域共有的关键词共现", cmap="Greens",
+                                 cbar_label="每百篇论文共现次数（各领域最小值）", fmt=".1f"))
+    
+    # Difference between two domains
+    st.subheader("⚖️ 领域差异")
+    col1, col2 = st.columns(2)
+    with col1:
+        first = st.selectbox("领域 A", domains, index=0, key="compare_first")
+    with col2:
+        second = st.selectbox("领域 B", domains, index=1, key="compare_second")
+    if first == second:
+        st.info("ℹ️ 请选择两个不同的领域")
+    else:
+        with st.spinner("🎨 正在生成热力图..."):
+            st.pyplot(render_heatmap(rates[first] - rates[second], title=f"{first} − {second}",
+                                     cmap="RdBu_r", center=0,
+                                     cbar_label="每百篇论文共现次数之差（红色: A 更多）", fmt=".1f"))
+    
+    # Keyword frequencies and top keyword overlap
+    with st.expander("📋 查看关键词出现率（每百篇论文）"):
+        frequencies = pd.DataFrame(result["keyword_counts"], index=vocabulary)
+        for domain in domains:
+            frequencies[domain] = frequencies[domain] / max(1, result["domain_paper_counts"][domain]) * 100
+        st.dataframe(frequencies.round(1))
+    if result["top_overlap"]:
+        with st.expander("📋 查看高频关键词重合度（Jaccard）"):
+            st.dataframe(pd.DataFrame(result["top_overlap"], columns=["领域 A", "领域 B", "Jaccard 重合度"]))
+    
+    render_run_report(result)
+
+
+def render_snapshot_panel(analysis_params: dict, api_key: str = ""):
+    """
+    List stored domain snapshots and edit the precomputed domain list.
+    
+    Args:
+        analysis_params: Current sidebar settings, saved for scheduled refreshes
+        api_key: LLM API key from the sidebar (needed to refresh now)
+    """
+    config = load_snapshot_config()
+    snapshots = list_snapshots()
+    with st.expander(f"⚡ 领域快照（{len(snapshots)} 个）"):
+        for summary in snapshots:
+            col1, col2 = st.columns([4, 1])
+            with col1:
+                st.write(f"{summary['domain']} · {summary['start_year']}-{summary['end_year']} · "
+                         f"{summary['paper_count']} 篇 · 数据截至 "
+                         f"{datetime.fromtimestamp(summary['created_at']):%m-%d %H:%M}")
+            with col2:
+                if st.button("查看", key=f"snapshot_view_{summary['domain']}"):
+                    attach_snapshot(summary["domain"])
+                    st.rerun()
+        
+        st.markdown("**预计算领域列表**")
+        domains_text = st.text_area(
+            "领域（每行一个）",
+            value="\n".join(config["domains"]),
+            help="这些领域的分析结果会在后台定期预计算，查询时即时返回"
+        )
+        col1, col2 = st.columns(2)
+        with col1:
+            lookback_years = st.number_input("覆盖最近年数", min_value=1, max_value=20,
+                                             value=int(config["lookback_years"]), step=1)
+        with col2:
+            refresh_hours = st.number_input("刷新间隔（小时）", min_value=1, max_value=24 * 30,
+                                            value=int(config["refresh_hours"]), step=1)
+        st.caption("服务端会按刷新间隔自动增量刷新过期快照（需设置环境变量 LLM_API_KEY，仅用于默认端点；"
+                   "其他端点只使用已配置的 LLM 后端），"
+                   "保存时会一并保存左侧边栏的当前分析设置")
+        
+        domains = list(dict.fromkeys(line.strip() for line in domains_text.splitlines() if line.strip()))
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button("💾 保存配置", key="snapshot_save_config"):
+                config.update(domains=domains, lookback_years=int(lookback_years),
+                              refresh_hours=int(refresh_hours), params=analysis_params)
+                save_snapshot_config(config)
+                st.success("✅ 快照配置已保存")
+        with col2:
+            if st.button("🔄 立即刷新全部快照", key="snapshot_refresh_all", disabled=not (api_key and domains),
+                         help=None if api_key else "请先在左侧边栏配置 API Key"):
+                attach_job(submit_snapshot_refresh(domains, analysis_params, api_key, int(lookback_years)))
+                st.rerun()
+
+
+# Job function of each job kind (used to submit and resume jobs)
+JOB_RUNNERS = {
+    "analysis": run_analysis,
+    "comparison": run_comparison,
+    "snapshot": run_snapshot_refresh,
+}
+
+def render_snapshot(snapshot: dict, api_key: str = ""):
+    """
+    Display a precomputed domain snapshot, with buttons to refresh it.
+    
+    Args:
+        snapshot: Snapshot dictionary from load_snapshot
+        api_key: LLM API key from the sidebar (needed to refresh)
+    """
+    params = snapshot["params"]
+    result = snapshot["result"]
+    st.subheader(f"⚡ 领域快照：{snapshot['domain']}")
+    st.caption(f"数据截至 {datetime.fromtimestamp(snapshot['created_at']):%Y-%m-%d %H:%M} · "
+               f"{params['start_year']}-{params['end_year']} · {result['paper_count']} 篇论文")
+    
+    refresh_help = None if api_key else "请先在左侧边栏配置 API Key"
+    lookback_years = params["end_year"] - params["start_year"] + 1
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button("🔄 增量刷新", key="snapshot_incremental", disabled=not api_key,
+                     help=refresh_help or "重新获取论文，只对新增论文调用 LLM"):
+            attach_job(submit_snapshot_refresh([snapshot["domain"]], params, api_key, lookback_years))
+            st.rerun()
+    with col2:
+        if st.button("♻️ 完全重建", key="snapshot_full", disabled=not api_key,
+                     help=refresh_help or "重新获取论文并重新提取全部关键词"):
+            attach_job(submit_snapshot_refresh([snapshot["domain"]], params, api_key, lookback_years,
+                                               incremental=False))
+            st.rerun()
+    
+    render_analysis_result(result, figure_path=snapshot["figure_path"], params=params)
+
+
+JOB_STATUS_LABELS = {
+    JOB_QUEUED: "⏳ 排队中",
+    JOB_RUNNING: "🔄 运行中",
+    JOB_SUCCEEDED: "✅ 已完成",
+    JOB_FAILED: "❌ 失败",
+    JOB_CANCELLED: "⏹️ 已取消",
+    JOB_INTERRUPTED: "⚠️ 已中断",
+}
+
+
+def attach_job(job_id: str):
+    """
+    Remember the job shown in this session, also in the URL so a browser refresh re-attaches.
+    """
+    st.session_state.job_id = job_id
+    st.query_params["job"] = job_id
+    st.session_state.pop("snapshot_domain", None)
+
+
+def attach_snapshot(domain: str):
+    """
+    Show a domain snapshot instead of a job in this session.
+    """
+    st.session_state.snapshot_domain = domain
+    st.session_state.pop("job_id", None)
+    st.query_params.pop("job", None)
+
+
+def resume_job(job: dict, api_key: str):
+    """
+    Submit a new job with the parameters of an earlier one.
+    
+    The new job resolves to the same corpus and extraction checkpoint, so only
+    unprocessed and previously failed papers are sent to the LLM.
+    
+    Args:
+        job: Earlier job dictionary
+        api_key: LLM API key
+    """
+    job_id = get_job_queue().submit(job["kind"], job["params"], JOB_RUNNERS[job["kind"]], api_key)
+    attach_job(job_id)
+    st.rerun()
+
+
+def render_job(job_id: str, api_key: str = "") -> bool:
+    """
+    Display a background analysis job: progress while running, results when finished.
+    
+    Args:
+        job_id: Job ID returned by the job queue
+        api_key: LLM API key from the sidebar (needed to resume the job)
+        
+    Returns:
+        True if the job is still active (the caller should poll again)
+    """
+    queue = get_job_queue()
+    job = queue.get(job_id)
+    if job is None:
+        st.warning(f"⚠️ 未找到任务 {job_id}")
+        return False
+    
+    params = job["params"]
+    st.caption(f"任务 {job_id} · {params['domain']} · {params['start_year']}-{params['end_year']} · "
+               f"{JOB_STATUS_LABELS.get(job['status'], job['status'])}")
+    
+    # Show log messages
+    log_levels = {"success": st.success, "warning": st.warning, "error": st.error}
+    with st.expander("📜 任务日志", expanded=job["status"] in ACTIVE_STATES or job["status"] == JOB_FAILED):
+        for _, level, message in job["log"]:
+            log_levels.get(level, st.info)(message)
+    
+    if job["status"] in ACTIVE_STATES:
+        st.progress(job["progress"], text=job["message"] or "⏳ 等待执行...")
+        if st.button("⏹️ 取消任务", key=f"cancel_{job_id}"):
+            queue.cancel(job_id)
+            st.info("已请求取消，任务将在当前论文处理完成后停止")
+        return True
+    
+    resume_help = "复用检查点中已完成的论文，只处理剩余和失败的论文" if api_key else "请先在左侧边栏配置 API Key"
+    if job["status"] == JOB_SUCCEEDED:
+        failed_papers = job["result"].get("failed_papers", 0)
+        if failed_papers and st.button(f"🔁 重试 {failed_papers} 篇失败的论文", key=f"retry_{job_id}",
+                                       disabled=not api_key, help=resume_help):
+            resume_job(job, api_key)
+        if job["kind"] == "comparison":
+            render_comparison_result(job["result"])
+        elif job["kind"] == "snapshot":
+            result = job["result"]
+            st.success(f"✅ 已更新 {len(result['refreshed'])} 个领域快照")
+            for domain in result["refreshed"]:
+                if st.button(f"⚡ 查看快照：{domain}", key=f"snapshot_{job_id}_{domain}"):
+                    attach_snapshot(domain)
+                    st.rerun()
+            for domain, error in result["failed"].items():
+                st.warning(f"⚠️ {domain}：{error}")
+        else:
+            render_analysis_result(job["result"], params=params)
+    elif job["status"] in (JOB_FAILED, JOB_CANCELLED, JOB_INTERRUPTED):
+        if st.button("🔁 继续任务", key=f"resume_{job_id}", disabled=not api_key, help=resume_help):
+            resume_job(job, api_key)
+    
+    if job["status"] == JOB_FAILED:
+        st.error(job["error"])
+        if job["error_kind"] == "no_papers":
+            st.info(NO_PAPERS_HELP)
+        elif job["error_kind"] == "llm_failed":
+            st.error("❌ LLM 关键词提取失败")
+            st.info(LLM_FAILURE_HELP)
+        else:
+            st.info("💡 应用程序仍在运行。请重试或调整搜索参数。")
+    elif job["status"] == JOB_CANCELLED:
+        st.info("⏹️ 任务已取消")
+    elif job["status"] == JOB_INTERRUPTED:
+        st.warning("⚠️ 任务因服务重启而中断，可点击「继续任务」从检查点恢复")
+    return False
+
+
+def main():
+    st.title("🔬 研究热点分析工具")
+    st.write("分析学术领域的研究趋势和热点话题")
+    
+    # Check for version upgrade and clear cache if needed
+    clear_cache_on_upgrade()
+    
+    # Keep configured domain snapshots fresh in the background (once per server process)
+    start_snapshot_scheduler(_scheduled_snapshot_refresh)
+    
+    # Resolve the Chinese font here rather than at import, so importing app never
+    # scans fonts (cheap on warm starts: the resolution is persisted and cached)
+    detected_font = resolve_chinese_font().name
+    
+    # Show font detection result
+    if detected_font:
+        st.success(f"✅ 已检测到中文字体: {detected_font}")
+    else:
+        st.warning("⚠️ 未检测到中文字体，热力图可能显示方框。请参考侧边栏的字体安装说明。")
+    
+    # Add cache clearing mechanism in sidebar
+    with st.sidebar:
+        st.header("⚙️ 设置")
+        
+        # LLM API Configuration
+        st.subheader("🔑 LLM API 配置")
+        st.markdown("**⚠️ 必须配置 API Key 才能使用本工具**")
+        
+        # API Key input - prominent and required
+        api_key_input = st.text_input(
+            "API Key (必填)",
+            value="",
+            type="password",
             help="输入你的 Qwen API Key（必填项）",
             placeholder="sk-xxxxxxxxxxxxxxxxxxxxxxxx",
             key="api_key_input"
@@ -953,14 +2291,14 @@ def main():
         # Endpoint input
         endpoint_input = st.text_input(
             "API Endpoint",
-            value="https://dashscope.aliyuncs.com/compatible-mode/v1",
+            value=DEFAULT_ENDPOINT,
             help="API 端点地址",
             key="endpoint_input"
         )
         
         # Store endpoint in session state
         if 'endpoint' not in st.session_state:
-            st.session_state.endpoint = "https://dashscope.aliyuncs.com/compatible-mode/v1"
+            st.session_state.endpoint = DEFAULT_ENDPOINT
         
         if endpoint_input:
             st.session_state.endpoint = endpoint_input
@@ -974,6 +2312,20 @@ def main():
             4. 复制并粘贴到上方输入框
             """)
         
+        # Additional backends (more keys, internal gateways) share the requests with the key above
+        try:
+            configured_backends = load_backends()
+        except ValueError as e:
+            configured_backends = []
+            st.warning(f"⚠️ {str(e)}")
+        llm_pool = st.checkbox(
+            f"🔀 同时使用已配置的 {len(configured_backends)} 个额外 LLM 后端",
+            value=True,
+            disabled=not configured_backends,
+            help=f"额外后端在 {BACKENDS_FILE} 中配置。请求按负载分配到各后端，"
+                 "失败时自动切换到其他后端，连续失败的后端会被暂时摘除"
+        )
+        
         # Validate API key and show appropriate status
         is_api_key_valid = validate_api_key(api_key_input)
         
@@ -998,18 +2350,84 @@ def main():
         if not api_key_input:
             st.warning("⚠️ 需要配置 API Key 才能使用智能功能")
         
+        extraction_labels = {"remote": "远程 LLM（qwen-plus，需要 API Key）",
+                             "local_llm": "本地模型（CPU 离线，需安装 llama-cpp-python）",
+                             "statistical": "统计关键短语（离线，数千篇论文只需数秒）"}
+        extraction_backend = st.selectbox(
+            "🧠 关键词提取方式",
+            options=list(extraction_labels.keys()),
+            format_func=lambda key: extraction_labels[key],
+            help="本地模型在本机 CPU 上以多个工作进程批量推理；统计关键短语基于全部标题和摘要的 "
+                 "n-gram 词频与逆文档频率打分。两者均无需网络和 API Key，不消耗 Token"
+        )
+        local_model_path = st.text_input(
+            "本地模型文件 (GGUF)",
+            value=os.getenv(LOCAL_MODEL_ENV, ""),
+            placeholder="models/qwen2.5-1.5b-instruct-q4_k_m.gguf",
+            help=f"量化指令模型的 GGUF 文件路径，默认读取环境变量 {LOCAL_MODEL_ENV}",
+            disabled=extraction_backend != "local_llm"
+        )
+        
         st.markdown("---")
         
+        # Paper source: live OpenAlex API or the ingested local snapshot index
+        local_index = index_stats()
+        source_labels = {"openalex": "OpenAlex API（在线）", "local": "本地 OpenAlex 索引（离线）"}
+        paper_source = st.selectbox(
+            "📚 论文数据源",
+            options=list(source_labels.keys()),
+            index=1 if local_index["works"] else 0,
+            format_func=lambda key: source_labels[key],
+            help="本地索引由 `python openalex_local.py ingest <快照目录>` 从 OpenAlex 快照文件导入，"
+                 "查询无需网络，毫秒级返回"
+        )
+        if local_index["works"]:
+            st.caption(f"本地索引：{local_index['works']} 篇论文（{local_index['min_year']}-{local_index['max_year']}）")
+        elif paper_source == "local":
+            st.warning("⚠️ 本地索引为空，请先运行 `python openalex_local.py ingest <快照目录>` 导入快照")
+        
         # Paper limit slider (v3.1 - Performance optimization)
         max_papers = st.slider(
             "最大论文数量",
             min_value=50,
-            max_value=300,
+            max_value=5000 if extraction_backend == "statistical" else 300,
             value=100,
             step=50,
             help="限制分析的论文总数，较少的论文处理更快（推荐100篇，约5-10分钟）"
         )
         
+        # Which papers fill the max_papers slots: top relevance hits or a stratified sample
+        sampling_labels = {
+            "none": "按检索相关性（默认）",
+            "year_journal": "按年份×期刊分层抽样",
+            "year_journal_citations": "按年份×期刊×被引分层抽样",
+        }
+        sampling = st.selectbox(
+            "🎯 论文抽样方式",
+            options=list(sampling_labels.keys()),
+            format_func=lambda key: sampling_labels[key],
+            help="分层抽样先获取更大的候选池（仅元数据），再按年份、期刊（及被引次数）比例抽取论文，"
+                 "避免样本集中在少数年份或期刊；只有抽中的论文会调用 LLM"
+        )
+        sampling_pool_factor = st.slider(
+            "候选池倍数",
+            min_value=2,
+            max_value=10,
+            value=5,
+            disabled=sampling == "none",
+            help="候选池大小 = 最大论文数量 × 倍数（最多 2000 篇，且不少于最大论文数量的 2 倍）"
+        )
+        
+        # Split the keyword search into parallel per-period sub-queries
+        partition_labels = {"none": "不分区（默认）", "year": "按年份分区", "quarter": "按季度分区"}
+        query_partition = st.selectbox(
+            "📅 查询分区",
+            options=list(partition_labels.keys()),
+            format_func=lambda key: partition_labels[key],
+            help="将时间范围拆分为每年（或每季度）的子查询并行检索，论文数量在各分区间平均分配，"
+                 "避免结果集中在少数年份。适用于传统搜索模式（未启用1区期刊筛选）"
+        )
+        
         # Keyword limit slider
         max_keywords = st.slider(
             "最大关键词数量",
@@ -1020,12 +2438,125 @@ def main():
             help="限制热力图中显示的关键词数量，避免图片过大"
         )
         
+        # Stop extraction once the displayed top keywords no longer change
+        early_stop = st.checkbox(
+            "排名收敛后提前停止",
+            value=False,
+            help="持续跟踪关键词频次，当前 N 个关键词（热力图显示的关键词）的排名稳定后停止提取剩余论文，节省 LLM 调用。"
+                 "启用后论文按随机顺序提取（优先级仅决定预算不足时跳过哪些论文），避免排名只在高被引论文上收敛。"
+                 "注意：收敛判断基于合并相似关键词之前的原始关键词，启用「合并相似关键词」时，"
+                 "合并后的热力图关键词可能与收敛时的排名略有差异"
+        )
+        early_stop_tolerance = st.slider(
+            "收敛容差",
+            min_value=0.0,
+            max_value=0.3,
+            value=0.1,
+            step=0.05,
+            disabled=not early_stop,
+            help="允许前 N 个关键词中发生变化的比例（0 表示完全不变）。容差越大，停止越早"
+        )
+        
+        # Token budget and cost settings
+        with st.expander("💰 Token 预算与成本"):
+            max_run_tokens = st.number_input(
+                "单次运行 Token 上限",
+                min_value=0,
+                value=0,
+                step=10000,
+                help="本次分析最多消耗的 Token 数，0 表示不限制"
+            )
+            tokens_per_minute = st.number_input(
+                "每分钟 Token 上限 (TPM)",
+                min_value=0,
+                value=0,
+                step=10000,
+                help="与 API 配额一致的每分钟 Token 限制，0 表示不限制"
+            )
+            requests_per_minute = st.number_input(
+                "每分钟请求上限 (RPM)",
+                min_value=0,
+                value=0,
+                step=10,
+                help="与 API 配额一致的每分钟请求数限制，0 表示不限制"
+            )
+            priority_labels = {"citations": "被引次数优先", "recency": "最新发表优先", "original": "检索相关性顺序"}
+            extraction_priority = st.selectbox(
+                "预算不足时的论文优先级",
+                options=list(priority_labels.keys()),
+                format_func=lambda key: priority_labels[key],
+                help="预算不足以处理全部论文时，优先处理哪些论文"
+            )
+            input_price = st.number_input(
+                "输入价格（元/千 Token）",
+                min_value=0.0,
+                value=0.0008,
+                step=0.0001,
+                format="%.4f"
+            )
+            output_price = st.number_input(
+                "输出价格（元/千 Token）",
+                min_value=0.0,
+                value=0.002,
+                step=0.0001,
+                format="%.4f"
+            )
+        
+        deduplicate = st.checkbox(
+            "合并重复论文",
+            value=True,
+            help="合并同一研究的预印本/正式发表版本及勘误（基于 DOI 和标题+摘要相似度），避免重复提取和重复计数"
+        )
+        
+        merge_similar_keywords = st.checkbox(
+            "合并语义相近关键词",
+            value=False,
+            help="在构建共现矩阵前，将含义相同的关键词变体（如 GNN / Graph Neural Networks）合并为同一个关键词"
+        )
+        embedding_labels = {"hashed": "字符 n-gram（快速，无需额外依赖）", "minilm": "MiniLM 语义模型（需安装 sentence-transformers）"}
+        embedding_backend = st.selectbox(
+            "关键词嵌入方式",
+            options=list(embedding_labels.keys()),
+            format_func=lambda key: embedding_labels[key],
+            disabled=not merge_similar_keywords
+        )
+        
+        max_concurrency = st.slider(
+            "最大并发请求数",
+            min_value=1,
+            max_value=16,
+            value=8,
+            step=1,
+            help="LLM 并发请求上限。实际并发会根据响应延迟和限流 (429) 自动调整"
+        )
+        
+        hedge_requests = st.checkbox(
+            "⚡ 对冲慢请求",
+            value=True,
+            help="请求超过近期 p90 延迟仍未返回时，再发送一次相同请求并采用先返回的结果。"
+                 "额外请求不超过总请求数的 10%（会计入 Token 用量）"
+        )
+        
+        token_budget = TokenBudget(
+            max_run_tokens=int(max_run_tokens),
+            tokens_per_minute=int(tokens_per_minute),
+            requests_per_minute=int(requests_per_minute),
+            input_price_per_1k=input_price,
+            output_price_per_1k=output_price,
+        )
+        
         st.markdown("---")
         
         col1, col2 = st.columns(2)
         with col1:
             if st.button("清除缓存", help="清除所有缓存数据，强制重新调用 API"):
+                from paper_store import clear_corpus_store
+                
                 st.cache_data.clear()
+                clear_corpus_store()
+                clear_checkpoints()
+                clear_exports()
+                get_http_cache().clear()
                 # Also update version file to prevent re-showing upgrade notice
                 save_current_version()
                 st.success("缓存已清除！")
@@ -1098,16 +2629,45 @@ def main():
                 
                 安装后请重启应用。
                 """)
+        st.caption(f"字体诊断: {font_diagnostic()}")
         
         st.markdown("---")
         st.caption("数据来源: OpenAlex (免费开放)")
     
-    # Create text input field for domain keywords
-    domain = st.text_input(
-        "🔍 研究领域关键词",
-        placeholder="例如：量子计算、机器学习、深度学习",
-        help="输入关键词以搜索学术论文"
+    # Single-domain analysis or comparison of several domains
+    analysis_mode = st.radio(
+        "分析模式",
+        ["单领域分析", "多领域对比"],
+        horizontal=True,
+        help="多领域对比会并行获取各领域论文，重叠论文只提取一次，并在统一关键词表上对比共现矩阵"
     )
+    compare_domains = analysis_mode == "多领域对比"
+    
+    # Create text input field for domain keywords
+    if compare_domains:
+        domain = st.text_input(
+            "🔍 研究领域关键词（2-4 个，用逗号分隔）",
+            placeholder="例如：quantum computing, quantum error correction",
+            help="输入要对比的多个领域，用逗号分隔"
+        )
+    else:
+        domain = st.text_input(
+            "🔍 研究领域关键词",
+            placeholder="例如：量子计算、机器学习、深度学习",
+            help="输入关键词以搜索学术论文"
+        )
+    domains = parse_comma_separated(domain) if compare_domains else []
+    
+    # Offer the precomputed snapshot of this domain, if there is one
+    snapshot = load_snapshot(domain) if domain.strip() and not compare_domains else None
+    if snapshot is not None:
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            st.info(f"⚡ 该领域已有预计算快照（数据截至 "
+                    f"{datetime.fromtimestamp(snapshot['created_at']):%Y-%m-%d %H:%M}），可即时查看")
+        with col2:
+            if st.button("⚡ 查看快照", key="view_domain_snapshot"):
+                attach_snapshot(snapshot["domain"])
     
     # Create date input selectors for start and end dates
     col1, col2 = st.columns(2)
@@ -1126,8 +2686,34 @@ def main():
             help="选择时间范围的结束日期"
         )
     
-    # Validate API key before allowing analysis
-    is_api_key_valid = validate_api_key(api_key_input)
+    # Sidebar settings shared by analyses, comparisons and snapshots
+    analysis_params = {
+        "endpoint": endpoint_input,
+        "use_journal_filter": bool(use_journal_filter and api_key_input),
+        "paper_source": paper_source,
+        "max_papers": max_papers,
+        "sampling": sampling,
+        "sampling_pool_factor": sampling_pool_factor,
+        "query_partition": query_partition,
+        "max_keywords": max_keywords,
+        "early_stop": early_stop,
+        "early_stop_tolerance": early_stop_tolerance,
+        "deduplicate": deduplicate,
+        "extraction_backend": extraction_backend,
+        "merge_similar_keywords": merge_similar_keywords,
+        "embedding_backend": embedding_backend,
+        "max_concurrency": max_concurrency,
+        "hedge_requests": hedge_requests,
+        "llm_pool": llm_pool,
+        "extraction_priority": extraction_priority,
+        "token_budget": asdict(token_budget),
+    }
+    if extraction_backend == "local_llm":
+        # Only local runs carry a model path, so other UI jobs match equivalent API requests
+        analysis_params["local_model_path"] = local_model_path.strip()
+    
+    # Validate API key before allowing analysis (offline extraction needs none)
+    is_api_key_valid = validate_api_key(api_key_input) or extraction_backend != "remote"
     
     # Show warning if API key is not configured
     if not is_api_key_valid:
@@ -1144,7 +2730,7 @@ def main():
     # Process form submission
     if submit_button:
         # API Key validation: ensure API key is configured
-        if not validate_api_key(api_key_input):
+        if not is_api_key_valid:
             st.error("⚠️ 需要配置 API Key 才能使用")
             st.info("""
             **如何获取 API Key：**
@@ -1162,183 +2748,62 @@ def main():
         # Input validation: reject empty domain keywords
         elif not domain or not domain.strip():
             st.error("请输入研究领域关键词")
+        elif compare_domains and not 2 <= len(set(domains)) <= 4:
+            st.error("多领域对比需要 2-4 个不同的研究领域，请用逗号分隔")
         # Date validation: ensure start_date ≤ end_date
         elif not validate_date_range(start_date, end_date):
             st.error("开始日期必须早于或等于结束日期")
         else:
-            # All validations passed - proceed with analysis
-            try:
-                # Step 1: Identify top journals (if enabled)
-                journals = []
-                if use_journal_filter and api_key_input:
-                    with st.spinner("🔍 正在识别1区期刊..."):
-                        journals = identify_top_journals(domain, api_key_input, endpoint_input)
-                    
-                    if journals:
-                        st.success(f"✅ 已识别 {len(journals)} 个1区期刊")
-                        with st.expander("📋 查看期刊列表（只会保留这些期刊的论文）"):
-                            st.markdown("**识别到的1区期刊：**")
-                            for i, journal in enumerate(journals, 1):
-                                st.write(f"{i}. {journal}")
-                        st.info("💡 接下来将只保留来自这些1区期刊的论文，过滤其他论文")
-                    else:
-                        st.info("ℹ️ 未识别到期刊，将搜索所有论文")
-                
-                # Step 2: Fetch papers from OpenAlex
-                with st.spinner("📚 正在从 OpenAlex 获取论文数据..."):
-                    start_year = start_date.year
-                    end_year = end_date.year
-                    papers = fetch_openalex_data(domain, start_year, end_year, journals if journals else None, max_papers=max_papers)
-                
-                # If journal filtering resulted in no papers, try without filtering
-                if not papers and journals:
-                    st.warning("⚠️ 在指定期刊中未找到论文，尝试搜索所有论文...")
-                    papers = fetch_openalex_data(domain, start_year, end_year, None, max_papers=max_papers)
-                
-                # Check if we got any papers
-                if not papers:
-                    # Display enhanced error message for empty results
-                    st.error("❌ 未找到任何论文")
-                    st.info("""
-                    **可能的原因：**
-                    - 🔍 关键词过于具体或拼写错误
-                    - 📅 时间范围内没有相关论文
-                    - 📚 1区期刊筛选过于严格
-                    - 🌐 OpenAlex 数据库中没有相关数据
-                    
-                    **建议的解决方案：**
-                    
-                    1. **调整搜索关键词**
-                       - 尝试使用更通用的关键词
-                       - 使用英文关键词（OpenAlex 主要收录英文文献）
-                       - 检查关键词拼写是否正确
-                       - 示例：将 "quantum error correction" 改为 "quantum computing"
-                    
-                    2. **扩大时间范围**
-                       - 尝试更长的时间跨度（如最近5年）
-                       - 确认起始日期早于结束日期
-                    
-                    3. **禁用1区期刊筛选**
-                       - 在左侧边栏取消勾选"识别1区期刊"
-                       - 这将搜索所有期刊的论文，而不仅限于顶级期刊
-                    
-                    4. **尝试其他领域**
-                       - 某些新兴领域可能数据较少
-                       - 尝试相关但更成熟的研究领域
-                    
-                    **提示：** 如果问题持续，可以先禁用1区筛选，查看是否能找到论文。
-                    """)
-                    st.stop()
-                
-                st.success(f"✅ 已从 OpenAlex 获取 {len(papers)} 篇论文")
-                
-                # Step 3: Extract keywords from papers using LLM (mandatory in v3.0)
-                with st.spinner("🤖 LLM 智能提取关键词..."):
-                    try:
-                        keyword_lists = extract_keywords_with_llm_single(
-                            papers, 
-                            api_key=api_key_input,
-                            endpoint=endpoint_input
-                        )
-                    except Exception as e:
-                        # Display clear error message in Chinese
-                        error_msg = str(e)
-                        st.error(f"❌ LLM 关键词提取失败")
-                        
-                        # Show the specific error details
-                        if "所有论文" in error_msg:
-                            st.error(error_msg)
-                        else:
-                            st.error(f"错误详情: {error_msg}")
-                        
-                        # Display detailed troubleshooting steps in Chinese
-                        st.info("""
-                        **可能的原因：**
-                        - ❌ API Key 无效、过期或配额不足
-                        - 🌐 网络连接问题或防火墙阻止
-                        - 🔗 API 端点配置错误
-                        - ⏱️ LLM 服务暂时不可用或响应超时
-                        - 📄 论文内容格式问题
-                        
-                        **解决方案（请按顺序尝试）：**
-                        
-                        1. **检查 API Key**
-                           - 在左侧边栏确认 API Key 已正确输入
-                           - 访问 [阿里云控制台](https://dashscope.console.aliyun.com/) 验证 API Key 状态
-                           - 确认 API Key 有足够的配额
-                        
-                        2. **检查网络连接**
-                           - 点击左侧边栏的"测试网络"按钮
-                           - 确认可以访问 OpenAlex API
-                           - 如在国内，可能需要使用 VPN
-                        
-                        3. **检查 API 端点**
-                           - 确认端点地址为: `https://dashscope.aliyuncs.com/compatible-mode/v1`
-                           - 如使用其他 LLM 服务，请确认端点正确
-                        
-                        4. **调整搜索参数**
-                           - 尝试缩短时间范围以减少论文数量
-                           - 尝试更具体的关键词
-                        
-                        5. **稍后重试**
-                           - LLM 服务可能暂时繁忙
-                           - 等待几分钟后重新尝试
-                        
-                        **重要提示：** v3.0 版本仅支持 LLM 提取，无规则提取备选方案。必须解决 LLM 连接问题才能继续。
-                        """)
-                        st.stop()
-                
-                # Check if we got any keywords
-                if not keyword_lists:
-                    st.warning("⚠️ 无法从论文中提取关键词")
-                    st.stop()
-                
-                st.success(f"✅ 已从 {len(keyword_lists)} 篇论文中提取关键词")
-                
-                # Count total unique keywords
-                all_keywords = set()
-                for keywords in keyword_lists:
-                    all_keywords.update(keywords)
-                total_keywords = len(all_keywords)
-                
-                # Show info if keywords will be limited
-                if total_keywords > max_keywords:
-                    st.info(f"ℹ️ 共提取 {total_keywords} 个关键词，将显示出现频率最高的前 {max_keywords} 个关键词")
-                
-                # Step 4: Build co-occurrence matrix
-                with st.spinner("📊 正在构建共现矩阵..."):
-                    matrix = build_cooccurrence_matrix(keyword_lists, max_keywords=max_keywords)
-                
-                # Check if matrix has data
-                if matrix.empty or len(matrix) == 0:
-                    st.warning("⚠️ 没有可用的共现数据进行可视化")
-                    st.stop()
-                
-                st.success(f"✅ 已构建 {len(matrix)}×{len(matrix)} 共现矩阵")
-                
-                # Step 5: Render heatmap
-                with st.spinner("🎨 正在生成热力图..."):
-                    fig = render_heatmap(matrix)
-                
-                # Display final heatmap
-                st.subheader("📈 关键词共现热力图")
-                st.pyplot(fig)
-                
-                # Display summary statistics
-                st.subheader("📊 分析摘要")
-                col1, col2, col3 = st.columns(3)
+            # All validations passed - submit the analysis as a background job
+            # so reruns, refreshes and disconnects do not lose it
+            params = {
+                "domain": domain.strip(),
+                "start_year": start_date.year,
+                "end_year": end_date.year,
+                **analysis_params,
+            }
+            job_kind = "analysis"
+            if compare_domains:
+                job_kind = "comparison"
+                params["domains"] = list(dict.fromkeys(domains))
+                params["domain"] = " vs ".join(params["domains"])
+            job_id = get_job_queue().submit(job_kind, params, JOB_RUNNERS[job_kind], api_key_input)
+            attach_job(job_id)
+    
+    # Re-attach to the job of this session (or of the URL after a browser refresh),
+    # unless a snapshot was opened
+    job_active = False
+    job_id = None
+    snapshot_domain = st.session_state.get("snapshot_domain")
+    snapshot = load_snapshot(snapshot_domain) if snapshot_domain else None
+    if snapshot is not None:
+        render_snapshot(snapshot, api_key_input)
+    else:
+        job_id = st.session_state.get("job_id") or st.query_params.get("job")
+        job_active = render_job(job_id, api_key_input) if job_id else False
+    
+    # Recent jobs from all sessions
+    recent_jobs = get_job_queue().list_jobs(limit=10)
+    if recent_jobs:
+        with st.expander("📂 最近的分析任务"):
+            for job in recent_jobs:
+                col1, col2 = st.columns([4, 1])
                 with col1:
-                    st.metric("分析论文数", len(papers))
+                    params = job["params"]
+                    st.write(f"{datetime.fromtimestamp(job['created_at']):%m-%d %H:%M} · {params['domain']} · "
+                             f"{params['start_year']}-{params['end_year']} · "
+                             f"{JOB_STATUS_LABELS.get(job['status'], job['status'])}")
                 with col2:
-                    st.metric("唯一关键词数", len(matrix))
-                with col3:
-                    total_cooccurrences = int(matrix.sum().sum() / 2)  # Divide by 2 because matrix is symmetric
-                    st.metric("总共现次数", total_cooccurrences)
-                
-            except Exception as e:
-                # Catch any unexpected errors and display user-friendly message
-                st.error(f"❌ 分析过程中发生错误: {str(e)}")
-                st.info("💡 应用程序仍在运行。请重试或调整搜索参数。")
+                    if st.button("查看", key=f"attach_{job['id']}", disabled=job["id"] == job_id):
+                        attach_job(job["id"])
+                        st.rerun()
+    
+    render_snapshot_panel(analysis_params, api_key_input)
+    
+    # Poll until the attached job finishes
+    if job_active:
+        time.sleep(1)
+        st.rerun()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,222 @@
+"""
+Load test of the HTTP API (api_server.py) with stubbed OpenAlex and LLM backends.
+
+Starts the API with uvicorn on a local port, in a temporary working
+directory (so the job table and caches start empty), and then:
+
+1. fires --clients concurrent submissions for each of --distinct domains,
+2. polls the resulting jobs until they finish,
+3. submits every request again and fetches the matrices.
+
+OpenAlex responses are generated locally and every LLM call sleeps for
+--llm-latency seconds, so the run measures the API and pipeline overhead
+and shows how many computations the coalescing saved.
+
+Usage (from the repository root):
+    python benchmarks/bench_api_load.py
+    python benchmarks/bench_api_load.py --clients 100 --distinct 5 --papers 100
+
+Exits with status 1 if identical requests were not coalesced into one job
+per domain or more LLM calls were made than one computation per domain needs.
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import socket
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import types
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+_WORDS = ("quantum surface code decoder neural network graph error correction qubit lattice "
+          "threshold noise transformer attention sparse").split()
+_KEYWORDS = ["Surface Code", "Graph Neural Networks", "Quantum Error Correction", "Qubit Lattice",
+             "Noise Threshold", "Sparse Attention", "Neural Decoder"]
+
+
+class _StubResponse:
+    def __init__(self, data: dict):
+        self._data = data
+        self.status_code = 200
+        self.headers = {"Content-Type": "application/json"}
+        self.content = json.dumps(data).encode("utf-8")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+    def raise_for_status(self):
+        pass
+
+    def json(self) -> dict:
+        return self._data
+
+    def iter_content(self, chunk_size: int = 1):
+        for start in range(0, len(self.content), chunk_size):
+            yield self.content[start:start + chunk_size]
+
+
+def _stub_openalex_get(url, params=None, timeout=None, **kwargs):
+    """Deterministic fake OpenAlex works page (IDs differ per search)."""
+    params = params or {}
+    count = params.get("per_page", 25)
+    prefix = abs(hash(params.get("search", ""))) % 10**6
+    rng = random.Random(prefix)
+    works = [{
+        "id": f"https://openalex.org/W{prefix}{i:04d}",
+        "doi": None,
+        "title": f"Paper {i} on {' '.join(rng.sample(_WORDS, 3))}",
+        "publication_year": 2020 + i % 5,
+        "cited_by_count": i,
+        "abstract_inverted_index": {word: [j] for j, word in enumerate(rng.sample(_WORDS, 8))},
+        "primary_location": {"source": {"display_name": "Stub Journal"}},
+    } for i in range(count)]
+    return _StubResponse({"results": works, "meta": {"count": count}})
+
+
+class _StubLLM:
+    """OpenAI-compatible client whose completions sleep and return fixed keywords."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+        self.chat = types.SimpleNamespace(completions=self)
+
+    def create(self, **kwargs):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.latency)
+        message = types.SimpleNamespace(content=", ".join(random.sample(_KEYWORDS, 3)))
+        usage = types.SimpleNamespace(prompt_tokens=120, completion_tokens=12)
+        return types.SimpleNamespace(choices=[types.SimpleNamespace(message=message)], usage=usage)
+
+
+def _install_stubs(llm: _StubLLM):
+    import requests
+
+    import llm_clients
+
+    @contextmanager
+    def stub_llm_client(api_key, endpoint):
+        yield llm
+
+    requests.get = _stub_openalex_get
+    llm_clients.llm_client = stub_llm_client
+
+
+def _start_server() -> tuple[str, object]:
+    import uvicorn
+
+    from api_server import api
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(api, host="127.0.0.1", port=port, log_level="warning",
+                                          access_log=False))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}", server
+
+
+def _percentiles(seconds: list[float]) -> str:
+    ordered = sorted(seconds)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    return f"p50 {statistics.median(ordered) * 1000:.1f} ms, p99 {p99 * 1000:.1f} ms"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--clients", type=int, default=50, help="Concurrent clients per domain (default: 50)")
+    parser.add_argument("--distinct", type=int, default=3, help="Number of distinct domains (default: 3)")
+    parser.add_argument("--papers", type=int, default=50, help="Papers per analysis (default: 50)")
+    parser.add_argument("--llm-latency", type=float, default=0.02,
+                        help="Seconds per stubbed LLM call (default: 0.02)")
+    args = parser.parse_args()
+
+    import httpx
+
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    os.chdir(tempfile.mkdtemp(prefix="bench_api_"))
+    llm = _StubLLM(args.llm_latency)
+    _install_stubs(llm)
+    base_url, server = _start_server()
+
+    requests_by_domain = [{
+        "domain": f"benchmark domain {i}",
+        "start_year": 2020,
+        "end_year": 2024,
+        "max_papers": args.papers,
+        "use_journal_filter": False,
+        "merge_similar_keywords": False,
+    } for i in range(args.distinct)]
+    headers = {"X-LLM-API-Key": "sk-benchmark-key"}
+
+    with httpx.Client(base_url=base_url, headers=headers, timeout=60,
+                      limits=httpx.Limits(max_connections=64)) as client:
+        def submit(body: dict) -> tuple[float, dict]:
+            start = time.perf_counter()
+            response = client.post("/analyses", json=body)
+            response.raise_for_status()
+            return time.perf_counter() - start, response.json()
+
+        bodies = [requests_by_domain[i % args.distinct] for i in range(args.clients * args.distinct)]
+        wall_start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=64) as executor:
+            submissions = list(executor.map(submit, bodies))
+
+        job_ids = {answer["job_id"] for _, answer in submissions}
+        for job_id in job_ids:
+            while client.get(f"/analyses/{job_id}").json()["status"] in ("queued", "running"):
+                time.sleep(0.1)
+        wall_seconds = time.perf_counter() - wall_start
+        statuses = {job_id: client.get(f"/analyses/{job_id}").json()["status"] for job_id in job_ids}
+
+        with ThreadPoolExecutor(max_workers=64) as executor:
+            repeats = list(executor.map(submit, bodies))
+
+        def fetch_matrix(job_id: str) -> float:
+            start = time.perf_counter()
+            client.get(f"/analyses/{job_id}/matrix").raise_for_status()
+            return time.perf_counter() - start
+
+        matrix_seconds = [fetch_matrix(job_id) for job_id in job_ids for _ in range(20)]
+    server.should_exit = True
+
+    sources = [answer["source"] for _, answer in submissions]
+    print(f"{len(bodies)} submissions for {args.distinct} distinct requests "
+          f"({args.papers} papers each), finished in {wall_seconds:.2f}s")
+    print(f"jobs started: {sources.count('submitted')}, coalesced: {sources.count('coalesced')}, "
+          f"cached: {sources.count('cached')}; job states: {sorted(statuses.values())}")
+    print(f"LLM calls: {llm.calls} (without coalescing: {len(bodies) * args.papers})")
+    print(f"submit latency: {_percentiles([seconds for seconds, _ in submissions])}")
+    print(f"repeat submit latency: {_percentiles([seconds for seconds, _ in repeats])}, "
+          f"served from cache: {sum(answer['source'] == 'cached' for _, answer in repeats)}/{len(repeats)}")
+    print(f"matrix fetch latency: {_percentiles(matrix_seconds)}")
+
+    failed = False
+    if len(job_ids) != args.distinct:
+        print(f"FAIL: expected {args.distinct} jobs, got {len(job_ids)}")
+        failed = True
+    if llm.calls > args.distinct * args.papers:
+        print(f"FAIL: more LLM calls than {args.distinct} computations need")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+"""
+Keyword extraction throughput (papers per second) of the extraction backends.
+
+Runs app.extract_keywords_by_paper over --papers synthetic papers with
+each backend:
+
+- remote:    the remote LLM path with a stubbed client whose completions
+             take --llm-latency seconds, under the adaptive concurrency
+             limiter with --concurrency as its maximum (the sidebar default)
+- local_llm: the GGUF model given by --model (or $LOCAL_LLM_MODEL) on CPU;
+             skipped without a model or without llama-cpp-python
+- statistical: corpus-level n-gram keyphrase scoring (statistical_keyphrases.py)
+
+Worker start-up and model loading are reported separately and are not
+part of the measured throughput, since the backend is reused across runs.
+
+Usage (from the repository root):
+    python benchmarks/bench_extraction_backends.py
+    python benchmarks/bench_extraction_backends.py --model models/qwen2.5-1.5b-instruct-q4_k_m.gguf --papers 200
+    python benchmarks/bench_extraction_backends.py --statistical-papers 5000
+
+Exits with status 1 if a backend extracts keywords for fewer than half of
+the papers.
+"""
+
+import argparse
+import logging
+import os
+import random
+import sys
+import threading
+import time
+import types
+from contextlib import contextmanager
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+_WORDS = ("quantum surface code decoder neural network graph error correction qubit lattice "
+          "threshold noise transformer attention sparse benchmark stabilizer fidelity").split()
+_KEYWORDS = ["Surface Code", "Graph Neural Networks", "Quantum Error Correction", "Qubit Lattice",
+             "Noise Threshold", "Sparse Attention", "Neural Decoder"]
+
+
+def make_papers(count: int, abstract_words: int, seed: int = 0) -> list[dict]:
+    rng = random.Random(seed)
+    return [{
+        "id": f"https://openalex.org/W{i:09d}",
+        "title": f"{' '.join(rng.sample(_WORDS, 5)).title()} for {' '.join(rng.sample(_WORDS, 2))}",
+        "abstract": " ".join(rng.choice(_WORDS) for _ in range(abstract_words)),
+    } for i in range(count)]
+
+
+class _StubLLM:
+    """OpenAI-compatible client whose completions sleep and return fixed keywords."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self._rng = random.Random(0)
+        self._lock = threading.Lock()
+        self.chat = types.SimpleNamespace(completions=self)
+
+    def create(self, **kwargs):
+        with self._lock:
+            keywords = self._rng.sample(_KEYWORDS, 3)
+        time.sleep(self.latency)
+        message = types.SimpleNamespace(content=", ".join(keywords))
+        usage = types.SimpleNamespace(prompt_tokens=250, completion_tokens=15)
+        return types.SimpleNamespace(choices=[types.SimpleNamespace(message=message)], usage=usage)
+
+
+def run_remote(app, papers: list[dict], latency: float, concurrency: int) -> list:
+    import llm_clients
+    from llm_concurrency import AdaptiveConcurrencyLimiter
+
+    llm = _StubLLM(latency)
+
+    @contextmanager
+    def stub_llm_client(api_key, endpoint):
+        yield llm
+
+    llm_clients.llm_client = stub_llm_client
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=min(2, concurrency), max_limit=concurrency)
+    return app.extract_keywords_by_paper(papers, "sk-benchmark", "http://stub", limiter=limiter)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--papers", type=int, default=100, help="Papers per backend (default: 100)")
+    parser.add_argument("--abstract-words", type=int, default=150, help="Words per abstract (default: 150)")
+    parser.add_argument("--llm-latency", type=float, default=1.5,
+                        help="Seconds per stubbed remote completion (default: 1.5)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Maximum remote concurrency (default: 8)")
+    parser.add_argument("--model", default=os.getenv("LOCAL_LLM_MODEL", ""),
+                        help="GGUF model of the local_llm backend (default: $LOCAL_LLM_MODEL)")
+    parser.add_argument("--workers", type=int, default=None, help="local_llm worker processes (default: auto)")
+    parser.add_argument("--statistical-papers", type=int, default=2000,
+                        help="Papers for the statistical backend, which is meant for large corpora (default: 2000)")
+    args = parser.parse_args()
+
+    # Streamlit warns about every st.* call outside `streamlit run`
+    logging.disable(logging.WARNING)
+    import app
+    from extraction_backends import LocalLLMBackend, StatisticalBackend
+
+    papers = make_papers(args.papers, args.abstract_words)
+    runners = {"remote": (papers, lambda: run_remote(app, papers, args.llm_latency, args.concurrency))}
+
+    if args.model:
+        try:
+            backend = LocalLLMBackend(args.model, workers=args.workers)
+        except RuntimeError as e:
+            print(f"local_llm skipped: {e}")
+        else:
+            # Start every worker and load its model before measuring
+            start = time.perf_counter()
+            warmup = make_papers(backend.workers * backend.batch_size, args.abstract_words, seed=1)
+            list(backend.iter_extract(warmup))
+            print(f"local_llm start-up: {backend.workers} workers, {time.perf_counter() - start:.1f}s")
+            runners["local_llm"] = (papers, lambda: app.extract_keywords_by_paper(papers, "", "", backend=backend))
+    else:
+        print("local_llm skipped: no model (pass --model or set LOCAL_LLM_MODEL)")
+
+    corpus = make_papers(args.statistical_papers, args.abstract_words, seed=2)
+    runners["statistical"] = (corpus, lambda: app.extract_keywords_by_paper(corpus, "", "", backend=StatisticalBackend()))
+
+    failed = False
+    for name, (batch, run) in runners.items():
+        start = time.perf_counter()
+        results = run()
+        seconds = time.perf_counter() - start
+        extracted = sum(1 for keywords in results if keywords)
+        print(f"{name:11s} {extracted}/{len(batch)} papers in {seconds:6.1f}s = "
+              f"{len(batch) / seconds:8.2f} papers/s")
+        if extracted < len(batch) / 2:
+            print(f"FAIL: {name} extracted keywords for fewer than half of the papers")
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
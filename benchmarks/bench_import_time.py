@@ -0,0 +1,81 @@
+"""
+Cold-start benchmark: how long a fresh Python process takes to import app.py.
+
+Every new Streamlit server process pays this before the first widget
+appears. Each run imports app in a new interpreter (so nothing is cached in
+sys.modules) and reports which heavy libraries the import pulled in; those
+should only load once a stage that needs them runs.
+
+Usage (from the repository root):
+    python benchmarks/bench_import_time.py
+    python benchmarks/bench_import_time.py --runs 10 --max-seconds 1.0
+
+Exits with status 1 if the median import time exceeds --max-seconds or a
+heavy library is imported eagerly.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Libraries that must not be imported by "import app"
+HEAVY_MODULES = ("pandas", "numpy", "matplotlib", "seaborn", "openai", "pyarrow", "httpx", "dotenv")
+
+_PROBE = f"""
+import json, sys, time
+start = time.perf_counter()
+import app
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "heavy": [m for m in {HEAVY_MODULES!r} if m in sys.modules]}}))
+"""
+
+
+def measure_once() -> dict:
+    """Import app in a fresh interpreter and return its timing and heavy modules."""
+    output = subprocess.run(
+        [sys.executable, "-c", _PROBE],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    # Streamlit may print warnings in bare mode; the result is the last line
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="Number of fresh interpreters (default: 5)")
+    parser.add_argument("--max-seconds", type=float, default=1.5,
+                        help="Fail if the median import time exceeds this (default: 1.5)")
+    args = parser.parse_args()
+
+    # Warm-up run: fills the font detection cache and the OS file cache
+    measure_once()
+    runs = [measure_once() for _ in range(args.runs)]
+    seconds = [run["seconds"] for run in runs]
+    heavy = sorted({module for run in runs for module in run["heavy"]})
+
+    median = statistics.median(seconds)
+    print(f"import app: median {median:.3f}s, min {min(seconds):.3f}s, max {max(seconds):.3f}s "
+          f"({args.runs} runs)")
+    print(f"heavy modules imported: {', '.join(heavy) if heavy else 'none'}")
+
+    failed = False
+    if median > args.max_seconds:
+        print(f"FAIL: median import time exceeds {args.max_seconds:.2f}s")
+        failed = True
+    if heavy:
+        print("FAIL: heavy modules must be imported lazily")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,193 @@
+"""
+Peak memory of decoding OpenAlex works pages: response.json() vs streaming.
+
+Generates a synthetic works page (--works results with --abstract-words
+word abstracts stored as abstract_inverted_index, like OpenAlex returns
+them) and converts it to paper records with work_to_paper in three ways:
+
+- json:    the whole body is read, decoded with json.loads and converted
+           (what response.json() does)
+- chunked: openalex_stream with the built-in raw_decode parser
+- ijson:   openalex_stream with ijson (skipped if ijson is not installed)
+
+The body is fed in CHUNK_SIZE pieces as a streamed response would deliver
+it. The page is also served over HTTP from a local server and fetched the
+way the app does, with an empty and a warm HTTP cache:
+
+- http json: requests.get(...).json() without the cache (the old fetch path)
+- http miss: http_cache.HttpCache.get + read_page on an empty cache (the
+             body is streamed, decoded and stored at the same time)
+- http hit:  the same request answered from the cache
+
+Peak memory is measured with tracemalloc, so it covers Python allocations
+made while decoding (the synthetic page itself is not counted).
+
+Usage (from the repository root):
+    python benchmarks/bench_json_stream.py
+    python benchmarks/bench_json_stream.py --works 200 --abstract-words 400 --runs 5
+
+Exits with status 1 if a streaming decoder returns different records or
+does not lower peak memory compared to json, or if a cache miss peaks
+higher than http json.
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from http_cache import HttpCache  # noqa: E402
+from openalex_local import work_to_paper  # noqa: E402
+from openalex_stream import CHUNK_SIZE, ijson_available, iter_results, read_page  # noqa: E402
+
+
+def make_page(works: int, abstract_words: int, seed: int = 0) -> bytes:
+    """JSON body of a synthetic OpenAlex works page."""
+    rng = random.Random(seed)
+    vocabulary = [f"term{i}" for i in range(2000)]
+    results = []
+    for i in range(works):
+        inverted_index = {}
+        for position in range(abstract_words):
+            inverted_index.setdefault(rng.choice(vocabulary), []).append(position)
+        results.append({
+            "id": f"https://openalex.org/W{i:09d}",
+            "doi": f"https://doi.org/10.1000/{i}",
+            "title": f"Synthetic work {i} on {' '.join(rng.sample(vocabulary, 6))}",
+            "publication_year": 2015 + i % 10,
+            "cited_by_count": rng.randint(0, 500),
+            "abstract_inverted_index": inverted_index,
+            "primary_location": {"source": {"display_name": f"Journal {i % 20}"}},
+        })
+    page = {"meta": {"count": works, "per_page": works, "next_cursor": "IlsxLjAsIDEyMzRdIg=="}, "results": results}
+    return json.dumps(page).encode("utf-8")
+
+
+def _chunks(body: bytes):
+    for start in range(0, len(body), CHUNK_SIZE):
+        yield body[start:start + CHUNK_SIZE]
+
+
+def decode_json(body: bytes) -> list[dict]:
+    content = b"".join(_chunks(body))
+    data = json.loads(content)
+    return [work_to_paper(work) for work in data["results"]]
+
+
+def decode_streaming(body: bytes, backend: str) -> list[dict]:
+    return [work_to_paper(work) for work in iter_results(_chunks(body), backend=backend)]
+
+
+def serve_page(body: bytes) -> ThreadingHTTPServer:
+    """Local HTTP server answering every GET with body."""
+
+    class PageHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("ETag", '"page"')
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), PageHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def fetch_json(url: str) -> list[dict]:
+    data = requests.get(url, timeout=60).json()
+    return [work_to_paper(work) for work in data["results"]]
+
+
+def fetch_cached(cache: HttpCache, url: str, empty: bool) -> list[dict]:
+    if empty:
+        cache.clear()
+    with cache.get(url) as response:
+        return read_page(response, work_to_paper)["results"]
+
+
+def measure(decode, runs: int) -> tuple[float, float, list[dict]]:
+    """Median peak MiB (traced runs) and median seconds (untraced runs), and the records."""
+    peaks = []
+    seconds = []
+    records = None
+    for _ in range(runs):
+        tracemalloc.start()
+        records = decode()
+        peaks.append(tracemalloc.get_traced_memory()[1] / 2**20)
+        tracemalloc.stop()
+        start = time.perf_counter()
+        decode()
+        seconds.append(time.perf_counter() - start)
+    return statistics.median(peaks), statistics.median(seconds), records
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--works", type=int, default=200, help="Works per page (default: 200)")
+    parser.add_argument("--abstract-words", type=int, default=250, help="Words per abstract (default: 250)")
+    parser.add_argument("--runs", type=int, default=3, help="Runs per decoder (default: 3)")
+    args = parser.parse_args()
+
+    body = make_page(args.works, args.abstract_words)
+    print(f"page: {args.works} works, {len(body) / 2**20:.1f} MiB of JSON")
+
+    decoders = {"json": lambda: decode_json(body), "chunked": lambda: decode_streaming(body, "chunked")}
+    if ijson_available():
+        decoders["ijson"] = lambda: decode_streaming(body, "ijson")
+    else:
+        print("ijson not installed, skipping the ijson decoder")
+
+    results = {name: measure(decode, args.runs) for name, decode in decoders.items()}
+
+    server = serve_page(body)
+    url = f"http://127.0.0.1:{server.server_address[1]}/works"
+    with tempfile.TemporaryDirectory() as directory:
+        cache = HttpCache(db_path=os.path.join(directory, "http_cache.sqlite3"))
+        fetches = {
+            "http json": lambda: fetch_json(url),
+            "http miss": lambda: fetch_cached(cache, url, empty=True),
+            "http hit": lambda: fetch_cached(cache, url, empty=False),
+        }
+        http_results = {name: measure(fetch, args.runs) for name, fetch in fetches.items()}
+    server.shutdown()
+
+    baseline_peak = results["json"][0]
+    for name, (peak, seconds, _) in {**results, **http_results}.items():
+        print(f"{name:9s} peak {peak:6.1f} MiB ({peak / baseline_peak:5.1%} of json), {seconds * 1000:7.1f} ms")
+
+    failed = False
+    reference = results["json"][2]
+    for name, (peak, _, records) in {**results, **http_results}.items():
+        if name == "json":
+            continue
+        if records != reference:
+            print(f"FAIL: {name} returned different records")
+            failed = True
+        if name in decoders and peak >= baseline_peak:
+            print(f"FAIL: {name} does not lower peak memory")
+            failed = True
+    if http_results["http miss"][0] >= http_results["http json"][0]:
+        print("FAIL: http miss does not lower peak memory compared to http json")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
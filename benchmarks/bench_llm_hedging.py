@@ -0,0 +1,91 @@
+"""
+Tail latency of per-paper LLM calls with and without hedged requests.
+
+Runs --calls stubbed LLM calls on --concurrency threads through
+llm_concurrency.HedgedCaller. Stub latencies are log-normal around
+--median seconds, and a fraction --stall-rate of requests stalls for
+--stall-factor times the median (the slow responses that dominate an
+extraction run). Each configuration reports the achieved p50/p99 per
+call, the hedge rate (duplicates per call) and the wall time.
+
+Usage (from the repository root):
+    python benchmarks/bench_llm_hedging.py
+    python benchmarks/bench_llm_hedging.py --calls 1000 --stall-rate 0.05 --percentile 0.95
+
+Exits with status 1 if hedging does not lower p99 or sends more
+duplicates than --max-extra-load allows.
+"""
+
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from llm_concurrency import HedgedCaller  # noqa: E402
+
+
+def make_stub(median: float, stall_rate: float, stall_factor: float, seed: int):
+    """Stub LLM request with a log-normal body and rare stalls."""
+    rng = random.Random(seed)
+    lock = threading.Lock()
+
+    def request():
+        with lock:
+            stalled = rng.random() < stall_rate
+            latency = median * (stall_factor if stalled else rng.lognormvariate(0, 0.35))
+        time.sleep(latency)
+        return latency
+
+    return request
+
+
+def run(args, max_extra_load: float) -> tuple[dict, float]:
+    caller = HedgedCaller(percentile=args.percentile, max_extra_load=max_extra_load,
+                          max_workers=args.concurrency * 2)
+    request = make_stub(args.median, args.stall_rate, args.stall_factor, args.seed)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        list(executor.map(lambda _: caller.call(request), range(args.calls)))
+    wall_seconds = time.perf_counter() - start
+    caller.shutdown()
+    return caller.summary(), wall_seconds
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=400, help="Calls per configuration (default: 400)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent callers (default: 8)")
+    parser.add_argument("--median", type=float, default=0.05, help="Median stub latency in seconds (default: 0.05)")
+    parser.add_argument("--stall-rate", type=float, default=0.03, help="Fraction of stalled requests (default: 0.03)")
+    parser.add_argument("--stall-factor", type=float, default=20,
+                        help="Stall latency as a multiple of the median (default: 20)")
+    parser.add_argument("--percentile", type=float, default=0.9, help="Hedge after this percentile (default: 0.9)")
+    parser.add_argument("--max-extra-load", type=float, default=0.1,
+                        help="Maximum duplicates per call (default: 0.1)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed of the stub latencies (default: 0)")
+    args = parser.parse_args()
+
+    results = {"no hedging": run(args, 0.0), "hedged": run(args, args.max_extra_load)}
+    for name, (summary, wall_seconds) in results.items():
+        print(f"{name:10s} p50 {summary['p50'] * 1000:7.1f} ms, p99 {summary['p99'] * 1000:7.1f} ms, "
+              f"hedge rate {summary['hedge_rate']:.1%} ({summary['hedge_wins']} won), wall {wall_seconds:.2f}s")
+
+    baseline, hedged = results["no hedging"][0], results["hedged"][0]
+    failed = False
+    if hedged["p99"] >= baseline["p99"]:
+        print("FAIL: hedging did not lower p99")
+        failed = True
+    if hedged["hedge_rate"] > args.max_extra_load:
+        print(f"FAIL: hedge rate above {args.max_extra_load:.0%}")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+"""
+Peak memory and time of top-K keyword selection: exact counting vs sketches.
+
+Generates --papers synthetic keyword lists (--keywords-per-paper keywords
+drawn from a Zipf-like distribution with a long tail of --tail-keywords
+one-off keywords per 1000 papers, like LLM output) and selects the top
+--top-k keywords in two ways:
+
+- exact:  a frequency dictionary over every keyword, sorted (what
+          build_cooccurrence_matrix does below STREAMING_MIN_PAPERS)
+- sketch: keyword_sketches.select_top_keywords (Space-Saving + Count-Min,
+          exact second pass over the candidates only)
+
+Peak memory is measured with tracemalloc, so it covers Python allocations
+made while selecting (the keyword lists themselves are not counted).
+
+Usage (from the repository root):
+    python benchmarks/bench_topk_sketch.py
+    python benchmarks/bench_topk_sketch.py --papers 500000 --top-k 50
+
+Exits with status 1 if the sketch selects different keywords than exact
+counting or does not lower peak memory.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from keyword_sketches import SKETCH_CAPACITY, select_top_keywords  # noqa: E402
+
+
+def make_keyword_lists(papers: int, keywords_per_paper: int, tail_keywords: int, seed: int = 0) -> list[list[str]]:
+    """Keyword lists with a Zipf-like head and a long tail of rare keywords."""
+    rng = random.Random(seed)
+    head = [f"Hotspot Topic {i}" for i in range(5000)]
+    weights = [1 / (rank + 1) for rank in range(len(head))]
+    tail_rate = tail_keywords / 1000
+    lists = []
+    for i in range(papers):
+        keywords = rng.choices(head, weights=weights, k=keywords_per_paper)
+        if rng.random() < tail_rate:
+            keywords[-1] = f"Rare Keyword {i}"
+        lists.append(keywords)
+    return lists
+
+
+def select_exact(keyword_lists: list[list[str]], k: int) -> list[str]:
+    keyword_freq = {}
+    for keywords in keyword_lists:
+        for keyword in keywords:
+            keyword_freq[keyword] = keyword_freq.get(keyword, 0) + 1
+    sorted_keywords = sorted(keyword_freq.items(), key=lambda x: x[1], reverse=True)
+    return [kw for kw, _ in sorted_keywords[:k]]
+
+
+def measure(select) -> tuple[float, float, object]:
+    """Peak MiB (traced run), seconds (untraced run) and the result."""
+    tracemalloc.start()
+    result = select()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    start = time.perf_counter()
+    select()
+    return peak / 2 ** 20, time.perf_counter() - start, result
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--papers", type=int, default=200_000, help="Papers (default: 200000)")
+    parser.add_argument("--keywords-per-paper", type=int, default=5, help="Keywords per paper (default: 5)")
+    parser.add_argument("--tail-keywords", type=int, default=600,
+                        help="Papers per 1000 with a keyword seen nowhere else (default: 600)")
+    parser.add_argument("--top-k", type=int, default=50, help="Keywords selected (default: 50)")
+    parser.add_argument("--capacity", type=int, default=SKETCH_CAPACITY,
+                        help=f"Space-Saving counters (default: {SKETCH_CAPACITY})")
+    args = parser.parse_args()
+
+    keyword_lists = make_keyword_lists(args.papers, args.keywords_per_paper, args.tail_keywords)
+    distinct = len({keyword for keywords in keyword_lists for keyword in keywords})
+    print(f"{args.papers} papers, {distinct} distinct keywords, top {args.top_k}")
+
+    exact_peak, exact_seconds, expected = measure(lambda: select_exact(keyword_lists, args.top_k))
+    sketch_peak, sketch_seconds, (selected, guaranteed) = measure(
+        lambda: select_top_keywords(keyword_lists, args.top_k, capacity=args.capacity)
+    )
+    print(f"exact   peak {exact_peak:7.1f} MiB  {exact_seconds:6.2f}s")
+    print(f"sketch  peak {sketch_peak:7.1f} MiB  {sketch_seconds:6.2f}s  "
+          f"(guaranteed exact: {'yes' if guaranteed else 'no'})")
+
+    failed = False
+    if selected != expected:
+        print(f"FAIL: sketch selected {len(set(selected) - set(expected))} keywords exact counting did not")
+        failed = True
+    if sketch_peak >= exact_peak:
+        print("FAIL: sketch did not lower peak memory")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,45 +1,34 @@
 """
 检查系统中可用的中文字体
 """
+import sys
+
 import matplotlib.font_manager as fm
 import matplotlib.pyplot as plt
 
-def check_chinese_fonts():
-    """检查系统中所有可用的字体"""
+from font_resolution import CHINESE_FONTS, chinese_font_properties, font_diagnostic, resolve_chinese_font
+
+def check_chinese_fonts(refresh=False):
+    """检查系统中可用的中文字体（与主程序共用字体解析结果）"""
     print("=" * 60)
     print("检查系统字体...")
     print("=" * 60)
     
-    # 获取所有字体
-    all_fonts = [f.name for f in fm.fontManager.ttflist]
-    
-    # 中文字体列表
-    chinese_fonts = [
-        'SimHei',           # 黑体 (Windows)
-        'Microsoft YaHei',  # 微软雅黑 (Windows)
-        'STHeiti',          # 华文黑体 (Mac)
-        'Arial Unicode MS', # (Mac)
-        'PingFang SC',      # 苹方 (Mac)
-        'Heiti SC',         # 黑体-简 (Mac)
-        'WenQuanYi Micro Hei',  # 文泉驿微米黑 (Linux)
-        'WenQuanYi Zen Hei',    # 文泉驿正黑 (Linux)
-        'Noto Sans CJK SC',     # 思源黑体 (Linux)
-        'Droid Sans Fallback',  # Android fallback
-    ]
+    # 读取已保存的字体解析结果（字体列表变化或 refresh 时重新扫描）
+    resolved = resolve_chinese_font(refresh=refresh)
+    print(f"\n🔎 字体诊断: {font_diagnostic()}")
     
     print("\n✅ 已安装的中文字体:")
-    found_fonts = []
-    for font in chinese_fonts:
-        if font in all_fonts:
-            print(f"  ✓ {font}")
-            found_fonts.append(font)
+    found_fonts = [font for font in CHINESE_FONTS if font in resolved.installed]
+    for font in found_fonts:
+        print(f"  ✓ {font}  ({resolved.installed[font]})")
     
     if not found_fonts:
         print("  ❌ 未找到任何中文字体！")
     
     print("\n❌ 未安装的中文字体:")
-    for font in chinese_fonts:
-        if font not in all_fonts:
+    for font in CHINESE_FONTS:
+        if font not in resolved.installed:
             print(f"  ✗ {font}")
     
     print("\n" + "=" * 60)
@@ -47,12 +36,11 @@ def check_chinese_fonts():
     print("=" * 60)
     
     if found_fonts:
-        # 测试第一个找到的字体
-        test_font = found_fonts[0]
+        # 测试主程序将使用的字体
+        test_font = resolved.name
         print(f"\n使用字体: {test_font}")
         
-        # 配置字体
-        plt.rcParams['font.sans-serif'] = [test_font]
+        # 与主程序相同：直接固定到字体文件
         plt.rcParams['axes.unicode_minus'] = False
         
         # 创建测试图
@@ -61,11 +49,13 @@ def check_chinese_fonts():
         values = [5, 8, 6, 7, 4]
         
         ax.bar(test_text, values)
-        ax.set_title('中文字体测试', fontsize=16)
-        ax.set_xlabel('关键词', fontsize=12)
-        ax.set_ylabel('频次', fontsize=12)
+        ax.set_title('中文字体测试', fontsize=16, fontproperties=chinese_font_properties(16))
+        ax.set_xlabel('关键词', fontsize=12, fontproperties=chinese_font_properties(12))
+        ax.set_ylabel('频次', fontsize=12, fontproperties=chinese_font_properties(12))
         
         plt.xticks(rotation=45, ha='right')
+        for label in ax.get_xticklabels():
+            label.set_fontproperties(chinese_font_properties())
         plt.tight_layout()
         
         # 保存图片
@@ -109,7 +99,8 @@ def list_all_fonts():
     print(f"\n总计: {len(all_fonts)} 个字体")
 
 if __name__ == "__main__":
-    success = check_chinese_fonts()
+    # --refresh: 忽略已保存的结果，重新扫描字体列表
+    success = check_chinese_fonts(refresh="--refresh" in sys.argv)
     
     # 询问是否显示所有字体
     print("\n" + "=" * 60)
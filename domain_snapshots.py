@@ -0,0 +1,230 @@
+"""
+Precomputed analysis snapshots for frequently used domains.
+
+A snapshot holds the finished analysis result of one domain (matrix,
+per-paper keywords, journals, run report) together with the rendered
+heatmap, so the UI can show it without fetching or calling the LLM. A
+background scheduler refreshes snapshots of the configured domain list
+once they are older than the configured interval.
+
+Layout under .cache/snapshots/:
+- config.json: domain list, lookback years, refresh interval and analysis parameters
+- <slug>/snapshot.json: domain, creation time, parameters and result
+- <slug>/heatmap.png: rendered heatmap
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import time
+
+
+SNAPSHOT_DIR = os.path.join(".cache", "snapshots")
+CONFIG_PATH = os.path.join(SNAPSHOT_DIR, "config.json")
+
+DEFAULT_CONFIG = {
+    "domains": [],
+    "lookback_years": 5,
+    "refresh_hours": 24,
+    "params": None,  # Analysis parameters saved from the UI
+}
+
+# How often the scheduler checks for stale snapshots
+SCHEDULER_INTERVAL_SECONDS = 300
+
+_write_lock = threading.Lock()
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def snapshot_slug(domain: str) -> str:
+    """
+    Directory name of a domain's snapshot: readable prefix plus a short hash.
+
+    Args:
+        domain: Search keyword
+
+    Returns:
+        File-system safe identifier, equal for case/whitespace variants
+    """
+    normalized = " ".join(domain.casefold().split())
+    readable = re.sub(r"[^0-9a-z]+", "-", normalized).strip("-")[:40] or "domain"
+    digest = hashlib.sha256(normalized.encode("utf-8")).hexdigest()[:10]
+    return f"{readable}-{digest}"
+
+
+def _write_json(path: str, data: dict):
+    """Write JSON atomically so readers never see a partial file."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def load_snapshot_config() -> dict:
+    """Snapshot configuration, with defaults for missing keys."""
+    config = dict(DEFAULT_CONFIG)
+    if os.path.exists(CONFIG_PATH):
+        try:
+            with open(CONFIG_PATH, "r", encoding="utf-8") as f:
+                config.update(json.load(f))
+        except (OSError, json.JSONDecodeError):
+            pass
+    return config
+
+
+def save_snapshot_config(config: dict):
+    """Persist the snapshot configuration."""
+    _write_json(CONFIG_PATH, config)
+
+
+def save_snapshot(domain: str, params: dict, result: dict, figure_png: bytes = None) -> dict:
+    """
+    Store a finished analysis as the current snapshot of a domain.
+
+    Args:
+        domain: Search keyword
+        params: Analysis parameters used for the run
+        result: Result dictionary of the analysis
+        figure_png: Rendered heatmap as PNG bytes (optional)
+
+    Returns:
+        The stored snapshot dictionary
+    """
+    directory = os.path.join(SNAPSHOT_DIR, snapshot_slug(domain))
+    snapshot = {
+        "domain": domain,
+        "created_at": time.time(),
+        "params": params,
+        "result": result,
+    }
+    with _write_lock:
+        os.makedirs(directory, exist_ok=True)
+        if figure_png is not None:
+            figure_path = os.path.join(directory, "heatmap.png")
+            tmp_path = f"{figure_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(figure_png)
+            os.replace(tmp_path, figure_path)
+        # Written last: a snapshot only becomes visible once complete
+        _write_json(os.path.join(directory, "snapshot.json"), snapshot)
+    return snapshot
+
+
+def load_snapshot(domain: str) -> dict:
+    """
+    Current snapshot of a domain.
+
+    Args:
+        domain: Search keyword
+
+    Returns:
+        Snapshot dictionary with "figure_path" (None if no figure was
+        stored), or None if the domain has no snapshot
+    """
+    directory = os.path.join(SNAPSHOT_DIR, snapshot_slug(domain))
+    try:
+        with open(os.path.join(directory, "snapshot.json"), "r", encoding="utf-8") as f:
+            snapshot = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    figure_path = os.path.join(directory, "heatmap.png")
+    snapshot["figure_path"] = figure_path if os.path.exists(figure_path) else None
+    return snapshot
+
+
+def list_snapshots() -> list[dict]:
+    """
+    Summaries of all stored snapshots, most recent first.
+
+    Returns:
+        List of dictionaries with domain, created_at, start_year, end_year and paper_count
+    """
+    summaries = []
+    if not os.path.isdir(SNAPSHOT_DIR):
+        return summaries
+    for name in os.listdir(SNAPSHOT_DIR):
+        path = os.path.join(SNAPSHOT_DIR, name, "snapshot.json")
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            continue
+        summaries.append({
+            "domain": snapshot["domain"],
+            "created_at": snapshot["created_at"],
+            "start_year": snapshot["params"]["start_year"],
+            "end_year": snapshot["params"]["end_year"],
+            "paper_count": snapshot["result"]["paper_count"],
+        })
+    return sorted(summaries, key=lambda summary: summary["created_at"], reverse=True)
+
+
+def stale_domains(config: dict, now: float = None) -> list[str]:
+    """
+    Configured domains whose snapshot is missing or older than the refresh interval.
+
+    Args:
+        config: Snapshot configuration
+        now: Current time (default: time.time())
+
+    Returns:
+        Domains that need a refresh, in configuration order
+    """
+    now = time.time() if now is None else now
+    max_age = config["refresh_hours"] * 3600
+    stale = []
+    for domain in config["domains"]:
+        snapshot = load_snapshot(domain)
+        if snapshot is None or now - snapshot["created_at"] >= max_age:
+            stale.append(domain)
+    return stale
+
+
+def clear_snapshots():
+    """Delete every stored snapshot (the configuration is kept)."""
+    if not os.path.isdir(SNAPSHOT_DIR):
+        return
+    for name in os.listdir(SNAPSHOT_DIR):
+        path = os.path.join(SNAPSHOT_DIR, name)
+        if os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def _scheduler_loop(refresh, interval: float):
+    while True:
+        try:
+            config = load_snapshot_config()
+            stale = stale_domains(config)
+            if stale and config["params"]:
+                refresh(stale, config)
+        except Exception:
+            pass  # Try again on the next tick; the UI shows failed refresh jobs
+        time.sleep(interval)
+
+
+def start_snapshot_scheduler(refresh, interval: float = SCHEDULER_INTERVAL_SECONDS):
+    """
+    Start the process-wide scheduler thread (once; later calls are ignored).
+
+    Every interval it calls refresh(stale_domains, config) if any configured
+    domain needs a refresh. refresh is responsible for not submitting a
+    refresh while another one is still running.
+
+    Args:
+        refresh: Callable(domains, config)
+        interval: Seconds between checks
+    """
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = threading.Thread(
+                target=_scheduler_loop, args=(refresh, interval), name="snapshot-scheduler", daemon=True
+            )
+            _scheduler.start()
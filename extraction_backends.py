@@ -0,0 +1,285 @@
+"""
+Keyword extraction backends.
+
+"remote" is the OpenAI-compatible LLM endpoint, called paper by paper by
+app.extract_keywords_by_paper under the token budget, the adaptive
+concurrency limiter and hedging. The other backends run without network
+access and implement ExtractionBackend; extract_keywords_by_paper
+consumes their results in place of the remote calls, so checkpoints,
+progress and early stopping work the same way.
+
+- "local_llm": a small quantized instruct model in GGUF format (e.g.
+  Qwen2.5-1.5B-Instruct Q4_K_M) run on CPU with llama-cpp-python (optional
+  install). Papers go in batches to worker processes that each load the
+  model once and share the CPU cores between them; prompt and response
+  parsing are the same as for the remote model.
+- "statistical": corpus-level n-gram keyphrase scoring with NumPy (see
+  statistical_keyphrases.py); no model, thousands of papers in seconds.
+
+Backends are created once per process and reused by later runs, so the
+model is not reloaded for every analysis. At most MAX_LOCAL_MODELS local
+models stay loaded: requesting another model retires the least recently
+used one, which shuts down its workers once no extraction is using it.
+"""
+
+import os
+import threading
+from abc import ABC, abstractmethod
+from collections.abc import Iterator
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context
+
+from keyword_parsing import build_keyword_prompt, parse_keyword_response
+
+
+EXTRACTION_BACKENDS = ("remote", "local_llm", "statistical")
+
+# Environment variable with the GGUF model used when no path is configured
+LOCAL_MODEL_ENV = "LOCAL_LLM_MODEL"
+
+# Papers per worker task: larger batches amortize inter-process overhead,
+# smaller ones keep progress updates and early stopping responsive
+LOCAL_BATCH_SIZE = 8
+
+# Context window of the local model (prompt + answer need well under 1k tokens)
+LOCAL_CONTEXT_TOKENS = 2048
+
+# Each worker gets at least this many CPU threads
+MIN_THREADS_PER_WORKER = 4
+MAX_LOCAL_WORKERS = 4
+
+# Local models (each held by every worker process) kept loaded at once
+MAX_LOCAL_MODELS = 1
+
+
+class ExtractionBackend(ABC):
+    """
+    Offline keyword extractor used in place of the remote LLM.
+    """
+    name = ""
+
+    @property
+    def fingerprint(self) -> str:
+        """Identifies the extractor in checkpoint fingerprints (different models, different keywords)."""
+        return self.name
+
+    @abstractmethod
+    def iter_extract(self, papers: list[dict],
+                     stop_event: threading.Event = None) -> Iterator[tuple[int, str, object]]:
+        """
+        Extract keywords for papers, yielding results as they finish.
+
+        Args:
+            papers: Paper dictionaries (title, abstract)
+            stop_event: Optional event; once set, papers not started yet
+                        are yielded as stopped
+
+        Yields:
+            Tuples of (index into papers, status, payload) with status and
+            payload as for remote calls: ("ok", keywords), ("failed",
+            reason) or ("stopped", None)
+        """
+
+    def close(self):
+        """Release workers and models."""
+
+    def retire(self):
+        """Release workers and models once no extraction is running (the backend was replaced)."""
+        self.close()
+
+
+# Model of a local_llm worker process (loaded by the pool initializer)
+_worker_model = None
+
+
+def _load_local_model(model_path: str, n_threads: int):
+    global _worker_model
+    from llama_cpp import Llama
+
+    _worker_model = Llama(model_path=model_path, n_ctx=LOCAL_CONTEXT_TOKENS, n_threads=n_threads, verbose=False)
+
+
+def _extract_local_batch(batch: list[tuple[str, str]]) -> list[tuple[str, object]]:
+    """Extract keywords for (title, abstract) pairs in a worker process."""
+    results = []
+    for title, abstract in batch:
+        if not title:
+            results.append(("failed", "无标题"))
+            continue
+        try:
+            response = _worker_model.create_chat_completion(
+                messages=[{"role": "user", "content": build_keyword_prompt(title, abstract)}],
+                temperature=0.3,
+                max_tokens=200,
+            )
+        except Exception as e:
+            # e.g. a prompt beyond the context window; only this paper fails
+            results.append(("failed", f"本地模型推理失败: {e}"))
+            continue
+        keywords = parse_keyword_response(response["choices"][0]["message"]["content"].strip())
+        results.append(("ok", keywords) if keywords else ("failed", "未提取到有效关键词"))
+    return results
+
+
+class LocalLLMBackend(ExtractionBackend):
+    """
+    Quantized instruct model on CPU, run in a pool of worker processes.
+    """
+    name = "local_llm"
+
+    def __init__(self, model_path: str, workers: int = None, batch_size: int = LOCAL_BATCH_SIZE):
+        """
+        Args:
+            model_path: GGUF model file
+            workers: Worker processes, each holding the model (default:
+                     one per MIN_THREADS_PER_WORKER cores, at most MAX_LOCAL_WORKERS)
+            batch_size: Papers per worker task
+
+        Raises:
+            RuntimeError if llama-cpp-python is not installed or the model file does not exist
+        """
+        try:
+            import llama_cpp  # noqa: F401
+        except ImportError as e:
+            raise RuntimeError("本地模型提取需要安装 llama-cpp-python：pip install llama-cpp-python") from e
+        if not model_path or not os.path.isfile(model_path):
+            raise RuntimeError(f"未找到本地模型文件：{model_path or '（未设置）'}")
+
+        cores = os.cpu_count() or 1
+        self.model_path = model_path
+        self.workers = workers or max(1, min(MAX_LOCAL_WORKERS, cores // MIN_THREADS_PER_WORKER))
+        self.batch_size = batch_size
+        self.closed = False
+        self._active = 0        # Running iter_extract calls
+        self._retired = False
+        self._state_lock = threading.Lock()
+        # Spawned workers do not inherit the app's threads and locks
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=get_context("spawn"),
+            initializer=_load_local_model,
+            initargs=(model_path, max(1, cores // self.workers)),
+        )
+
+    @property
+    def fingerprint(self) -> str:
+        return f"{self.name}:{os.path.basename(self.model_path)}"
+
+    def iter_extract(self, papers: list[dict],
+                     stop_event: threading.Event = None) -> Iterator[tuple[int, str, object]]:
+        with self._state_lock:
+            if self.closed:
+                raise RuntimeError(f"本地模型已被替换或关闭，请重新开始分析：{self.model_path}")
+            self._active += 1
+        batches = iter([list(range(start, min(start + self.batch_size, len(papers))))
+                        for start in range(0, len(papers), self.batch_size)])
+        running = {}
+
+        def submit_next() -> bool:
+            indices = next(batches, None)
+            if indices is None:
+                return False
+            batch = [(papers[i].get("title", ""), papers[i].get("abstract", "")) for i in indices]
+            running[self._executor.submit(_extract_local_batch, batch)] = indices
+            return True
+
+        try:
+            # Keep two batches per worker in flight, so a stop skips everything after them
+            for _ in range(2 * self.workers):
+                if not submit_next():
+                    break
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    indices = running.pop(future)
+                    try:
+                        outcomes = future.result()
+                    except BrokenProcessPool as e:
+                        self.close()
+                        raise RuntimeError(f"本地模型加载失败，请检查模型文件：{self.model_path}") from e
+                    for i, (status, payload) in zip(indices, outcomes):
+                        yield i, status, payload
+                    if stop_event is None or not stop_event.is_set():
+                        submit_next()
+            for indices in batches:
+                for i in indices:
+                    yield i, "stopped", None
+        finally:
+            for future in running:
+                future.cancel()
+            with self._state_lock:
+                self._active -= 1
+                close = self._retired and self._active == 0
+            if close:
+                self.close()
+
+    def close(self):
+        self.closed = True
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def retire(self):
+        with self._state_lock:
+            self._retired = True
+            idle = self._active == 0
+        if idle:
+            self.close()
+
+
+class StatisticalBackend(ExtractionBackend):
+    """
+    Statistical keyphrases scored across all papers of the run at once.
+    """
+    name = "statistical"
+
+    def iter_extract(self, papers: list[dict],
+                     stop_event: threading.Event = None) -> Iterator[tuple[int, str, object]]:
+        from statistical_keyphrases import extract_keyphrases
+
+        # Scores depend on the whole corpus, so every paper is extracted in one pass
+        for i, (paper, keywords) in enumerate(zip(papers, extract_keyphrases(papers))):
+            if not paper.get("title"):
+                yield i, "failed", "无标题"
+            elif keywords:
+                yield i, "ok", keywords
+            else:
+                yield i, "failed", "未提取到有效关键词"
+
+
+_backends: dict[tuple, ExtractionBackend] = {}
+_backends_lock = threading.Lock()
+
+
+def get_extraction_backend(name: str, model_path: str = None) -> ExtractionBackend:
+    """
+    Process-wide instance of an offline extraction backend.
+
+    Args:
+        name: One of EXTRACTION_BACKENDS except "remote"
+        model_path: Model file of "local_llm" (default: $LOCAL_LLM_MODEL)
+
+    Returns:
+        Backend (created on first use, reused afterwards; loading a local model
+        beyond MAX_LOCAL_MODELS retires the least recently used one)
+
+    Raises:
+        RuntimeError if the backend cannot be set up (missing package or model)
+    """
+    if name == "local_llm":
+        model_path = model_path or os.getenv(LOCAL_MODEL_ENV, "")
+    key = (name, model_path)
+    with _backends_lock:
+        backend = _backends.pop(key, None)
+        if backend is None or getattr(backend, "closed", False):
+            if name == "local_llm":
+                backend = LocalLLMBackend(model_path)
+                local_keys = [other for other in _backends if other[0] == "local_llm"]
+                for other in local_keys[:max(0, len(local_keys) - MAX_LOCAL_MODELS + 1)]:
+                    _backends.pop(other).retire()
+            elif name == "statistical":
+                backend = StatisticalBackend()
+            else:
+                raise ValueError(f"Unknown extraction backend: {name}")
+        # Most recently used last
+        _backends[key] = backend
+        return backend
@@ -0,0 +1,150 @@
+"""
+Durable per-paper checkpoints for LLM keyword extraction.
+
+Every extracted (or failed) paper is written to SQLite as soon as it
+finishes, keyed by a run fingerprint (domain, years, journals and paper
+IDs). If a run dies at paper 240/300, rerunning the same analysis reuses
+the 240 stored results and only sends the remaining and previously failed
+papers to the LLM.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+
+DB_PATH = os.path.join(".cache", "checkpoints.sqlite3")
+
+# Checkpoints older than this are dropped when the store is opened
+RETENTION_SECONDS = 7 * 24 * 3600
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS extractions (
+    fingerprint TEXT NOT NULL,
+    paper_id TEXT NOT NULL,
+    status TEXT NOT NULL,
+    keywords TEXT,
+    reason TEXT,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (fingerprint, paper_id)
+)
+"""
+
+_init_lock = threading.Lock()
+_initialized_paths = set()
+
+
+def run_fingerprint(domain: str, start_year: int, end_year: int, journals: list[str],
+                    paper_ids: list[str], extractor: str = None) -> str:
+    """
+    Identify an extraction run by its inputs.
+
+    Args:
+        domain: Search keyword
+        start_year: Beginning of time range (YYYY)
+        end_year: End of time range (YYYY)
+        journals: Journal names used for the fetch (may be empty)
+        paper_ids: OpenAlex IDs of the papers in the run
+        extractor: Offline extraction backend (None for the remote LLM, whose
+                   fingerprints stay unchanged)
+
+    Returns:
+        Hex digest fingerprint
+    """
+    key = [domain.strip().lower(), start_year, end_year, sorted(journals or []), sorted(paper_ids)]
+    if extractor:
+        key.append(extractor)
+    payload = json.dumps(key, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+@contextmanager
+def _connect(db_path: str):
+    """Connection for one transaction: committed (or rolled back) and closed on exit."""
+    directory = os.path.dirname(db_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        with _init_lock:
+            if db_path not in _initialized_paths:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(_SCHEMA)
+                conn.execute("DELETE FROM extractions WHERE updated_at < ?", (time.time() - RETENTION_SECONDS,))
+                conn.commit()
+                _initialized_paths.add(db_path)
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+class ExtractionCheckpoint:
+    """
+    Per-paper extraction results of one run fingerprint.
+    """
+
+    def __init__(self, fingerprint: str, db_path: str = DB_PATH):
+        self.fingerprint = fingerprint
+        self.db_path = db_path
+
+    def _rows(self, status: str) -> list[tuple]:
+        with _connect(self.db_path) as conn:
+            return conn.execute(
+                "SELECT paper_id, keywords, reason FROM extractions WHERE fingerprint = ? AND status = ?",
+                (self.fingerprint, status),
+            ).fetchall()
+
+    def completed(self) -> dict[str, list[str]]:
+        """Keywords of papers already extracted successfully, by paper ID."""
+        return {paper_id: json.loads(keywords) for paper_id, keywords, _ in self._rows("ok")}
+
+    def failed(self) -> dict[str, str]:
+        """Failure reasons of papers that still need a retry, by paper ID."""
+        return {paper_id: reason for paper_id, _, reason in self._rows("failed")}
+
+    def _write(self, paper_id: str, status: str, keywords: list[str] = None, reason: str = None):
+        with _connect(self.db_path) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO extractions (fingerprint, paper_id, status, keywords, reason, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (self.fingerprint, paper_id, status,
+                 json.dumps(keywords, ensure_ascii=False) if keywords is not None else None,
+                 reason, time.time()),
+            )
+
+    def record_success(self, paper_id: str, keywords: list[str]):
+        self._write(paper_id, "ok", keywords=keywords)
+
+    def record_failure(self, paper_id: str, reason: str):
+        self._write(paper_id, "failed", reason=reason)
+
+    def seed(self, keywords_by_id: dict[str, list[str]]):
+        """
+        Mark papers as extracted with keywords known from elsewhere (e.g. an
+        earlier snapshot of the same domain), so they are not sent to the LLM.
+        """
+        now = time.time()
+        with _connect(self.db_path) as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO extractions (fingerprint, paper_id, status, keywords, reason, updated_at) "
+                "VALUES (?, ?, 'ok', ?, NULL, ?)",
+                [(self.fingerprint, paper_id, json.dumps(keywords, ensure_ascii=False), now)
+                 for paper_id, keywords in keywords_by_id.items()],
+            )
+
+    def clear(self):
+        """Forget every paper of this run."""
+        with _connect(self.db_path) as conn:
+            conn.execute("DELETE FROM extractions WHERE fingerprint = ?", (self.fingerprint,))
+
+
+def clear_checkpoints(db_path: str = DB_PATH):
+    """Delete all checkpoints of all runs."""
+    if os.path.exists(db_path):
+        with _connect(db_path) as conn:
+            conn.execute("DELETE FROM extractions")
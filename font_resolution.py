@@ -0,0 +1,186 @@
+"""
+Chinese font resolution shared by app.py and check_fonts.py.
+
+Finding a CJK font means loading matplotlib's font list and probing it for
+the known Chinese font names. That is done once: the installed candidates
+and their font file paths are persisted to .cache/font_resolution.json,
+keyed by the path and mtime of matplotlib's own font list cache, so later
+processes (and both tools) read the answer without scanning or even
+importing matplotlib.
+
+Charts are then pinned to the resolved font file through FontProperties
+objects instead of a long font.sans-serif fallback chain, so matplotlib
+does not search for a font for every text element.
+"""
+
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+
+
+CACHE_FILE = os.path.join(".cache", "font_resolution.json")
+
+# Chinese fonts to try (in order of preference)
+CHINESE_FONTS = [
+    'SimHei',           # 黑体 (Windows)
+    'Microsoft YaHei',  # 微软雅黑 (Windows)
+    'STHeiti',          # 华文黑体 (Mac)
+    'Arial Unicode MS', # (Mac)
+    'PingFang SC',      # 苹方 (Mac)
+    'Heiti SC',         # 黑体-简 (Mac)
+    'WenQuanYi Micro Hei',  # 文泉驿微米黑 (Linux)
+    'WenQuanYi Zen Hei',    # 文泉驿正黑 (Linux)
+    'Noto Sans CJK SC',     # 思源黑体 (Linux)
+    'Droid Sans Fallback',  # Android fallback
+]
+
+_lock = threading.Lock()
+_resolved = None
+
+
+@dataclass
+class ResolvedFont:
+    """
+    Outcome of a font resolution.
+    """
+    name: str                 # Preferred installed Chinese font, or None
+    path: str                 # Font file of that font, or None
+    installed: dict[str, str] = field(default_factory=dict)  # All installed candidates: name -> file
+    source: str = "scan"      # "cache" or "scan"
+    seconds: float = 0.0      # Time spent resolving
+
+
+def _matplotlib_font_cache() -> str:
+    import matplotlib
+    import matplotlib.font_manager as fm
+
+    return os.path.join(matplotlib.get_cachedir(), f"fontlist-v{fm.FontManager.__version__}.json")
+
+
+def _load_cached() -> dict:
+    """Persisted resolution, if matplotlib's font list is unchanged since it was written."""
+    try:
+        with open(CACHE_FILE, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+        if os.path.getmtime(cached["font_cache"]) != cached["font_cache_mtime"]:
+            return None
+        if not all(os.path.exists(path) for path in cached["installed"].values()):
+            return None
+        return cached
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def _scan() -> dict[str, str]:
+    """Probe matplotlib's font list once for all candidates."""
+    import matplotlib.font_manager as fm
+
+    files_by_name = {}
+    for entry in fm.fontManager.ttflist:
+        files_by_name.setdefault(entry.name, entry.fname)
+    return {name: files_by_name[name] for name in CHINESE_FONTS if name in files_by_name}
+
+
+def resolve_chinese_font(refresh: bool = False) -> ResolvedFont:
+    """
+    Resolve the Chinese font to use (once per process, persisted across processes).
+
+    Args:
+        refresh: Ignore the persisted result and scan again
+
+    Returns:
+        ResolvedFont (name and path are None if no Chinese font is installed)
+    """
+    global _resolved
+    with _lock:
+        if _resolved is not None and not refresh:
+            return _resolved
+
+        start = time.perf_counter()
+        cached = None if refresh else _load_cached()
+        if cached is not None:
+            installed = cached["installed"]
+            source = "cache"
+        else:
+            installed = _scan()
+            source = "scan"
+            try:
+                font_cache = _matplotlib_font_cache()
+                os.makedirs(os.path.dirname(CACHE_FILE), exist_ok=True)
+                tmp_path = f"{CACHE_FILE}.{os.getpid()}.tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump({
+                        "font_cache": font_cache,
+                        "font_cache_mtime": os.path.getmtime(font_cache),
+                        "installed": installed,
+                    }, f, ensure_ascii=False)
+                os.replace(tmp_path, CACHE_FILE)
+            except OSError:
+                pass  # No font list cache (or read-only disk): scan again next time
+
+        name = next((font for font in CHINESE_FONTS if font in installed), None)
+        _resolved = ResolvedFont(
+            name=name,
+            path=installed.get(name) if name else None,
+            installed=installed,
+            source=source,
+            seconds=time.perf_counter() - start,
+        )
+        return _resolved
+
+
+def chinese_font_properties(size: float = None):
+    """
+    FontProperties pinned to the resolved font file.
+
+    Text drawn with it skips matplotlib's font search entirely.
+
+    Args:
+        size: Optional font size in points
+
+    Returns:
+        matplotlib.font_manager.FontProperties, or None if no Chinese font is installed
+    """
+    resolved = resolve_chinese_font()
+    if resolved.path is None:
+        return None
+    from matplotlib.font_manager import FontProperties
+
+    return FontProperties(fname=resolved.path, size=size)
+
+
+def configure_matplotlib() -> ResolvedFont:
+    """
+    Apply the resolved font to matplotlib's defaults.
+
+    Text that is not drawn with chinese_font_properties() falls back to a
+    two-entry font.sans-serif list (resolved font, then DejaVu Sans for
+    glyphs it lacks) instead of probing every candidate.
+
+    Returns:
+        The resolved font
+    """
+    import matplotlib
+
+    resolved = resolve_chinese_font()
+    if resolved.name:
+        matplotlib.rcParams['font.sans-serif'] = [resolved.name, 'DejaVu Sans']
+    matplotlib.rcParams['axes.unicode_minus'] = False
+    return resolved
+
+
+def font_diagnostic() -> str:
+    """
+    One-line startup diagnostic of the font resolution.
+
+    Returns:
+        Human-readable summary (font, file, source and time taken)
+    """
+    resolved = resolve_chinese_font()
+    source = "缓存" if resolved.source == "cache" else "扫描字体列表"
+    if resolved.name is None:
+        return f"未找到中文字体（{source}，{resolved.seconds * 1000:.1f} ms）"
+    return (f"{resolved.name} · {resolved.path}（{source}，{resolved.seconds * 1000:.1f} ms，"
+            f"已安装 {len(resolved.installed)} 个候选字体）")
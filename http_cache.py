@@ -0,0 +1,390 @@
+"""
+Persistent HTTP response cache for OpenAlex GET requests.
+
+Response bodies are stored in SQLite together with their validators (ETag,
+Last-Modified), so every process and every session shares them and they
+survive restarts. A lookup:
+
+- answers from the cache while the entry is younger than ttl_seconds,
+- serves an older entry immediately and revalidates it in the background
+  with a conditional request (stale-while-revalidate),
+- fetches synchronously when nothing usable is stored,
+- falls back to the stored entry, however old, while OpenAlex is
+  unreachable or failing (timeouts, connection errors, 429 and 5xx).
+  Stale entries whose last background revalidation failed are reported
+  as "offline" as well.
+
+Fetched bodies are streamed: the caller decodes the chunks as they arrive
+(see openalex_stream.py) while they are spooled to a temporary file, and
+the entry is written from that file once the body is complete. The full
+body is never held in memory.
+
+Entries are evicted least recently used first once the stored bodies
+exceed max_bytes, and dropped after max_stale_seconds without a successful
+revalidation.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+import requests
+
+
+DB_PATH = os.path.join(".cache", "http_cache.sqlite3")
+
+# Entries younger than this are served without contacting the server
+TTL_SECONDS = 6 * 3600
+
+# Entries older than this are fetched synchronously instead of served stale
+# (except during outages) and dropped at the next eviction
+MAX_STALE_SECONDS = 30 * 24 * 3600
+
+# Total size of stored bodies before least recently used entries are evicted
+MAX_BYTES = 512 * 1024 * 1024
+
+# Statuses treated as an outage (stale entries are served instead)
+_OUTAGE_STATUSES = {429, 500, 502, 503, 504}
+
+# Bytes copied at a time from the spooled body into SQLite
+_COPY_CHUNK_SIZE = 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    body BLOB NOT NULL,
+    content_type TEXT,
+    etag TEXT,
+    last_modified TEXT,
+    validated_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    size INTEGER NOT NULL
+)
+"""
+
+_init_lock = threading.Lock()
+_initialized_paths = set()
+
+
+@contextmanager
+def _connect(db_path: str):
+    """Connection for one transaction: committed (or rolled back) and closed on exit."""
+    directory = os.path.dirname(db_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        with _init_lock:
+            if db_path not in _initialized_paths:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(_SCHEMA)
+                conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)")
+                conn.commit()
+                _initialized_paths.add(db_path)
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+def request_key(url: str, params: dict = None) -> str:
+    """Cache key of a GET request (independent of parameter order)."""
+    payload = json.dumps([url, sorted((params or {}).items())], ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+class CachedResponse:
+    """
+    Response answered by the cache (or fetched through it).
+
+    Provides the parts of requests.Response the fetch code uses.
+    cache_status is "miss" (fetched now, see StreamedResponse), "hit"
+    (fresh entry), "revalidated" (server answered 304 Not Modified),
+    "stale" (old entry served while a background revalidation runs) or
+    "offline" (old entry served because the server could not be reached,
+    now or at the last background revalidation). age_seconds is the time
+    since the entry was last validated.
+    """
+
+    def __init__(self, url: str, body: bytes, status_code: int = 200, headers: dict = None,
+                 cache_status: str = "miss", age_seconds: float = 0.0):
+        self.url = url
+        self.content = body
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.cache_status = cache_status
+        self.age_seconds = age_seconds
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"{self.status_code} Error for url: {self.url}", response=self)
+
+    def json(self):
+        return json.loads(self.content)
+
+    def iter_content(self, chunk_size: int = 1):
+        for start in range(0, len(self.content), chunk_size):
+            yield self.content[start:start + chunk_size]
+
+
+class StreamedResponse(CachedResponse):
+    """
+    Response being fetched from the server (cache_status "miss").
+
+    The body is read once, through iter_content (or content, which reads it
+    all); with a store callback, the chunks are also spooled to a temporary
+    file that is handed to store(file, size) once the body is complete.
+    Closing the response before then stores nothing.
+    """
+
+    def __init__(self, url: str, response: requests.Response, store=None):
+        super().__init__(url, None, response.status_code, dict(response.headers))
+        self._response = response
+        self._store = store
+        self._content = None
+
+    @property
+    def content(self) -> bytes:
+        if self._content is None:
+            self._content = b"".join(self.iter_content(64 * 1024))
+        return self._content
+
+    @content.setter
+    def content(self, body: bytes):
+        self._content = body
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self._response.close()
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            self.close()
+        super().raise_for_status()
+
+    def iter_content(self, chunk_size: int = 1):
+        if self._content is not None:
+            yield from super().iter_content(chunk_size)
+            return
+        if self._store is None:
+            yield from self._response.iter_content(chunk_size)
+            return
+        with tempfile.TemporaryFile() as spool:
+            size = 0
+            for chunk in self._response.iter_content(chunk_size):
+                spool.write(chunk)
+                size += len(chunk)
+                yield chunk
+            self._store(spool, size)
+
+
+class HttpCache:
+    """
+    Shared on-disk cache of GET responses with conditional revalidation.
+    """
+
+    def __init__(self, db_path: str = DB_PATH, ttl_seconds: float = TTL_SECONDS,
+                 max_stale_seconds: float = MAX_STALE_SECONDS, max_bytes: int = MAX_BYTES):
+        """
+        Args:
+            db_path: SQLite file
+            ttl_seconds: Age up to which entries are served without revalidation
+            max_stale_seconds: Age after which entries are no longer served stale
+            max_bytes: Total body size kept on disk
+        """
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.max_stale_seconds = max_stale_seconds
+        self.max_bytes = max_bytes
+        self._revalidating = set()
+        self._failed_revalidations = set()  # Keys whose last background revalidation failed
+        self._lock = threading.Lock()
+
+    def _lookup(self, key: str) -> tuple:
+        with _connect(self.db_path) as conn:
+            return conn.execute(
+                "SELECT body, content_type, etag, last_modified, validated_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+
+    def _touch(self, key: str, validated: bool = False):
+        now = time.time()
+        with _connect(self.db_path) as conn:
+            if validated:
+                conn.execute("UPDATE responses SET accessed_at = ?, validated_at = ? WHERE key = ?", (now, now, key))
+            else:
+                conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+
+    def _store(self, key: str, url: str, headers: dict, body_file, size: int):
+        """Store a complete body from body_file (copied in chunks where SQLite allows it)."""
+        now = time.time()
+        body_file.seek(0)
+        with _connect(self.db_path) as conn:
+            # Blob I/O (Python 3.11+) writes into a preallocated blob without reading the whole body
+            incremental = hasattr(conn, "blobopen")
+            cursor = conn.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(key, url, body, content_type, etag, last_modified, validated_at, accessed_at, size) "
+                f"VALUES (?, ?, {'zeroblob(?)' if incremental else '?'}, ?, ?, ?, ?, ?, ?)",
+                (key, url, size if incremental else body_file.read(), headers.get("Content-Type"),
+                 headers.get("ETag"), headers.get("Last-Modified"), now, now, size),
+            )
+            if incremental:
+                with conn.blobopen("responses", "body", cursor.lastrowid) as blob:
+                    while chunk := body_file.read(_COPY_CHUNK_SIZE):
+                        blob.write(chunk)
+            self._evict(conn)
+        with self._lock:
+            self._failed_revalidations.discard(key)
+
+    def _evict(self, conn: sqlite3.Connection):
+        """Drop expired entries, then least recently used ones until under max_bytes."""
+        conn.execute("DELETE FROM responses WHERE validated_at < ?", (time.time() - self.max_stale_seconds,))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        evicted = []
+        for key, size in conn.execute("SELECT key, size FROM responses ORDER BY accessed_at"):
+            if total <= self.max_bytes:
+                break
+            evicted.append((key,))
+            total -= size
+        conn.executemany("DELETE FROM responses WHERE key = ?", evicted)
+
+    def _fetch(self, key: str, url: str, params: dict, timeout: float, entry: tuple,
+               rate_limiter=None) -> CachedResponse:
+        """
+        Request from the server (conditionally if an entry exists) and update the cache.
+
+        A 200 response is returned before its body is read (StreamedResponse);
+        it is stored once the caller has read the whole body.
+        """
+        headers = {}
+        if entry is not None:
+            _, _, etag, last_modified, _ = entry
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+        if rate_limiter is not None:
+            rate_limiter.acquire()
+        response = requests.get(url, params=params, headers=headers, timeout=timeout, stream=True)
+        if response.status_code == 304 and entry is not None:
+            response.close()
+            self._touch(key, validated=True)
+            with self._lock:
+                self._failed_revalidations.discard(key)
+            return CachedResponse(url, entry[0], headers={"Content-Type": entry[1]}, cache_status="revalidated")
+        if response.status_code in _OUTAGE_STATUSES:
+            response.close()
+            raise requests.exceptions.HTTPError(f"{response.status_code} Error for url: {url}", response=response)
+        store = None
+        if response.status_code == 200:
+            def store(body_file, size: int):
+                self._store(key, url, response.headers, body_file, size)
+        return StreamedResponse(url, response, store)
+
+    def _revalidate_in_background(self, key: str, url: str, params: dict, timeout: float, entry: tuple,
+                                  rate_limiter=None):
+        with self._lock:
+            if key in self._revalidating:
+                return
+            self._revalidating.add(key)
+
+        def revalidate():
+            failed = False
+            try:
+                with self._fetch(key, url, params, timeout, entry, rate_limiter) as response:
+                    # Reading the body stores it
+                    for _ in response.iter_content(64 * 1024):
+                        pass
+            except requests.exceptions.RequestException:
+                # Keep serving the stored entry, as "offline" until a revalidation succeeds
+                failed = True
+            finally:
+                with self._lock:
+                    self._revalidating.discard(key)
+                    if failed:
+                        self._failed_revalidations.add(key)
+                    else:
+                        self._failed_revalidations.discard(key)
+
+        threading.Thread(target=revalidate, name=f"http-cache-{key[:8]}", daemon=True).start()
+
+    def get(self, url: str, params: dict = None, timeout: float = 60, rate_limiter=None) -> CachedResponse:
+        """
+        GET through the cache.
+
+        Args:
+            url: Request URL
+            params: Query parameters
+            timeout: Timeout of a network request (seconds)
+            rate_limiter: Optional limiter (with acquire()) waited for before network requests
+
+        Returns:
+            CachedResponse (see cache_status for where it came from)
+
+        Raises:
+            requests.exceptions.RequestException if the server cannot be
+            reached and nothing usable is stored
+        """
+        key = request_key(url, params)
+        entry = self._lookup(key)
+        age = time.time() - entry[4] if entry is not None else None
+        if entry is not None and age <= self.max_stale_seconds:
+            self._touch(key)
+            cached = CachedResponse(url, entry[0], headers={"Content-Type": entry[1]}, age_seconds=age)
+            if age <= self.ttl_seconds:
+                cached.cache_status = "hit"
+            else:
+                with self._lock:
+                    unreachable = key in self._failed_revalidations
+                cached.cache_status = "offline" if unreachable else "stale"
+                self._revalidate_in_background(key, url, params, timeout, entry, rate_limiter)
+            return cached
+
+        try:
+            return self._fetch(key, url, params, timeout, entry, rate_limiter)
+        except requests.exceptions.RequestException:
+            if entry is None:
+                raise
+            # Even an entry beyond max_stale_seconds beats an error panel during an outage
+            return CachedResponse(url, entry[0], headers={"Content-Type": entry[1]}, cache_status="offline",
+                                  age_seconds=age)
+
+    def clear(self):
+        """Delete every stored response."""
+        if os.path.exists(self.db_path):
+            with _connect(self.db_path) as conn:
+                conn.execute("DELETE FROM responses")
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_http_cache() -> HttpCache:
+    """Process-wide HTTP cache."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = HttpCache()
+        return _cache
+
+
+def cached_get(url: str, params: dict = None, timeout: float = 60, rate_limiter=None) -> CachedResponse:
+    """GET through the shared HTTP cache (see HttpCache.get)."""
+    return get_http_cache().get(url, params=params, timeout=timeout, rate_limiter=rate_limiter)
@@ -0,0 +1,312 @@
+"""
+Background job queue for long-running analyses.
+
+Jobs run on a local worker thread pool and their state lives in a SQLite
+table, so a Streamlit rerun, browser refresh or websocket drop no longer
+throws away a running analysis: the UI polls the job by ID and re-attaches
+to it. Each job records progress, a message log, cancellation requests and
+its JSON result.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+
+DB_PATH = os.path.join(".cache", "jobs.sqlite3")
+
+# Job states
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+JOB_INTERRUPTED = "interrupted"  # Worker process died (e.g. server restart)
+
+ACTIVE_STATES = {JOB_QUEUED, JOB_RUNNING}
+
+# Keep at most this many log lines per job
+MAX_LOG_LINES = 200
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    params TEXT NOT NULL,
+    status TEXT NOT NULL,
+    progress REAL NOT NULL DEFAULT 0,
+    message TEXT NOT NULL DEFAULT '',
+    log TEXT NOT NULL DEFAULT '[]',
+    result TEXT,
+    error TEXT,
+    error_kind TEXT,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    owner_pid INTEGER,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+)
+"""
+
+
+class JobCancelled(Exception):
+    """Raised inside a job when cancellation has been requested."""
+
+
+class JobContext:
+    """
+    Handle passed to a running job for reporting progress and checking cancellation.
+    """
+
+    def __init__(self, queue: "JobQueue", job_id: str):
+        self.queue = queue
+        self.job_id = job_id
+
+    def is_cancelled(self) -> bool:
+        return self.queue._cancel_requested(self.job_id)
+
+    def check_cancelled(self):
+        """Raise JobCancelled if the user cancelled the job."""
+        if self.is_cancelled():
+            raise JobCancelled()
+
+    def progress(self, fraction: float, message: str = None):
+        """
+        Update progress (0-1) and the current status message.
+
+        Also checks for cancellation, so long loops only need to report progress.
+        """
+        self.queue._update(self.job_id, progress=max(0.0, min(1.0, fraction)), message=message)
+        self.check_cancelled()
+
+    def update_params(self, **values):
+        """
+        Merge values into the persisted job parameters, e.g. decisions a
+        resumed job must repeat exactly (such as the identified journals).
+        """
+        self.queue._merge_params(self.job_id, values)
+
+    def log(self, message: str, level: str = "info"):
+        """
+        Append a message to the job log (level: info, success, warning, error).
+        """
+        self.queue._append_log(self.job_id, level, message)
+
+    def scoped(self, start: float, end: float, prefix: str) -> "JobContext":
+        """
+        Context for one step of a multi-step job: progress 0-1 of the step maps
+        to start-end of the job, and messages are prefixed (e.g. "[2/5] domain").
+        """
+        return _ScopedJobContext(self, start, end, prefix)
+
+
+class _ScopedJobContext(JobContext):
+    def __init__(self, parent: JobContext, start: float, end: float, prefix: str):
+        super().__init__(parent.queue, parent.job_id)
+        self.parent = parent
+        self.start = start
+        self.end = end
+        self.prefix = prefix
+
+    def progress(self, fraction: float, message: str = None):
+        self.parent.progress(self.start + (self.end - self.start) * max(0.0, min(1.0, fraction)),
+                             f"{self.prefix} · {message}" if message else None)
+
+    def log(self, message: str, level: str = "info"):
+        self.parent.log(f"{self.prefix} · {message}", level)
+
+    def scoped(self, start: float, end: float, prefix: str) -> JobContext:
+        span = self.end - self.start
+        return _ScopedJobContext(self.parent, self.start + span * start, self.start + span * end,
+                                 f"{self.prefix} · {prefix}")
+
+
+def _pid_alive(pid: int) -> bool:
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JobQueue:
+    """
+    SQLite-backed job table with a local worker pool.
+
+    Job functions are called as func(ctx, params, *extra_args) and must return
+    a JSON-serializable result. Only params are persisted; extra_args (e.g.
+    API keys) stay in memory.
+    """
+
+    def __init__(self, db_path: str = DB_PATH, max_workers: int = 2):
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="analysis-job")
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(_SCHEMA)
+        self._mark_orphans_interrupted()
+
+    @contextmanager
+    def _connect(self):
+        """Connection for one transaction: committed (or rolled back) and closed on exit."""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _mark_orphans_interrupted(self):
+        """Jobs left active by a process that no longer exists can never finish."""
+        with self._lock, self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, owner_pid FROM jobs WHERE status IN (?, ?)", tuple(ACTIVE_STATES)
+            ).fetchall()
+            for row in rows:
+                if row["owner_pid"] != os.getpid() and not _pid_alive(row["owner_pid"]):
+                    conn.execute(
+                        "UPDATE jobs SET status = ?, message = ?, updated_at = ? WHERE id = ?",
+                        (JOB_INTERRUPTED, "任务因服务重启而中断", time.time(), row["id"]),
+                    )
+
+    def _update(self, job_id: str, **fields):
+        fields = {key: value for key, value in fields.items() if value is not None}
+        if not fields:
+            return
+        fields["updated_at"] = time.time()
+        assignments = ", ".join(f"{key} = ?" for key in fields)
+        with self._lock, self._connect() as conn:
+            conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+
+    def _append_log(self, job_id: str, level: str, message: str):
+        with self._lock, self._connect() as conn:
+            row = conn.execute("SELECT log FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                return
+            log = json.loads(row["log"])
+            log.append([time.time(), level, message])
+            conn.execute(
+                "UPDATE jobs SET log = ?, updated_at = ? WHERE id = ?",
+                (json.dumps(log[-MAX_LOG_LINES:], ensure_ascii=False), time.time(), job_id),
+            )
+
+    def _merge_params(self, job_id: str, values: dict):
+        with self._lock, self._connect() as conn:
+            row = conn.execute("SELECT params FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                return
+            params = json.loads(row["params"])
+            params.update(values)
+            conn.execute(
+                "UPDATE jobs SET params = ?, updated_at = ? WHERE id = ?",
+                (json.dumps(params, ensure_ascii=False), time.time(), job_id),
+            )
+
+    def _cancel_requested(self, job_id: str) -> bool:
+        with self._connect() as conn:
+            row = conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return bool(row and row["cancel_requested"])
+
+    def _run(self, job_id: str, func, params: dict, extra_args: tuple):
+        if self._cancel_requested(job_id):
+            self._update(job_id, status=JOB_CANCELLED, message="已取消")
+            return
+        self._update(job_id, status=JOB_RUNNING)
+        ctx = JobContext(self, job_id)
+        try:
+            result = func(ctx, params, *extra_args)
+        except JobCancelled:
+            self._update(job_id, status=JOB_CANCELLED, message="已取消")
+        except Exception as e:
+            self._update(job_id, status=JOB_FAILED, error=str(e),
+                         error_kind=getattr(e, "kind", type(e).__name__))
+        else:
+            self._update(job_id, status=JOB_SUCCEEDED, progress=1.0, message="完成",
+                         result=json.dumps(result, ensure_ascii=False))
+
+    def submit(self, kind: str, params: dict, func, *extra_args) -> str:
+        """
+        Queue a job on the worker pool.
+
+        Args:
+            kind: Job type (e.g. "analysis")
+            params: JSON-serializable parameters (persisted)
+            func: Callable func(ctx, params, *extra_args) -> result
+            extra_args: Additional in-memory arguments (not persisted)
+
+        Returns:
+            Job ID
+        """
+        job_id = uuid.uuid4().hex[:12]
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, kind, params, status, owner_pid, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, kind, json.dumps(params, ensure_ascii=False), JOB_QUEUED, os.getpid(), now, now),
+            )
+        self._executor.submit(self._run, job_id, func, params, extra_args)
+        return job_id
+
+    def cancel(self, job_id: str):
+        """Request cancellation; the job stops at its next progress report."""
+        self._update(job_id, cancel_requested=1)
+
+    def get(self, job_id: str) -> dict:
+        """
+        Current state of a job.
+
+        Returns:
+            Job dictionary (params, log and result decoded), or None if unknown
+        """
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._decode(row) if row else None
+
+    def list_jobs(self, kind: str = None, limit: int = 20) -> list[dict]:
+        """
+        Most recent jobs first (without results, to keep the listing cheap).
+        """
+        query = "SELECT id, kind, params, status, progress, message, created_at, updated_at FROM jobs"
+        args = ()
+        if kind:
+            query += " WHERE kind = ?"
+            args = (kind,)
+        query += " ORDER BY created_at DESC LIMIT ?"
+        with self._connect() as conn:
+            rows = conn.execute(query, (*args, limit)).fetchall()
+        return [self._decode(row) for row in rows]
+
+    @staticmethod
+    def _decode(row: sqlite3.Row) -> dict:
+        job = dict(row)
+        for key in ("params", "log", "result"):
+            if job.get(key) is not None:
+                job[key] = json.loads(job[key])
+        return job
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    """Process-wide job queue shared by all sessions."""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = JobQueue()
+        return _queue
@@ -0,0 +1,338 @@
+"""
+Embedding-based clustering of extracted keywords.
+
+LLM keywords for the same concept come in many surface forms ("GNN",
+"Graph Neural Networks", "graph neural network"). This module embeds each
+keyword locally, finds near neighbours with random-hyperplane LSH and maps
+every keyword to its cluster representative before the co-occurrence
+matrix is built.
+
+Two embedding backends are available:
+- "hashed": TF-IDF weighted, hashed character 3/4-grams (no extra dependencies)
+- "minilm": sentence-transformers all-MiniLM-L6-v2 on CPU (optional install)
+
+Similarity alone over-merges: "deep reinforcement learning" embeds close
+to "reinforcement learning" and "SARS-CoV-2" to "SARS-CoV-1". Keywords
+whose words agree up to case, punctuation, word order and plurals always
+merge; an embedding match also needs lexical evidence (see _may_merge).
+
+MiniLM embeddings are cached on disk by keyword string, so repeated
+vocabularies cost nothing; hashed embeddings are cheaper to recompute than
+to store and are not cached.
+"""
+
+import os
+import re
+import threading
+import zlib
+from collections import Counter
+from difflib import SequenceMatcher
+
+import numpy as np
+
+
+CACHE_DIR = os.path.join(".cache", "keyword_embeddings")
+
+HASHED_DIM = 1024
+MINILM_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+EMBEDDING_BACKENDS = ("hashed", "minilm")
+
+# Default cosine similarity needed to merge two keywords, per backend
+DEFAULT_THRESHOLDS = {"hashed": 0.8, "minilm": 0.8}
+
+# Words of two keywords that differ must be at least this similar to count as
+# spelling variants ("colour" / "color") when merging with the hashed backend
+SPELLING_SIMILARITY = 0.8
+
+_ACRONYM_PATTERN = re.compile(r"^[A-Z][A-Za-z0-9]{1,7}$")
+_WORD_PATTERN = re.compile(r"[^\W_]+")
+
+_cache_lock = threading.Lock()
+_memory_cache: dict[str, dict[str, np.ndarray]] = {}
+_minilm_model = None
+
+
+def normalize_keyword(keyword: str) -> str:
+    """Case-fold and collapse whitespace so trivially different spellings compare equal."""
+    return " ".join(keyword.casefold().split())
+
+
+def _singular(word: str) -> str:
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 3 and word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+
+def keyword_words(keyword: str) -> tuple[str, ...]:
+    """
+    Sorted, case-folded, singular words of a keyword.
+
+    "Quantum Error-Correcting Codes" and "quantum error correcting code" give
+    the same words; keywords with equal words are always merged.
+    """
+    return tuple(sorted(_singular(word) for word in _WORD_PATTERN.findall(keyword.casefold())))
+
+
+def _spelling_variants(first: tuple[str, ...], second: tuple[str, ...]) -> bool:
+    """Whether the words that differ between two keywords pair up as near-identical spellings."""
+    only_first = list((Counter(first) - Counter(second)).elements())
+    only_second = list((Counter(second) - Counter(first)).elements())
+    if len(only_first) != len(only_second):
+        return False
+    for word in only_first:
+        # Numbers never vary in spelling ("SARS-CoV-1" / "SARS-CoV-2")
+        best = max(only_second, key=lambda other: SequenceMatcher(None, word, other).ratio())
+        if word.isdigit() or best.isdigit() or SequenceMatcher(None, word, best).ratio() < SPELLING_SIMILARITY:
+            return False
+        only_second.remove(best)
+    return True
+
+
+def _may_merge(first: str, second: str, backend: str) -> bool:
+    """
+    Lexical evidence an embedding match needs before two keywords merge.
+
+    Character n-grams cannot tell a qualifier or a version number from a
+    spelling variant, so "hashed" only merges keywords whose differing words
+    are near-identical spellings. MiniLM may merge different wordings of a
+    concept, but not a narrower concept ("deep reinforcement learning" vs
+    "reinforcement learning") or a different number ("SARS-CoV-2").
+    """
+    first_words, second_words = keyword_words(first), keyword_words(second)
+    if backend == "hashed":
+        return _spelling_variants(first_words, second_words)
+    first_set, second_set = set(first_words), set(second_words)
+    if first_set < second_set or second_set < first_set:
+        return False
+    return not any(word.isdigit() for word in first_set ^ second_set)
+
+
+def _hashed_embedding(keyword: str) -> np.ndarray:
+    """Sublinear term frequency of hashed character 3/4-grams (IDF is applied later)."""
+    text = f" {normalize_keyword(keyword)} "
+    counts = {}
+    for size in (3, 4):
+        for i in range(len(text) - size + 1):
+            bucket = zlib.crc32(text[i:i + size].encode("utf-8")) % HASHED_DIM
+            counts[bucket] = counts.get(bucket, 0) + 1
+    vector = np.zeros(HASHED_DIM, dtype=np.float32)
+    for bucket, count in counts.items():
+        vector[bucket] = 1.0 + np.log(count)
+    return vector
+
+
+def _minilm_embeddings(keywords: list[str]) -> np.ndarray:
+    global _minilm_model
+    if _minilm_model is None:
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise RuntimeError("语义嵌入需要安装 sentence-transformers：pip install sentence-transformers") from e
+        _minilm_model = SentenceTransformer(MINILM_MODEL, device="cpu")
+    return _minilm_model.encode(keywords, batch_size=64, convert_to_numpy=True).astype(np.float32)
+
+
+def _cache_path(backend: str) -> str:
+    return os.path.join(CACHE_DIR, f"{backend}.npz")
+
+
+def _load_cache(backend: str) -> dict[str, np.ndarray]:
+    """Load the on-disk cache for a backend into memory (once per process). Caller holds the lock."""
+    if backend in _memory_cache:
+        return _memory_cache[backend]
+    cache = {}
+    path = _cache_path(backend)
+    if os.path.exists(path):
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                for keyword, vector in zip(data["keywords"], data["vectors"]):
+                    cache[str(keyword)] = vector
+        except Exception:
+            # Corrupt cache: start over
+            cache = {}
+    _memory_cache[backend] = cache
+    return cache
+
+
+def _save_cache(backend: str, cache: dict[str, np.ndarray]):
+    """Atomically write the cache so concurrent sessions never read a partial file."""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    path = _cache_path(backend)
+    tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+    keywords = np.array(list(cache.keys()), dtype=str)
+    vectors = np.stack(list(cache.values())) if cache else np.zeros((0, 0), dtype=np.float32)
+    np.savez_compressed(tmp_path, keywords=keywords, vectors=vectors)
+    os.replace(tmp_path, path)
+
+
+def embed_keywords(keywords: list[str], backend: str = "hashed") -> np.ndarray:
+    """
+    Embed normalized keywords, using the on-disk cache for "minilm".
+
+    Args:
+        keywords: Keywords to embed
+        backend: One of EMBEDDING_BACKENDS
+
+    Returns:
+        Array of shape (len(keywords), dim), rows are L2-normalized
+    """
+    normalized = [normalize_keyword(keyword) for keyword in keywords]
+    if backend == "hashed":
+        # Recomputing is cheaper than loading or rewriting a cache file
+        matrix = np.stack([_hashed_embedding(keyword) for keyword in normalized])
+    else:
+        with _cache_lock:
+            cache = _load_cache(backend)
+            missing = sorted({keyword for keyword in normalized if keyword not in cache})
+            if missing:
+                for keyword, vector in zip(missing, _minilm_embeddings(missing)):
+                    cache[keyword] = vector
+                try:
+                    _save_cache(backend, cache)
+                except OSError:
+                    pass  # Cache is an optimization only
+            matrix = np.stack([cache[keyword] for keyword in normalized]).astype(np.float32)
+
+    if backend == "hashed":
+        # IDF over the current vocabulary: common n-grams ("ing", " de") weigh less
+        document_freq = np.count_nonzero(matrix, axis=0)
+        idf = np.log((1 + len(matrix)) / (1 + document_freq)) + 1.0
+        matrix = matrix * idf
+
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _lsh_candidates(embeddings: np.ndarray, tables: int = 8, bits: int = 12, seed: int = 7) -> list[set[int]]:
+    """
+    Approximate nearest-neighbour candidates via random-hyperplane LSH.
+
+    Returns:
+        For each row, the set of other rows sharing a bucket in any table
+    """
+    rng = np.random.default_rng(seed)
+    planes = rng.standard_normal((embeddings.shape[1], tables * bits)).astype(np.float32)
+    signs = (embeddings @ planes) > 0
+    weights = 1 << np.arange(bits)
+
+    candidates = [set() for _ in range(len(embeddings))]
+    for table in range(tables):
+        codes = signs[:, table * bits:(table + 1) * bits] @ weights
+        buckets = {}
+        for row, code in enumerate(codes):
+            buckets.setdefault(int(code), []).append(row)
+        for members in buckets.values():
+            if len(members) < 2:
+                continue
+            for row in members:
+                candidates[row].update(members)
+    for row, row_candidates in enumerate(candidates):
+        row_candidates.discard(row)
+    return candidates
+
+
+def _acronym_targets(keywords: list[str]) -> dict[str, str]:
+    """Map acronyms such as "GNN"/"GNNs" to the multi-word keyword with matching initials."""
+    by_initials = {}
+    for keyword in keywords:
+        words = keyword.split()
+        if len(words) >= 2:
+            initials = "".join(word[0] for word in words if word).lower()
+            by_initials.setdefault(initials, keyword)
+
+    targets = {}
+    for keyword in keywords:
+        stripped = keyword.strip()
+        if not _ACRONYM_PATTERN.match(stripped) or sum(char.isupper() for char in stripped) < 2:
+            continue
+        key = stripped.lower()
+        target = by_initials.get(key) or (by_initials.get(key[:-1]) if key.endswith("s") else None)
+        if target:
+            targets[keyword] = target
+    return targets
+
+
+def cluster_keywords(keyword_lists: list[list[str]], threshold: float = None,
+                     backend: str = "hashed") -> tuple[list[list[str]], dict[str, str]]:
+    """
+    Map semantically equivalent keywords to a shared representative.
+
+    Keywords are visited from most to least frequent; each unassigned keyword
+    becomes a representative and absorbs its unassigned LSH neighbours whose
+    cosine similarity reaches the threshold and that pass _may_merge.
+    Keywords with the same words (keyword_words) and acronyms of a keyword
+    merge without an embedding match.
+
+    Args:
+        keyword_lists: Keywords extracted from each paper
+        threshold: Cosine similarity needed to merge (default per backend)
+        backend: One of EMBEDDING_BACKENDS
+
+    Returns:
+        Tuple of (keyword lists with representatives substituted and
+        per-paper duplicates removed, mapping from variant to representative)
+    """
+    if threshold is None:
+        threshold = DEFAULT_THRESHOLDS.get(backend, 0.8)
+
+    keyword_freq = {}
+    for keywords in keyword_lists:
+        for keyword in keywords:
+            keyword_freq[keyword] = keyword_freq.get(keyword, 0) + 1
+    if not keyword_freq:
+        return keyword_lists, {}
+
+    # Most frequent first; ties prefer the shorter spelling
+    vocabulary = sorted(keyword_freq, key=lambda kw: (-keyword_freq[kw], len(kw), kw))
+    index = {keyword: i for i, keyword in enumerate(vocabulary)}
+    representative = {}
+
+    # Keywords with the same words (case, punctuation, order and plurals aside) always merge
+    first_by_normalized = {}
+    for keyword in vocabulary:
+        normalized = keyword_words(keyword) or normalize_keyword(keyword)
+        if normalized in first_by_normalized:
+            representative[keyword] = first_by_normalized[normalized]
+        else:
+            first_by_normalized[normalized] = keyword
+
+    # Acronyms join their expansion
+    for acronym, target in _acronym_targets(vocabulary).items():
+        if acronym not in representative:
+            representative[acronym] = representative.get(target, target)
+
+    embeddings = embed_keywords(vocabulary, backend=backend)
+    candidates = _lsh_candidates(embeddings)
+    for keyword in vocabulary:
+        if keyword in representative:
+            continue
+        representative[keyword] = keyword
+        row = index[keyword]
+        for other_row in candidates[row]:
+            other = vocabulary[other_row]
+            if other in representative:
+                continue
+            if float(embeddings[row] @ embeddings[other_row]) >= threshold and _may_merge(keyword, other, backend):
+                representative[other] = keyword
+
+    # Acronyms may point at a keyword that was itself absorbed later: follow the chain
+    for keyword in vocabulary:
+        rep = representative[keyword]
+        while representative[rep] != rep:
+            rep = representative[rep]
+        representative[keyword] = rep
+
+    mapping = {keyword: rep for keyword, rep in representative.items() if keyword != rep}
+    clustered = []
+    for keywords in keyword_lists:
+        seen = []
+        for keyword in keywords:
+            rep = representative.get(keyword, keyword)
+            if rep not in seen:
+                seen.append(rep)
+        clustered.append(seen)
+    return clustered, mapping
@@ -0,0 +1,71 @@
+"""
+Keyword extraction prompt and the rules applied to extracted keywords.
+
+Shared by every extraction backend (remote LLM, local model worker
+processes), so all of them ask the same question and keep the same kind
+of keywords. Kept free of Streamlit and heavy imports so worker processes
+can import it cheaply.
+"""
+
+
+# Broad concepts that say nothing about a research hotspot
+GENERIC_TERMS = {'machine learning', 'deep learning', 'artificial intelligence',
+                 'computer science', 'data science', 'neural network'}
+
+# Longer "keywords" are usually (parts of) titles
+MAX_KEYWORD_WORDS = 5
+
+MAX_KEYWORDS_PER_PAPER = 6
+
+
+def build_keyword_prompt(title: str, abstract: str) -> str:
+    """
+    Build the LLM prompt used to extract keywords from one paper.
+
+    Args:
+        title: Paper title
+        abstract: Paper abstract (may be empty)
+
+    Returns:
+        Prompt string
+    """
+    # Limit abstract length
+    abstract = abstract[:800]
+    return f"""从以下论文的标题和摘要中提取3-5个核心关键词。
+
+要求：
+1. 提取具体的技术、方法、模型名称（如"Transformer Architecture"、"Quantum Error Correction"）
+2. 避免宽泛概念（如"Machine Learning"、"Computer Science"）
+3. 优先提取多词专业术语（2-4个词）
+4. 不要输出完整的论文标题
+5. 只输出关键词，用逗号分隔
+
+标题: {title}
+摘要: {abstract if abstract else "无摘要"}
+
+输出格式：关键词1, 关键词2, 关键词3
+"""
+
+
+def is_valid_keyword(keyword: str) -> bool:
+    """Whether a keyword has 1-5 words and is not a generic term."""
+    return 1 <= len(keyword.split()) <= MAX_KEYWORD_WORDS and keyword.lower() not in GENERIC_TERMS
+
+
+def parse_keyword_response(llm_output: str) -> list[str]:
+    """
+    Parse and filter the comma-separated keywords returned by the LLM.
+
+    Args:
+        llm_output: Raw LLM response text
+
+    Returns:
+        Filtered keyword list (at most 6 keywords)
+    """
+    # Split keywords by comma
+    keywords = [kw.strip() for kw in llm_output.split(',') if kw.strip()]
+
+    # Filter out overly long "keywords" (likely full titles) and generic terms
+    keywords = [kw for kw in keywords if is_valid_keyword(kw)]
+
+    return keywords[:MAX_KEYWORDS_PER_PAPER]
@@ -0,0 +1,189 @@
+"""
+Bounded-memory top-K keyword selection for very large corpora.
+
+build_cooccurrence_matrix normally counts every distinct keyword exactly
+to pick the max_keywords most frequent ones. LLM keywords have a very long
+tail, so for hundreds of thousands of papers that dictionary grows without
+bound. select_top_keywords picks the same keywords in bounded memory:
+
+1. One pass feeds the keywords, aggregated per CHUNK_PAPERS papers, into
+   a Space-Saving summary (at most `capacity` counters) and a Count-Min
+   sketch (fixed-size counter table). Space-Saving keeps every keyword
+   more frequent than N / capacity (N = keyword occurrences) and bounds
+   the overcount of each tracked keyword; Count-Min overestimates every
+   keyword by at most epsilon * N with probability 1 - delta, and the
+   smaller of the two overestimates is used as a keyword's upper bound.
+2. Tracked keywords whose upper bound reaches the K-th largest lower bound
+   are the candidates. A second pass counts only them exactly and ranks
+   them as build_cooccurrence_matrix does (by frequency, ties by first
+   occurrence).
+
+If the K-th largest lower bound exceeds every untracked keyword's maximum
+possible count (Space-Saving's smallest counter), the result is provably
+identical to exact counting; select_top_keywords reports whether that held.
+Pair frequencies are only needed among the selected keywords, so the
+co-occurrence pass over them stays exact and needs no sketch.
+"""
+
+import heapq
+import math
+from collections import Counter
+
+import numpy as np
+
+
+# Space-Saving counters: keywords more frequent than occurrences / capacity are always kept
+SKETCH_CAPACITY = 10_000
+
+# Count-Min overcount at most EPSILON * occurrences, with probability 1 - DELTA
+SKETCH_EPSILON = 1e-4
+SKETCH_DELTA = 0.01
+
+# Papers whose keywords are aggregated before updating the sketches (bounds the extra memory)
+CHUNK_PAPERS = 1000
+
+
+class SpaceSaving:
+    """
+    Space-Saving heavy-hitter summary with a fixed number of counters.
+    """
+
+    def __init__(self, capacity: int = SKETCH_CAPACITY):
+        """
+        Args:
+            capacity: Number of counters (memory is proportional to it)
+        """
+        self.capacity = capacity
+        self.total = 0
+        self._counts: dict[str, int] = {}
+        self._errors: dict[str, int] = {}
+        # Min-heap of (count, item); entries whose count is out of date are skipped
+        self._heap: list[tuple[int, str]] = []
+
+    def add(self, item: str, count: int = 1):
+        self.total += count
+        if item in self._counts:
+            self._counts[item] += count
+        elif len(self._counts) < self.capacity:
+            self._counts[item] = count
+            self._errors[item] = 0
+        else:
+            # Replace the smallest counter; its count is the new item's maximum overcount
+            smallest, evicted = self._pop_min()
+            del self._counts[evicted]
+            del self._errors[evicted]
+            self._counts[item] = smallest + count
+            self._errors[item] = smallest
+        heapq.heappush(self._heap, (self._counts[item], item))
+        if len(self._heap) > 2 * self.capacity:
+            # Drop out-of-date entries (amortized O(1) per update)
+            self._heap = [(count, item) for item, count in self._counts.items()]
+            heapq.heapify(self._heap)
+
+    def _pop_min(self) -> tuple[int, str]:
+        while True:
+            count, item = heapq.heappop(self._heap)
+            if self._counts.get(item) == count:
+                return count, item
+
+    @property
+    def min_count(self) -> int:
+        """Upper bound on the count of any keyword not tracked (0 while counters are free)."""
+        if len(self._counts) < self.capacity:
+            return 0
+        while self._counts.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+        return self._heap[0][0]
+
+    def items(self) -> list[tuple[str, int, int]]:
+        """Tracked (item, count, maximum overcount); the true count is within [count - overcount, count]."""
+        return [(item, count, self._errors[item]) for item, count in self._counts.items()]
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+
+class CountMinSketch:
+    """
+    Count-Min sketch: frequency estimates that never undercount, in fixed memory.
+    
+    Items are added and estimated in batches (one NumPy operation per batch).
+    """
+
+    def __init__(self, epsilon: float = SKETCH_EPSILON, delta: float = SKETCH_DELTA):
+        """
+        Args:
+            epsilon: Overcount bound as a fraction of all occurrences
+            delta: Probability that an estimate exceeds that bound
+        """
+        self.width = math.ceil(math.e / epsilon)
+        self.depth = math.ceil(math.log(1 / delta))
+        self.total = 0
+        self._table = np.zeros((self.depth, self.width), dtype=np.int64)
+
+    def _columns(self, items: list[str]) -> np.ndarray:
+        # Double hashing: depth column indices from one 64-bit hash (stable within a process)
+        hashes = np.array([hash(item) for item in items], dtype=np.int64).view(np.uint64)
+        h1 = hashes & np.uint64(0xFFFFFFFF)
+        h2 = (hashes >> np.uint64(32)) | np.uint64(1)
+        rows = np.arange(self.depth, dtype=np.uint64)[:, None]
+        return ((h1 + rows * h2) % np.uint64(self.width)).astype(np.int64)
+
+    def add(self, items: list[str], counts: list[int]):
+        """Add counts[i] occurrences of items[i]."""
+        counts = np.asarray(counts, dtype=np.int64)
+        self.total += int(counts.sum())
+        columns = self._columns(items)
+        for row in range(self.depth):
+            np.add.at(self._table[row], columns[row], counts)
+
+    def estimate(self, items: list[str]) -> np.ndarray:
+        """Estimated count of each item (true count <= estimate)."""
+        columns = self._columns(items)
+        return self._table[np.arange(self.depth)[:, None], columns].min(axis=0)
+
+
+def select_top_keywords(keyword_lists: list[list[str]], k: int,
+                        capacity: int = SKETCH_CAPACITY) -> tuple[list[str], bool]:
+    """
+    The k most frequent keywords, counted in bounded memory.
+
+    Args:
+        keyword_lists: Keywords of each paper (iterated twice)
+        k: Number of keywords to select
+        capacity: Space-Saving counters
+
+    Returns:
+        Tuple of (keywords by descending frequency, whether the selection is
+        guaranteed to equal exact counting)
+    """
+    summary = SpaceSaving(capacity)
+    sketch = CountMinSketch()
+    for start in range(0, len(keyword_lists), CHUNK_PAPERS):
+        # Frequent keywords update the sketches once per chunk instead of once per occurrence
+        chunk_counts = Counter(keyword for keywords in keyword_lists[start:start + CHUNK_PAPERS]
+                               for keyword in keywords)
+        for keyword, count in chunk_counts.items():
+            summary.add(keyword, count)
+        sketch.add(list(chunk_counts), list(chunk_counts.values()))
+
+    # (keyword, lower bound, upper bound) of every tracked keyword
+    tracked = summary.items()
+    estimates = sketch.estimate([keyword for keyword, _, _ in tracked]).tolist()
+    bounds = [(keyword, count - error, min(count, estimate))
+              for (keyword, count, error), estimate in zip(tracked, estimates)]
+    lower_bounds = sorted((lower for _, lower, _ in bounds), reverse=True)
+    kth_lower = lower_bounds[k - 1] if 0 < k <= len(lower_bounds) else 0
+    candidates = {keyword for keyword, _, upper in bounds if upper >= kth_lower}
+    exact = kth_lower > summary.min_count or len(summary) < capacity
+
+    # Exact counts of the candidates only
+    counts = dict.fromkeys(candidates, 0)
+    first_seen = {}
+    for keywords in keyword_lists:
+        for keyword in keywords:
+            if keyword in counts:
+                counts[keyword] += 1
+                first_seen.setdefault(keyword, len(first_seen))
+    ranked = sorted(counts, key=lambda keyword: (-counts[keyword], first_seen[keyword]))
+    return ranked[:k], exact
@@ -0,0 +1,144 @@
+"""
+Process-wide registry of OpenAI-compatible clients.
+
+Every Streamlit session and every LLM call site shares one client per
+(endpoint, API key) pair, so HTTP connection pools and TLS sessions are
+reused instead of being rebuilt on every run. Clients unused for a while
+are closed and evicted.
+"""
+
+import hashlib
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+import httpx
+from openai import OpenAI
+
+
+# Connection pool sized for the adaptive limiter's maximum concurrency (16)
+# plus headroom for journal identification from other sessions
+POOL_LIMITS = httpx.Limits(
+    max_connections=32,
+    max_keepalive_connections=16,
+    keepalive_expiry=90.0,
+)
+
+# Per-request timeouts are still passed by each call; this is the fallback
+POOL_TIMEOUT = httpx.Timeout(30.0, connect=10.0)
+
+# Clients idle longer than this are closed and removed
+IDLE_TTL_SECONDS = 600
+
+
+@dataclass
+class _Entry:
+    client: OpenAI
+    last_used: float
+    leases: int = 0
+
+
+def _registry_key(api_key: str, endpoint: str) -> tuple[str, str]:
+    # Never keep raw API keys as dictionary keys
+    key_hash = hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+    return endpoint.rstrip("/"), key_hash
+
+
+class ClientRegistry:
+    """
+    Thread-safe registry of shared OpenAI clients keyed by (endpoint, API key hash).
+    """
+
+    def __init__(self, idle_ttl: float = IDLE_TTL_SECONDS, clock=time.monotonic):
+        self.idle_ttl = idle_ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: dict[tuple[str, str], _Entry] = {}
+
+    def _create_client(self, api_key: str, endpoint: str) -> OpenAI:
+        http_client = httpx.Client(limits=POOL_LIMITS, timeout=POOL_TIMEOUT)
+        # Retries are handled by call_with_retry so the adaptive limiter sees 429s
+        return OpenAI(api_key=api_key, base_url=endpoint, http_client=http_client, max_retries=0)
+
+    def _evict_idle(self, now: float):
+        """Close clients that are idle and not leased. Caller holds the lock."""
+        expired = [
+            key for key, entry in self._entries.items()
+            if entry.leases == 0 and now - entry.last_used > self.idle_ttl
+        ]
+        for key in expired:
+            entry = self._entries.pop(key)
+            try:
+                entry.client.close()
+            except Exception:
+                pass
+
+    def _checkout(self, api_key: str, endpoint: str) -> tuple[tuple[str, str], OpenAI]:
+        key = _registry_key(api_key, endpoint)
+        with self._lock:
+            now = self._clock()
+            self._evict_idle(now)
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = _Entry(client=self._create_client(api_key, endpoint), last_used=now)
+                self._entries[key] = entry
+            entry.leases += 1
+            entry.last_used = now
+            return key, entry.client
+
+    def _checkin(self, key: tuple[str, str]):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.leases -= 1
+                entry.last_used = self._clock()
+
+    @contextmanager
+    def lease(self, api_key: str, endpoint: str):
+        """
+        Borrow the shared client for (endpoint, API key).
+
+        A leased client is never evicted, however long the run takes.
+
+        Yields:
+            OpenAI client
+        """
+        key, client = self._checkout(api_key, endpoint)
+        try:
+            yield client
+        finally:
+            self._checkin(key)
+
+    def close_all(self):
+        """Close every client (e.g. on shutdown)."""
+        with self._lock:
+            for entry in self._entries.values():
+                try:
+                    entry.client.close()
+                except Exception:
+                    pass
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+# Shared by all sessions of this server process
+_registry = ClientRegistry()
+
+
+def llm_client(api_key: str, endpoint: str):
+    """
+    Context manager yielding the process-wide shared client for (endpoint, API key).
+
+    Args:
+        api_key: LLM API key
+        endpoint: LLM API endpoint (base_url)
+
+    Example:
+        with llm_client(api_key, endpoint) as client:
+            client.chat.completions.create(...)
+    """
+    return _registry.lease(api_key, endpoint)
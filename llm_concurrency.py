@@ -0,0 +1,374 @@
+"""
+Adaptive concurrency control for LLM calls.
+
+An AIMD (additive increase, multiplicative decrease) limiter grows the number
+of in-flight requests while latency stays stable and halves it on throttling
+(HTTP 429) or timeouts. Failed calls are retried with jittered exponential
+backoff instead of being skipped.
+
+Slow outliers are cut by hedging: a call that has not returned by the
+tracked p90 latency is sent a second time and whichever copy returns first
+wins, with the number of duplicates capped at a fraction of all calls.
+"""
+
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+# Error categories returned by classify_llm_error()
+ERROR_THROTTLED = "throttled"
+ERROR_TIMEOUT = "timeout"
+ERROR_CONNECTION = "connection"
+ERROR_SERVER = "server"
+ERROR_AUTH = "auth"
+ERROR_OTHER = "other"
+
+# Categories that are worth retrying and that signal overload to the limiter
+RETRYABLE_ERRORS = {ERROR_THROTTLED, ERROR_TIMEOUT, ERROR_CONNECTION, ERROR_SERVER}
+OVERLOAD_ERRORS = {ERROR_THROTTLED, ERROR_TIMEOUT}
+
+# Hedge a call once it is slower than this percentile of recent requests,
+# sending at most this many duplicates per call
+HEDGE_PERCENTILE = 0.9
+HEDGE_MAX_EXTRA_LOAD = 0.1
+
+# User-facing messages per error category
+ERROR_MESSAGES = {
+    ERROR_THROTTLED: "请求被限流 (429)",
+    ERROR_TIMEOUT: "处理超时",
+    ERROR_CONNECTION: "网络连接失败",
+    ERROR_SERVER: "LLM 服务暂时不可用",
+    ERROR_AUTH: "API调用失败（认证或配额问题）",
+    ERROR_OTHER: "提取失败",
+}
+
+
+def classify_llm_error(error: Exception) -> str:
+    """
+    Map an exception raised by the OpenAI SDK to an error category.
+
+    Args:
+        error: Exception raised by an LLM call
+
+    Returns:
+        One of the ERROR_* categories
+    """
+    status_code = getattr(error, "status_code", None)
+    if status_code is None:
+        status_code = getattr(getattr(error, "response", None), "status_code", None)
+
+    if status_code == 429:
+        return ERROR_THROTTLED
+    if status_code in (401, 403):
+        return ERROR_AUTH
+    if status_code in (408, 504):
+        return ERROR_TIMEOUT
+    if isinstance(status_code, int) and status_code >= 500:
+        return ERROR_SERVER
+    if isinstance(status_code, int) and status_code >= 400:
+        # Invalid requests (400, 404, 422, ...) fail the same way on every retry and
+        # backend, whatever their message says
+        return ERROR_OTHER
+
+    name = type(error).__name__.lower()
+    message = str(error).lower()
+    if "ratelimit" in name or "rate limit" in message or "throttl" in message:
+        return ERROR_THROTTLED
+    if "timeout" in name or "timeout" in message or "timed out" in message:
+        return ERROR_TIMEOUT
+    if "connection" in name:
+        return ERROR_CONNECTION
+    if ("authentication" in name or "permission" in name
+            or "authenticat" in message or "unauthorized" in message):
+        return ERROR_AUTH
+    return ERROR_OTHER
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    AIMD limiter for the number of concurrent LLM requests.
+
+    - Every successful call with latency close to the baseline adds
+      1/limit to the limit (about +1 per round of requests).
+    - A throttled or timed-out call multiplies the limit by decrease_factor,
+      at most once per cooldown period so one burst of 429s counts once.
+    """
+
+    def __init__(self, initial_limit: int = 2, min_limit: int = 1, max_limit: int = 16,
+                 decrease_factor: float = 0.5, latency_tolerance: float = 2.0,
+                 cooldown_seconds: float = 5.0, clock=time.monotonic):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.decrease_factor = decrease_factor
+        self.latency_tolerance = latency_tolerance
+        self.cooldown_seconds = cooldown_seconds
+        self._clock = clock
+        self._limit = float(max(min_limit, min(initial_limit, max_limit)))
+        self._in_flight = 0
+        self._condition = threading.Condition()
+        self._baseline_latency = None
+        self._last_decrease = None
+        self.peak_limit = int(self._limit)
+        self.throttle_events = []  # (seconds since start, category, new limit)
+        self._started = clock()
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def acquire(self):
+        """Block until a request slot is free under the current limit."""
+        with self._condition:
+            while self._in_flight >= int(self._limit):
+                self._condition.wait()
+            self._in_flight += 1
+
+    def release(self, latency: float = None, error_category: str = None):
+        """
+        Free a request slot and adapt the limit.
+
+        Args:
+            latency: Seconds the request took (None if unknown)
+            error_category: ERROR_* category if the request failed, else None
+        """
+        with self._condition:
+            self._in_flight -= 1
+            if error_category in OVERLOAD_ERRORS:
+                self._on_overload(error_category)
+            elif error_category is None and latency is not None:
+                self._on_success(latency)
+            self._condition.notify_all()
+
+    def _on_success(self, latency: float):
+        if self._baseline_latency is None:
+            self._baseline_latency = latency
+            return
+        # Slow EWMA so the baseline tracks time-of-day drift but not single spikes
+        stable = latency <= self._baseline_latency * self.latency_tolerance
+        self._baseline_latency = 0.9 * self._baseline_latency + 0.1 * latency
+        if stable and self._limit < self.max_limit:
+            self._limit = min(self.max_limit, self._limit + 1.0 / self._limit)
+            self.peak_limit = max(self.peak_limit, int(self._limit))
+
+    def _on_overload(self, error_category: str):
+        now = self._clock()
+        if self._last_decrease is not None and now - self._last_decrease < self.cooldown_seconds:
+            return
+        self._last_decrease = now
+        self._limit = max(float(self.min_limit), self._limit * self.decrease_factor)
+        self.throttle_events.append((round(now - self._started, 1), error_category, int(self._limit)))
+
+    def summary(self) -> dict:
+        """
+        Snapshot of limiter state for the run report.
+        """
+        with self._condition:
+            return {
+                "current_limit": int(self._limit),
+                "peak_limit": self.peak_limit,
+                "baseline_latency": round(self._baseline_latency, 2) if self._baseline_latency else None,
+                "throttle_events": list(self.throttle_events),
+            }
+
+
+def _percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class HedgedCaller:
+    """
+    Sends a duplicate of a call that is slower than the tracked latency percentile.
+
+    The hedge delay is the `percentile` of the latencies of recent
+    successful attempts (primary and duplicate requests alike, so it follows
+    the service and not the hedged outcome). No call is hedged before
+    min_samples attempts have finished, and duplicates never exceed
+    max_extra_load times the number of calls.
+    """
+
+    def __init__(self, percentile: float = HEDGE_PERCENTILE, max_extra_load: float = HEDGE_MAX_EXTRA_LOAD,
+                 min_samples: int = 10, window: int = 200, max_workers: int = 32, clock=time.monotonic):
+        """
+        Args:
+            percentile: Latency percentile after which a call is hedged
+            max_extra_load: Maximum duplicates as a fraction of calls
+            min_samples: Finished attempts needed before hedging starts
+            window: Number of recent attempt latencies tracked
+            max_workers: Threads running requests (primary and duplicates)
+        """
+        self.percentile = percentile
+        self.max_extra_load = max_extra_load
+        self.min_samples = min_samples
+        self._clock = clock
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm-hedge")
+        self._lock = threading.Lock()
+        self._attempt_latencies = deque(maxlen=window)
+        self._call_latencies = []
+        self.calls = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def hedge_delay(self) -> float:
+        """Seconds after which a call is hedged (None while there are too few samples)."""
+        with self._lock:
+            if len(self._attempt_latencies) < max(1, self.min_samples):
+                return None
+            return _percentile(self._attempt_latencies, self.percentile)
+
+    def _submit(self, func):
+        started = self._clock()
+
+        def record(future):
+            if not future.cancelled() and future.exception() is None:
+                with self._lock:
+                    self._attempt_latencies.append(self._clock() - started)
+
+        future = self._executor.submit(func)
+        future.add_done_callback(record)
+        return future
+
+    def _allow_hedge(self, on_hedge) -> bool:
+        with self._lock:
+            if self.hedges + 1 > self.max_extra_load * self.calls:
+                return False
+            self.hedges += 1
+        if on_hedge is not None and not on_hedge():
+            with self._lock:
+                self.hedges -= 1
+            return False
+        return True
+
+    def call(self, func, on_discard=None, on_hedge=None):
+        """
+        Run func, hedging it if it is slow.
+
+        Args:
+            func: Zero-argument callable performing one request
+            on_discard: Optional callable receiving the outcome of every copy
+                        that did not win once it finishes: its result, or None
+                        if it failed (e.g. to account for its token usage)
+            on_hedge: Optional callable run before a duplicate is sent; the
+                      duplicate is only sent if it returns True (e.g. after
+                      reserving rate limit and budget for it)
+
+        Returns:
+            Result of the first copy that succeeds
+
+        Raises:
+            The exception of the primary request if every copy fails
+        """
+        started = self._clock()
+        with self._lock:
+            self.calls += 1
+        futures = [self._submit(func)]
+        done, _ = wait(futures, timeout=self.hedge_delay())
+        if not done and self._allow_hedge(on_hedge):
+            futures.append(self._submit(func))
+
+        pending = set(futures)
+        winner = None
+        while pending and winner is None:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            winner = next((future for future in futures if future in done and future.exception() is None), None)
+
+        def discard(loser):
+            failed = loser.cancelled() or loser.exception() is not None
+            on_discard(None if failed else loser.result())
+
+        if on_discard is not None:
+            # Without a winner, the primary's failure is the caller's to handle
+            for future in futures:
+                if future is not (winner or futures[0]):
+                    future.add_done_callback(discard)
+        if winner is None:
+            raise futures[0].exception() or futures[-1].exception()
+
+        with self._lock:
+            self._call_latencies.append(self._clock() - started)
+            if winner is not futures[0]:
+                self.hedge_wins += 1
+        return winner.result()
+
+    def shutdown(self):
+        """Stop accepting calls; copies still running finish in the background."""
+        self._executor.shutdown(wait=False)
+
+    def summary(self) -> dict:
+        """
+        Achieved latency and hedging counters for the run report.
+        """
+        with self._lock:
+            latencies = list(self._call_latencies)
+            attempts = list(self._attempt_latencies)
+            return {
+                "calls": self.calls,
+                "hedges": self.hedges,
+                "hedge_wins": self.hedge_wins,
+                "hedge_rate": round(self.hedges / self.calls, 3) if self.calls else 0.0,
+                "p50": round(_percentile(latencies, 0.5), 3) if latencies else None,
+                "p99": round(_percentile(latencies, 0.99), 3) if latencies else None,
+                "hedge_delay": (round(_percentile(attempts, self.percentile), 3)
+                                if len(attempts) >= max(1, self.min_samples) else None),
+            }
+
+
+def backoff_delay(attempt: int, base_delay: float = 1.0, max_delay: float = 30.0, rng=random.random) -> float:
+    """
+    Full-jitter exponential backoff delay for a retry attempt.
+
+    Args:
+        attempt: Retry number starting at 0
+        base_delay: Delay scale in seconds
+        max_delay: Upper bound of the delay in seconds
+
+    Returns:
+        Seconds to wait before the next attempt
+    """
+    return rng() * min(max_delay, base_delay * (2 ** attempt))
+
+
+def call_with_retry(func, limiter: AdaptiveConcurrencyLimiter = None, max_retries: int = 4,
+                    base_delay: float = 1.0, max_delay: float = 30.0,
+                    sleep=time.sleep, clock=time.monotonic):
+    """
+    Run an LLM call under the limiter, retrying transient failures.
+
+    Throttling, timeouts, connection and 5xx errors are retried with
+    jittered exponential backoff; other errors are raised immediately.
+
+    Args:
+        func: Zero-argument callable performing one LLM request
+        limiter: Optional concurrency limiter gating each attempt
+        max_retries: Maximum number of retries after the first attempt
+
+    Returns:
+        Whatever func returns
+
+    Raises:
+        The last exception if all attempts fail
+    """
+    for attempt in range(max_retries + 1):
+        if limiter is not None:
+            limiter.acquire()
+        started = clock()
+        try:
+            result = func()
+        except Exception as e:
+            category = classify_llm_error(e)
+            if limiter is not None:
+                limiter.release(clock() - started, category)
+            if category not in RETRYABLE_ERRORS or attempt == max_retries:
+                raise
+            sleep(backoff_delay(attempt, base_delay, max_delay))
+            continue
+        if limiter is not None:
+            limiter.release(clock() - started)
+        return result
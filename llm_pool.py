@@ -0,0 +1,325 @@
+"""
+Pool of OpenAI-compatible LLM backends.
+
+Several (endpoint, API key, model) backends, e.g. multiple DashScope keys
+and an internal gateway, share journal identification and keyword
+extraction, so a run is no longer throttled by a single key's quota:
+
+- Routing: every request goes to the healthy backend with the fewest
+  outstanding requests relative to its weight (weighted least outstanding
+  requests); ties are broken at random.
+- Failover: a request that fails with a throttling, timeout, connection,
+  server or authentication error is sent again right away to a backend it
+  has not tried yet.
+- Health checks: FAILURE_THRESHOLD consecutive failures take a backend out
+  of rotation. A background checker probes ejected backends every
+  HEALTH_CHECK_INTERVAL seconds (GET /models, which costs no tokens) and
+  puts them back once they answer.
+
+The key and endpoint entered in the UI (or sent to the HTTP API) are the
+first backend. Additional backends are read from llm_backends.json (path
+overridable with $LLM_BACKENDS_FILE), a JSON list such as:
+
+    [
+      {"endpoint": "https://dashscope.aliyuncs.com/compatible-mode/v1",
+       "api_key_env": "DASHSCOPE_API_KEY_2"},
+      {"endpoint": "https://llm-gateway.example.com/v1", "api_key_env": "GATEWAY_KEY",
+       "model": "qwen2.5-72b-instruct", "weight": 2}
+    ]
+
+"api_key_env" names an environment variable holding the key ("api_key"
+with the key itself also works). Keys stay in memory only and are never
+written to job parameters.
+"""
+
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from urllib.parse import urlparse
+
+from llm_concurrency import ERROR_AUTH, RETRYABLE_ERRORS, classify_llm_error
+
+
+BACKENDS_FILE = "llm_backends.json"
+BACKENDS_FILE_ENV = "LLM_BACKENDS_FILE"
+
+DEFAULT_MODEL = "qwen-plus"
+
+# Errors after which a request moves on to another backend
+FAILOVER_ERRORS = RETRYABLE_ERRORS | {ERROR_AUTH}
+
+# Consecutive failures that take a backend out of rotation
+FAILURE_THRESHOLD = 3
+
+# Seconds between probes of ejected backends, and the timeout of a probe
+HEALTH_CHECK_INTERVAL = 15
+HEALTH_CHECK_TIMEOUT = 5
+
+# Pools unused this long are dropped (with their keys and health state)
+IDLE_TTL_SECONDS = 600
+
+
+@dataclass
+class LLMBackend:
+    """
+    One OpenAI-compatible endpoint with its key and model, and its routing state.
+    """
+    endpoint: str
+    api_key: str = field(repr=False)
+    model: str = DEFAULT_MODEL
+    weight: float = 1.0
+    outstanding: int = 0                        # Requests in flight
+    consecutive_failures: int = 0
+    healthy: bool = True
+    requests: int = 0
+    failures: int = 0
+
+    @property
+    def label(self) -> str:
+        """Endpoint host and model (never the key)."""
+        return f"{urlparse(self.endpoint).netloc or self.endpoint}/{self.model}"
+
+    @property
+    def identity(self) -> tuple:
+        key_hash = hashlib.sha256(self.api_key.encode("utf-8")).hexdigest()[:16]
+        return self.endpoint.rstrip("/"), key_hash, self.model, self.weight
+
+
+def load_backends(path: str = None) -> list[LLMBackend]:
+    """
+    Additional backends from the configuration file.
+
+    Args:
+        path: JSON file (default: $LLM_BACKENDS_FILE or llm_backends.json)
+
+    Returns:
+        Configured backends (empty if the file does not exist)
+
+    Raises:
+        ValueError if the file is malformed or an entry has no endpoint or key,
+        or a weight that is not positive
+    """
+    path = path or os.getenv(BACKENDS_FILE_ENV, BACKENDS_FILE)
+    if not os.path.exists(path):
+        return []
+    try:
+        with open(path, encoding="utf-8") as f:
+            entries = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        raise ValueError(f"LLM 后端配置文件 {path} 无法读取：{e}") from e
+    if not isinstance(entries, list):
+        raise ValueError(f"LLM 后端配置文件 {path} 应为 JSON 列表")
+
+    backends = []
+    for number, entry in enumerate(entries, start=1):
+        api_key = entry.get("api_key") or os.getenv(entry.get("api_key_env") or "", "")
+        if not entry.get("endpoint") or not api_key:
+            raise ValueError(f"LLM 后端配置文件 {path} 第 {number} 项缺少 endpoint 或 API Key")
+        try:
+            weight = float(entry.get("weight", 1.0))
+        except (TypeError, ValueError):
+            weight = 0.0
+        if not weight > 0:
+            raise ValueError(f"LLM 后端配置文件 {path} 第 {number} 项的 weight 必须为正数")
+        backends.append(LLMBackend(
+            endpoint=entry["endpoint"],
+            api_key=api_key,
+            model=entry.get("model", DEFAULT_MODEL),
+            weight=weight,
+        ))
+    return backends
+
+
+class LLMPool:
+    """
+    Weighted least-outstanding-requests routing with failover and health checks.
+    """
+
+    def __init__(self, backends: list[LLMBackend], failure_threshold: int = FAILURE_THRESHOLD,
+                 health_check_interval: float = HEALTH_CHECK_INTERVAL, client_factory=None, rng=random.random):
+        """
+        Args:
+            backends: Backends in priority order (at least one)
+            failure_threshold: Consecutive failures that eject a backend
+            health_check_interval: Seconds between probes of ejected backends
+            client_factory: Context manager factory (api_key, endpoint) -> client
+                            (default: the shared clients of llm_clients.py)
+            rng: Random source for breaking ties
+        """
+        if not backends:
+            raise ValueError("LLMPool needs at least one backend")
+        self.backends = backends
+        self.failure_threshold = failure_threshold
+        self.health_check_interval = health_check_interval
+        self._client_factory = client_factory
+        self._rng = rng
+        self._lock = threading.Lock()
+        self._checker = None
+        self.last_used = time.monotonic()
+
+    def _client(self, backend: LLMBackend):
+        if self._client_factory is not None:
+            return self._client_factory(backend.api_key, backend.endpoint)
+        from llm_clients import llm_client
+
+        return llm_client(backend.api_key, backend.endpoint)
+
+    def _acquire(self, tried: set[int]) -> int:
+        """Pick and reserve the backend for the next attempt (None if all were tried)."""
+        with self._lock:
+            untried = [i for i in range(len(self.backends)) if i not in tried]
+            # If every untried backend is ejected, trying one beats failing without a try
+            candidates = [i for i in untried if self.backends[i].healthy] or untried
+            if not candidates:
+                return None
+            index = min(candidates, key=lambda i: ((self.backends[i].outstanding + 1) / self.backends[i].weight,
+                                                   self._rng()))
+            backend = self.backends[index]
+            backend.outstanding += 1
+            backend.requests += 1
+            self.last_used = time.monotonic()
+            return index
+
+    def _release(self, index: int, failed: bool = False):
+        with self._lock:
+            backend = self.backends[index]
+            backend.outstanding -= 1
+            if not failed:
+                backend.consecutive_failures = 0
+                return
+            backend.failures += 1
+            backend.consecutive_failures += 1
+            if backend.healthy and backend.consecutive_failures >= self.failure_threshold:
+                backend.healthy = False
+                if self._checker is None:
+                    self._checker = threading.Thread(target=self._check_ejected, name="llm-pool-health",
+                                                     daemon=True)
+                    self._checker.start()
+
+    def call(self, request):
+        """
+        Run one LLM request on the best backend, failing over to the others.
+
+        Args:
+            request: Callable (client, model) performing the request
+
+        Returns:
+            Whatever request returns
+
+        Raises:
+            The last error if every backend failed, or at once an error that
+            another backend would not fix (e.g. an invalid request)
+        """
+        tried = set()
+        last_error = None
+        while True:
+            index = self._acquire(tried)
+            if index is None:
+                raise last_error
+            tried.add(index)
+            backend = self.backends[index]
+            try:
+                with self._client(backend) as client:
+                    result = request(client, backend.model)
+            except Exception as e:
+                failover = classify_llm_error(e) in FAILOVER_ERRORS
+                self._release(index, failed=failover)
+                if not failover:
+                    raise
+                last_error = e
+                continue
+            self._release(index)
+            return result
+
+    def _probe(self, backend: LLMBackend) -> bool:
+        try:
+            with self._client(backend) as client:
+                client.models.list(timeout=HEALTH_CHECK_TIMEOUT)
+        except Exception as e:
+            # A server that answers (e.g. 404 for /models) is reachable and accepts the key
+            return classify_llm_error(e) not in FAILOVER_ERRORS
+        return True
+
+    def _check_ejected(self):
+        """Probe ejected backends until all are back in rotation."""
+        while True:
+            time.sleep(self.health_check_interval)
+            with self._lock:
+                ejected = [backend for backend in self.backends if not backend.healthy]
+                if not ejected:
+                    self._checker = None
+                    return
+            for backend in ejected:
+                if self._probe(backend):
+                    with self._lock:
+                        backend.healthy = True
+                        backend.consecutive_failures = 0
+
+    def summary(self) -> list[dict]:
+        """Requests, failures and health per backend."""
+        with self._lock:
+            return [{
+                "backend": backend.label,
+                "weight": backend.weight,
+                "requests": backend.requests,
+                "failures": backend.failures,
+                "healthy": backend.healthy,
+            } for backend in self.backends]
+
+
+_pools: dict[tuple, LLMPool] = {}
+_pools_lock = threading.Lock()
+
+
+def _evict_idle_pools(now: float):
+    """Drop pools unused for IDLE_TTL_SECONDS with no request in flight. Caller holds the lock."""
+    expired = [
+        key for key, pool in _pools.items()
+        if now - pool.last_used > IDLE_TTL_SECONDS and not any(backend.outstanding for backend in pool.backends)
+    ]
+    for key in expired:
+        del _pools[key]
+
+
+def get_llm_pool(api_key: str, endpoint: str, configured: bool = True) -> LLMPool:
+    """
+    Process-wide pool of the given backend plus the configured ones.
+
+    Pools are shared by every run with the same backends, so health state
+    carries over between runs; pools unused for IDLE_TTL_SECONDS are dropped.
+
+    Args:
+        api_key: Key of the primary backend (may be empty if backends are configured)
+        endpoint: Endpoint of the primary backend
+        configured: Add the backends of the configuration file
+
+    Returns:
+        LLMPool
+
+    Raises:
+        ValueError if no backend is available or the configuration file is malformed
+    """
+    backends = [LLMBackend(endpoint, api_key)] if api_key else []
+    if configured:
+        backends.extend(load_backends())
+    unique = {}
+    for backend in backends:
+        unique.setdefault(backend.identity[:3], backend)
+    backends = list(unique.values())
+    if not backends:
+        raise ValueError("未配置任何 LLM 后端")
+
+    key = tuple(backend.identity for backend in backends)
+    with _pools_lock:
+        now = time.monotonic()
+        _evict_idle_pools(now)
+        pool = _pools.get(key)
+        if pool is None:
+            pool = LLMPool(backends)
+            _pools[key] = pool
+        pool.last_used = now
+        return pool
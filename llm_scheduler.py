@@ -0,0 +1,334 @@
+"""
+Token budget and cost-aware scheduling for LLM keyword extraction.
+
+Estimates how many tokens each extraction request will consume before the run
+starts, picks which papers to process when the budget is tight, and enforces
+per-run and per-minute (TPM / RPM) limits while the run is in progress.
+"""
+
+import math
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+
+
+# Completion tokens we expect for a "3-5 keywords, comma separated" answer.
+# max_tokens is only an upper bound; real answers are far shorter.
+EXPECTED_COMPLETION_TOKENS = 60
+
+# Chat template / role markers added by the API around every message
+MESSAGE_OVERHEAD_TOKENS = 8
+
+# Supported priority orders for papers when the budget cannot cover all of them
+PRIORITY_MODES = ("citations", "recency", "original")
+
+
+def _is_cjk(char: str) -> bool:
+    code = ord(char)
+    return (
+        0x4E00 <= code <= 0x9FFF      # CJK Unified Ideographs
+        or 0x3400 <= code <= 0x4DBF   # Extension A
+        or 0x3000 <= code <= 0x303F   # CJK punctuation
+        or 0xFF00 <= code <= 0xFFEF   # Full-width forms
+    )
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Roughly estimate the number of tokens a text costs for Qwen-style tokenizers.
+
+    CJK characters are counted as one token each, everything else as one token
+    per four characters. The estimate is intentionally slightly pessimistic.
+
+    Args:
+        text: Prompt or completion text
+
+    Returns:
+        Estimated token count (0 for empty text)
+    """
+    if not text:
+        return 0
+    cjk_count = sum(1 for char in text if _is_cjk(char))
+    other_count = len(text) - cjk_count
+    return cjk_count + math.ceil(other_count / 4)
+
+
+def estimate_request_tokens(prompt: str, expected_completion: int = EXPECTED_COMPLETION_TOKENS) -> int:
+    """
+    Estimate the total tokens (prompt + completion) of one chat request.
+
+    Args:
+        prompt: User prompt sent to the LLM
+        expected_completion: Expected completion length in tokens
+
+    Returns:
+        Estimated total token count
+    """
+    return estimate_tokens(prompt) + MESSAGE_OVERHEAD_TOKENS + expected_completion
+
+
+@dataclass
+class TokenBudget:
+    """
+    Limits and prices applied to one extraction run.
+
+    A value of 0 for any limit means "unlimited".
+    Prices are in yuan per 1,000 tokens.
+    """
+    max_run_tokens: int = 0
+    tokens_per_minute: int = 0
+    requests_per_minute: int = 0
+    input_price_per_1k: float = 0.0008
+    output_price_per_1k: float = 0.002
+
+
+@dataclass
+class ExtractionPlan:
+    """
+    Result of planning an extraction run against a token budget.
+    """
+    selected: list[int]           # Paper indices to process, in processing order
+    skipped: list[int]            # Paper indices dropped because of the run budget
+    estimated_tokens: int         # Total estimated tokens for the selected papers
+    projected_seconds: float      # Projected wall-clock time of the run
+    projected_cost: float         # Projected cost in yuan
+
+
+def paper_priority_key(paper: dict, priority: str):
+    """
+    Sort key for a paper under the given priority mode (higher priority sorts first).
+
+    Args:
+        paper: Paper dictionary
+        priority: One of PRIORITY_MODES
+
+    Returns:
+        Tuple usable as a sort key
+    """
+    if priority == "citations":
+        return (-(paper.get("cited_by_count") or 0), -(paper.get("publication_year") or 0))
+    if priority == "recency":
+        return (-(paper.get("publication_year") or 0), -(paper.get("cited_by_count") or 0))
+    return ()
+
+
+def plan_extraction(papers: list[dict], estimates: list[int], budget: TokenBudget,
+                    priority: str = "citations", avg_latency: float = 2.0,
+                    concurrency: int = 1, shuffle_seed: int = None) -> ExtractionPlan:
+    """
+    Decide which papers to extract and project time and cost of the run.
+
+    Papers are ordered by priority; when the run budget cannot cover all of
+    them, the lowest-priority papers are skipped. With shuffle_seed the
+    selected papers are processed in a seeded random order instead, so that
+    any prefix of the run is a uniform sample of the selection (needed when
+    extraction may stop early once the keyword ranking converges).
+
+    Args:
+        papers: Paper dictionaries
+        estimates: Estimated tokens per paper (same order as papers)
+        budget: Token budget for the run
+        priority: One of PRIORITY_MODES
+        avg_latency: Expected seconds per LLM request
+        concurrency: Number of requests in flight at once
+        shuffle_seed: Optional seed; priority then only decides which papers
+                      are skipped, not the processing order
+
+    Returns:
+        ExtractionPlan with selected/skipped indices and projections
+    """
+    order = list(range(len(papers)))
+    if priority != "original":
+        # sorted() is stable, so ties keep their OpenAlex relevance order
+        order = sorted(order, key=lambda i: paper_priority_key(papers[i], priority))
+
+    selected = []
+    skipped = []
+    total_tokens = 0
+    for i in order:
+        if budget.max_run_tokens and total_tokens + estimates[i] > budget.max_run_tokens:
+            skipped.append(i)
+            continue
+        selected.append(i)
+        total_tokens += estimates[i]
+    if shuffle_seed is not None:
+        random.Random(shuffle_seed).shuffle(selected)
+
+    # Wall-clock time is bound by whichever is slowest: latency, RPM or TPM
+    n = len(selected)
+    projected_seconds = n * avg_latency / max(1, concurrency)
+    if budget.requests_per_minute:
+        projected_seconds = max(projected_seconds, n / budget.requests_per_minute * 60)
+    if budget.tokens_per_minute:
+        projected_seconds = max(projected_seconds, total_tokens / budget.tokens_per_minute * 60)
+
+    completion_tokens = n * EXPECTED_COMPLETION_TOKENS
+    prompt_tokens = total_tokens - completion_tokens
+    projected_cost = (prompt_tokens * budget.input_price_per_1k
+                      + completion_tokens * budget.output_price_per_1k) / 1000
+
+    return ExtractionPlan(
+        selected=selected,
+        skipped=skipped,
+        estimated_tokens=total_tokens,
+        projected_seconds=projected_seconds,
+        projected_cost=projected_cost,
+    )
+
+
+@dataclass
+class _UsageWindow:
+    events: deque = field(default_factory=deque)  # (timestamp, tokens)
+    tokens: int = 0
+
+
+class LLMScheduler:
+    """
+    Enforces a TokenBudget while an extraction run is in progress.
+
+    Call acquire() with the estimated tokens before every request and record()
+    with the real usage afterwards. Thread-safe, so it can gate concurrent
+    requests.
+    """
+
+    WINDOW_SECONDS = 60.0
+
+    def __init__(self, budget: TokenBudget, clock=time.monotonic, sleep=time.sleep):
+        self.budget = budget
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._window = _UsageWindow()
+        self.reserved_tokens = 0
+        self.used_prompt_tokens = 0
+        self.used_completion_tokens = 0
+        self.requests = 0
+        self.rejected = 0
+        self.throttle_wait_seconds = 0.0
+
+    @property
+    def used_tokens(self) -> int:
+        return self.used_prompt_tokens + self.used_completion_tokens
+
+    def _prune(self, now: float):
+        window = self._window
+        while window.events and now - window.events[0][0] >= self.WINDOW_SECONDS:
+            _, tokens = window.events.popleft()
+            window.tokens -= tokens
+
+    def _wait_time(self, tokens: int, now: float) -> float:
+        """Seconds until a request of this size fits into the per-minute window."""
+        window = self._window
+        waits = [0.0]
+        if self.budget.requests_per_minute and len(window.events) >= self.budget.requests_per_minute:
+            oldest = window.events[len(window.events) - self.budget.requests_per_minute][0]
+            waits.append(oldest + self.WINDOW_SECONDS - now)
+        if self.budget.tokens_per_minute and window.events and window.tokens + tokens > self.budget.tokens_per_minute:
+            # Drop events from the front until enough tokens have expired
+            freed = 0
+            for timestamp, event_tokens in window.events:
+                freed += event_tokens
+                if window.tokens - freed + tokens <= self.budget.tokens_per_minute:
+                    waits.append(timestamp + self.WINDOW_SECONDS - now)
+                    break
+            else:
+                # Larger than the whole limit: sent alone once the window is empty
+                waits.append(window.events[-1][0] + self.WINDOW_SECONDS - now)
+        return max(waits)
+
+    def _over_budget(self, estimated_tokens: int) -> bool:
+        return bool(self.budget.max_run_tokens
+                    and self.used_tokens + self.reserved_tokens + estimated_tokens > self.budget.max_run_tokens)
+
+    def _reserve(self, estimated_tokens: int, now: float):
+        self._window.events.append((now, estimated_tokens))
+        self._window.tokens += estimated_tokens
+        self.reserved_tokens += estimated_tokens
+        self.requests += 1
+
+    def acquire(self, estimated_tokens: int) -> bool:
+        """
+        Reserve budget for one request, waiting for the per-minute window if needed.
+
+        Args:
+            estimated_tokens: Estimated total tokens of the request
+
+        Returns:
+            True if the request may be sent, False if the run budget is exhausted
+        """
+        while True:
+            with self._lock:
+                if self._over_budget(estimated_tokens):
+                    self.rejected += 1
+                    return False
+
+                now = self._clock()
+                self._prune(now)
+                wait = self._wait_time(estimated_tokens, now)
+                if wait <= 0:
+                    self._reserve(estimated_tokens, now)
+                    return True
+                self.throttle_wait_seconds += wait
+
+            self._sleep(wait)
+
+    def try_acquire(self, estimated_tokens: int) -> bool:
+        """
+        Reserve budget for an optional request (e.g. a hedged duplicate) without waiting.
+
+        Like acquire(), but returns False instead of waiting for the
+        per-minute window, and a refusal is not counted as a budget rejection.
+
+        Args:
+            estimated_tokens: Estimated total tokens of the request
+
+        Returns:
+            True if the request may be sent now (release it with record())
+        """
+        with self._lock:
+            if self._over_budget(estimated_tokens):
+                return False
+            now = self._clock()
+            self._prune(now)
+            if self._wait_time(estimated_tokens, now) > 0:
+                return False
+            self._reserve(estimated_tokens, now)
+            return True
+
+    def record(self, estimated_tokens: int, usage=None):
+        """
+        Replace a reservation with the real usage reported by the API.
+
+        Args:
+            estimated_tokens: Value previously passed to acquire()
+            usage: response.usage object (prompt_tokens / completion_tokens),
+                   or None if the request failed before returning usage
+        """
+        with self._lock:
+            self.reserved_tokens -= estimated_tokens
+            if usage is None:
+                return
+            self.used_prompt_tokens += getattr(usage, "prompt_tokens", 0) or 0
+            self.used_completion_tokens += getattr(usage, "completion_tokens", 0) or 0
+
+    def cost(self) -> float:
+        """Actual cost of the run so far in yuan."""
+        return (self.used_prompt_tokens * self.budget.input_price_per_1k
+                + self.used_completion_tokens * self.budget.output_price_per_1k) / 1000
+
+    def summary(self) -> dict:
+        """
+        Snapshot of usage counters for the run report.
+        """
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "prompt_tokens": self.used_prompt_tokens,
+                "completion_tokens": self.used_completion_tokens,
+                "total_tokens": self.used_tokens,
+                "cost": round(self.cost(), 4),
+                "budget_rejections": self.rejected,
+                "throttle_wait_seconds": round(self.throttle_wait_seconds, 1),
+            }
@@ -0,0 +1,432 @@
+"""
+Local OpenAlex works index for offline queries.
+
+Loads OpenAlex snapshot files (gzipped JSON Lines, as in the
+data/works/updated_date=*/part_*.gz layout of the public snapshot) into a
+SQLite database with an FTS5 full-text index over titles and abstracts.
+Only the fields the pipeline reads are stored: ID, DOI, title, abstract
+(reconstructed from the inverted index), publication year, citation count
+and journal name.
+
+The fetch layer queries it instead of api.openalex.org when the paper
+source is "local": search terms, publication year range and journal
+filters are answered from the index in milliseconds, without network
+access.
+
+Usage (from the repository root):
+    python openalex_local.py ingest /data/openalex/works --concept C41008148 --from-year 2018
+    python openalex_local.py stats
+"""
+
+import argparse
+import glob
+import gzip
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from dataclasses import asdict, dataclass
+
+
+DB_PATH = os.path.join(".cache", "openalex_local.sqlite3")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS works (
+    rowid INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    doi TEXT NOT NULL,
+    title TEXT NOT NULL,
+    abstract TEXT NOT NULL,
+    publication_year INTEGER NOT NULL,
+    cited_by_count INTEGER NOT NULL,
+    journal TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS works_year ON works (publication_year);
+CREATE VIRTUAL TABLE IF NOT EXISTS works_fts USING fts5(
+    title, abstract, content='works', content_rowid='rowid', tokenize='porter unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS works_ai AFTER INSERT ON works BEGIN
+    INSERT INTO works_fts (rowid, title, abstract) VALUES (new.rowid, new.title, new.abstract);
+END;
+CREATE TRIGGER IF NOT EXISTS works_au AFTER UPDATE ON works BEGIN
+    INSERT INTO works_fts (works_fts, rowid, title, abstract) VALUES ('delete', old.rowid, old.title, old.abstract);
+    INSERT INTO works_fts (rowid, title, abstract) VALUES (new.rowid, new.title, new.abstract);
+END;
+CREATE TABLE IF NOT EXISTS works_stats (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    works INTEGER NOT NULL,
+    min_year INTEGER,
+    max_year INTEGER
+);
+"""
+
+# Recomputes the one-row works_stats table (run after every ingestion)
+_REFRESH_STATS = """
+INSERT OR REPLACE INTO works_stats (id, works, min_year, max_year)
+SELECT 1, COUNT(*), MIN(publication_year), MAX(publication_year) FROM works
+"""
+
+_UPSERT = """
+INSERT INTO works (id, doi, title, abstract, publication_year, cited_by_count, journal)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (id) DO UPDATE SET
+    doi = excluded.doi, title = excluded.title, abstract = excluded.abstract,
+    publication_year = excluded.publication_year, cited_by_count = excluded.cited_by_count,
+    journal = excluded.journal
+"""
+
+_init_lock = threading.Lock()
+_initialized_paths = set()
+
+
+def reconstruct_abstract_from_inverted_index(inverted_index: dict) -> str:
+    """
+    Convert OpenAlex inverted index format to full text.
+
+    OpenAlex stores abstracts as inverted indices where each word maps to
+    a list of positions where it appears. This function reconstructs the
+    original text by placing words at their correct positions.
+
+    Args:
+        inverted_index: Dictionary mapping words to position lists
+                       e.g., {"hello": [0], "world": [1]}
+
+    Returns:
+        Reconstructed full text string, or empty string if index is empty
+    """
+    if not inverted_index:
+        return ""
+
+    # Create a list to hold words at their positions
+    # First, find the maximum position to determine list size
+    max_position = 0
+    for positions in inverted_index.values():
+        if positions:
+            max_position = max(max_position, max(positions))
+
+    # Initialize list with empty strings
+    words = [""] * (max_position + 1)
+
+    # Place each word at its positions
+    for word, positions in inverted_index.items():
+        for pos in positions:
+            words[pos] = word
+
+    # Join words with spaces
+    return " ".join(words)
+
+
+def journal_matches(journal: str, journal_name: str) -> bool:
+    """
+    Flexible journal name matching used by the journal filters.
+
+    Matches exact names, substrings in either direction, or names sharing
+    at least half of the target's significant words (longer than 3 characters).
+
+    Args:
+        journal: Target journal name
+        journal_name: Journal name of a paper
+
+    Returns:
+        True if the paper's journal counts as the target journal
+    """
+    journal_lower = journal.lower().strip()
+    journal_name_lower = journal_name.lower().strip()
+    if journal_lower == journal_name_lower:
+        return True
+    if journal_lower in journal_name_lower or journal_name_lower in journal_lower:
+        return True
+    journal_words = [w for w in journal_lower.split() if len(w) > 3]
+    if journal_words:
+        matches = sum(1 for word in journal_words if word in journal_name_lower)
+        return matches >= len(journal_words) * 0.5
+    return False
+
+
+def _connect(db_path: str) -> sqlite3.Connection:
+    directory = os.path.dirname(db_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=30)
+    with _init_lock:
+        if db_path not in _initialized_paths:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            _initialized_paths.add(db_path)
+    conn.create_function("journal_matches", 2, journal_matches, deterministic=True)
+    return conn
+
+
+def index_exists(db_path: str = DB_PATH) -> bool:
+    """Whether a local index has been ingested."""
+    return os.path.exists(db_path)
+
+
+@dataclass
+class IngestStats:
+    """
+    Outcome of one ingestion run.
+    """
+    files: int = 0
+    works_read: int = 0
+    works_indexed: int = 0   # Works that passed the filters (new or updated)
+    seconds: float = 0.0
+
+
+def _snapshot_files(paths: list[str]) -> list[str]:
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, "**", "*.gz"), recursive=True)))
+        else:
+            files.append(path)
+    return files
+
+
+def _concept_matches(work: dict, concepts: set[str]) -> bool:
+    """Whether a work is tagged with one of the concepts (IDs like C41008148, or names)."""
+    for tag in (work.get("concepts") or []) + (work.get("topics") or []):
+        tag_id = (tag.get("id") or "").rsplit("/", 1)[-1].lower()
+        if tag_id in concepts or (tag.get("display_name") or "").lower() in concepts:
+            return True
+    return False
+
+
+def work_journal(work: dict) -> str:
+    """Journal (primary source) display name of an OpenAlex work, or ""."""
+    primary_location = work.get("primary_location") or {}
+    source = primary_location.get("source") or {}
+    if isinstance(source, dict):
+        return source.get("display_name") or ""
+    return ""
+
+
+def work_to_paper(work: dict) -> dict:
+    """
+    Convert an OpenAlex work to the paper dictionary used by the pipeline.
+
+    Args:
+        work: Work as returned by the OpenAlex API (or snapshot files)
+
+    Returns:
+        Paper dictionary (id, doi, title, abstract, publication_year,
+        cited_by_count, journal)
+    """
+    return {
+        "id": work.get("id") or "",
+        "doi": work.get("doi") or "",
+        "title": work.get("title") or "",
+        "abstract": reconstruct_abstract_from_inverted_index(work.get("abstract_inverted_index")),
+        "publication_year": work.get("publication_year") or 0,
+        "cited_by_count": work.get("cited_by_count") or 0,
+        "journal": work_journal(work),
+    }
+
+
+_PAPER_FIELDS = ("id", "doi", "title", "abstract", "publication_year", "cited_by_count", "journal")
+
+
+def _work_row(work: dict) -> tuple:
+    paper = work_to_paper(work)
+    return tuple(paper[field] for field in _PAPER_FIELDS)
+
+
+def ingest_snapshot(paths: list[str], concepts: list[str] = None, start_year: int = None,
+                    end_year: int = None, db_path: str = DB_PATH, batch_size: int = 5000,
+                    progress=None) -> IngestStats:
+    """
+    Load OpenAlex works snapshot files into the local index.
+
+    Works already in the index are updated in place, so newer snapshot
+    partitions can be ingested on top of older ones.
+
+    Args:
+        paths: Snapshot files (*.gz JSON Lines) or directories searched recursively
+        concepts: Optional concept/topic IDs or names; other works are skipped
+        start_year: Optional first publication year to keep
+        end_year: Optional last publication year to keep
+        db_path: SQLite database path
+        batch_size: Works written per transaction
+        progress: Optional callback progress(stats) called after each batch
+
+    Returns:
+        IngestStats
+    """
+    wanted = {concept.strip().lower() for concept in concepts or [] if concept.strip()}
+    stats = IngestStats()
+    start = time.perf_counter()
+    conn = _connect(db_path)
+    conn.execute("PRAGMA synchronous=OFF")
+    try:
+        batch = []
+        for path in _snapshot_files(paths):
+            stats.files += 1
+            opener = gzip.open if path.endswith(".gz") else open
+            with opener(path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    work = json.loads(line)
+                    stats.works_read += 1
+                    year = work.get("publication_year") or 0
+                    if not work.get("id") or not work.get("title"):
+                        continue
+                    if (start_year and year < start_year) or (end_year and year > end_year):
+                        continue
+                    if wanted and not _concept_matches(work, wanted):
+                        continue
+                    batch.append(_work_row(work))
+                    if len(batch) >= batch_size:
+                        with conn:
+                            conn.executemany(_UPSERT, batch)
+                        stats.works_indexed += len(batch)
+                        batch = []
+                        if progress:
+                            progress(stats)
+        if batch:
+            with conn:
+                conn.executemany(_UPSERT, batch)
+            stats.works_indexed += len(batch)
+        conn.execute("INSERT INTO works_fts (works_fts) VALUES ('optimize')")
+        conn.execute(_REFRESH_STATS)
+        conn.commit()
+    finally:
+        conn.close()
+    stats.seconds = time.perf_counter() - start
+    return stats
+
+
+def _match_query(domain: str) -> str:
+    # Every search term must occur (like OpenAlex "search"); quoting keeps FTS5 syntax out
+    terms = re.findall(r"\w+", domain.lower())
+    return " ".join(f'"{term}"' for term in terms)
+
+
+def search_works(domain: str, start_year: int, end_year: int, journal: str = None,
+                 limit: int = 100, db_path: str = DB_PATH) -> list[dict]:
+    """
+    Full-text search of the local index, most relevant first.
+
+    Args:
+        domain: Search keyword (all terms must appear in the title or abstract)
+        start_year: Beginning of time range (YYYY)
+        end_year: End of time range (YYYY)
+        journal: Optional journal name (flexible matching, see journal_matches)
+        limit: Maximum number of papers
+
+    Returns:
+        List of paper dictionaries (same fields as fetch_openalex_data)
+    """
+    match = _match_query(domain)
+    if not match or not index_exists(db_path):
+        return []
+    query = (
+        "SELECT works.id, works.doi, works.title, works.abstract, works.publication_year, "
+        "works.cited_by_count, works.journal "
+        "FROM works_fts JOIN works ON works.rowid = works_fts.rowid "
+        "WHERE works_fts MATCH ? AND works.publication_year BETWEEN ? AND ?"
+    )
+    args = [match, start_year, end_year]
+    if journal:
+        query += " AND works.journal != '' AND journal_matches(?, works.journal)"
+        args.append(journal)
+    query += " ORDER BY bm25(works_fts) LIMIT ?"
+    args.append(limit)
+    conn = _connect(db_path)
+    try:
+        rows = conn.execute(query, args).fetchall()
+    finally:
+        conn.close()
+    return [dict(zip(_PAPER_FIELDS, row)) for row in rows]
+
+
+def search_local_papers(domain: str, start_year: int, end_year: int, journals: list[str] = None,
+                        max_papers: int = 100, db_path: str = DB_PATH) -> list[dict]:
+    """
+    Local counterpart of fetch_openalex_data.
+
+    With journals, papers are collected per journal (about max_papers /
+    len(journals) each, at least 5) as in the journal-based API search.
+
+    Args:
+        domain: Search keyword
+        start_year: Beginning of time range (YYYY)
+        end_year: End of time range (YYYY)
+        journals: Optional list of journal names
+        max_papers: Maximum total papers
+
+    Returns:
+        List of paper dictionaries
+    """
+    if not journals:
+        return search_works(domain, start_year, end_year, limit=max_papers, db_path=db_path)
+
+    papers_per_journal = max(5, max_papers // len(journals))
+    papers = []
+    seen = set()
+    for journal in journals:
+        if len(papers) >= max_papers:
+            break
+        for paper in search_works(domain, start_year, end_year, journal=journal,
+                                  limit=papers_per_journal, db_path=db_path):
+            if paper["id"] not in seen:
+                seen.add(paper["id"])
+                papers.append(paper)
+    return papers[:max_papers]
+
+
+def index_stats(db_path: str = DB_PATH) -> dict:
+    """
+    Size of the local index.
+
+    Read from the counts stored by the last ingestion, so the UI can show
+    them on every rerun without counting a large index.
+
+    Returns:
+        Dictionary with works, min_year and max_year (None values if empty or missing)
+    """
+    if not index_exists(db_path):
+        return {"works": 0, "min_year": None, "max_year": None}
+    conn = _connect(db_path)
+    try:
+        row = conn.execute("SELECT works, min_year, max_year FROM works_stats").fetchone()
+        if row is None:
+            # Index ingested before the counts were stored
+            with conn:
+                conn.execute(_REFRESH_STATS)
+            row = conn.execute("SELECT works, min_year, max_year FROM works_stats").fetchone()
+    finally:
+        conn.close()
+    works, min_year, max_year = row
+    return {"works": works, "min_year": min_year, "max_year": max_year}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--db", default=DB_PATH, help=f"SQLite database (default: {DB_PATH})")
+    commands = parser.add_subparsers(dest="command", required=True)
+    ingest = commands.add_parser("ingest", help="Load snapshot files into the index")
+    ingest.add_argument("paths", nargs="+", help="Snapshot *.gz files or directories")
+    ingest.add_argument("--concept", action="append", default=[],
+                        help="Keep works tagged with this concept/topic ID or name (repeatable)")
+    ingest.add_argument("--from-year", type=int, help="First publication year to keep")
+    ingest.add_argument("--to-year", type=int, help="Last publication year to keep")
+    commands.add_parser("stats", help="Show the size of the index")
+    args = parser.parse_args()
+
+    if args.command == "ingest":
+        def report(stats: IngestStats):
+            print(f"  {stats.works_indexed} indexed / {stats.works_read} read", file=sys.stderr)
+
+        stats = ingest_snapshot(args.paths, args.concept, args.from_year, args.to_year,
+                                db_path=args.db, progress=report)
+        print(json.dumps(asdict(stats)))
+    print(json.dumps(index_stats(args.db)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,245 @@
+"""
+Year-partitioned query planner for OpenAlex searches.
+
+A single `publication_year:{start}-{end}` search returns the top relevance
+hits of the whole range, which pile up in a few (usually recent) years.
+The planner instead:
+
+1. splits the range into per-year or per-quarter partitions,
+2. sends the first page of every partition in parallel, which also
+   returns the number of matching works per partition,
+3. allocates the paper budget evenly across partitions (partitions with
+   fewer matches than their share pass the rest on to the others),
+4. pages further into the partitions that need more works, and
+5. merges the partitions with ID-level deduplication.
+
+All requests of the process share one rate limiter, so parallel
+partitions (and concurrent analyses) stay within OpenAlex's limits.
+"""
+
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+import requests
+
+from http_cache import cached_get
+from openalex_stream import read_page
+
+
+OPENALEX_WORKS_URL = "https://api.openalex.org/works"
+
+# OpenAlex allows 10 requests per second; stay a little below
+REQUESTS_PER_SECOND = 8
+MAX_WORKERS = 4
+
+# OpenAlex pages hold at most 200 works
+PAGE_SIZE = 200
+
+PARTITION_MODES = ("none", "year", "quarter")
+
+_QUARTERS = (("01-01", "03-31"), ("04-01", "06-30"), ("07-01", "09-30"), ("10-01", "12-31"))
+
+
+class RateLimiter:
+    """
+    Spaces calls evenly at a fixed rate across all threads.
+    """
+
+    def __init__(self, rate: float):
+        """
+        Args:
+            rate: Maximum calls per second
+        """
+        self.interval = 1 / rate
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def acquire(self):
+        """Block until the next call slot."""
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if wait > 0:
+            time.sleep(wait)
+
+
+# Shared by every OpenAlex request of the process
+OPENALEX_RATE_LIMITER = RateLimiter(REQUESTS_PER_SECOND)
+
+
+def get_works(params: dict, rate_limiter: RateLimiter = OPENALEX_RATE_LIMITER, convert=None) -> dict:
+    """
+    One OpenAlex works request (through the HTTP cache) with the fetch layer's retry policy.
+
+    Args:
+        params: Query parameters
+        rate_limiter: Limiter every network request waits for
+        convert: Optional converter of raw results (e.g. work_to_paper); the
+                 page is then decoded incrementally (see openalex_stream.py)
+
+    Returns:
+        Decoded JSON response (with converted results if convert is given)
+    """
+    max_retries = 3
+    retry_delay = 2
+    for attempt in range(max_retries):
+        try:
+            response = cached_get(OPENALEX_WORKS_URL, params=params, timeout=60, rate_limiter=rate_limiter)
+            response.raise_for_status()
+            if convert is None:
+                return response.json()
+            with response:
+                return read_page(response, convert)
+        except requests.exceptions.RequestException:
+            if attempt < max_retries - 1:
+                time.sleep(retry_delay)
+            else:
+                raise
+
+
+@dataclass
+class QueryPartition:
+    """
+    One slice of the publication date range and its fetch state.
+    """
+    label: str
+    filter: str
+    available: int = 0                          # Matching works reported by OpenAlex
+    allocation: int = 0                         # Works this partition contributes
+    works: list[dict] = field(default_factory=list)
+    next_cursor: str = None
+
+
+def plan_partitions(start_year: int, end_year: int, mode: str = "year") -> list[QueryPartition]:
+    """
+    Split a publication year range into partitions.
+
+    Args:
+        start_year: Beginning of time range (YYYY)
+        end_year: End of time range (YYYY)
+        mode: "year" or "quarter"
+
+    Returns:
+        Partitions in chronological order
+    """
+    partitions = []
+    for year in range(start_year, end_year + 1):
+        if mode == "quarter":
+            for quarter, (first, last) in enumerate(_QUARTERS, start=1):
+                partitions.append(QueryPartition(
+                    f"{year}Q{quarter}", f"from_publication_date:{year}-{first},to_publication_date:{year}-{last}"))
+        else:
+            partitions.append(QueryPartition(str(year), f"publication_year:{year}"))
+    return partitions
+
+
+def allocate_budget(budget: int, capacities: list[int]) -> list[int]:
+    """
+    Split a budget evenly, capping every share at its capacity.
+
+    Shares a partition cannot fill are redistributed evenly over the
+    partitions that still have capacity. Items left over after the even
+    split go to the partitions with the most matches, one each.
+
+    Args:
+        budget: Total number of items
+        capacities: Maximum items per partition
+
+    Returns:
+        Allocation per partition (sums to min(budget, sum(capacities)))
+    """
+    allocation = [0] * len(capacities)
+    remaining = min(budget, sum(capacities))
+    # Fill partitions from the smallest capacity up: those below the even share take everything
+    order = sorted((i for i, capacity in enumerate(capacities) if capacity > 0), key=lambda i: capacities[i])
+    for position, i in enumerate(order):
+        share = remaining // (len(order) - position)
+        if capacities[i] > share:
+            break
+        allocation[i] = capacities[i]
+        remaining -= capacities[i]
+    else:
+        return allocation
+
+    open_partitions = order[position:]
+    share, leftover = divmod(remaining, len(open_partitions))
+    for i in open_partitions:
+        allocation[i] = share
+    for i in sorted(open_partitions, key=lambda i: (-capacities[i], i))[:leftover]:
+        allocation[i] += 1
+    return allocation
+
+
+def _fetch_page(base_params: dict, partition: QueryPartition, per_page: int,
+                rate_limiter: RateLimiter, convert) -> QueryPartition:
+    """Fetch the next page of a partition (the first page also sets available)."""
+    first_page = partition.next_cursor is None
+    data = get_works({**base_params, "filter": partition.filter, "per_page": per_page,
+                      "cursor": "*" if first_page else partition.next_cursor}, rate_limiter, convert)
+    results = data.get("results", [])
+    meta = data.get("meta", {})
+    if first_page:
+        partition.available = meta.get("count") or len(results)
+    partition.works.extend(results)
+    partition.next_cursor = meta.get("next_cursor") if results else None
+    return partition
+
+
+def fetch_partitioned(base_params: dict, start_year: int, end_year: int, budget: int, mode: str = "year",
+                      max_workers: int = MAX_WORKERS, rate_limiter: RateLimiter = OPENALEX_RATE_LIMITER,
+                      convert=None) -> tuple[list[dict], list[QueryPartition]]:
+    """
+    Run a works search as parallel per-year (or per-quarter) sub-queries.
+
+    Args:
+        base_params: Query parameters of the unpartitioned search (search,
+                     select, ...); filter, per_page and cursor are set per partition
+        start_year: Beginning of time range (YYYY)
+        end_year: End of time range (YYYY)
+        budget: Maximum total works
+        mode: "year" or "quarter"
+        max_workers: Partitions queried at the same time
+        rate_limiter: Limiter shared by all requests
+        convert: Optional converter applied to every work as it is decoded
+                 (converted records must keep the "id" key)
+
+    Returns:
+        Tuple of (works in chronological partition order and relevance order
+        within a partition, without duplicate IDs; the partitions)
+    """
+    base_params = {key: value for key, value in base_params.items()
+                   if key not in ("filter", "per_page", "cursor", "page")}
+    partitions = plan_partitions(start_year, end_year, mode)
+    first_page_size = min(PAGE_SIZE, max(1, math.ceil(budget / len(partitions))))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        list(executor.map(lambda partition: _fetch_page(base_params, partition, first_page_size, rate_limiter, convert),
+                          partitions))
+        allocation = allocate_budget(budget, [partition.available for partition in partitions])
+        for partition, share in zip(partitions, allocation):
+            partition.allocation = share
+
+        # Page further into partitions whose share exceeds the first page
+        pending = [partition for partition in partitions
+                   if len(partition.works) < partition.allocation and partition.next_cursor]
+        while pending:
+            list(executor.map(
+                lambda partition: _fetch_page(base_params, partition,
+                                              min(PAGE_SIZE, partition.allocation - len(partition.works)),
+                                              rate_limiter, convert),
+                pending))
+            pending = [partition for partition in pending
+                       if len(partition.works) < partition.allocation and partition.next_cursor]
+
+    works = []
+    seen = set()
+    for partition in partitions:
+        for work in partition.works[:partition.allocation]:
+            if work.get("id") and work["id"] not in seen:
+                seen.add(work["id"])
+                works.append(work)
+    return works, partitions
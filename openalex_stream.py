@@ -0,0 +1,201 @@
+"""
+Incremental decoding of OpenAlex works pages.
+
+`response.json()` holds the raw body, its decoded text and the full object
+tree (including every `abstract_inverted_index`) at the same time, and the
+converted paper records are built on top of that. For 200-work pages this
+roughly doubles peak memory per request.
+
+read_page streams the body instead: every entry of the "results" array is
+decoded on its own, passed to a converter (e.g. work_to_paper) and dropped
+before the next one is read. The other top-level fields ("meta", ...) are
+small and decoded as usual.
+
+Two decoders are available:
+- "chunked": json.JSONDecoder.raw_decode on one result at a time (default;
+  no extra dependencies)
+- "ijson": ijson's event parser (optional install). It works on any JSON
+  layout, but benchmarks/bench_json_stream.py measures it slower and with a
+  higher peak than "chunked", because the objects are rebuilt in Python.
+"""
+
+import codecs
+import json
+from collections.abc import Callable, Iterable, Iterator
+
+
+CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = " \t\n\r"
+# Characters that can continue a number ("1." and "1.5e" decode as 1 and 1.5)
+_NUMBER_CHARS = "0123456789+-.eE"
+_DECODER = json.JSONDecoder()
+
+
+class _ChunkReader:
+    """File-like view of an iterable of byte chunks (for ijson)."""
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._pending = b""
+
+    def read(self, size: int = -1) -> bytes:
+        while not self._pending:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return b""
+            self._pending = chunk
+        if size < 0 or size >= len(self._pending):
+            data, self._pending = self._pending, b""
+        else:
+            data, self._pending = self._pending[:size], self._pending[size:]
+        return data
+
+
+def _iter_ijson(chunks: Iterable[bytes], fields: dict) -> Iterator[dict]:
+    import ijson
+
+    key = None
+    builder = None
+    for prefix, event, value in ijson.parse(_ChunkReader(chunks), use_float=True):
+        if prefix == "":
+            if event == "map_key":
+                key = value
+            continue
+        if key == "results" and prefix == "results" and event in ("start_array", "end_array"):
+            continue
+        if builder is None:
+            builder = ijson.ObjectBuilder()
+        builder.event(event, value)
+        # A value is complete when its own prefix sees a scalar or a closing event
+        target = "results.item" if key == "results" else key
+        if prefix == target and event not in ("start_map", "start_array", "map_key"):
+            if key == "results":
+                yield builder.value
+            else:
+                fields[key] = builder.value
+            builder = None
+
+
+class _TextBuffer:
+    """Decoded text of a byte stream, read on demand; consumed text is dropped."""
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self.text = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self) -> bool:
+        """Append the next chunk. Returns False at the end of the stream."""
+        for chunk in self._chunks:
+            if chunk:
+                self.text = self.text[self.pos:] + self._decoder.decode(chunk)
+                self.pos = 0
+                return True
+        self.text = self.text[self.pos:] + self._decoder.decode(b"", final=True)
+        self.pos = 0
+        self.eof = True
+        return False
+
+    def peek(self) -> str:
+        """Next non-whitespace character (not consumed)."""
+        while True:
+            while self.pos < len(self.text) and self.text[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if self.eof or not self.fill():
+                raise ValueError("Unexpected end of JSON document")
+
+    def expect(self, chars: str) -> str:
+        """Consume the next character, which must be one of chars."""
+        char = self.peek()
+        if char not in chars:
+            raise ValueError(f"Expected one of {chars!r} in JSON document, got {char!r}")
+        self.pos += 1
+        return char
+
+    def value(self):
+        """Decode the next complete JSON value."""
+        self.peek()
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self.text, self.pos)
+                # A number at the end of the buffer may continue in the next chunk;
+                # in a complete document a value is never followed by a number character
+                if self.eof or (end < len(self.text) and self.text[end] not in _NUMBER_CHARS):
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self.fill()
+
+
+def _iter_chunked(chunks: Iterable[bytes], fields: dict) -> Iterator[dict]:
+    buffer = _TextBuffer(chunks)
+    buffer.expect("{")
+    if buffer.peek() == "}":
+        return
+    while True:
+        key = buffer.value()
+        buffer.expect(":")
+        if key == "results" and buffer.peek() == "[":
+            buffer.pos += 1
+            if buffer.peek() == "]":
+                buffer.pos += 1
+            else:
+                while True:
+                    yield buffer.value()
+                    if buffer.expect(",]") == "]":
+                        break
+        else:
+            fields[key] = buffer.value()
+        if buffer.expect(",}") == "}":
+            return
+
+
+def ijson_available() -> bool:
+    try:
+        import ijson  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def iter_results(chunks: Iterable[bytes], fields: dict = None, backend: str = "chunked") -> Iterator[dict]:
+    """
+    Decode the "results" entries of a JSON works page one at a time.
+
+    Args:
+        chunks: Body of the page as byte chunks (e.g. response.iter_content())
+        fields: Optional dict that receives the other top-level fields
+                ("meta", ...) as they are read
+        backend: "chunked" or "ijson"
+
+    Yields:
+        Raw result objects, in order
+    """
+    fields = {} if fields is None else fields
+    if backend == "ijson":
+        return _iter_ijson(chunks, fields)
+    return _iter_chunked(chunks, fields)
+
+
+def read_page(response, convert: Callable[[dict], dict]) -> dict:
+    """
+    Stream a works page and convert every result as it is decoded.
+
+    Args:
+        response: requests.Response fetched with stream=True
+        convert: Converter applied to each raw result (e.g. work_to_paper)
+
+    Returns:
+        Page dict like response.json(), with "results" replaced by the converted records
+    """
+    fields = {}
+    results = [convert(work) for work in iter_results(response.iter_content(CHUNK_SIZE), fields)]
+    fields["results"] = results
+    return fields
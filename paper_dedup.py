@@ -0,0 +1,195 @@
+"""
+Near-duplicate detection for fetched papers.
+
+OpenAlex frequently returns the preprint and the published version (or an
+erratum) of the same work. This module collapses them before LLM extraction
+using MinHash signatures over title+abstract word shingles, banded LSH to
+find candidate pairs in near-linear time, and exact DOI matches.
+"""
+
+import re
+import zlib
+
+import numpy as np
+
+
+# Mersenne prime 2^61 - 1 for universal hashing; coefficients stay below 2^31
+# and shingle hashes below 2^32, so a * x + b never overflows uint64
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+# Sources that indicate a preprint rather than the published version
+PREPRINT_SOURCES = ("arxiv", "biorxiv", "medrxiv", "ssrn", "research square", "preprints", "techrxiv", "chemrxiv")
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9\u4e00-\u9fff]+")
+
+
+def normalize_doi(doi: str) -> str:
+    """
+    Normalize a DOI such as "https://doi.org/10.1000/XYZ" to "10.1000/xyz".
+
+    Args:
+        doi: DOI string or URL (may be empty or None)
+
+    Returns:
+        Normalized DOI, or empty string
+    """
+    if not doi:
+        return ""
+    doi = doi.strip().lower()
+    for prefix in ("https://doi.org/", "http://doi.org/", "https://dx.doi.org/", "doi:"):
+        if doi.startswith(prefix):
+            doi = doi[len(prefix):]
+    return doi
+
+
+def paper_shingles(paper: dict, size: int = 3) -> set[int]:
+    """
+    Hash the word shingles of a paper's title and abstract.
+
+    Args:
+        paper: Paper dictionary
+        size: Words per shingle
+
+    Returns:
+        Set of 32-bit shingle hashes
+    """
+    text = f"{paper.get('title', '')} {paper.get('abstract', '')}".lower()
+    tokens = _TOKEN_PATTERN.findall(text)
+    if len(tokens) < size:
+        grams = tokens
+    else:
+        grams = (" ".join(tokens[i:i + size]) for i in range(len(tokens) - size + 1))
+    return {zlib.crc32(gram.encode("utf-8")) for gram in grams}
+
+
+def minhash_signatures(shingle_sets: list[set[int]], num_perm: int = 128, seed: int = 1) -> np.ndarray:
+    """
+    Compute MinHash signatures for a list of shingle sets.
+
+    Args:
+        shingle_sets: Shingle hashes per document
+        num_perm: Number of hash permutations
+        seed: Random seed for the permutations (fixed for reproducibility)
+
+    Returns:
+        Array of shape (len(shingle_sets), num_perm); empty sets get all-max rows
+    """
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, 1 << 31, size=num_perm, dtype=np.uint64)
+    b = rng.integers(0, 1 << 31, size=num_perm, dtype=np.uint64)
+
+    signatures = np.full((len(shingle_sets), num_perm), _MAX_HASH, dtype=np.uint64)
+    for row, shingles in enumerate(shingle_sets):
+        if not shingles:
+            continue
+        x = np.fromiter(shingles, dtype=np.uint64, count=len(shingles))[:, None]
+        hashes = ((a * x + b) % _MERSENNE_PRIME) & _MAX_HASH
+        signatures[row] = hashes.min(axis=0)
+    return signatures
+
+
+class _UnionFind:
+    def __init__(self, n: int):
+        self.parent = list(range(n))
+
+    def find(self, i: int) -> int:
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, i: int, j: int):
+        root_i, root_j = self.find(i), self.find(j)
+        if root_i != root_j:
+            self.parent[max(root_i, root_j)] = min(root_i, root_j)
+
+
+def _representative_rank(paper: dict):
+    # Prefer the published version, then the most cited, then the one with an abstract
+    journal = (paper.get("journal") or "").lower()
+    is_preprint = not journal or any(source in journal for source in PREPRINT_SOURCES)
+    return (is_preprint, -(paper.get("cited_by_count") or 0), not paper.get("abstract"))
+
+
+def find_duplicate_groups(papers: list[dict], threshold: float = 0.8, num_perm: int = 128,
+                          bands: int = 16) -> dict[int, list[int]]:
+    """
+    Group near-identical papers (same DOI or similar title+abstract).
+
+    Candidate pairs come from banded LSH over MinHash signatures and are
+    confirmed when their estimated Jaccard similarity reaches the threshold.
+    The representative of each group is its published, most cited version.
+
+    Args:
+        papers: Paper dictionaries
+        threshold: Minimum estimated Jaccard similarity for duplicates
+        num_perm: MinHash signature length (must be divisible by bands)
+        bands: Number of LSH bands
+
+    Returns:
+        Mapping from representative index to all member indices (including
+        itself), in original order; papers without duplicates form their own group
+    """
+    n = len(papers)
+    if n < 2:
+        return {i: [i] for i in range(n)}
+
+    groups = _UnionFind(n)
+
+    # Exact DOI matches
+    first_by_doi = {}
+    for i, paper in enumerate(papers):
+        doi = normalize_doi(paper.get("doi"))
+        if doi:
+            if doi in first_by_doi:
+                groups.union(first_by_doi[doi], i)
+            else:
+                first_by_doi[doi] = i
+
+    # MinHash + LSH for near-identical text
+    shingle_sets = [paper_shingles(paper) for paper in papers]
+    signatures = minhash_signatures(shingle_sets, num_perm=num_perm)
+    rows = num_perm // bands
+    for band in range(bands):
+        buckets = {}
+        band_slice = signatures[:, band * rows:(band + 1) * rows]
+        for i in range(n):
+            if not shingle_sets[i]:
+                continue
+            buckets.setdefault(band_slice[i].tobytes(), []).append(i)
+        for members in buckets.values():
+            if len(members) < 2:
+                continue
+            for pos, first in enumerate(members):
+                for other in members[pos + 1:]:
+                    if groups.find(first) == groups.find(other):
+                        continue
+                    similarity = float(np.mean(signatures[first] == signatures[other]))
+                    if similarity >= threshold:
+                        groups.union(first, other)
+
+    # Pick one representative per group
+    clusters = {}
+    for i in range(n):
+        clusters.setdefault(groups.find(i), []).append(i)
+    return {
+        members[0] if len(members) == 1 else min(members, key=lambda i: _representative_rank(papers[i])): members
+        for members in clusters.values()
+    }
+
+
+def deduplicate_papers(papers: list[dict], threshold: float = 0.8) -> tuple[list[dict], int]:
+    """
+    Collapse near-identical papers, keeping one representative per group.
+
+    Args:
+        papers: Paper dictionaries
+        threshold: Minimum estimated Jaccard similarity for duplicates
+
+    Returns:
+        Tuple of (deduplicated papers in original order, number of papers collapsed)
+    """
+    keep = set(find_duplicate_groups(papers, threshold=threshold))
+    # One sequential pass, which is also cheap for columnar corpora
+    return [paper for i, paper in enumerate(papers) if i in keep], len(papers) - len(keep)
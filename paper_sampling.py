@@ -0,0 +1,225 @@
+"""
+Stratified sampling of search results before keyword extraction.
+
+Taking the first max_papers relevance-ranked hits (or filling journal
+quotas in order) skews the corpus towards a few years and journals. The
+sampler instead:
+
+1. prefetches a candidate pool of pool_factor x max_papers works with
+   metadata only (ID, year, citations, journal; no abstracts),
+2. draws a stratified random sample across publication year x journal
+   (optionally x citation band) with proportional allocation,
+3. fetches titles and abstracts for the sampled works only.
+
+Only the sampled papers go to LLM extraction. The sample is seeded from
+the request, so reruns draw the same papers (and reuse checkpoints).
+"""
+
+import random
+import zlib
+from collections import Counter, defaultdict
+
+from openalex_local import journal_matches, search_works, work_journal, work_to_paper
+from openalex_planner import PAGE_SIZE, get_works
+
+# Prefetch only what stratification needs; abstracts are the expensive field
+METADATA_FIELDS = "id,publication_year,cited_by_count,primary_location"
+FULL_FIELDS = "id,doi,title,publication_year,cited_by_count,abstract_inverted_index,primary_location"
+
+# Upper bound on the metadata pool, raised for large samples so the pool
+# always holds at least MIN_POOL_FACTOR x max_papers candidates
+MAX_POOL = 2000
+MIN_POOL_FACTOR = 2
+
+# Works fetched per ID-filter request when hydrating the sample
+IDS_PER_REQUEST = 50
+
+# Supported strata
+SAMPLING_MODES = ("none", "year_journal", "year_journal_citations")
+
+# Citation bands (quantiles of the pool) used by "year_journal_citations"
+CITATION_BANDS = 3
+
+
+def _citation_bands(records: list[dict], bands: int) -> list[int]:
+    """Quantile band (0 = least cited) of every record within the pool."""
+    order = sorted(range(len(records)), key=lambda i: records[i].get("cited_by_count") or 0)
+    result = [0] * len(records)
+    for rank, i in enumerate(order):
+        result[i] = rank * bands // max(len(records), 1)
+    return result
+
+
+def stratified_sample(records: list[dict], sample_size: int, citation_bands: int = 0,
+                      seed: int = 0) -> tuple[list[int], dict]:
+    """
+    Draw a stratified random sample across publication year x journal.
+
+    Each stratum gets a share of the sample proportional to its size in the
+    pool (largest remainder rounding); papers within a stratum are drawn at
+    random.
+
+    Args:
+        records: Candidate works with publication_year, journal and cited_by_count
+        sample_size: Number of papers to draw
+        citation_bands: Also stratify by this many citation quantile bands (0 = off)
+        seed: Random seed
+
+    Returns:
+        Tuple of (sampled indices in pool order, report with pool size,
+        sample size, stratum count and per-year pool/sample counts)
+    """
+    bands = _citation_bands(records, citation_bands) if citation_bands else [0] * len(records)
+    strata = defaultdict(list)
+    for i, record in enumerate(records):
+        strata[(record.get("publication_year") or 0, record.get("journal") or "", bands[i])].append(i)
+
+    sample_size = min(sample_size, len(records))
+    # Proportional allocation, remainders go to the strata with the largest fractions
+    quotas = {key: len(members) * sample_size / max(len(records), 1) for key, members in strata.items()}
+    allocation = {key: int(quota) for key, quota in quotas.items()}
+    leftover = sample_size - sum(allocation.values())
+    for key in sorted(quotas, key=lambda key: quotas[key] - allocation[key], reverse=True)[:leftover]:
+        allocation[key] += 1
+
+    rng = random.Random(seed)
+    sampled = []
+    # Sorted keys keep the draw independent of the pool order within a seed
+    for key in sorted(strata, key=repr):
+        sampled.extend(rng.sample(strata[key], allocation[key]))
+    sampled.sort()
+
+    pool_years = Counter(records[i].get("publication_year") or 0 for i in range(len(records)))
+    sample_years = Counter(records[i].get("publication_year") or 0 for i in sampled)
+    report = {
+        "pool_size": len(records),
+        "sample_size": len(sampled),
+        "strata": len(strata),
+        "years": {str(year): [pool_years[year], sample_years[year]] for year in sorted(pool_years)},
+    }
+    return sampled, report
+
+
+def _metadata_record(work: dict) -> dict:
+    return {
+        "id": work.get("id"),
+        "publication_year": work.get("publication_year") or 0,
+        "cited_by_count": work.get("cited_by_count") or 0,
+        "journal": work_journal(work),
+    }
+
+
+def prefetch_metadata(domain: str, start_year: int, end_year: int, pool_size: int) -> list[dict]:
+    """
+    Metadata of the top relevance hits of a search (no titles or abstracts).
+
+    Args:
+        domain: Search keyword
+        start_year: Beginning of time range (YYYY)
+        end_year: End of time range (YYYY)
+        pool_size: Maximum number of works
+
+    Returns:
+        List of records with id, publication_year, cited_by_count and journal
+    """
+    records = []
+    seen = set()
+    cursor = "*"
+    while cursor and len(records) < pool_size:
+        data = get_works({
+            "search": domain,
+            "filter": f"publication_year:{start_year}-{end_year}",
+            "per_page": min(PAGE_SIZE, pool_size),
+            "cursor": cursor,
+            "select": METADATA_FIELDS,
+        }, convert=_metadata_record)
+        works = data.get("results", [])
+        for record in works:
+            if record["id"] and record["id"] not in seen:
+                seen.add(record["id"])
+                records.append(record)
+        cursor = data.get("meta", {}).get("next_cursor") if works else None
+    return records[:pool_size]
+
+
+def hydrate_works(ids: list[str]) -> list[dict]:
+    """
+    Fetch full paper records (title, abstract, ...) for OpenAlex IDs.
+
+    Args:
+        ids: OpenAlex work IDs (URL or short form)
+
+    Returns:
+        Paper dictionaries in the order of ids (works OpenAlex did not return are left out)
+    """
+    papers_by_id = {}
+    for start in range(0, len(ids), IDS_PER_REQUEST):
+        batch = [work_id.rsplit("/", 1)[-1] for work_id in ids[start:start + IDS_PER_REQUEST]]
+        data = get_works({
+            "filter": f"openalex:{'|'.join(batch)}",
+            "per_page": len(batch),
+            "select": FULL_FIELDS,
+        }, convert=work_to_paper)
+        for paper in data.get("results", []):
+            if paper["title"]:
+                papers_by_id[paper["id"].rsplit("/", 1)[-1]] = paper
+    return [papers_by_id[work_id.rsplit("/", 1)[-1]] for work_id in ids
+            if work_id.rsplit("/", 1)[-1] in papers_by_id]
+
+
+def sampling_seed(domain: str, start_year: int, end_year: int) -> int:
+    """Stable seed of a request, so reruns draw the same sample."""
+    return zlib.crc32(f"{domain.strip().lower()}|{start_year}|{end_year}".encode("utf-8"))
+
+
+def pool_limit(max_papers: int, pool_factor: int) -> int:
+    """
+    Number of candidates to prefetch for a sample of max_papers.
+
+    pool_factor x max_papers, clamped to MAX_POOL, but never below
+    MIN_POOL_FACTOR x max_papers (a pool no larger than the sample would
+    turn the stratified sample into the plain relevance-ranked head).
+    """
+    return min(max_papers * pool_factor, max(MAX_POOL, max_papers * MIN_POOL_FACTOR))
+
+
+def fetch_stratified_sample(domain: str, start_year: int, end_year: int, journals: list[str] = None,
+                            max_papers: int = 100, mode: str = "year_journal", pool_factor: int = 5,
+                            source: str = "openalex") -> tuple[list[dict], dict]:
+    """
+    Fetch a stratified sample of max_papers papers for a search.
+
+    Args:
+        domain: Search keyword
+        start_year: Beginning of time range (YYYY)
+        end_year: End of time range (YYYY)
+        journals: Optional journal names; pool works from other journals are
+                  dropped (works without a journal name are kept, as in the
+                  journal-based search)
+        max_papers: Sample size
+        mode: "year_journal" or "year_journal_citations"
+        pool_factor: Candidate pool size as a multiple of max_papers
+        source: "openalex" (live API) or "local" (snapshot index)
+
+    Returns:
+        Tuple of (sampled papers, sampling report)
+    """
+    pool_size = pool_limit(max_papers, pool_factor)
+    if source == "local":
+        # The local index has the full records at no extra cost
+        pool = search_works(domain, start_year, end_year, limit=pool_size)
+    else:
+        pool = prefetch_metadata(domain, start_year, end_year, pool_size)
+    if journals:
+        pool = [record for record in pool
+                if not record["journal"] or any(journal_matches(journal, record["journal"]) for journal in journals)]
+
+    citation_bands = CITATION_BANDS if mode == "year_journal_citations" else 0
+    indices, report = stratified_sample(pool, max_papers, citation_bands=citation_bands,
+                                        seed=sampling_seed(domain, start_year, end_year))
+    sampled = [pool[i] for i in indices]
+    papers = sampled if source == "local" else hydrate_works([record["id"] for record in sampled])
+    report["mode"] = mode
+    if pool_size < max_papers * pool_factor:
+        report["pool_limit"] = pool_size
+    return papers, report
@@ -0,0 +1,202 @@
+"""
+Columnar on-disk store for fetched paper corpora.
+
+Corpora are written as Arrow IPC files with dictionary-encoded journal names
+and publication years, and memory-mapped on reload, so they cost little RAM,
+are shared by every session and survive server restarts.
+
+The Corpus class is the thin accessor used by the rest of the pipeline: it
+behaves like a read-only sequence of paper dictionaries. Whole-corpus
+operations (column(), take()) stay columnar; the paper dictionaries that
+dedup, sampling and extraction work on are built on access, one record
+batch at a time when iterating, and never cached, so a large corpus is not
+held in memory a second time as Python objects.
+
+Stored corpora expire CORPUS_TTL_SECONDS after they were fetched, so a
+domain is re-fetched from OpenAlex instead of being served stale forever.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import time
+from collections.abc import Sequence
+
+import pyarrow as pa
+
+
+STORE_DIR = os.path.join(".cache", "corpora")
+
+# Stored corpora older than this are fetched again
+CORPUS_TTL_SECONDS = 7 * 24 * 3600
+
+# Rows converted to dictionaries at a time while iterating over a corpus
+ITER_BATCH_ROWS = 1024
+
+# Fields kept per paper (everything the pipeline reads)
+PAPER_SCHEMA = pa.schema([
+    pa.field("id", pa.string()),
+    pa.field("doi", pa.string()),
+    pa.field("title", pa.string()),
+    pa.field("abstract", pa.string()),
+    pa.field("publication_year", pa.dictionary(pa.int16(), pa.int32())),
+    pa.field("cited_by_count", pa.int32()),
+    pa.field("journal", pa.dictionary(pa.int32(), pa.string())),
+])
+
+
+def corpus_key(domain: str, start_year: int, end_year: int, journals: list[str] = None,
+               max_papers: int = 100, options: dict = None) -> str:
+    """
+    Stable identifier of a fetch request.
+
+    Args:
+        domain: Search keyword
+        start_year: Beginning of time range (YYYY)
+        end_year: End of time range (YYYY)
+        journals: Optional list of journal names
+        max_papers: Maximum total papers
+        options: Optional further fetch settings (e.g. the sampling mode)
+
+    Returns:
+        Hex digest identifying the corpus
+    """
+    request = [domain.strip().lower(), start_year, end_year, journals or [], max_papers]
+    if options:
+        request.append(options)
+    payload = json.dumps(request, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+def papers_to_table(papers: list[dict]) -> pa.Table:
+    """
+    Convert paper dictionaries to an Arrow table with PAPER_SCHEMA.
+
+    Args:
+        papers: Paper dictionaries
+
+    Returns:
+        Arrow table
+    """
+    columns = {
+        "id": [paper.get("id", "") for paper in papers],
+        "doi": [paper.get("doi") or "" for paper in papers],
+        "title": [paper.get("title", "") for paper in papers],
+        "abstract": [paper.get("abstract", "") for paper in papers],
+        "publication_year": pa.array([paper.get("publication_year") or 0 for paper in papers],
+                                     type=pa.int32()).dictionary_encode(),
+        "cited_by_count": [paper.get("cited_by_count") or 0 for paper in papers],
+        "journal": pa.array([paper.get("journal") or "" for paper in papers],
+                            type=pa.string()).dictionary_encode(),
+    }
+    return pa.Table.from_pydict(columns, schema=PAPER_SCHEMA)
+
+
+class Corpus(Sequence):
+    """
+    Read-only, Arrow-backed sequence of papers.
+
+    Indexing returns a plain paper dictionary; column() returns one field for
+    all papers without building per-paper dictionaries.
+    """
+
+    def __init__(self, table: pa.Table, metadata: dict = None):
+        self.table = table
+        self.metadata = metadata or {}
+
+    @classmethod
+    def from_papers(cls, papers: list[dict], metadata: dict = None) -> "Corpus":
+        return cls(papers_to_table(papers), metadata)
+
+    def __len__(self) -> int:
+        return self.table.num_rows
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step == 1:
+                return self.table.slice(start, max(0, stop - start)).to_pylist()
+            return self.table.take(list(range(start, stop, step))).to_pylist()
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("corpus index out of range")
+        return self.table.slice(index, 1).to_pylist()[0]
+
+    def __iter__(self):
+        for batch in self.table.to_batches(max_chunksize=ITER_BATCH_ROWS):
+            yield from batch.to_pylist()
+
+    def column(self, name: str) -> list:
+        """All values of one field, in corpus order."""
+        return self.table.column(name).to_pylist()
+
+    def take(self, indices: list[int]) -> "Corpus":
+        """A new corpus with the given rows, still columnar."""
+        return Corpus(self.table.take(indices), self.metadata)
+
+    @property
+    def nbytes(self) -> int:
+        return self.table.nbytes
+
+
+def _corpus_path(key: str) -> str:
+    return os.path.join(STORE_DIR, f"{key}.arrow")
+
+
+def save_corpus(key: str, papers: list[dict], metadata: dict = None) -> Corpus:
+    """
+    Persist a corpus and return it memory-mapped from disk.
+
+    Args:
+        key: Corpus identifier (see corpus_key)
+        papers: Paper dictionaries
+        metadata: JSON-serializable description (domain, years, ...)
+
+    Returns:
+        Corpus backed by the written file
+    """
+    metadata = dict(metadata or {})
+    metadata.setdefault("fetched_at", time.time())
+    table = papers_to_table(papers)
+    table = table.replace_schema_metadata({"corpus": json.dumps(metadata, ensure_ascii=False)})
+
+    os.makedirs(STORE_DIR, exist_ok=True)
+    path = _corpus_path(key)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with pa.OSFile(tmp_path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    os.replace(tmp_path, path)
+    return load_corpus(key, max_age_seconds=None)
+
+
+def load_corpus(key: str, max_age_seconds: float = CORPUS_TTL_SECONDS) -> Corpus:
+    """
+    Memory-map a stored corpus.
+
+    Args:
+        key: Corpus identifier (see corpus_key)
+        max_age_seconds: Treat corpora fetched longer ago than this as
+                         missing (None: never expire)
+
+    Returns:
+        Corpus, or None if it is not stored, expired (or unreadable)
+    """
+    path = _corpus_path(key)
+    if not os.path.exists(path):
+        return None
+    try:
+        table = pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+    except (pa.ArrowInvalid, OSError):
+        return None
+    raw_metadata = (table.schema.metadata or {}).get(b"corpus", b"{}")
+    metadata = json.loads(raw_metadata.decode("utf-8"))
+    if max_age_seconds is not None and time.time() - metadata.get("fetched_at", 0) > max_age_seconds:
+        return None
+    return Corpus(table, metadata)
+
+
+def clear_corpus_store():
+    """Delete every stored corpus."""
+    shutil.rmtree(STORE_DIR, ignore_errors=True)
@@ -0,0 +1,249 @@
+"""
+Downloadable exports of analysis results.
+
+Each export is generated on first request and cached on disk under
+.cache/exports/<digest>/, where the digest is a hash of the result, so
+repeated downloads (from any session) are served from the file. Results
+hold the symmetric co-occurrence matrix sparsely, as its non-zero
+upper-triangle entries (see sparse_entries), and the writers read those
+directly via numpy and Arrow, never building a dense matrix.
+
+Formats:
+- cooccurrence.npz: symmetric COO matrix readable with scipy.sparse.load_npz
+  (plus a "keywords" array with the row/column labels)
+- edges.parquet / edges.csv: upper-triangle edge list (source, target, weight)
+- paper_keywords.parquet: per-paper keyword lists, as extracted and after merging
+- run_metadata.json: parameters, journals, counts, plan, token usage and concurrency
+"""
+
+import csv
+import hashlib
+import json
+import os
+import shutil
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+
+EXPORT_DIR = os.path.join(".cache", "exports")
+
+
+def result_digest(result: dict) -> str:
+    """
+    Stable hash of an analysis result (matrix, keywords and metadata).
+
+    Args:
+        result: JSON-serializable result (or result plus parameters)
+
+    Returns:
+        Hex digest
+    """
+    payload = json.dumps(result, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+def sparse_entries(values) -> dict:
+    """
+    Non-zero upper-triangle entries of a symmetric co-occurrence matrix.
+
+    This is how results store their matrices (together with the keyword
+    labels); dense_values() restores the full matrix.
+
+    Args:
+        values: Square matrix (numpy array, DataFrame or nested lists)
+
+    Returns:
+        Dictionary with rows, cols and weights lists (rows[i] < cols[i])
+    """
+    import numpy as np
+
+    values = np.asarray(values)
+    rows, cols = np.nonzero(np.triu(values, k=1))
+    return {"rows": rows.tolist(), "cols": cols.tolist(), "weights": values[rows, cols].astype(int).tolist()}
+
+
+def matrix_entries(matrix: dict):
+    """
+    Entries of a stored matrix as numpy arrays.
+
+    Results written before matrices were stored sparsely hold a dense
+    "values" list instead; its non-zero entries are extracted.
+
+    Args:
+        matrix: Stored matrix (see sparse_entries)
+
+    Returns:
+        Tuple of (rows, cols, weights) int32 arrays of the upper triangle
+    """
+    import numpy as np
+
+    if "values" in matrix:
+        matrix = sparse_entries(matrix["values"])
+    return (np.asarray(matrix["rows"], dtype=np.int32), np.asarray(matrix["cols"], dtype=np.int32),
+            np.asarray(matrix["weights"], dtype=np.int32))
+
+
+def dense_values(matrix: dict, size: int):
+    """
+    Full symmetric matrix of a stored matrix (for heatmaps of a few hundred keywords).
+
+    Args:
+        matrix: Stored matrix (see sparse_entries)
+        size: Number of keywords
+
+    Returns:
+        size x size int32 numpy array
+    """
+    import numpy as np
+
+    rows, cols, weights = matrix_entries(matrix)
+    values = np.zeros((size, size), dtype=np.int32)
+    values[rows, cols] = weights
+    values[cols, rows] = weights
+    return values
+
+
+def _nonzero_entries(result: dict):
+    """
+    Keywords and the non-zero upper-triangle entries of the matrix.
+
+    Returns:
+        Tuple of (keywords, rows, cols, weights) with numpy index/weight arrays
+    """
+    return (result["matrix"]["keywords"], *matrix_entries(result["matrix"]))
+
+
+def _write_npz(result: dict, params: dict, path: str):
+    import numpy as np
+
+    keywords, rows, cols, weights = _nonzero_entries(result)
+    # Same layout as scipy.sparse.save_npz for a COO matrix (both triangles)
+    np.savez_compressed(
+        path,
+        format=np.array(b"coo"),
+        shape=np.array([len(keywords), len(keywords)]),
+        row=np.concatenate([rows, cols]),
+        col=np.concatenate([cols, rows]),
+        data=np.concatenate([weights, weights]),
+        keywords=np.array(keywords, dtype=str),
+    )
+
+
+def _edge_table(result: dict):
+    import pyarrow as pa
+
+    keywords, rows, cols, weights = _nonzero_entries(result)
+    dictionary = pa.array(keywords, type=pa.string())
+    return pa.table({
+        "source": pa.DictionaryArray.from_arrays(pa.array(rows, type=pa.int32()), dictionary),
+        "target": pa.DictionaryArray.from_arrays(pa.array(cols, type=pa.int32()), dictionary),
+        "weight": pa.array(weights, type=pa.int32()),
+    })
+
+
+def _write_edges_parquet(result: dict, params: dict, path: str):
+    import pyarrow.parquet as pq
+
+    pq.write_table(_edge_table(result), path, compression="zstd")
+
+
+def _write_edges_csv(result: dict, params: dict, path: str):
+    keywords, rows, cols, weights = _nonzero_entries(result)
+    # utf-8-sig so Excel opens Chinese keywords correctly
+    with open(path, "w", encoding="utf-8-sig", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["source", "target", "weight"])
+        writer.writerows(zip((keywords[i] for i in rows), (keywords[j] for j in cols), weights.tolist()))
+
+
+def _write_paper_keywords(result: dict, params: dict, path: str):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    mapping = result.get("keyword_mapping", {})
+    paper_keywords = result.get("paper_keywords", {})
+    merged = []
+    for keywords in paper_keywords.values():
+        merged.append(list(dict.fromkeys(mapping.get(keyword, keyword) for keyword in keywords)))
+    table = pa.table({
+        "paper_id": pa.array(list(paper_keywords.keys()), type=pa.string()),
+        "keywords": pa.array(list(paper_keywords.values()), type=pa.list_(pa.string())),
+        "merged_keywords": pa.array(merged, type=pa.list_(pa.string())),
+    })
+    pq.write_table(table, path, compression="zstd")
+
+
+def _write_metadata(result: dict, params: dict, path: str):
+    keywords, rows, _, _ = _nonzero_entries(result)
+    metadata = {key: value for key, value in result.items() if key not in ("matrix", "paper_keywords")}
+    metadata["params"] = params
+    metadata["vocabulary_size"] = len(keywords)
+    metadata["edge_count"] = int(len(rows))
+    metadata["result_digest"] = result_digest(result)
+    metadata["exported_at"] = time.time()
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(metadata, f, ensure_ascii=False, indent=2)
+
+
+@dataclass(frozen=True)
+class ExportFormat:
+    """
+    One downloadable export of an analysis result.
+    """
+    file_name: str
+    mime: str
+    label: str
+    writer: Callable  # writer(result, params, path)
+
+
+EXPORT_FORMATS = {
+    "npz": ExportFormat("cooccurrence.npz", "application/octet-stream", "共现矩阵（稀疏 NPZ）", _write_npz),
+    "edges_parquet": ExportFormat("edges.parquet", "application/vnd.apache.parquet", "边列表（Parquet）",
+                                  _write_edges_parquet),
+    "edges_csv": ExportFormat("edges.csv", "text/csv", "边列表（CSV）", _write_edges_csv),
+    "paper_keywords": ExportFormat("paper_keywords.parquet", "application/vnd.apache.parquet",
+                                   "论文关键词（Parquet）", _write_paper_keywords),
+    "metadata": ExportFormat("run_metadata.json", "application/json", "运行元数据（JSON）", _write_metadata),
+}
+
+
+def export_path(result: dict, export_format: str, params: dict = None) -> str:
+    """
+    Path of an export file, generating it on first request.
+
+    Args:
+        result: Result dictionary of an analysis
+        export_format: Key of EXPORT_FORMATS
+        params: Analysis parameters (included in the run metadata)
+
+    Returns:
+        Path of the cached export file
+    """
+    spec = EXPORT_FORMATS[export_format]
+    params = params or {}
+    directory = os.path.join(EXPORT_DIR, result_digest({"result": result, "params": params}))
+    path = os.path.join(directory, spec.file_name)
+    if os.path.exists(path):
+        return path
+
+    os.makedirs(directory, exist_ok=True)
+    # Keep the extension: numpy appends ".npz" to names without it
+    root, extension = os.path.splitext(path)
+    tmp_path = f"{root}.{os.getpid()}.tmp{extension}"
+    spec.writer(result, params, tmp_path)
+    os.replace(tmp_path, path)
+    return path
+
+
+def export_bytes(result: dict, export_format: str, params: dict = None) -> bytes:
+    """
+    Contents of an export file (generated and cached on first request).
+    """
+    with open(export_path(result, export_format, params), "rb") as f:
+        return f.read()
+
+
+def clear_exports():
+    """Delete every cached export."""
+    shutil.rmtree(EXPORT_DIR, ignore_errors=True)
@@ -0,0 +1,269 @@
+"""
+Statistical keyphrase extraction over a whole corpus.
+
+An offline alternative to LLM extraction that handles thousands of papers
+in seconds (RAKE/YAKE-style candidates, TF-IDF-style scoring):
+
+1. titles and abstracts are tokenized once; stopwords, numbers and
+   punctuation split the text into candidate runs,
+2. every 1-4 word n-gram inside a run is a candidate; the n-grams of all
+   papers are generated and deduplicated at once with NumPy (one array per
+   n-gram length),
+3. each (paper, candidate) pair is scored by its frequency in the paper,
+   its inverse document frequency in the corpus, a bonus for appearing in
+   the title and a length weight that favours multi-word terms (as the
+   LLM prompt does),
+4. each paper keeps its best candidates that pass the LLM path's keyword
+   rules (1-5 words, no generic terms), skipping phrases nested in one
+   already chosen.
+
+Plurals are counted with their singular ("networks" -> "network"), but a
+keyphrase is displayed in the most frequent surface form of its n-gram in
+the corpus ("Surface Codes" stays plural, acronyms keep their case).
+
+In corpora of MIN_DF_CORPUS papers or more, candidates found in a single
+paper (they cannot form co-occurrence hotspots) or in more than
+MAX_DF_RATIO of the papers (usually the search domain itself) are dropped.
+"""
+
+import re
+
+import numpy as np
+
+from keyword_parsing import is_valid_keyword
+
+
+MAX_NGRAM = 4
+
+# Keywords kept per paper (the LLM prompt asks for 3-5)
+KEYWORDS_PER_PAPER = 5
+
+# Score multiplier of candidates that appear in the title is 1 + TITLE_BONUS
+TITLE_BONUS = 1.0
+
+# Score weight by number of words (index 0 unused)
+LENGTH_WEIGHTS = np.array([0.0, 0.6, 1.0, 1.1, 1.0])
+
+MIN_DF_CORPUS = 20
+MAX_DF_RATIO = 0.5
+
+# Function words and the boilerplate of abstracts; they end candidate phrases
+STOPWORDS = frozenset("""
+a about above across after again against all almost along also although always am among an and another any are
+around as at be because been before being below between both but by can could did do does doing done due during
+each either enough especially etc even ever every few for from further had has have having he her here hers how
+however i if in into is it its itself just least less like made make makes many may might more most much must my
+neither no nor not now of off often on once one only onto or other others otherwise our out over own per perhaps
+rather same several she should since so some such than that the their them then there therefore these they this
+those though through thus to too two under until up upon us very via was we well were what when where whether
+which while who whom whose why will with within without would yet you your
+abstract achieve achieved achieves allow allowed allows applied apply approach approaches based compare compared
+consider considered demonstrate demonstrated demonstrates describe described develop developed different discuss
+discussed enable enabled enables evaluate evaluated existing explore explored find findings first improve
+improved improves including
+indicate indicates introduce introduced introduces investigate investigated investigates lead leads method
+methods new novel obtain obtained outperform outperforms paper papers perform performed performs present
+presented presents propose proposed proposes provide provided provides recent recently report reported result
+results reveal reveals show showed shown shows significant significantly studies study suggest suggests three
+use used uses using various work works
+""".split())
+
+# Words (letters, digits, inner hyphens/apostrophes) or single other characters;
+# the separator between fields and papers is a lone "."
+_TOKEN_PATTERN = re.compile(r"[A-Za-z0-9]+(?:[-'][A-Za-z0-9]+)*|[^\sA-Za-z0-9]")
+
+
+def _tokenize(papers: list[dict]) -> tuple[list[str], list[int], list[int], list[bool]]:
+    """
+    Tokenize all titles and abstracts.
+
+    Returns:
+        Tuple of (distinct spellings, spelling ID of every token, paper
+        index of every token, whether every token is in a title)
+    """
+    spelling_index = {}
+    token_spellings = []
+    docs = []
+    in_title = []
+    for doc, paper in enumerate(papers):
+        for text, is_title in ((paper.get("title") or "", True), (paper.get("abstract") or "", False)):
+            field_tokens = _TOKEN_PATTERN.findall(text)
+            # Separator, so no n-gram spans two fields or papers
+            field_tokens.append(".")
+            token_spellings.extend(spelling_index.setdefault(token, len(spelling_index)) for token in field_tokens)
+            docs.extend([doc] * len(field_tokens))
+            in_title.extend([is_title] * len(field_tokens))
+    return list(spelling_index), token_spellings, docs, in_title
+
+
+def _display_forms(spellings: list[str], spelling_counts: np.ndarray, lower_ids: np.ndarray,
+                   vocabulary_size: int) -> list[str]:
+    """Display form of each lowercase word: its most frequent spelling if that is an acronym, else capitalized."""
+    order = np.lexsort((-spelling_counts, lower_ids))
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = lower_ids[order][1:] != lower_ids[order][:-1]
+    forms = [""] * vocabulary_size
+    for spelling_id in order[first]:
+        spelling = spellings[spelling_id]
+        forms[lower_ids[spelling_id]] = spelling if any(char.isupper() for char in spelling[1:]) else spelling.capitalize()
+    return forms
+
+
+def _singular(word: str, vocabulary: set[str]) -> str:
+    if len(word) > 3 and word.endswith("s") and not word.endswith(("ss", "us", "is")) and word[:-1] in vocabulary:
+        return word[:-1]
+    return word
+
+
+def _unique_rows(grams: np.ndarray, base: int) -> tuple[np.ndarray, np.ndarray]:
+    """Distinct n-gram rows and the row index of every n-gram (like np.unique(axis=0), but faster)."""
+    n = grams.shape[1]
+    if base ** n >= 2 ** 63:
+        return np.unique(grams, axis=0, return_inverse=True)
+    # Sorting one int64 key per n-gram is much faster than sorting rows
+    keys = np.zeros(len(grams), dtype=np.int64)
+    for k in range(n):
+        keys = keys * base + grams[:, k]
+    unique_keys, inverse = np.unique(keys, return_inverse=True)
+    rows = np.empty((len(unique_keys), n), dtype=grams.dtype)
+    for k in range(n - 1, -1, -1):
+        unique_keys, rows[:, k] = np.divmod(unique_keys, base)
+    return rows, inverse
+
+
+def _most_frequent_row(tokens: np.ndarray, starts: np.ndarray, n: int, base: int) -> np.ndarray:
+    """Most frequent n-token sequence among those starting at starts."""
+    rows, inverse = _unique_rows(np.stack([tokens[starts + k] for k in range(n)], axis=1), base)
+    return rows[np.argmax(np.bincount(inverse.reshape(-1)))]
+
+
+def _contains(phrase: tuple, part: tuple) -> bool:
+    return any(phrase[i:i + len(part)] == part for i in range(len(phrase) - len(part) + 1))
+
+
+def extract_keyphrases(papers: list[dict], top_n: int = KEYWORDS_PER_PAPER) -> list[list[str]]:
+    """
+    Score n-gram candidates across the corpus and pick keyphrases per paper.
+
+    Args:
+        papers: Paper dictionaries (title, abstract); scores depend on all of them
+        top_n: Keyphrases kept per paper
+
+    Returns:
+        Keyphrase list for each paper, aligned with papers (may be empty)
+    """
+    if not papers:
+        return []
+    spellings, spelling_ids, docs, in_title = _tokenize(papers)
+    spelling_ids = np.array(spelling_ids, dtype=np.int64)
+    docs = np.array(docs, dtype=np.int64)
+    in_title = np.array(in_title, dtype=bool)
+
+    # Vocabulary of lowercase words; each distinct spelling is lowercased once
+    spelling_counts = np.bincount(spelling_ids, minlength=len(spellings))
+    lowered = [spelling.lower() for spelling in spellings]
+    # Surface words (lowercase, plurals kept) for display
+    surface_vocabulary, surface_ids = np.unique(np.array(lowered), return_inverse=True)
+    surface_ids = surface_ids.reshape(-1)
+    # Plurals share the singular's ID where both occur ("networks" -> "network")
+    present = set(lowered)
+    lowered = [_singular(word, present) for word in lowered]
+    vocabulary, lower_ids = np.unique(np.array(lowered), return_inverse=True)
+    lower_ids = lower_ids.reshape(-1)
+    token_ids = lower_ids[spelling_ids]
+    breaks = np.array([word in STOPWORDS or len(word) < 2 or word.endswith("ly")
+                       or not any(char.isalpha() for char in word)
+                       for word in vocabulary.tolist()], dtype=bool)
+
+    # Every n-gram without a break token is a candidate
+    break_count = np.concatenate(([0], np.cumsum(breaks[token_ids])))
+    candidate_rows = []             # Unique token ID rows per n-gram length
+    offsets = [0]                   # First candidate ID per n-gram length
+    occurrence_candidates = []
+    occurrence_positions = []
+    for n in range(1, MAX_NGRAM + 1):
+        starts = np.arange(max(0, len(token_ids) - n + 1))
+        starts = starts[break_count[starts + n] == break_count[starts]]
+        if len(starts):
+            rows, inverse = _unique_rows(np.stack([token_ids[starts + k] for k in range(n)], axis=1), len(vocabulary))
+        else:
+            rows, inverse = np.zeros((0, n), dtype=token_ids.dtype), np.zeros(0, dtype=np.int64)
+        candidate_rows.append(rows)
+        occurrence_candidates.append(inverse.reshape(-1) + offsets[-1])
+        occurrence_positions.append(starts)
+        offsets.append(offsets[-1] + len(rows))
+    candidate_count = offsets[-1]
+    if candidate_count == 0:
+        return [[] for _ in papers]
+    occurrence_candidates = np.concatenate(occurrence_candidates)
+    occurrence_positions = np.concatenate(occurrence_positions)
+    lengths = np.repeat(np.arange(1, MAX_NGRAM + 1), np.diff(offsets))
+
+    # Term frequency and title presence per (paper, candidate), document frequency per candidate
+    pair_keys = docs[occurrence_positions] * candidate_count + occurrence_candidates
+    pairs, pair_inverse, term_freq = np.unique(pair_keys, return_inverse=True, return_counts=True)
+    in_title_pair = np.bincount(pair_inverse.reshape(-1), weights=in_title[occurrence_positions],
+                                minlength=len(pairs)) > 0
+    pair_docs = pairs // candidate_count
+    pair_candidates = pairs % candidate_count
+    doc_freq = np.bincount(pair_candidates, minlength=candidate_count)
+
+    n_docs = len(papers)
+    idf = np.log((1 + n_docs) / (1 + doc_freq)) + 1.0
+    scores = ((1.0 + np.log(term_freq)) * idf[pair_candidates] * (1.0 + TITLE_BONUS * in_title_pair)
+              * LENGTH_WEIGHTS[lengths[pair_candidates]])
+    keep = np.ones(len(pairs), dtype=bool)
+    if n_docs >= MIN_DF_CORPUS:
+        keep = (doc_freq[pair_candidates] >= 2) & (doc_freq[pair_candidates] <= MAX_DF_RATIO * n_docs)
+
+    # Pairs by paper, best score first
+    order = np.lexsort((-scores, pair_docs))
+    order = order[keep[order]]
+    sorted_docs = pair_docs[order]
+    first = np.searchsorted(sorted_docs, np.arange(n_docs), side="left")
+    last = np.searchsorted(sorted_docs, np.arange(n_docs), side="right")
+
+    forms = _display_forms(spellings, spelling_counts, surface_ids, len(surface_vocabulary))
+    # Words with a single surface form (most of them) are displayed without looking at occurrences
+    surface_words = np.zeros(len(surface_vocabulary), dtype=np.int64)
+    surface_words[surface_ids] = lower_ids
+    variants = np.bincount(surface_words, minlength=len(vocabulary))
+    sole_surface = np.zeros(len(vocabulary), dtype=np.int64)
+    sole_surface[surface_words] = np.arange(len(surface_vocabulary))
+    surface_tokens = surface_ids[spelling_ids]
+    occurrence_order = None         # Occurrences sorted by candidate, built for the first plural variant
+    phrases = {}
+
+    results = []
+    for doc in range(n_docs):
+        chosen = []
+        chosen_words = []
+        for candidate in pair_candidates[order[first[doc]:last[doc]]].tolist():
+            n = int(lengths[candidate])
+            words = tuple(candidate_rows[n - 1][candidate - offsets[n - 1]].tolist())
+            if any(_contains(other, words) or _contains(words, other) for other in chosen_words):
+                continue
+            if candidate not in phrases:
+                if all(variants[word] == 1 for word in words):
+                    surface = sole_surface[list(words)]
+                else:
+                    if occurrence_order is None:
+                        occurrence_order = np.argsort(occurrence_candidates, kind="stable")
+                        occurrence_bounds = np.concatenate(
+                            ([0], np.cumsum(np.bincount(occurrence_candidates, minlength=candidate_count))))
+                    occurrences = occurrence_order[occurrence_bounds[candidate]:occurrence_bounds[candidate + 1]]
+                    surface = _most_frequent_row(surface_tokens, occurrence_positions[occurrences], n,
+                                                 len(surface_vocabulary))
+                phrase = " ".join(forms[word] for word in surface.tolist())
+                # Generic terms are also caught in their singular form ("neural networks")
+                valid = is_valid_keyword(phrase) and is_valid_keyword(" ".join(vocabulary[list(words)].tolist()))
+                phrases[candidate] = phrase if valid else None
+            phrase = phrases[candidate]
+            if phrase is None:
+                continue
+            chosen.append(phrase)
+            chosen_words.append(words)
+            if len(chosen) == top_n:
+                break
+        results.append(chosen)
+    return results
@@ -0,0 +1,8 @@
+"""
+Test configuration: the modules live in the repository root, which is not an installed package.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
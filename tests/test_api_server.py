@@ -0,0 +1,115 @@
+from dataclasses import asdict
+
+import pytest
+from fastapi.testclient import TestClient
+
+import api_server
+from job_queue import JOB_QUEUED, JOB_SUCCEEDED
+from llm_scheduler import TokenBudget
+
+
+SERVER_KEY = "sk-server-0123456789"
+CALLER_KEY = "sk-caller-0123456789"
+REQUEST = {"domain": "quantum computing", "start_year": 2020, "end_year": 2024}
+
+
+@pytest.fixture
+def submitted(monkeypatch):
+    """Submissions as (params, api_key), without running any job."""
+    calls = []
+
+    def submit(params, api_key):
+        calls.append((params, api_key))
+        return "job1", JOB_QUEUED, "submitted"
+
+    monkeypatch.setenv("LLM_API_KEY", SERVER_KEY)
+    monkeypatch.setattr(api_server, "submit_analysis", submit)
+    return calls
+
+
+@pytest.fixture
+def client():
+    return TestClient(api_server.api)
+
+
+def test_server_key_is_used_with_the_default_endpoint(client, submitted):
+    response = client.post("/analyses", json=REQUEST)
+    assert response.status_code == 202
+    params, api_key = submitted[0]
+    assert api_key == SERVER_KEY
+    assert params["endpoint"] == api_server.DEFAULT_ENDPOINT
+    assert SERVER_KEY not in str(params)
+
+
+def test_custom_endpoint_requires_the_callers_key(client, submitted):
+    request = {**REQUEST, "endpoint": "https://attacker.example.com/v1"}
+    assert client.post("/analyses", json=request).status_code == 403
+    assert submitted == []
+
+    response = client.post("/analyses", json=request, headers={"X-LLM-API-Key": CALLER_KEY})
+    assert response.status_code == 202
+    assert submitted[0][1] == CALLER_KEY
+
+
+def test_local_model_path_is_not_accepted_from_requests(client, submitted):
+    request = {**REQUEST, "extraction_backend": "local_llm", "local_model_path": "/etc/passwd"}
+    assert client.post("/analyses", json=request).status_code == 202
+    params, _ = submitted[0]
+    assert "local_model_path" not in params
+
+
+class FakeJobQueue:
+    def __init__(self):
+        self.jobs = []
+
+    def submit(self, kind, params, runner, api_key):
+        self.jobs.append({"id": f"job{len(self.jobs) + 1}", "kind": kind, "params": params,
+                          "status": JOB_QUEUED, "updated_at": 0})
+        return self.jobs[-1]["id"]
+
+    def list_jobs(self, kind=None, limit=50):
+        return [job for job in reversed(self.jobs) if kind in (None, job["kind"])][:limit]
+
+    def get(self, job_id):
+        return next((dict(job) for job in self.jobs if job["id"] == job_id), None)
+
+
+def test_requests_coalesce_with_an_equivalent_ui_job(client, monkeypatch):
+    queue = FakeJobQueue()
+    monkeypatch.setenv("LLM_API_KEY", SERVER_KEY)
+    monkeypatch.setattr(api_server, "get_job_queue", lambda: queue)
+    # Job parameters as submitted by the Streamlit sidebar with its default settings
+    ui_params = {
+        "domain": "Quantum Computing", "start_year": 2020, "end_year": 2024,
+        "endpoint": api_server.DEFAULT_ENDPOINT, "use_journal_filter": True, "paper_source": "openalex",
+        "max_papers": 100, "sampling": "none", "sampling_pool_factor": 5, "query_partition": "none",
+        "max_keywords": 20, "early_stop": False, "early_stop_tolerance": 0.1, "deduplicate": True,
+        "extraction_backend": "remote", "merge_similar_keywords": False, "embedding_backend": "hashed",
+        "max_concurrency": 4, "hedge_requests": False, "llm_pool": True, "extraction_priority": "citations",
+        "token_budget": asdict(TokenBudget()),
+    }
+    queue.submit("analysis", ui_params, None, SERVER_KEY)
+
+    response = client.post("/analyses", json=REQUEST)
+    assert response.status_code == 202
+    assert response.json()["job_id"] == "job1"
+    assert response.json()["source"] == "coalesced"
+
+    # A different request still gets its own job
+    response = client.post("/analyses", json={**REQUEST, "max_keywords": 30})
+    assert response.json()["source"] == "submitted"
+    assert len(queue.jobs) == 2
+
+
+def test_matrix_is_returned_as_sparse_entries(client, monkeypatch):
+    queue = FakeJobQueue()
+    monkeypatch.setattr(api_server, "get_job_queue", lambda: queue)
+    job_id = queue.submit("analysis", {}, None, SERVER_KEY)
+    queue.jobs[0].update(status=JOB_SUCCEEDED, result={
+        "matrix": {"keywords": ["Qubit", "Surface Code", "Decoder"], "rows": [0, 1], "cols": [1, 2], "weights": [4, 1]},
+        "paper_count": 5, "total_keywords": 12, "keyword_mapping": {}, "journals": [],
+    })
+    matrix = client.get(f"/analyses/{job_id}/matrix").json()
+    assert matrix["keywords"] == ["Qubit", "Surface Code", "Decoder"]
+    assert (matrix["rows"], matrix["cols"], matrix["weights"]) == ([0, 1], [1, 2], [4, 1])
+    assert matrix["paper_count"] == 5
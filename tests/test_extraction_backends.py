@@ -0,0 +1,70 @@
+import pytest
+
+import extraction_backends
+from extraction_backends import ExtractionBackend, StatisticalBackend, get_extraction_backend
+
+
+class FakeLocalBackend(ExtractionBackend):
+    name = "local_llm"
+
+    def __init__(self, model_path: str):
+        self.model_path = model_path
+        self.closed = False
+        self.retired = False
+
+    def iter_extract(self, papers, stop_event=None):
+        yield from ()
+
+    def close(self):
+        self.closed = True
+
+    def retire(self):
+        self.retired = True
+
+
+@pytest.fixture
+def backends(monkeypatch):
+    monkeypatch.setattr(extraction_backends, "_backends", {})
+    monkeypatch.setattr(extraction_backends, "LocalLLMBackend", FakeLocalBackend)
+    return extraction_backends._backends
+
+
+def test_extraction_backend_requires_iter_extract():
+    class Incomplete(ExtractionBackend):
+        name = "incomplete"
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_backends_are_reused(backends):
+    assert isinstance(get_extraction_backend("statistical"), StatisticalBackend)
+    assert get_extraction_backend("statistical") is get_extraction_backend("statistical")
+    model = get_extraction_backend("local_llm", "models/a.gguf")
+    assert get_extraction_backend("local_llm", "models/a.gguf") is model
+
+
+def test_loading_another_local_model_retires_the_previous_one(backends, monkeypatch):
+    monkeypatch.setattr(extraction_backends, "MAX_LOCAL_MODELS", 2)
+    first = get_extraction_backend("local_llm", "models/a.gguf")
+    second = get_extraction_backend("local_llm", "models/b.gguf")
+    statistical = get_extraction_backend("statistical")
+    # Using the first model again makes the second the least recently used one
+    assert get_extraction_backend("local_llm", "models/a.gguf") is first
+
+    third = get_extraction_backend("local_llm", "models/c.gguf")
+    assert second.retired and not first.retired and not third.retired
+    assert set(backends.values()) == {first, third, statistical}
+    # A retired model is loaded again when requested
+    assert get_extraction_backend("local_llm", "models/b.gguf") is not second
+
+
+def test_closed_backends_are_replaced(backends):
+    model = get_extraction_backend("local_llm", "models/a.gguf")
+    model.close()
+    assert get_extraction_backend("local_llm", "models/a.gguf") is not model
+
+
+def test_unknown_backend(backends):
+    with pytest.raises(ValueError):
+        get_extraction_backend("remote")
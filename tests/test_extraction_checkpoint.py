@@ -0,0 +1,84 @@
+import sqlite3
+import time
+
+import pytest
+
+import extraction_checkpoint
+from extraction_checkpoint import ExtractionCheckpoint, clear_checkpoints, run_fingerprint
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "checkpoints.sqlite3")
+
+
+def test_fingerprint_ignores_order_and_case_but_not_the_inputs():
+    fingerprint = run_fingerprint("Quantum Computing ", 2020, 2024, ["Nature", "Science"], ["W1", "W2"])
+    assert fingerprint == run_fingerprint("quantum computing", 2020, 2024, ["Science", "Nature"], ["W2", "W1"])
+    assert fingerprint != run_fingerprint("quantum computing", 2021, 2024, ["Nature", "Science"], ["W1", "W2"])
+    assert fingerprint != run_fingerprint("quantum computing", 2020, 2024, ["Nature"], ["W1", "W2"])
+    assert fingerprint != run_fingerprint("quantum computing", 2020, 2024, ["Nature", "Science"], ["W1", "W3"])
+    assert fingerprint != run_fingerprint("quantum computing", 2020, 2024, ["Nature", "Science"], ["W1", "W2"],
+                                          extractor="statistical")
+
+
+def test_resumed_run_sees_finished_and_failed_papers(db_path):
+    run = ExtractionCheckpoint("run", db_path)
+    run.record_success("W1", ["Surface Code", "Qubit"])
+    run.record_failure("W2", "timeout")
+    ExtractionCheckpoint("other", db_path).record_success("W3", ["Other"])
+
+    resumed = ExtractionCheckpoint("run", db_path)
+    assert resumed.completed() == {"W1": ["Surface Code", "Qubit"]}
+    assert resumed.failed() == {"W2": "timeout"}
+
+    # A retried paper that succeeds is no longer failed
+    resumed.record_success("W2", ["Decoder"])
+    assert resumed.failed() == {}
+    assert set(resumed.completed()) == {"W1", "W2"}
+
+    resumed.clear()
+    assert resumed.completed() == {}
+    assert ExtractionCheckpoint("other", db_path).completed() == {"W3": ["Other"]}
+
+
+def test_seeded_keywords_count_as_completed(db_path):
+    run = ExtractionCheckpoint("run", db_path)
+    run.record_failure("W1", "timeout")
+    run.seed({"W1": ["Qubit"], "W2": ["Surface Code"]})
+    assert run.completed() == {"W1": ["Qubit"], "W2": ["Surface Code"]}
+    assert run.failed() == {}
+
+    clear_checkpoints(db_path)
+    assert run.completed() == {}
+
+
+def test_expired_checkpoints_are_dropped_when_the_store_is_opened(db_path, monkeypatch):
+    ExtractionCheckpoint("run", db_path).record_success("W1", ["Qubit"])
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("UPDATE extractions SET updated_at = ?",
+                     (time.time() - extraction_checkpoint.RETENTION_SECONDS - 60,))
+    monkeypatch.setattr(extraction_checkpoint, "_initialized_paths", set())
+    assert ExtractionCheckpoint("run", db_path).completed() == {}
+
+
+def test_connections_are_closed(db_path, monkeypatch):
+    opened = []
+    connect = sqlite3.connect
+
+    class TrackedConnection(sqlite3.Connection):
+        def close(self):
+            opened.remove(self)
+            super().close()
+
+    def tracked_connect(*args, **kwargs):
+        conn = connect(*args, factory=TrackedConnection, **kwargs)
+        opened.append(conn)
+        return conn
+
+    monkeypatch.setattr(extraction_checkpoint.sqlite3, "connect", tracked_connect)
+    run = ExtractionCheckpoint("run", db_path)
+    run.record_success("W1", ["Qubit"])
+    run.seed({"W2": ["Surface Code"]})
+    assert len(run.completed()) == 2
+    assert opened == []
@@ -0,0 +1,157 @@
+import json
+import sqlite3
+import time
+
+import pytest
+import requests
+
+import http_cache
+from http_cache import HttpCache
+
+
+URL = "https://api.openalex.org/works"
+PARAMS = {"search": "quantum computing", "per_page": 50}
+BODY = json.dumps({"meta": {"count": 2}, "results": [{"id": "W1"}, {"id": "W2"}]}).encode("utf-8")
+HOUR = 3600
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, body: bytes = b"", headers: dict = None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.body = body
+        self.closed = False
+
+    def iter_content(self, chunk_size: int = 1):
+        for start in range(0, len(self.body), chunk_size):
+            yield self.body[start:start + chunk_size]
+
+    def close(self):
+        self.closed = True
+
+
+class FakeServer:
+    """Stands in for requests.get; answers are queued responses or exceptions."""
+
+    def __init__(self):
+        self.answers = []
+        self.requests = []
+
+    def get(self, url, params=None, headers=None, timeout=None, stream=False):
+        self.requests.append({"url": url, "params": params, "headers": headers or {}, "stream": stream})
+        answer = self.answers.pop(0)
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+
+@pytest.fixture
+def server(monkeypatch):
+    fake = FakeServer()
+    monkeypatch.setattr(http_cache.requests, "get", fake.get)
+    return fake
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return HttpCache(db_path=str(tmp_path / "http_cache.sqlite3"), ttl_seconds=6 * HOUR)
+
+
+def ok(body: bytes = BODY) -> FakeResponse:
+    return FakeResponse(200, body, {"Content-Type": "application/json", "ETag": '"v1"'})
+
+
+def read(response) -> bytes:
+    with response:
+        return b"".join(response.iter_content(7))
+
+
+def age_entry(cache: HttpCache, seconds: float):
+    with sqlite3.connect(cache.db_path) as conn:
+        conn.execute("UPDATE responses SET validated_at = validated_at - ?", (seconds,))
+
+
+def wait_for_revalidation(cache: HttpCache):
+    deadline = time.time() + 5
+    while cache._revalidating and time.time() < deadline:
+        time.sleep(0.01)
+    assert not cache._revalidating
+
+
+def test_miss_streams_and_stores_then_hits(cache, server):
+    server.answers = [ok()]
+    response = cache.get(URL, PARAMS)
+    assert response.cache_status == "miss"
+    assert server.requests[0]["stream"]
+    assert read(response) == BODY
+
+    cached = cache.get(URL, {"per_page": 50, "search": "quantum computing"})
+    assert cached.cache_status == "hit"
+    assert cached.json() == json.loads(BODY)
+    assert len(server.requests) == 1
+
+
+def test_partially_read_or_failed_responses_are_not_stored(cache, server):
+    not_found = FakeResponse(404, b"not found")
+    server.answers = [ok(), not_found, ok()]
+    with cache.get(URL, PARAMS) as response:
+        next(response.iter_content(7))
+    with pytest.raises(requests.exceptions.HTTPError):
+        cache.get(URL, PARAMS).raise_for_status()
+    assert not_found.closed
+    assert read(cache.get(URL, PARAMS)) == BODY
+    assert len(server.requests) == 3
+
+
+def test_stale_entry_is_served_and_revalidated_with_304(cache, server):
+    server.answers = [ok()]
+    read(cache.get(URL, PARAMS))
+    age_entry(cache, 7 * HOUR)
+
+    server.answers = [FakeResponse(304)]
+    stale = cache.get(URL, PARAMS)
+    assert stale.cache_status == "stale"
+    assert stale.age_seconds == pytest.approx(7 * HOUR, abs=60)
+    assert stale.content == BODY
+    wait_for_revalidation(cache)
+    assert server.requests[-1]["headers"]["If-None-Match"] == '"v1"'
+
+    assert cache.get(URL, PARAMS).cache_status == "hit"
+
+
+def test_stale_entry_is_reported_offline_while_revalidation_fails(cache, server):
+    server.answers = [ok()]
+    read(cache.get(URL, PARAMS))
+    age_entry(cache, 7 * HOUR)
+
+    server.answers = [requests.exceptions.ConnectionError("unreachable")]
+    assert cache.get(URL, PARAMS).cache_status == "stale"
+    wait_for_revalidation(cache)
+
+    # The failed revalidation is surfaced on the next lookup; the server is tried again meanwhile
+    updated = json.dumps({"results": [{"id": "W3"}]}).encode("utf-8")
+    server.answers = [ok(updated)]
+    offline = cache.get(URL, PARAMS)
+    assert offline.cache_status == "offline"
+    assert offline.age_seconds == pytest.approx(7 * HOUR, abs=60)
+    assert offline.content == BODY
+    wait_for_revalidation(cache)
+
+    fresh = cache.get(URL, PARAMS)
+    assert fresh.cache_status == "hit"
+    assert fresh.content == updated
+
+
+def test_outage_serves_expired_entry_and_raises_without_one(cache, server):
+    server.answers = [ok()]
+    read(cache.get(URL, PARAMS))
+    age_entry(cache, cache.max_stale_seconds + HOUR)
+
+    server.answers = [FakeResponse(503)]
+    offline = cache.get(URL, PARAMS)
+    assert offline.cache_status == "offline"
+    assert offline.content == BODY
+
+    server.answers = [requests.exceptions.Timeout("timed out")]
+    with pytest.raises(requests.exceptions.Timeout):
+        cache.get(URL, {"search": "uncached"})
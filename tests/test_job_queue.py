@@ -0,0 +1,118 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+
+import job_queue
+from job_queue import (
+    JOB_CANCELLED,
+    JOB_FAILED,
+    JOB_INTERRUPTED,
+    JOB_QUEUED,
+    JOB_SUCCEEDED,
+    JobQueue,
+)
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "jobs.sqlite3")
+
+
+def wait_for(queue: JobQueue, job_id: str, status: str) -> dict:
+    deadline = time.time() + 5
+    while time.time() < deadline:
+        job = queue.get(job_id)
+        if job["status"] == status:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} is {queue.get(job_id)['status']}, expected {status}")
+
+
+def test_submitted_job_runs_and_stores_its_result(db_path):
+    queue = JobQueue(db_path)
+
+    def job(ctx, params, api_key):
+        ctx.log("started")
+        ctx.progress(0.5, "halfway")
+        ctx.update_params(journals=["Nature"])
+        return {"domain": params["domain"], "key_seen": bool(api_key)}
+
+    job_id = queue.submit("analysis", {"domain": "qubits"}, job, "sk-secret-key")
+    finished = wait_for(queue, job_id, JOB_SUCCEEDED)
+    assert finished["result"] == {"domain": "qubits", "key_seen": True}
+    assert finished["params"] == {"domain": "qubits", "journals": ["Nature"]}
+    assert [message for _, _, message in finished["log"]] == ["started"]
+    assert finished["progress"] == 1.0
+    # Extra arguments such as API keys are never persisted
+    with sqlite3.connect(db_path) as conn:
+        assert "sk-secret-key" not in str(conn.execute("SELECT * FROM jobs").fetchall())
+    assert [job["id"] for job in queue.list_jobs(kind="analysis")] == [job_id]
+
+
+def test_failed_job_records_the_error(db_path):
+    queue = JobQueue(db_path)
+
+    def job(ctx, params):
+        raise ValueError("no papers")
+
+    failed = wait_for(queue, queue.submit("analysis", {}, job), JOB_FAILED)
+    assert failed["error"] == "no papers"
+    assert failed["error_kind"] == "ValueError"
+
+
+def test_cancelled_job_stops_at_its_next_progress_report(db_path):
+    queue = JobQueue(db_path)
+    started = threading.Event()
+    cancelled = threading.Event()
+
+    def job(ctx, params):
+        started.set()
+        cancelled.wait(5)
+        ctx.progress(0.5)
+        return "not reached"
+
+    job_id = queue.submit("analysis", {}, job)
+    assert started.wait(5)
+    queue.cancel(job_id)
+    cancelled.set()
+    assert wait_for(queue, job_id, JOB_CANCELLED)["result"] is None
+
+
+def test_restart_marks_jobs_of_dead_processes_interrupted(db_path, monkeypatch):
+    queue = JobQueue(db_path, max_workers=1)
+    block = threading.Event()
+    running = queue.submit("analysis", {}, lambda ctx, params: block.wait(5))
+    waiting = queue.submit("analysis", {}, lambda ctx, params: None)
+    assert queue.get(waiting)["status"] == JOB_QUEUED
+
+    # A restarted server finds the jobs of a process that no longer exists
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("UPDATE jobs SET owner_pid = -1")
+    monkeypatch.setattr(job_queue, "_pid_alive", lambda pid: pid != -1)
+    restarted = JobQueue(db_path)
+    assert {restarted.get(job_id)["status"] for job_id in (running, waiting)} == {JOB_INTERRUPTED}
+    block.set()
+
+
+def test_connections_are_closed(db_path, monkeypatch):
+    opened = []
+    connect = sqlite3.connect
+
+    class TrackedConnection(sqlite3.Connection):
+        def close(self):
+            opened.remove(self)
+            super().close()
+
+    def tracked_connect(*args, **kwargs):
+        conn = connect(*args, factory=TrackedConnection, **kwargs)
+        opened.append(conn)
+        return conn
+
+    monkeypatch.setattr(job_queue.sqlite3, "connect", tracked_connect)
+    queue = JobQueue(db_path)
+    job_id = queue.submit("analysis", {}, lambda ctx, params: ctx.log("done"))
+    wait_for(queue, job_id, JOB_SUCCEEDED)
+    queue.list_jobs()
+    assert opened == []
@@ -0,0 +1,52 @@
+import os
+
+import pytest
+
+import keyword_clustering
+from keyword_clustering import cluster_keywords, keyword_words
+
+
+def merged(keywords: list[str], backend: str = "hashed") -> dict[str, str]:
+    return cluster_keywords([keywords], backend=backend)[1]
+
+
+def test_keyword_words_ignore_case_punctuation_order_and_plurals():
+    assert keyword_words("Quantum Error-Correcting Codes") == keyword_words("quantum error correcting code")
+    assert keyword_words("Graph Neural Networks") == keyword_words("graph neural network")
+    assert keyword_words("SARS-CoV-1") != keyword_words("SARS-CoV-2")
+
+
+@pytest.mark.parametrize("variant, canonical", [
+    ("GNN", "Graph Neural Networks"),
+    ("GNNs", "Graph Neural Networks"),
+    ("surface codes", "surface code"),
+    ("Graph Neural Networks", "graph neural network"),
+    ("quantum error-correction", "quantum error correction"),
+])
+def test_merges_true_variants(variant, canonical):
+    # The canonical form is more frequent, so it becomes the representative
+    clustered, mapping = cluster_keywords([[canonical, variant], [canonical]])
+    assert mapping == {variant: canonical}
+    assert clustered == [[canonical], [canonical]]
+
+
+@pytest.mark.parametrize("pair", [
+    ("reinforcement learning", "deep reinforcement learning"),
+    ("SARS-CoV-1", "SARS-CoV-2"),
+    ("surface code", "surface code decoder"),
+    ("quantum annealing", "quantum computing"),
+])
+def test_keeps_distinct_concepts_apart(pair):
+    assert merged(list(pair)) == {}
+
+
+def test_lexical_guard_applies_to_semantic_backend():
+    assert not keyword_clustering._may_merge("reinforcement learning", "deep reinforcement learning", "minilm")
+    assert not keyword_clustering._may_merge("SARS-CoV-1", "SARS-CoV-2", "minilm")
+    assert keyword_clustering._may_merge("quantum annealing", "adiabatic quantum computation", "minilm")
+
+
+def test_hashed_embeddings_are_not_written_to_disk(tmp_path, monkeypatch):
+    monkeypatch.setattr(keyword_clustering, "CACHE_DIR", str(tmp_path / "embeddings"))
+    cluster_keywords([["surface code", "surface codes", "qubit"]])
+    assert not os.path.exists(tmp_path / "embeddings")
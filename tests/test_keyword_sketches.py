@@ -0,0 +1,69 @@
+from collections import Counter
+
+from hypothesis import given, settings
+from hypothesis import strategies as st
+
+from keyword_sketches import CountMinSketch, SpaceSaving, select_top_keywords
+
+
+def exact_top_keywords(keyword_lists: list[list[str]], k: int) -> list[str]:
+    """Ranking of build_cooccurrence_matrix: by frequency, ties by first occurrence."""
+    counts = Counter(keyword for keywords in keyword_lists for keyword in keywords)
+    return [keyword for keyword, _ in sorted(counts.items(), key=lambda item: item[1], reverse=True)[:k]]
+
+
+# Small vocabularies with skewed frequencies, so rankings have heavy hitters, a tail and ties
+keyword = st.integers(min_value=0, max_value=60).map(lambda i: f"Keyword {i * i % 61}")
+keyword_lists = st.lists(st.lists(keyword, max_size=6), max_size=80)
+
+
+@settings(max_examples=200, deadline=None)
+@given(keyword_lists, st.integers(min_value=1, max_value=15))
+def test_matches_exact_counting_when_every_keyword_fits(lists, k):
+    selected, exact = select_top_keywords(lists, k, capacity=100)
+    assert exact
+    assert selected == exact_top_keywords(lists, k)
+
+
+@settings(max_examples=300, deadline=None)
+@given(keyword_lists, st.integers(min_value=1, max_value=10), st.integers(min_value=1, max_value=30))
+def test_guaranteed_selections_match_exact_counting(lists, k, capacity):
+    selected, exact = select_top_keywords(lists, k, capacity=capacity)
+    if exact:
+        assert selected == exact_top_keywords(lists, k)
+    if capacity >= k:
+        assert len(selected) == min(k, len({keyword for keywords in lists for keyword in keywords}))
+
+
+def test_heavy_hitters_are_found_with_few_counters():
+    lists = [["Quantum Error Correction", "Surface Code", f"Rare {i}"] for i in range(3000)]
+    lists += [["Surface Code"]] * 500
+    selected, exact = select_top_keywords(lists, 2, capacity=50)
+    assert selected == ["Surface Code", "Quantum Error Correction"]
+    assert exact
+
+
+@settings(max_examples=100, deadline=None)
+@given(st.lists(keyword, max_size=300), st.integers(min_value=1, max_value=20))
+def test_space_saving_bounds(items, capacity):
+    summary = SpaceSaving(capacity)
+    for item in items:
+        summary.add(item)
+    counts = Counter(items)
+    tracked = {item for item, _, _ in summary.items()}
+    assert len(summary) <= capacity
+    for item, count, error in summary.items():
+        assert count - error <= counts[item] <= count
+    for item in counts.keys() - tracked:
+        assert counts[item] <= summary.min_count
+
+
+@settings(max_examples=50, deadline=None)
+@given(st.lists(keyword, max_size=300))
+def test_count_min_never_undercounts(items):
+    sketch = CountMinSketch(epsilon=0.1, delta=0.1)
+    counts = Counter(items)
+    if counts:
+        sketch.add(list(counts), list(counts.values()))
+        assert all(estimate >= counts[item] for item, estimate in zip(counts, sketch.estimate(list(counts))))
+    assert sketch.total == len(items)
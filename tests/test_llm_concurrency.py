@@ -0,0 +1,155 @@
+import threading
+
+import httpx
+import openai
+import pytest
+
+from llm_concurrency import (
+    ERROR_AUTH,
+    ERROR_CONNECTION,
+    ERROR_OTHER,
+    ERROR_SERVER,
+    ERROR_THROTTLED,
+    ERROR_TIMEOUT,
+    AdaptiveConcurrencyLimiter,
+    HedgedCaller,
+    call_with_retry,
+    classify_llm_error,
+)
+from llm_scheduler import LLMScheduler, TokenBudget
+
+
+REQUEST = httpx.Request("POST", "https://llm.example.com/v1/chat/completions")
+
+
+def status_error(error_class, status_code: int, message: str):
+    return error_class(message, response=httpx.Response(status_code, request=REQUEST), body=None)
+
+
+@pytest.mark.parametrize("error, category", [
+    (status_error(openai.RateLimitError, 429, "Rate limit reached"), ERROR_THROTTLED),
+    (status_error(openai.AuthenticationError, 401, "Incorrect API key provided"), ERROR_AUTH),
+    (status_error(openai.PermissionDeniedError, 403, "Quota exceeded"), ERROR_AUTH),
+    (status_error(openai.InternalServerError, 500, "Internal error"), ERROR_SERVER),
+    (status_error(openai.InternalServerError, 503, "Service unavailable"), ERROR_SERVER),
+    (status_error(openai.APIStatusError, 504, "Gateway timeout"), ERROR_TIMEOUT),
+    (status_error(openai.APIStatusError, 408, "Request timeout"), ERROR_TIMEOUT),
+    (openai.APITimeoutError(request=REQUEST), ERROR_TIMEOUT),
+    (openai.APIConnectionError(request=REQUEST), ERROR_CONNECTION),
+    (httpx.ReadTimeout("timed out", request=REQUEST), ERROR_TIMEOUT),
+])
+def test_classifies_sdk_errors(error, category):
+    assert classify_llm_error(error) == category
+
+
+@pytest.mark.parametrize("error", [
+    status_error(openai.BadRequestError, 400, "Invalid value for 'author' in messages"),
+    status_error(openai.BadRequestError, 400, "The api rejected the request: prompt too long"),
+    status_error(openai.BadRequestError, 400, "Request timed out while validating input"),
+    status_error(openai.NotFoundError, 404, "The model `qwen-plus` does not exist or you do not have access"),
+    status_error(openai.UnprocessableEntityError, 422, "Authorization header is malformed"),
+])
+def test_client_errors_are_not_retried_or_blamed_on_auth(error):
+    # The status code decides, not words in the message
+    assert classify_llm_error(error) == ERROR_OTHER
+
+
+def test_message_heuristics_without_status_code():
+    assert classify_llm_error(RuntimeError("Rate limit exceeded, slow down")) == ERROR_THROTTLED
+    assert classify_llm_error(RuntimeError("Authentication failed")) == ERROR_AUTH
+    assert classify_llm_error(ValueError("missing author list")) == ERROR_OTHER
+    assert classify_llm_error(ValueError("unexpected api response format")) == ERROR_OTHER
+
+
+def test_call_with_retry_retries_transient_errors_only():
+    delays = []
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise status_error(openai.RateLimitError, 429, "Rate limit reached")
+        return "ok"
+
+    assert call_with_retry(flaky, sleep=delays.append) == "ok"
+    assert len(attempts) == 3
+    assert len(delays) == 2
+
+    attempts.clear()
+
+    def invalid():
+        attempts.append(1)
+        raise status_error(openai.BadRequestError, 400, "Invalid author")
+
+    with pytest.raises(openai.BadRequestError):
+        call_with_retry(invalid, sleep=delays.append)
+    assert len(attempts) == 1
+
+
+def test_limiter_halves_on_throttling_but_not_on_invalid_requests():
+    now = [0.0]
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=8, max_limit=16, clock=lambda: now[0])
+
+    def fail(error):
+        raise error
+
+    with pytest.raises(openai.BadRequestError):
+        call_with_retry(lambda: fail(status_error(openai.BadRequestError, 400, "Invalid author")),
+                        limiter=limiter, clock=lambda: now[0])
+    assert limiter.limit == 8
+
+    with pytest.raises(openai.RateLimitError):
+        call_with_retry(lambda: fail(status_error(openai.RateLimitError, 429, "Rate limit reached")),
+                        limiter=limiter, max_retries=0, clock=lambda: now[0])
+    assert limiter.limit == 4
+    assert limiter.in_flight == 0
+
+
+
+def slow_then_fast(release: threading.Event):
+    """Request whose first copy hangs until release is set; later copies answer at once."""
+    copies = []
+
+    def request():
+        copies.append(1)
+        if len(copies) == 1:
+            release.wait(5)
+            return "slow"
+        return "fast"
+    return request
+
+
+def test_hedged_duplicates_reserve_budget_before_they_are_sent():
+    scheduler = LLMScheduler(TokenBudget(max_run_tokens=300))
+    hedger = HedgedCaller(max_extra_load=1.0, min_samples=1)
+    hedger.call(lambda: "warm-up")
+    discarded = []
+    settled = threading.Event()
+
+    def on_discard(result):
+        discarded.append(result)
+        scheduler.record(100, None)
+        settled.set()
+
+    # The duplicate fits the budget: it is reserved, sent and wins
+    release = threading.Event()
+    assert scheduler.acquire(100)
+    assert hedger.call(slow_then_fast(release), on_discard=on_discard,
+                       on_hedge=lambda: scheduler.try_acquire(100)) == "fast"
+    assert hedger.hedges == 1 and hedger.hedge_wins == 1
+    assert scheduler.reserved_tokens == 200
+    release.set()
+    assert settled.wait(5)
+    assert discarded == ["slow"]
+    scheduler.record(100, None)
+
+    # With the budget taken by other requests no duplicate is sent
+    assert scheduler.acquire(100) and scheduler.acquire(100) and scheduler.acquire(100)
+    release = threading.Event()
+    threading.Timer(0.2, release.set).start()
+    assert hedger.call(slow_then_fast(release), on_discard=on_discard,
+                       on_hedge=lambda: scheduler.try_acquire(100)) == "slow"
+    assert hedger.hedges == 1
+    assert discarded == ["slow"]
+    assert scheduler.reserved_tokens == 300
+    hedger.shutdown()
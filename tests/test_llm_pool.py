@@ -0,0 +1,172 @@
+import json
+import time
+from contextlib import contextmanager
+
+import httpx
+import openai
+import pytest
+
+import llm_pool
+from llm_pool import LLMBackend, LLMPool, get_llm_pool, load_backends
+
+
+REQUEST = httpx.Request("POST", "https://llm.example.com/v1/chat/completions")
+
+
+def status_error(error_class, status_code: int, message: str):
+    return error_class(message, response=httpx.Response(status_code, request=REQUEST), body=None)
+
+
+class FakeModels:
+    def __init__(self, server: "FakeServers", endpoint: str):
+        self._server = server
+        self._endpoint = endpoint
+
+    def list(self, timeout=None):
+        error = self._server.probe_errors.get(self._endpoint)
+        if error is not None:
+            raise error
+
+
+class FakeClient:
+    def __init__(self, server: "FakeServers", endpoint: str):
+        self.endpoint = endpoint
+        self.models = FakeModels(server, endpoint)
+
+
+class FakeServers:
+    """Clients of fake endpoints; probe_errors makes an endpoint's health check fail."""
+
+    def __init__(self):
+        self.probe_errors = {}
+
+    @contextmanager
+    def client(self, api_key: str, endpoint: str):
+        yield FakeClient(self, endpoint)
+
+
+def make_pool(*weights: float, **options) -> tuple[LLMPool, FakeServers]:
+    servers = FakeServers()
+    backends = [LLMBackend(f"https://llm{i}.example.com/v1", f"sk-key-{i}", weight=weight)
+                for i, weight in enumerate(weights)]
+    options.setdefault("rng", lambda: 0.0)
+    return LLMPool(backends, client_factory=servers.client, **options), servers
+
+
+def answer_from(errors: dict):
+    """Request raising errors[endpoint] (if any), else returning the endpoint that answered."""
+    def request(client, model):
+        error = errors.get(client.endpoint)
+        if error is not None:
+            raise error
+        return client.endpoint
+    return request
+
+
+def test_routes_by_weight_and_outstanding_requests():
+    pool, _ = make_pool(2, 1)
+    first, second = (backend.endpoint for backend in pool.backends)
+    assert pool.call(answer_from({})) == first
+
+    # Nested calls keep earlier requests outstanding: scores are (outstanding + 1) / weight
+    chosen = []
+
+    def nested(depth):
+        def request(client, model):
+            chosen.append(client.endpoint)
+            if depth > 1:
+                pool.call(nested(depth - 1))
+        return request
+
+    pool.call(nested(4))
+    assert chosen == [first, first, second, first]
+    assert all(backend.outstanding == 0 for backend in pool.backends)
+
+
+@pytest.mark.parametrize("error", [
+    status_error(openai.RateLimitError, 429, "Rate limit reached"),
+    status_error(openai.InternalServerError, 503, "Service unavailable"),
+    status_error(openai.AuthenticationError, 401, "Incorrect API key provided"),
+    openai.APITimeoutError(request=REQUEST),
+])
+def test_fails_over_on_backend_errors(error):
+    pool, _ = make_pool(2, 1)
+    first, second = (backend.endpoint for backend in pool.backends)
+    assert pool.call(answer_from({first: error})) == second
+    assert [backend.failures for backend in pool.backends] == [1, 0]
+
+
+def test_invalid_requests_do_not_fail_over_or_eject():
+    pool, _ = make_pool(2, 1)
+    first = pool.backends[0].endpoint
+    error = status_error(openai.BadRequestError, 400, "Invalid value for 'author' in messages")
+    for _ in range(pool.failure_threshold + 2):
+        with pytest.raises(openai.BadRequestError):
+            pool.call(answer_from({first: error}))
+    assert [backend.requests for backend in pool.backends] == [pool.failure_threshold + 2, 0]
+    assert all(backend.healthy and backend.failures == 0 for backend in pool.backends)
+
+
+def test_raises_the_last_error_when_every_backend_fails():
+    pool, _ = make_pool(1, 1)
+    errors = {backend.endpoint: status_error(openai.InternalServerError, 500, f"down {i}")
+              for i, backend in enumerate(pool.backends)}
+    with pytest.raises(openai.InternalServerError, match="down 1"):
+        pool.call(answer_from(errors))
+
+
+def test_ejects_failing_backend_and_readmits_it_after_a_healthy_probe():
+    pool, servers = make_pool(2, 1, failure_threshold=3, health_check_interval=0.02)
+    first, second = (backend.endpoint for backend in pool.backends)
+    outage = {first: status_error(openai.InternalServerError, 503, "Service unavailable")}
+    servers.probe_errors[first] = openai.APIConnectionError(request=REQUEST)
+
+    for _ in range(3):
+        assert pool.call(answer_from(outage)) == second
+    assert not pool.backends[0].healthy
+    # Ejected: requests go straight to the healthy backend
+    requests_before = pool.backends[0].requests
+    assert pool.call(answer_from({})) == second
+    assert pool.backends[0].requests == requests_before
+
+    del servers.probe_errors[first]
+    deadline = time.time() + 5
+    while not pool.backends[0].healthy and time.time() < deadline:
+        time.sleep(0.01)
+    assert pool.backends[0].healthy
+    assert pool.call(answer_from({})) == first
+    assert [entry["healthy"] for entry in pool.summary()] == [True, True]
+
+
+def test_needs_a_backend():
+    with pytest.raises(ValueError):
+        LLMPool([])
+
+
+@pytest.mark.parametrize("weight", [0, -1, "heavy", None])
+def test_backends_file_rejects_non_positive_weights(tmp_path, weight):
+    path = tmp_path / "llm_backends.json"
+    path.write_text(json.dumps([
+        {"endpoint": "https://llm0.example.com/v1", "api_key": "sk-key-0", "weight": 2},
+        {"endpoint": "https://llm1.example.com/v1", "api_key": "sk-key-1", "weight": weight},
+    ]), encoding="utf-8")
+    with pytest.raises(ValueError, match="第 2 项"):
+        load_backends(str(path))
+
+
+def test_idle_pools_are_evicted(monkeypatch):
+    monkeypatch.setattr(llm_pool, "_pools", {})
+    first = get_llm_pool("sk-key-0", "https://llm0.example.com/v1", configured=False)
+    assert get_llm_pool("sk-key-0", "https://llm0.example.com/v1", configured=False) is first
+
+    # A pool with a request in flight is kept however long ago it was chosen
+    first.last_used -= llm_pool.IDLE_TTL_SECONDS + 1
+    first.backends[0].outstanding = 1
+    get_llm_pool("sk-key-1", "https://llm1.example.com/v1", configured=False)
+    assert get_llm_pool("sk-key-0", "https://llm0.example.com/v1", configured=False) is first
+
+    first.last_used -= llm_pool.IDLE_TTL_SECONDS + 1
+    first.backends[0].outstanding = 0
+    get_llm_pool("sk-key-1", "https://llm1.example.com/v1", configured=False)
+    assert len(llm_pool._pools) == 1
+    assert get_llm_pool("sk-key-0", "https://llm0.example.com/v1", configured=False) is not first
@@ -0,0 +1,129 @@
+from types import SimpleNamespace
+
+import pytest
+
+from llm_scheduler import LLMScheduler, TokenBudget, plan_extraction
+
+
+PAPERS = [
+    {"id": "W0", "cited_by_count": 5, "publication_year": 2019},
+    {"id": "W1", "cited_by_count": 50, "publication_year": 2021},
+    {"id": "W2", "cited_by_count": 50, "publication_year": 2023},
+    {"id": "W3", "cited_by_count": 0, "publication_year": 2024},
+]
+
+
+class FakeClock:
+    """Clock and sleep of a scheduler; sleeping advances time instead of blocking."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def make_scheduler(**limits) -> tuple[LLMScheduler, FakeClock]:
+    clock = FakeClock()
+    return LLMScheduler(TokenBudget(**limits), clock=clock, sleep=clock.sleep), clock
+
+
+def usage(prompt_tokens: int, completion_tokens: int):
+    return SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+
+
+@pytest.mark.parametrize("priority, order", [
+    ("citations", [2, 1, 0, 3]),
+    ("recency", [3, 2, 1, 0]),
+    ("original", [0, 1, 2, 3]),
+])
+def test_plan_orders_papers_by_priority(priority, order):
+    plan = plan_extraction(PAPERS, [100] * 4, TokenBudget(), priority=priority)
+    assert plan.selected == order
+    assert plan.skipped == []
+    assert plan.estimated_tokens == 400
+
+
+def test_plan_skips_lowest_priority_papers_over_budget():
+    # W1 no longer fits after W2; cheaper papers further down still do
+    plan = plan_extraction(PAPERS, [100, 300, 250, 100], TokenBudget(max_run_tokens=450))
+    assert plan.selected == [2, 0, 3]
+    assert plan.skipped == [1]
+    assert plan.estimated_tokens == 450
+
+
+def test_plan_projects_time_from_the_slowest_limit():
+    estimates = [1000] * 4
+    assert plan_extraction(PAPERS, estimates, TokenBudget(), avg_latency=2.0, concurrency=2).projected_seconds == 4.0
+    assert plan_extraction(PAPERS, estimates, TokenBudget(requests_per_minute=2)).projected_seconds == 120.0
+    assert plan_extraction(PAPERS, estimates, TokenBudget(tokens_per_minute=1000)).projected_seconds == 240.0
+
+
+def test_shuffled_plan_keeps_the_priority_selection():
+    estimates = [100, 300, 250, 100]
+    budget = TokenBudget(max_run_tokens=450)
+    plan = plan_extraction(PAPERS, estimates, budget, shuffle_seed=1)
+    assert sorted(plan.selected) == sorted(plan_extraction(PAPERS, estimates, budget).selected)
+    assert plan.skipped == [1]
+    assert plan.selected == plan_extraction(PAPERS, estimates, budget, shuffle_seed=1).selected
+
+
+def test_acquire_waits_for_the_requests_per_minute_window():
+    scheduler, clock = make_scheduler(requests_per_minute=2)
+    assert scheduler.acquire(10) and scheduler.acquire(10)
+    clock.now = 15.0
+    assert scheduler.acquire(10)
+    # Sent once the first request has left the one-minute window
+    assert clock.sleeps == [45.0]
+    assert scheduler.throttle_wait_seconds == 45.0
+    assert scheduler.requests == 3
+
+
+def test_acquire_waits_until_enough_tokens_expire():
+    scheduler, clock = make_scheduler(tokens_per_minute=1000)
+    assert scheduler.acquire(600)
+    clock.now = 10.0
+    assert scheduler.acquire(300)
+    clock.now = 20.0
+    assert scheduler.acquire(500)
+    assert clock.sleeps == [40.0]
+
+
+def test_oversized_request_is_sent_alone():
+    scheduler, clock = make_scheduler(tokens_per_minute=1000)
+    # Alone in the window it goes at once instead of waiting forever
+    assert scheduler.acquire(1500)
+    assert clock.sleeps == []
+    clock.now = 30.0
+    assert scheduler.acquire(1500)
+    assert clock.sleeps == [30.0]
+
+
+def test_run_budget_rejects_and_record_settles_reservations():
+    scheduler, _ = make_scheduler(max_run_tokens=1000)
+    assert scheduler.acquire(600)
+    assert not scheduler.acquire(500)
+    scheduler.record(600, usage(250, 50))
+    assert scheduler.reserved_tokens == 0
+    assert scheduler.used_tokens == 300
+    assert scheduler.acquire(500)
+    scheduler.record(500, None)
+    assert scheduler.summary()["budget_rejections"] == 1
+    assert scheduler.summary()["total_tokens"] == 300
+
+
+def test_try_acquire_never_waits_or_counts_rejections():
+    scheduler, clock = make_scheduler(requests_per_minute=1, max_run_tokens=1000)
+    assert scheduler.try_acquire(400)
+    assert not scheduler.try_acquire(400)  # window full
+    clock.now = 60.0
+    assert not scheduler.try_acquire(700)  # over the run budget
+    assert scheduler.try_acquire(400)
+    assert clock.sleeps == []
+    assert scheduler.reserved_tokens == 800
+    assert scheduler.rejected == 0
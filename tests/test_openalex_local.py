@@ -0,0 +1,94 @@
+import gzip
+import json
+import sqlite3
+
+import pytest
+
+from openalex_local import index_stats, ingest_snapshot, search_local_papers, search_works
+
+
+def work(number: int, title: str, year: int, journal: str = "", citations: int = 0, concept: str = "C1") -> dict:
+    return {
+        "id": f"https://openalex.org/W{number}",
+        "doi": f"https://doi.org/10.1/{number}",
+        "title": title,
+        "abstract_inverted_index": {"We": [0], "study": [1], "qubits.": [2]},
+        "publication_year": year,
+        "cited_by_count": citations,
+        "primary_location": {"source": {"display_name": journal} if journal else None},
+        "concepts": [{"id": f"https://openalex.org/{concept}", "display_name": "Physics"}],
+    }
+
+
+WORKS = [
+    work(1, "Surface code decoding with neural networks", 2021, "Physical Review Letters", 40),
+    work(2, "Quantum error correction below threshold", 2023, "Nature", 300),
+    work(3, "Surface code experiments on superconducting qubits", 2019, "Nature Physics", 10),
+    work(4, "Graph neural networks for molecules", 2022, "Nature Communications", 5, concept="C2"),
+    work(5, "Surface code thresholds", 2024, "", 2),
+]
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    snapshot = tmp_path / "works" / "updated_date=2024-01-01"
+    snapshot.mkdir(parents=True)
+    with gzip.open(snapshot / "part_000.gz", "wt", encoding="utf-8") as f:
+        for entry in WORKS[:3]:
+            f.write(json.dumps(entry) + "\n")
+        f.write("\n")
+    with gzip.open(snapshot / "part_001.gz", "wt", encoding="utf-8") as f:
+        for entry in WORKS[3:] + [{"id": "https://openalex.org/W6", "title": None}]:
+            f.write(json.dumps(entry) + "\n")
+    path = str(tmp_path / "openalex_local.sqlite3")
+    stats = ingest_snapshot([str(tmp_path / "works")], concepts=["C1"], start_year=2019, db_path=path)
+    assert (stats.files, stats.works_read, stats.works_indexed) == (2, 6, 4)
+    return path
+
+
+def ids(papers: list[dict]) -> list[str]:
+    return [paper["id"].rsplit("/", 1)[-1] for paper in papers]
+
+
+def test_ingested_works_are_found_by_full_text_search(db_path):
+    papers = search_works("surface code", 2018, 2024, db_path=db_path)
+    assert sorted(ids(papers)) == ["W1", "W3", "W5"]
+    paper = next(paper for paper in papers if paper["id"].endswith("W1"))
+    assert paper == {
+        "id": "https://openalex.org/W1", "doi": "https://doi.org/10.1/1",
+        "title": "Surface code decoding with neural networks", "abstract": "We study qubits.",
+        "publication_year": 2021, "cited_by_count": 40, "journal": "Physical Review Letters",
+    }
+    # Stemming matches "qubit" in abstracts; the concept filter dropped W4
+    assert sorted(ids(search_works("qubit", 2018, 2024, db_path=db_path))) == ["W1", "W2", "W3", "W5"]
+    assert search_works("graph neural networks", 2018, 2024, db_path=db_path) == []
+
+
+def test_year_bounds_are_inclusive(db_path):
+    assert sorted(ids(search_works("surface code", 2019, 2021, db_path=db_path))) == ["W1", "W3"]
+    assert ids(search_works("surface code", 2024, 2024, db_path=db_path)) == ["W5"]
+    assert search_works("surface code", 2025, 2030, db_path=db_path) == []
+
+
+def test_journal_filter_matches_flexibly_and_skips_unknown_journals(db_path):
+    assert ids(search_works("surface code", 2018, 2024, journal="Physical Review Letters", db_path=db_path)) == ["W1"]
+    # "Nature" also matches "Nature Physics" (substring), never a paper without a journal
+    assert ids(search_works("surface code", 2018, 2024, journal="Nature", db_path=db_path)) == ["W3"]
+    papers = search_local_papers("qubit", 2018, 2024, journals=["Nature", "Physical Review Letters"],
+                                 max_papers=10, db_path=db_path)
+    assert sorted(ids(papers)) == ["W1", "W2", "W3"]
+
+
+def test_index_stats_are_stored_at_ingest(db_path, tmp_path):
+    assert index_stats(db_path) == {"works": 4, "min_year": 2019, "max_year": 2024}
+    # Read from the stored counts, not by counting the works table
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("DELETE FROM works WHERE publication_year < 2024")
+    assert index_stats(db_path)["works"] == 4
+    assert index_stats(str(tmp_path / "missing.sqlite3")) == {"works": 0, "min_year": None, "max_year": None}
+
+
+def test_index_stats_of_an_older_index_are_computed_once(db_path):
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("DELETE FROM works_stats")
+    assert index_stats(db_path) == {"works": 4, "min_year": 2019, "max_year": 2024}
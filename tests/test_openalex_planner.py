@@ -0,0 +1,62 @@
+from hypothesis import given, settings
+from hypothesis import strategies as st
+
+from openalex_planner import allocate_budget, plan_partitions
+
+
+def test_even_split():
+    assert allocate_budget(300, [500, 500, 500]) == [100, 100, 100]
+
+
+def test_small_partitions_pass_their_share_on():
+    assert allocate_budget(300, [20, 500, 500]) == [20, 140, 140]
+    assert allocate_budget(300, [20, 50, 500]) == [20, 50, 230]
+
+
+def test_budget_above_total_capacity_takes_everything():
+    assert allocate_budget(1000, [20, 0, 30]) == [20, 0, 30]
+    assert allocate_budget(10, []) == []
+    assert allocate_budget(0, [5, 5]) == [0, 0]
+
+
+def test_remainder_goes_to_the_partitions_with_most_matches():
+    # 10 over four partitions: 2 each, the 2 left over go to the largest partitions, not the earliest
+    assert allocate_budget(10, [100, 400, 300, 200]) == [2, 3, 3, 2]
+    # Ties keep chronological order
+    assert allocate_budget(5, [50, 50, 50]) == [2, 2, 1]
+    # Fewer items than partitions
+    assert allocate_budget(2, [10, 30, 20]) == [0, 1, 1]
+
+
+@settings(max_examples=300, deadline=None)
+@given(st.integers(min_value=0, max_value=2000), st.lists(st.integers(min_value=0, max_value=500), max_size=12))
+def test_allocation_is_capped_complete_and_even(budget, capacities):
+    allocation = allocate_budget(budget, capacities)
+    assert sum(allocation) == min(budget, sum(capacities))
+    assert all(0 <= share <= capacity for share, capacity in zip(allocation, capacities))
+    # Partitions below capacity differ by at most one item
+    unfilled = [share for share, capacity in zip(allocation, capacities) if share < capacity]
+    if unfilled:
+        assert max(unfilled) - min(unfilled) <= 1
+        # ... and no filled partition got more than an unfilled one
+        assert all(share <= max(unfilled) for share in allocation)
+
+
+def test_year_partitions():
+    partitions = plan_partitions(2019, 2021)
+    assert [partition.label for partition in partitions] == ["2019", "2020", "2021"]
+    assert partitions[0].filter == "publication_year:2019"
+    assert all(partition.works == [] and partition.next_cursor is None for partition in partitions)
+
+
+def test_quarter_partitions():
+    partitions = plan_partitions(2020, 2021, mode="quarter")
+    assert [partition.label for partition in partitions] == [
+        "2020Q1", "2020Q2", "2020Q3", "2020Q4", "2021Q1", "2021Q2", "2021Q3", "2021Q4"]
+    assert partitions[1].filter == "from_publication_date:2020-04-01,to_publication_date:2020-06-30"
+    assert partitions[-1].filter == "from_publication_date:2021-10-01,to_publication_date:2021-12-31"
+
+
+def test_single_year_range():
+    assert [partition.label for partition in plan_partitions(2020, 2020)] == ["2020"]
+    assert plan_partitions(2021, 2020) == []
@@ -0,0 +1,84 @@
+import json
+
+import pytest
+from hypothesis import given, settings
+from hypothesis import strategies as st
+
+from openalex_stream import ijson_available, iter_results
+
+
+BACKENDS = ["chunked", pytest.param("ijson", marks=pytest.mark.skipif(not ijson_available(),
+                                                                      reason="ijson not installed"))]
+
+PAGE = {
+    "meta": {"count": 1234, "db_response_time_ms": 27, "page": None, "per_page": 2, "next_cursor": "IlsxMDAuMCwgMTJd"},
+    "results": [
+        {"id": "https://openalex.org/W1", "title": "Quantum \"error\" correction — a review 量子",
+         "publication_year": 2021, "cited_by_count": 0, "relevance_score": 1.5e3, "fwci": -0.25,
+         "abstract_inverted_index": {"Surface": [0], "codes\\": [1, 7], "été": [2]},
+         "primary_location": {"source": {"display_name": "Nature"}, "is_oa": True, "license": None}},
+        {"id": "https://openalex.org/W2", "title": "", "relevance_score": 12.0, "authorships": [],
+         "emoji": "\U0001F52C"},
+    ],
+    "group_by": [],
+    "took": 0.125,
+}
+
+
+def decode(chunks: list[bytes], backend: str) -> tuple[list, dict]:
+    fields = {}
+    results = list(iter_results(chunks, fields, backend=backend))
+    return results, fields
+
+
+def split(body: bytes, cuts: list[int]) -> list[bytes]:
+    cuts = sorted({min(cut, len(body)) for cut in cuts})
+    return [body[start:end] for start, end in zip([0] + cuts, cuts + [len(body)])]
+
+
+def expected(body: bytes) -> tuple[list, dict]:
+    page = json.loads(body)
+    return page.pop("results", []), page
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize("indent", [None, 2])
+def test_every_two_chunk_split_matches_json_loads(backend, indent):
+    # Cuts land inside keys, strings, escapes, multi-byte UTF-8 characters and numbers
+    body = json.dumps(PAGE, indent=indent, ensure_ascii=False).encode("utf-8")
+    for cut in range(1, len(body)):
+        assert decode(split(body, [cut]), backend) == expected(body), f"split at byte {cut}"
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_one_byte_chunks_match_json_loads(backend):
+    body = json.dumps(PAGE, ensure_ascii=True).encode("utf-8")
+    assert decode([body[i:i + 1] for i in range(len(body))], backend) == expected(body)
+
+
+@pytest.mark.parametrize("body", [b'{}', b'{"results": []}', b' {"meta": {"count": 0}, "results" : [ ] } '])
+def test_pages_without_results(body):
+    assert decode([body], "chunked") == expected(body)
+
+
+@pytest.mark.parametrize("body", [b'{"results": [{"id": 1}', b'{"results": [1 2]}', b'{"meta": 1.5e'])
+def test_truncated_or_malformed_pages_raise(body):
+    with pytest.raises(ValueError):
+        decode([body], "chunked")
+
+
+scalars = st.one_of(
+    st.none(), st.booleans(), st.integers(min_value=-10**12, max_value=10**12),
+    st.floats(allow_nan=False, allow_infinity=False), st.text(max_size=12),
+)
+values = st.recursive(scalars, lambda children: st.one_of(
+    st.lists(children, max_size=4), st.dictionaries(st.text(max_size=6), children, max_size=4)), max_leaves=12)
+
+
+@settings(max_examples=200, deadline=None)
+@given(st.lists(values, max_size=5), st.dictionaries(st.text(max_size=6).filter(lambda key: key != "results"),
+                                                     values, max_size=3),
+       st.lists(st.integers(min_value=1, max_value=400), max_size=8), st.booleans())
+def test_random_pages_and_chunkings_match_json_loads(results, other_fields, cuts, ensure_ascii):
+    body = json.dumps({**other_fields, "results": results}, ensure_ascii=ensure_ascii).encode("utf-8")
+    assert decode(split(body, cuts), "chunked") == expected(body)
@@ -0,0 +1,100 @@
+from hypothesis import given, settings
+from hypothesis import strategies as st
+
+from paper_dedup import deduplicate_papers, find_duplicate_groups, normalize_doi
+
+
+ABSTRACT = ("We present a surface code decoder based on graph neural networks that is trained on "
+            "simulated syndrome data and generalizes to larger code distances. The decoder reaches "
+            "a threshold comparable to minimum weight perfect matching while running in linear time "
+            "on commodity hardware, which makes real-time decoding of superconducting qubits feasible.")
+
+
+def paper(title: str, abstract: str = ABSTRACT, doi: str = None, journal: str = "Nature Physics",
+          cited_by_count: int = 0) -> dict:
+    return {"title": title, "abstract": abstract, "doi": doi, "journal": journal, "cited_by_count": cited_by_count}
+
+
+def test_normalize_doi():
+    assert normalize_doi("https://doi.org/10.1000/ABC.123") == "10.1000/abc.123"
+    assert normalize_doi(" doi:10.1000/abc.123 ") == "10.1000/abc.123"
+    assert normalize_doi("https://dx.doi.org/10.1000/abc.123") == "10.1000/abc.123"
+    assert normalize_doi(None) == ""
+
+
+def test_groups_same_doi_despite_different_text():
+    papers = [
+        paper("Original article", abstract="first text", doi="https://doi.org/10.1000/XYZ"),
+        paper("Unrelated paper", abstract="something else entirely about catalysis", doi="10.1000/other"),
+        paper("Erratum: Original article", abstract="correction of a figure", doi="doi:10.1000/xyz"),
+    ]
+    assert find_duplicate_groups(papers) == {0: [0, 2], 1: [1]}
+
+
+def test_groups_preprint_and_published_version():
+    papers = [
+        paper("Graph neural network decoders for the surface code", journal="arXiv (Cornell University)",
+              cited_by_count=40),
+        paper("Quantum chemistry on noisy hardware", abstract="Variational eigensolvers for small molecules "
+              "evaluated on superconducting devices with error mitigation and symmetry verification."),
+        # Published version: same text, small edits in the title, fewer citations so far
+        paper("Graph Neural Network Decoders for the Surface Code.",
+              abstract=ABSTRACT.replace("commodity hardware", "standard hardware"), cited_by_count=12),
+    ]
+    groups = find_duplicate_groups(papers)
+    # The published version represents the group even though the preprint is cited more
+    assert groups == {2: [0, 2], 1: [1]}
+
+
+def test_representative_is_most_cited_published_version():
+    papers = [
+        paper("Surface code decoding with graph neural networks", cited_by_count=3),
+        paper("Surface code decoding with graph neural networks", cited_by_count=30),
+        paper("Surface code decoding with graph neural networks", journal="", cited_by_count=90),
+    ]
+    assert find_duplicate_groups(papers) == {1: [0, 1, 2]}
+
+
+def test_keeps_different_papers_with_similar_topics():
+    papers = [
+        paper("Graph neural network decoders for the surface code"),
+        paper("Transformer decoders for color codes", abstract="A transformer model decodes color codes "
+              "under circuit-level noise and is compared with belief propagation and union-find decoders."),
+        paper("Untitled", abstract=""),
+        paper("", abstract=""),
+    ]
+    assert find_duplicate_groups(papers) == {0: [0], 1: [1], 2: [2], 3: [3]}
+
+
+def test_deduplicate_papers_keeps_original_order():
+    papers = [
+        paper("A study of qubits", abstract="alpha beta gamma delta epsilon zeta eta theta", doi="10.1/a",
+              journal="arXiv"),
+        paper("Other", abstract="completely different words in this one abstract here", doi="10.1/b"),
+        paper("A study of qubits", abstract="alpha beta gamma delta epsilon zeta eta theta", doi="10.1/a"),
+    ]
+    kept, collapsed = deduplicate_papers(papers)
+    assert kept == [papers[1], papers[2]]
+    assert collapsed == 1
+
+
+words = st.text(alphabet="abcdefghij", min_size=1, max_size=6)
+
+
+@settings(max_examples=50, deadline=None)
+@given(st.lists(st.lists(words, min_size=0, max_size=30).map(" ".join), min_size=0, max_size=12),
+       st.lists(st.integers(min_value=0, max_value=11), max_size=5))
+def test_groups_partition_papers_and_keep_exact_copies_together(abstracts, copied):
+    papers = [paper(f"title {i}", abstract=abstract) for i, abstract in enumerate(abstracts)]
+    copies = [i for i in copied if i < len(papers)]
+    papers += [dict(papers[i]) for i in copies]
+
+    groups = find_duplicate_groups(papers)
+    members = sorted(i for group in groups.values() for i in group)
+    assert members == list(range(len(papers)))
+    for representative, group in groups.items():
+        assert representative in group
+        assert group == sorted(group)
+    group_of = {i: representative for representative, group in groups.items() for i in group}
+    for offset, i in enumerate(copies):
+        assert group_of[i] == group_of[len(abstracts) + offset]
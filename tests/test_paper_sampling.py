@@ -0,0 +1,89 @@
+from collections import Counter
+
+import paper_sampling
+from paper_sampling import MAX_POOL, pool_limit, stratified_sample
+
+
+def make_pool(sizes: dict) -> list[dict]:
+    """Pool with sizes[(year, journal)] records per stratum, citations counting up."""
+    records = []
+    for (year, journal), size in sizes.items():
+        for _ in range(size):
+            records.append({"id": f"W{len(records)}", "publication_year": year, "journal": journal,
+                            "cited_by_count": len(records)})
+    return records
+
+
+def stratum_counts(records: list[dict], indices: list[int]) -> Counter:
+    return Counter((records[i]["publication_year"], records[i]["journal"]) for i in indices)
+
+
+def test_allocation_is_proportional_to_stratum_size():
+    records = make_pool({(2020, "A"): 60, (2020, "B"): 30, (2021, "A"): 10})
+    indices, report = stratified_sample(records, 20)
+    assert stratum_counts(records, indices) == {(2020, "A"): 12, (2020, "B"): 6, (2021, "A"): 2}
+    assert indices == sorted(set(indices))
+    assert report["pool_size"] == 100
+    assert report["sample_size"] == 20
+    assert report["strata"] == 3
+    assert report["years"] == {"2020": [90, 18], "2021": [10, 2]}
+
+
+def test_remainders_go_to_the_largest_fractions():
+    records = make_pool({(2020, "A"): 5, (2020, "B"): 4, (2021, "A"): 1})
+    # Quotas 2.0, 1.6 and 0.4: the single leftover paper goes to the 0.6 fraction
+    indices, _ = stratified_sample(records, 4)
+    assert stratum_counts(records, indices) == {(2020, "A"): 2, (2020, "B"): 2}
+
+
+def test_citation_bands_split_strata():
+    records = make_pool({(2020, "A"): 30})
+    indices, report = stratified_sample(records, 9, citation_bands=3)
+    assert report["strata"] == 3
+    # One third of the sample from each citation tercile
+    assert Counter(i // 10 for i in indices) == {0: 3, 1: 3, 2: 3}
+
+
+def test_same_seed_draws_the_same_sample():
+    records = make_pool({(2020, "A"): 50, (2021, "B"): 50})
+    first, _ = stratified_sample(records, 10, seed=7)
+    assert stratified_sample(records, 10, seed=7)[0] == first
+    assert any(stratified_sample(records, 10, seed=seed)[0] != first for seed in range(8, 12))
+
+
+def test_sample_size_at_least_the_pool_takes_every_record():
+    records = make_pool({(2020, "A"): 4, (2021, "B"): 3})
+    for sample_size in (7, 50):
+        indices, report = stratified_sample(records, sample_size)
+        assert indices == list(range(7))
+        assert report["sample_size"] == 7
+
+
+def test_empty_pool():
+    assert stratified_sample([], 10) == ([], {"pool_size": 0, "sample_size": 0, "strata": 0, "years": {}})
+
+
+def test_pool_is_never_capped_below_the_sample():
+    assert pool_limit(100, 5) == 500
+    assert pool_limit(1000, 5) == MAX_POOL
+    # Large statistical runs keep a pool that still leaves something to sample
+    assert pool_limit(5000, 5) == 5000 * paper_sampling.MIN_POOL_FACTOR
+    assert pool_limit(5000, 2) == 10000
+
+
+def test_clamped_pool_is_reported(monkeypatch):
+    requested = []
+
+    def fake_search(domain, start_year, end_year, limit):
+        requested.append(limit)
+        return make_pool({(2020, "A"): limit})
+
+    monkeypatch.setattr(paper_sampling, "search_works", fake_search)
+    papers, report = paper_sampling.fetch_stratified_sample("qec", 2020, 2020, max_papers=1500, pool_factor=5,
+                                                            source="local")
+    assert requested == [3000]
+    assert len(papers) == 1500
+    assert report["pool_limit"] == 3000
+
+    _, report = paper_sampling.fetch_stratified_sample("qec", 2020, 2020, max_papers=100, source="local")
+    assert "pool_limit" not in report
@@ -0,0 +1,53 @@
+import time
+
+import pytest
+
+import paper_store
+from paper_store import Corpus, load_corpus, save_corpus
+
+
+PAPERS = [
+    {"id": f"W{i}", "doi": "", "title": f"Paper {i}", "abstract": "text", "publication_year": 2020 + i % 3,
+     "cited_by_count": i, "journal": "Physical Review X" if i % 2 else "Nature"}
+    for i in range(5)
+]
+
+
+@pytest.fixture(autouse=True)
+def store_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(paper_store, "STORE_DIR", str(tmp_path))
+
+
+def test_round_trip_keeps_papers_and_metadata():
+    corpus = save_corpus("key", PAPERS, {"domain": "qubits"})
+    assert list(corpus) == PAPERS
+    assert corpus[1] == PAPERS[1]
+    assert corpus[-1] == PAPERS[-1]
+    assert corpus[1:3] == PAPERS[1:3]
+    assert corpus.column("journal") == [paper["journal"] for paper in PAPERS]
+    assert list(corpus.take([4, 0])) == [PAPERS[4], PAPERS[0]]
+    assert corpus.metadata["domain"] == "qubits"
+    with pytest.raises(IndexError):
+        corpus[len(PAPERS)]
+
+
+def test_rows_are_read_in_batches(monkeypatch):
+    monkeypatch.setattr(paper_store, "ITER_BATCH_ROWS", 2)
+    corpus = Corpus.from_papers(PAPERS)
+    assert list(corpus) == PAPERS
+    assert corpus[::2] == PAPERS[::2]
+    assert corpus[3:10] == PAPERS[3:10]
+    assert corpus[4:1] == []
+    assert corpus[-2] == PAPERS[-2]
+    # Rows are built on access, not cached
+    assert corpus[0] is not corpus[0]
+
+
+def test_expired_corpus_is_treated_as_missing():
+    save_corpus("fresh", PAPERS)
+    assert save_corpus("old", PAPERS, {"fetched_at": time.time() - paper_store.CORPUS_TTL_SECONDS - 60}) is not None
+    assert load_corpus("fresh") is not None
+    assert load_corpus("old") is None
+    assert load_corpus("old", max_age_seconds=None) is not None
+    assert load_corpus("missing") is None
+
@@ -0,0 +1,79 @@
+import csv
+import json
+
+import numpy as np
+import pyarrow.parquet as pq
+import pytest
+
+import result_exports
+from result_exports import dense_values, export_path, matrix_entries, sparse_entries
+
+
+KEYWORDS = ["Surface Code", "Qubit", "Decoder", "量子纠错"]
+VALUES = np.array([
+    [0, 3, 1, 0],
+    [3, 0, 0, 2],
+    [1, 0, 0, 0],
+    [0, 2, 0, 0],
+])
+RESULT = {
+    "matrix": {"keywords": KEYWORDS, **sparse_entries(VALUES)},
+    "paper_keywords": {"W1": ["surface code", "Qubit"], "W2": ["Qubit", "量子纠错"]},
+    "keyword_mapping": {"surface code": "Surface Code"},
+    "paper_count": 2,
+}
+
+
+@pytest.fixture(autouse=True)
+def export_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(result_exports, "EXPORT_DIR", str(tmp_path))
+
+
+def test_sparse_entries_round_trip():
+    assert RESULT["matrix"] == {"keywords": KEYWORDS, "rows": [0, 0, 1], "cols": [1, 2, 3], "weights": [3, 1, 2]}
+    assert json.loads(json.dumps(RESULT["matrix"])) == RESULT["matrix"]
+    assert (dense_values(RESULT["matrix"], len(KEYWORDS)) == VALUES).all()
+    # Results stored before matrices were sparse still read the same
+    legacy = {"keywords": KEYWORDS, "values": VALUES.tolist()}
+    assert all((a == b).all() for a, b in zip(matrix_entries(legacy), matrix_entries(RESULT["matrix"])))
+
+
+def test_npz_is_the_symmetric_coo_matrix():
+    with np.load(export_path(RESULT, "npz")) as npz:
+        assert npz["format"] == b"coo"
+        assert list(npz["keywords"]) == KEYWORDS
+        values = np.zeros(tuple(npz["shape"]), dtype=np.int64)
+        values[npz["row"], npz["col"]] = npz["data"]
+    assert (values == VALUES).all()
+
+
+def test_edge_lists_hold_every_pair_once():
+    expected = [("Surface Code", "Qubit", 3), ("Surface Code", "Decoder", 1), ("Qubit", "量子纠错", 2)]
+    table = pq.read_table(export_path(RESULT, "edges_parquet")).to_pydict()
+    assert list(zip(table["source"], table["target"], table["weight"])) == expected
+
+    with open(export_path(RESULT, "edges_csv"), encoding="utf-8-sig", newline="") as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == ["source", "target", "weight"]
+    assert [(source, target, int(weight)) for source, target, weight in rows[1:]] == expected
+
+
+def test_paper_keywords_and_metadata():
+    table = pq.read_table(export_path(RESULT, "paper_keywords")).to_pydict()
+    assert table["paper_id"] == ["W1", "W2"]
+    assert table["merged_keywords"] == [["Surface Code", "Qubit"], ["Qubit", "量子纠错"]]
+
+    with open(export_path(RESULT, "metadata", {"domain": "qubits"}), encoding="utf-8") as f:
+        metadata = json.load(f)
+    assert metadata["params"] == {"domain": "qubits"}
+    assert (metadata["vocabulary_size"], metadata["edge_count"]) == (4, 3)
+    assert "matrix" not in metadata and "paper_keywords" not in metadata
+
+
+def test_exports_are_generated_once(monkeypatch):
+    path = export_path(RESULT, "edges_csv")
+    calls = []
+    monkeypatch.setitem(result_exports.EXPORT_FORMATS, "edges_csv", result_exports.ExportFormat(
+        "edges.csv", "text/csv", "", lambda *args: calls.append(args)))
+    assert export_path(RESULT, "edges_csv") == path
+    assert calls == []
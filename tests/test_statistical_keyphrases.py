@@ -0,0 +1,81 @@
+import numpy as np
+
+import statistical_keyphrases
+from statistical_keyphrases import MIN_DF_CORPUS, extract_keyphrases
+
+
+def test_display_forms_follow_the_surface_tokens():
+    papers = [
+        {"title": "Fast code decoding for surface codes",
+         "abstract": "We study code decoding of surface codes. The surface codes use QEC."},
+        {"title": "Surface codes and QEC", "abstract": "Decoding of codes"},
+    ]
+    keywords = extract_keyphrases(papers)
+    assert "Code Decoding" in keywords[0]
+    assert "Surface Codes" in keywords[0]
+    assert "QEC" in keywords[0]
+    assert not any("Codes Decoding" in phrase for phrases in keywords for phrase in phrases)
+
+
+def test_plurals_are_counted_with_the_singular():
+    papers = [{"title": "Lattice surgery", "abstract": "One lattice."},
+              {"title": "Lattices", "abstract": "Lattice surgery with lattices."}]
+    keywords = extract_keyphrases(papers)
+    # One candidate, shown as its most frequent surface form
+    assert sum(phrase.lower() in ("lattice", "lattices") for phrase in keywords[1]) <= 1
+
+
+def test_generic_terms_are_dropped():
+    papers = [{"title": "Neural networks for lattice surgery",
+               "abstract": "Machine learning and deep learning with a neural network for lattice surgery."}]
+    keywords = extract_keyphrases(papers, top_n=20)[0]
+    lowered = {phrase.lower() for phrase in keywords}
+    assert not lowered & {"neural network", "neural networks", "machine learning", "deep learning"}
+    assert "lattice surgery" in lowered
+
+
+def test_keyphrases_respect_the_word_limit(monkeypatch):
+    # Favour a six-word run, longer than any keyword may be
+    monkeypatch.setattr(statistical_keyphrases, "MAX_NGRAM", 6)
+    monkeypatch.setattr(statistical_keyphrases, "LENGTH_WEIGHTS", np.array([0.0, 0.1, 0.1, 0.1, 0.1, 0.1, 10.0]))
+    papers = [{"title": "adaptive lattice surgery scheduling compiler toolchain",
+               "abstract": "Adaptive lattice surgery scheduling compiler toolchain, 42 x."}]
+    keywords = extract_keyphrases(papers, top_n=10)[0]
+    assert keywords
+    assert all(1 <= len(phrase.split()) <= 5 for phrase in keywords)
+    # Numbers, single characters and punctuation never start or join a phrase
+    assert not any(word in phrase.lower().split() for phrase in keywords for word in ("42", "x"))
+
+
+def test_nested_phrases_are_suppressed():
+    papers = [{"title": "Surface code decoder",
+               "abstract": "A surface code decoder. The surface code decoder runs on hardware."}]
+    keywords = extract_keyphrases(papers)[0]
+    assert keywords[0] == "Surface Code Decoder"
+    assert not {"Surface Code", "Code Decoder", "Surface", "Code", "Decoder"} & set(keywords)
+    assert "Hardware" in keywords
+
+
+def test_document_frequency_cut_in_large_corpora():
+    n_docs = MIN_DF_CORPUS
+    papers = [{"title": f"Quantum topic{i}",
+               "abstract": "Lattice surgery on hardware." if i < 5 else "Magic state distillation."}
+              for i in range(n_docs)]
+    for paper in papers[10:]:
+        paper["abstract"] = "Syndrome extraction circuits."
+    keywords = extract_keyphrases(papers)
+    # In every paper (above MAX_DF_RATIO) or in a single one: dropped
+    assert not any(phrase in ("Quantum", f"Topic{i}") for i, phrases in enumerate(keywords) for phrase in phrases)
+    assert all("Lattice Surgery" in keywords[i] for i in range(5))
+    assert all("Magic State Distillation" in keywords[i] for i in range(5, 10))
+    # Exactly MAX_DF_RATIO of the papers is still kept
+    assert all("Syndrome Extraction Circuits" in keywords[i] for i in range(10, n_docs))
+
+    # Smaller corpora keep candidates of a single paper
+    small = extract_keyphrases(papers[:MIN_DF_CORPUS - 1])
+    assert "Quantum Topic3" in small[3]
+
+
+def test_results_are_aligned_with_papers():
+    assert extract_keyphrases([]) == []
+    assert extract_keyphrases([{"title": "", "abstract": None}, {"title": "the of and"}]) == [[], []]
@@ -0,0 +1,77 @@
+import random
+
+from llm_scheduler import TokenBudget, plan_extraction
+from topk_convergence import TopKConvergenceMonitor
+
+
+def stationary_papers(count: int, seed: int = 0) -> list[list[str]]:
+    """Papers whose keywords follow one fixed, clearly ranked distribution."""
+    rng = random.Random(seed)
+    vocabulary = [f"Keyword {i}" for i in range(40)]
+    weights = [1 / (rank + 1) ** 2 for rank in range(len(vocabulary))]
+    return [rng.choices(vocabulary, weights=weights, k=5) for _ in range(count)]
+
+
+def test_top_k_is_the_most_frequent_keywords():
+    monitor = TopKConvergenceMonitor(k=2)
+    for keywords in [["a", "b"], ["a", "c"], ["a", "c"], ["d"]]:
+        monitor.add(keywords)
+    assert monitor.top_k() == {"a", "c"}
+
+
+def test_converges_on_a_stable_ranking():
+    monitor = TopKConvergenceMonitor(k=5, tolerance=0.2, min_papers=30, check_every=5)
+    papers = stationary_papers(400)
+    for keywords in papers:
+        if monitor.add(keywords):
+            break
+    assert monitor.converged
+    assert 30 <= monitor.converged_at < len(papers)
+    assert monitor.converged_at % 5 == 0
+    assert monitor.stability >= monitor.confidence
+    # Further papers keep reporting convergence without changing when it happened
+    converged_at = monitor.converged_at
+    assert monitor.add(["Keyword 0"])
+    assert monitor.converged_at == converged_at
+
+
+def test_never_stops_before_min_papers():
+    monitor = TopKConvergenceMonitor(k=3, tolerance=0.5, min_papers=100, check_every=1, patience=1)
+    for keywords in stationary_papers(99):
+        assert not monitor.add(keywords)
+    assert not monitor.converged
+
+
+def test_does_not_converge_while_the_top_keywords_change():
+    monitor = TopKConvergenceMonitor(k=5, tolerance=0.0, min_papers=10, check_every=5)
+    # Every 10 papers a new set of keywords dominates the counts
+    for paper in range(300):
+        era = paper // 10
+        assert not monitor.add([f"Topic {era}-{i}" for i in range(5)] * (era + 1))
+    assert monitor.converged_at is None
+
+
+
+def test_early_stop_order_does_not_converge_on_the_head():
+    # The most cited papers share one topic; the rest spread over ten tail keywords
+    rng = random.Random(0)
+    papers = [{"id": f"W{i}", "cited_by_count": 1000 - i} for i in range(400)]
+    head = [f"Head {j}" for j in range(5)]
+    keywords = [head if i < 100 else rng.sample([f"Tail {j}" for j in range(10)], 5) for i in range(400)]
+    estimates = [100] * len(papers)
+
+    def monitor_over(order: list[int]) -> TopKConvergenceMonitor:
+        monitor = TopKConvergenceMonitor(k=5, tolerance=0.0, min_papers=30, check_every=5)
+        for i in order:
+            if monitor.add(keywords[i]):
+                break
+        return monitor
+
+    # In citation order the head's keywords look settled long before the tail is seen
+    by_priority = monitor_over(plan_extraction(papers, estimates, TokenBudget()).selected)
+    assert by_priority.converged and by_priority.top_k() == set(head)
+
+    # The early-stop order samples the whole run, where no top 5 stands out
+    plan = plan_extraction(papers, estimates, TokenBudget(), shuffle_seed=0)
+    assert sorted(plan.selected) == list(range(len(papers)))
+    assert not monitor_over(plan.selected).converged
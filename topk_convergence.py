@@ -0,0 +1,125 @@
+"""
+Convergence monitor for the top-K keyword ranking during extraction.
+
+The heatmap only shows the max_keywords most frequent keywords, and that
+set usually stops changing long before every paper has been extracted.
+The monitor follows the running keyword counts as papers finish and
+declares the ranking converged when both hold:
+
+- Rank stability: the top-K set has changed by at most `tolerance` (as a
+  fraction of K) over the last `patience` checks.
+- Bootstrap confidence: in at least `confidence` of the bootstrap
+  resamples of the papers seen so far, the resampled top-K set overlaps
+  the current one by at least 1 - tolerance.
+
+Both tests assume the papers seen so far are a uniform sample of the run:
+papers must be fed in random order (plan_extraction(shuffle_seed=...)), not
+by citations or recency, or the ranking converges on the head of the list.
+
+Keywords are counted exactly as build_cooccurrence_matrix counts them
+(every occurrence), but before keyword variants are merged: merging needs
+every paper's keywords, so it runs after extraction. With merging enabled,
+variants of one keyword are separate entries here and their combined
+frequency is not seen, so the merged heatmap can rank keywords somewhat
+differently from the ranking that converged.
+"""
+
+import random
+from collections import Counter
+
+
+class TopKConvergenceMonitor:
+    """
+    Tracks keyword frequencies and decides when extraction can stop early.
+    """
+
+    def __init__(self, k: int, tolerance: float = 0.1, min_papers: int = 30, check_every: int = 5,
+                 patience: int = 3, bootstrap_samples: int = 200, confidence: float = 0.9, seed: int = 0):
+        """
+        Args:
+            k: Number of keywords shown (max_keywords)
+            tolerance: Fraction of the top-K set allowed to change (0 = identical sets)
+            min_papers: Never stop before this many papers are extracted
+            check_every: Evaluate convergence after every this many papers
+            patience: Consecutive stable checks required
+            bootstrap_samples: Number of bootstrap resamples per check
+            confidence: Required fraction of resamples within tolerance
+            seed: Seed of the bootstrap resampling
+        """
+        self.k = k
+        self.tolerance = tolerance
+        self.min_papers = min_papers
+        self.check_every = check_every
+        self.patience = patience
+        self.bootstrap_samples = bootstrap_samples
+        self.confidence = confidence
+        self._rng = random.Random(seed)
+        self._papers: list[list[str]] = []
+        self._counts = Counter()
+        self._history: list[set[str]] = []
+        self.stability = 0.0       # Bootstrap confidence of the last check
+        self.converged_at = None   # Number of papers when convergence was reached
+        self.saved_calls = 0       # LLM requests not sent after convergence (set by the extraction loop)
+
+    def top_k(self) -> set[str]:
+        """Current top-K keywords (same ordering as build_cooccurrence_matrix)."""
+        ranked = sorted(self._counts.items(), key=lambda item: item[1], reverse=True)
+        return {keyword for keyword, _ in ranked[:self.k]}
+
+    def _overlap(self, first: set[str], second: set[str]) -> float:
+        return len(first & second) / max(len(first), 1)
+
+    def _bootstrap_stability(self, current: set[str]) -> float:
+        """Fraction of bootstrap resamples whose top-K is within tolerance of current."""
+        import numpy as np
+
+        vocabulary = {keyword: index for index, keyword in enumerate(self._counts)}
+        counts = np.zeros((len(self._papers), len(vocabulary)), dtype=np.float32)
+        for row, keywords in enumerate(self._papers):
+            for keyword in keywords:
+                counts[row, vocabulary[keyword]] += 1
+
+        n = len(self._papers)
+        rng = np.random.default_rng(self._rng.randrange(2**32))
+        weights = rng.multinomial(n, np.full(n, 1 / n), size=self.bootstrap_samples).astype(np.float32)
+        resampled = weights @ counts
+        # Columns of the k largest counts in every resample
+        top_columns = np.argpartition(-resampled, self.k - 1, axis=1)[:, :self.k]
+        current_columns = np.zeros(len(vocabulary), dtype=bool)
+        current_columns[[vocabulary[keyword] for keyword in current]] = True
+        overlaps = current_columns[top_columns].sum(axis=1) / self.k
+        return float(np.mean(overlaps >= 1 - self.tolerance))
+
+    def add(self, keywords: list[str]) -> bool:
+        """
+        Record the keywords of one extracted paper.
+
+        Returns:
+            True once the top-K ranking has converged
+        """
+        self._papers.append(list(keywords))
+        self._counts.update(keywords)
+        if self.converged_at is not None:
+            return True
+        if len(self._papers) % self.check_every != 0:
+            return False
+
+        current = self.top_k()
+        self._history.append(current)
+        if len(self._papers) < self.min_papers or len(self._counts) < self.k:
+            return False
+        recent = self._history[-(self.patience + 1):]
+        if len(recent) <= self.patience:
+            return False
+        if any(self._overlap(current, previous) < 1 - self.tolerance for previous in recent[:-1]):
+            return False
+
+        self.stability = self._bootstrap_stability(current)
+        if self.stability >= self.confidence:
+            self.converged_at = len(self._papers)
+            return True
+        return False
+
+    @property
+    def converged(self) -> bool:
+        return self.converged_at is not None